@@ -1,3 +1,4 @@
+from scripts.timing import mark # First import, so marks are relative to process start
 import os
 import shutil
 import json
@@ -7,15 +8,8 @@ import subprocess
 import re
 import time # For potential delays if needed
 import gc
-# ✅ Preload LLM in main thread
-GLOBAL_QWEN_LLM = None
-try:
-    print("🔄 Initializing Qwen LLM in main thread...")
-    from scripts.llama_cpp_custom import get_qllm
-    GLOBAL_QWEN_LLM = get_qllm()
-    print("✅ Qwen LLM initialized successfully!")
-except Exception as e:
-    print(f"⚠️ Warning: Qwen LLM could not be initialized. Continuing without it. Error: {e}")
+# The local Qwen model is no longer loaded here; FileOrganizerApp loads it on a
+# background thread after the window is shown, and only if AI analysis is enabled.
 
 from dotenv import load_dotenv
 from pathlib import Path
@@ -45,6 +39,8 @@ load_dotenv()
 
 # --- Main Application Window ---
 from pyQT.Main import FileOrganizerApp
+from scripts.log_setup import setup_logging
+mark("imports done")
 
 
 # --- Main Execution ---
@@ -74,9 +70,11 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # --- Run the PyQt Application ---
+    setup_logging() # Console and run logs are written on a background thread
     app = QApplication(sys.argv)
     # You might want to apply a style for better consistency:
     # app.setStyle("Fusion")
     main_window = FileOrganizerApp()
     main_window.show()
+    mark("window shown")
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Microbenchmark: per-file cost of extension classification.
+
+Compares the legacy FileOrganizerApp._get_category (category dict rebuilt on
+every call + linear `ext in list` scan) with the precompiled ExtensionIndex.
+
+    python -m benchmarks.bench_categories --files 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.file_categories import DEFAULT_CATEGORIES, ExtensionIndex
+
+
+def legacy_get_category(ext):
+    """Verbatim copy of the pre-index FileOrganizerApp._get_category."""
+    categories = {
+        'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg', '.heic', '.heif', '.ico'],
+        'Documents': ['.pdf', '.docx', '.doc', '.txt', '.rtf', '.odt', '.wpd', '.md'],
+        'Spreadsheets': ['.xlsx', '.xls', '.csv', '.ods'],
+        'Presentations': ['.pptx', '.ppt', '.odp'],
+        'Videos': ['.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm', '.mpeg', '.mpg'],
+        'Audio': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma'],
+        'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.iso'],
+        'Code': ['.py', '.js', '.html', '.css', '.java', '.cpp', '.c', '.h', '.cs', '.php', '.rb', '.json', '.xml', '.yaml', '.sh', '.bat'],
+        'Executables': ['.exe', '.msi', '.app', '.dmg', '.deb', '.rpm', '.jar'],
+        'Fonts': ['.ttf', '.otf', '.woff', '.woff2'],
+        'Databases': ['.sqlite', '.db', '.sql', '.mdb', '.accdb'],
+    }
+    for category, extensions in categories.items():
+        if ext in extensions:
+            return category
+    return 'Others'
+
+
+def legacy_analyze(names):
+    """The legacy _analyze_by_extension loop, minus the directory listing."""
+    result = {}
+    for item in names:
+        ext = os.path.splitext(item)[1].lower()
+        category = legacy_get_category(ext) if ext else 'No Extension'
+        result.setdefault(category, []).append(item)
+    return result
+
+
+def make_names(count, seed=0):
+    rng = random.Random(seed)
+    extensions = [ext for exts in DEFAULT_CATEGORIES.values() for ext in exts]
+    extensions += ['.unknown', '.part', '.tmp', '']
+    return [f"file_{i}{rng.choice(extensions)}" for i in range(count)]
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extension classification microbenchmark")
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    names = make_names(args.files)
+    index = ExtensionIndex(DEFAULT_CATEGORIES)
+
+    legacy = min(time_call(legacy_analyze, names) for _ in range(args.repeat))
+    indexed = min(time_call(index.classify_many, names) for _ in range(args.repeat))
+
+    per_file = lambda seconds: seconds / args.files * 1e9
+    print(f"files: {args.files:,}")
+    print(f"legacy _get_category loop : {legacy:8.3f} s  ({per_file(legacy):7.1f} ns/file)")
+    print(f"ExtensionIndex.classify_many: {indexed:8.3f} s  ({per_file(indexed):7.1f} ns/file)")
+    print(f"speedup: {legacy / indexed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
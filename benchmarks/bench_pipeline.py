@@ -0,0 +1,319 @@
+"""
+End-to-end benchmark: analyze, organize and undo a synthetic folder with a stub LLM.
+
+Builds a folder of N empty files with real-world names (benchmarks.synthetic_tree)
+on tmpfs. It then runs the same steps as AnalysisWorker and OrganizeWorker,
+timing each stage:
+
+    scan      FolderSnapshot.scan
+    classify  extension categories (classify_many)
+    chunk     template collapse (NameClusters) + token-budgeted plan_chunks
+    llm       rendered prompts through cached_invoke + dispatch to FakeLLM
+    merge     StructureTree merge of chunk answers + cluster expansion
+    validate  validate_structure against the snapshot
+    plan      compile_move_plan
+    move      execute_move_plan with a MoveJournal
+    undo      undo_run from the journal
+
+The LLM is benchmarks.fake_llm.FakeLLM. Its answers are deterministic, and
+its latency, prefill rate and decode rate are set on the command line, so
+runs can be compared. The LLM response cache is off. Results are written to
+benchmark-results/pipeline-<time>.json (layout below). ``--baseline``
+compares them with an earlier file and flags stages that got slower.
+
+    python -m benchmarks.bench_pipeline --files 1000 10000 100000
+    python -m benchmarks.bench_pipeline --files 10000 --latency 0.2 --token-rate 60 --baseline latest
+
+Results file (schema_version 1):
+    {"schema": "organizahh-pipeline-benchmark", "schema_version": 1, "created": ISO time,
+     "environment": {"python", "platform", "cpu_count", "git_commit", "tmpfs"},
+     "runs": [{"params": {"files", "seed", "subdirs", "llm": {...}},
+               "stages": {"scan": {"seconds", "items", "per_second"}, ...},
+               "totals": {"seconds", "labels", "chunks", "llm_calls", "tokens_in", "tokens_out",
+                          "moved", "move_errors", "undo_errors", "coverage", "peak_rss_mb"}}]}
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["ORGANIZAHH_LLM_CACHE"] = "0" # Every chunk must reach the stub, and no user cache is touched
+
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.synthetic_tree import create_tree, generate_names, nest_names, remove_tree, tmpfs_dir
+from scripts.file_categories import classify_many
+from scripts.folder_snapshot import FolderSnapshot
+from scripts.llm_cache import cached_invoke
+from scripts.llm_dispatch import dispatch, llm_concurrency
+from scripts.move_journal import MoveJournal, read_run, undo_run
+from scripts.move_plan import compile_move_plan, execute_move_plan
+from scripts.name_templates import NameClusters
+from scripts.prompt_templates import prompt_template_local, static_prefix
+from scripts.structure_tree import StructureTree
+from scripts.structure_validation import validate_structure
+from scripts.token_budget import budget_for, plan_chunks
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmark-results")
+SCHEMA = "organizahh-pipeline-benchmark"
+SCHEMA_VERSION = 1
+STAGES = ("scan", "classify", "chunk", "llm", "merge", "validate", "plan", "move", "undo")
+
+# Stands in for JsonOutputParser's instructions (same role in the prompt, no LangChain needed)
+FORMAT_INSTRUCTIONS = "The output should be formatted as a JSON object mapping folder names to subfolders or file lists."
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, items=0):
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self.stages[name] = {
+            "seconds": round(seconds, 6),
+            "items": items,
+            "per_second": round(items / seconds, 1) if items and seconds > 0 else None,
+        }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1) # bytes on macOS, KB elsewhere
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_pipeline(count, llm, seed=0, subdirs=0):
+    """Build a synthetic folder of ``count`` files and run every stage on it; returns one "runs" entry."""
+    names = nest_names(generate_names(count, seed), subdirs, seed)
+    work = tmpfs_dir()
+    root = os.path.join(work, "tree")
+    os.makedirs(root)
+    timer = StageTimer()
+    try:
+        create_tree(names, root)
+
+        with timer.stage("scan", count):
+            snapshot = FolderSnapshot.scan(root, recursive=subdirs > 0)
+
+        with timer.stage("classify", count):
+            analysis = classify_many(snapshot.files)
+            file_categories = {name: category for category, members in analysis.items() for name in members}
+
+        with timer.stage("chunk", count):
+            clusters = NameClusters(snapshot.files)
+            budget = budget_for(llm)
+            overhead = budget.count(prompt_template_local.format(format_instructions=FORMAT_INSTRUCTIONS,
+                                                                 files_chunk=""))
+            chunks = plan_chunks(clusters.labels, budget, prompt_overhead=overhead)
+
+        llm.prime_prefix(static_prefix(prompt_template_local, format_instructions=FORMAT_INSTRUCTIONS))
+
+        def process_chunk(chunk):
+            prompt = prompt_template_local.format(format_instructions=FORMAT_INSTRUCTIONS,
+                                                  files_chunk=json.dumps(chunk, indent=2))
+            return cached_invoke(llm, prompt, parse=json.loads)
+
+        with timer.stage("llm", len(chunks)):
+            results = dispatch(chunks, process_chunk, max_workers=llm_concurrency(False, llm),
+                               weight=lambda chunk: sum(len(name) for name in chunk))
+        failed = [res.error for res in results if res.error is not None]
+        if failed:
+            raise RuntimeError(f"{len(failed)} chunk(s) failed, first: {failed[0]!r}")
+
+        with timer.stage("merge", len(chunks)):
+            tree = StructureTree()
+            for res in results:
+                tree.merge(res.value)
+            structure = clusters.expand_structure(tree.to_structure())
+
+        with timer.stage("validate", count):
+            structure, report = validate_structure(structure, snapshot.files, file_categories)
+
+        with timer.stage("plan", count):
+            plan = compile_move_plan(root, structure, set(snapshot.files))
+
+        with timer.stage("move", len(plan.moves)):
+            journal = MoveJournal.create(root, directory=os.path.join(work, "journal"))
+            moved = execute_move_plan(plan, journal=journal)
+            journal.commit()
+
+        with timer.stage("undo", len(moved.moved)):
+            undone = undo_run(read_run(journal.path))
+    finally:
+        remove_tree(work)
+
+    return {
+        "params": {"files": count, "seed": seed, "subdirs": subdirs, "llm": llm.describe()},
+        "stages": timer.stages,
+        "totals": {
+            "seconds": round(sum(stage["seconds"] for stage in timer.stages.values()), 6),
+            "labels": len(clusters.labels),
+            "chunks": len(chunks),
+            "llm_calls": llm.calls,
+            "tokens_in": llm.tokens_in,
+            "tokens_out": llm.tokens_out,
+            "moved": len(moved.moved),
+            "move_errors": len(moved.errors),
+            "undo_errors": len(undone.errors),
+            "coverage": round(report.coverage, 4),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+    }
+
+
+def make_results(runs):
+    return {
+        "schema": SCHEMA,
+        "schema_version": SCHEMA_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": git_commit(),
+            "tmpfs": os.path.isdir("/dev/shm"), # Trees are built in /dev/shm when it exists
+        },
+        "runs": runs,
+    }
+
+
+def save_results(results, directory=RESULTS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"pipeline-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("schema") != SCHEMA:
+        raise ValueError(f"{path} is not a pipeline benchmark result")
+    if results.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{path} has schema_version {results.get('schema_version')}, expected {SCHEMA_VERSION}")
+    return results
+
+
+def latest_results(directory=RESULTS_DIR, exclude=None):
+    paths = sorted(path for path in glob.glob(os.path.join(directory, "pipeline-*.json")) if path != exclude)
+    return paths[-1] if paths else None
+
+
+def _run_key(run):
+    params = run["params"]
+    return params["files"], params["seed"], params["subdirs"], json.dumps(params["llm"], sort_keys=True)
+
+
+def compare(current, baseline, tolerance=0.10, min_seconds=0.005):
+    """Per-stage (files, stage, baseline s, current s, ratio, regressed) rows for runs with equal params.
+
+    A stage regressed when it is more than ``tolerance`` slower and by more
+    than ``min_seconds`` (tiny stages are all noise).
+    """
+    base_runs = {_run_key(run): run for run in baseline["runs"]}
+    rows = []
+    for run in current["runs"]:
+        base = base_runs.get(_run_key(run))
+        if base is None:
+            continue
+        for stage in STAGES:
+            if stage not in run["stages"] or stage not in base["stages"]:
+                continue
+            now, before = run["stages"][stage]["seconds"], base["stages"][stage]["seconds"]
+            ratio = now / before if before > 0 else None
+            regressed = ratio is not None and ratio > 1 + tolerance and now - before > min_seconds
+            rows.append((run["params"]["files"], stage, before, now, ratio, regressed))
+    return rows
+
+
+def print_run(run):
+    print(f"\n{run['params']['files']:,} files ({run['totals']['labels']:,} labels, {run['totals']['chunks']} chunks)")
+    for stage in STAGES:
+        entry = run["stages"][stage]
+        rate = f"{entry['per_second']:>14,.0f}/s" if entry["per_second"] else " " * 16
+        print(f"  {stage:<9} {entry['seconds']:>10.4f} s {rate}  ({entry['items']:,} items)")
+    totals = run["totals"]
+    print(f"  {'total':<9} {totals['seconds']:>10.4f} s   coverage {totals['coverage']:.1%}, "
+          f"moved {totals['moved']:,}, errors {totals['move_errors'] + totals['undo_errors']}")
+
+
+def print_comparison(rows):
+    if not rows:
+        print("\nNo runs with matching parameters in the baseline.")
+        return
+    print(f"\n{'files':>9} {'stage':<9} {'baseline':>10} {'current':>10} {'change':>8}")
+    for files, stage, before, now, ratio, regressed in rows:
+        change = f"{ratio - 1:+.0%}" if ratio is not None else "n/a"
+        print(f"{files:>9,} {stage:<9} {before:>10.4f} {now:>10.4f} {change:>8}{'  REGRESSED' if regressed else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, nargs="+", default=[10_000], help="Folder sizes to run (1k to 1M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--subdirs", type=int, default=0, help="Spread files over this many nested folders")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub LLM seconds per call")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="Stub LLM output tokens/s (0 = instant)")
+    parser.add_argument("--prompt-rate", type=float, default=0.0, help="Stub LLM prefill tokens/s (0 = instant)")
+    parser.add_argument("--context", type=int, default=8192, help="Stub LLM context window")
+    parser.add_argument("--max-tokens", type=int, default=2048, help="Stub LLM output limit")
+    parser.add_argument("--concurrency", type=int, default=4, help="Stub LLM parallel slots")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of names the stub leaves out")
+    parser.add_argument("--baseline", help="Earlier results file to compare with, or 'latest'")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Slowdown ratio flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on a regression")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    runs = []
+    for count in args.files:
+        llm = FakeLLM(latency=args.latency, token_rate=args.token_rate, prompt_rate=args.prompt_rate,
+                      context_window=args.context, max_tokens=args.max_tokens,
+                      max_concurrency=args.concurrency, drop_rate=args.drop_rate)
+        run = run_pipeline(count, llm, seed=args.seed, subdirs=args.subdirs)
+        print_run(run)
+        runs.append(run)
+    results = make_results(runs)
+
+    path = None
+    if not args.no_save:
+        path = save_results(results, args.output_dir)
+        print(f"\nResults written to {path}")
+
+    if args.baseline:
+        baseline_path = latest_results(args.output_dir, exclude=path) if args.baseline == "latest" else args.baseline
+        if baseline_path is None:
+            print("\nNo earlier results to compare with.")
+            return
+        print(f"\nCompared with {baseline_path}:")
+        rows = compare(results, load_results(baseline_path), tolerance=args.tolerance)
+        print_comparison(rows)
+        if args.fail_on_regression and any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: prompt-eval time per chunk with and without KV-cache prefix reuse.
+
+Runs the local organisation prompt (prompt_template_local) over synthetic
+file chunks on MyQwenLLM, generating a single token per call so the timing
+is dominated by prompt evaluation. Three modes:
+
+  full prompt eval   every call evaluates the whole prompt (prefix_reuse=False)
+  llama.cpp implicit no primed prefix; llama.cpp keeps whatever the previous
+                     call left in the KV cache
+  primed snapshot    prime_prefix(): the shared head is restored from a snapshot
+
+With --interleave an unrelated prompt runs between chunks (as happens with the
+agent, or with several clients on one inference-server slot), which throws
+away llama.cpp's implicit reuse but not the primed snapshot.
+
+    python -m benchmarks.bench_prefix_reuse --chunks 6 --files-per-chunk 40
+    python -m benchmarks.bench_prefix_reuse --model-path ~/models/qwen2.5-3b-instruct-q4_0.gguf --interleave
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.prompt_templates import prompt_template_local, static_prefix
+
+FORMAT_INSTRUCTIONS = "Return a JSON object that matches the example structure."
+OTHER_PROMPT = "Thought: I should list the files in the folder first.\nAction:"
+
+
+def make_chunks(count, per_chunk, seed=0):
+    rng = random.Random(seed)
+    stems = ["invoice", "holiday", "report", "scan", "draft", "notes", "track", "setup", "backup", "photo"]
+    exts = [".pdf", ".jpg", ".docx", ".mp3", ".zip", ".py", ".xlsx", ".png", ".txt", ".exe"]
+    return [[f"{rng.choice(stems)}_{rng.randint(1, 9999)}{rng.choice(exts)}" for _ in range(per_chunk)]
+            for _ in range(count)]
+
+
+def load_llm(model_path):
+    if model_path:
+        from llama_cpp import Llama
+        from scripts.llama_cpp_custom import MyQwenLLM
+        return MyQwenLLM(model=Llama(model_path=os.path.expanduser(model_path), n_ctx=32768, verbose=False))
+    from scripts.llama_cpp_custom import load_qwen_llm
+    return load_qwen_llm()
+
+
+def run_mode(llm, prompts, prefix, reuse, prime, interleave):
+    llm.prefix_reuse = reuse
+    llm._prefixes.clear()
+    llm._model.reset()
+    if prime:
+        llm.prime_prefix(prefix)
+    timings = []
+    for prompt in prompts:
+        if interleave:
+            llm._call(OTHER_PROMPT, max_tokens=1, structured=False)
+        start = time.perf_counter()
+        llm._call(prompt, max_tokens=1, structured=False)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KV-cache prefix reuse benchmark")
+    parser.add_argument("--chunks", type=int, default=6)
+    parser.add_argument("--files-per-chunk", type=int, default=40)
+    parser.add_argument("--model-path", default=None, help="Local GGUF file (default: download the Qwen model)")
+    parser.add_argument("--interleave", action="store_true", help="Run another prompt between chunks")
+    args = parser.parse_args()
+
+    prompts = [prompt_template_local.format(format_instructions=FORMAT_INSTRUCTIONS,
+                                            files_chunk=json.dumps(chunk, indent=2))
+               for chunk in make_chunks(args.chunks, args.files_per_chunk)]
+    prefix = static_prefix(prompt_template_local, format_instructions=FORMAT_INSTRUCTIONS)
+    llm = load_llm(args.model_path)
+    prefix_tokens = len(llm.tokenize(prefix))
+    prompt_tokens = statistics.mean(len(llm.tokenize(p)) for p in prompts)
+    print(f"chunks: {args.chunks}  prefix: {prefix_tokens} tokens  prompt: {prompt_tokens:.0f} tokens/chunk"
+          f"{'  (interleaved)' if args.interleave else ''}")
+
+    modes = [("full prompt eval", False, False), ("llama.cpp implicit", True, False), ("primed snapshot", True, True)]
+    baseline = None
+    for label, reuse, prime in modes:
+        timings = run_mode(llm, prompts, prefix, reuse, prime, args.interleave)
+        # The first chunk pays for evaluating (and snapshotting) the prefix; report it separately
+        first, rest = timings[0] * 1000, statistics.mean(timings[1:] or timings) * 1000
+        baseline = baseline or rest
+        print(f"{label:<19}: first chunk {first:8.1f} ms   later chunks {rest:8.1f} ms/chunk"
+              f"   ({baseline / rest:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
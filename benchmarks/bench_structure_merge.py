@@ -0,0 +1,85 @@
+"""
+Benchmark: merging per-chunk LLM structures into one.
+
+Compares the legacy FileOrganizerApp._merge_structures (list leaves, dedup by
+``v not in target[key]``) with StructureTree.merge as the number of
+assignments grows. The legacy cost grows quadratically with files per folder;
+the tree stays linear.
+
+    python -m benchmarks.bench_structure_merge --files 100000 --chunk 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.structure_tree import StructureTree
+
+
+def legacy_merge(target, source):
+    """Verbatim logic of the pre-tree FileOrganizerApp._merge_structures (minus the warning print)."""
+    for key, value in source.items():
+        if key in target:
+            if isinstance(target[key], dict) and isinstance(value, dict):
+                legacy_merge(target[key], value)
+            elif isinstance(target[key], list) and isinstance(value, list):
+                target[key].extend(v for v in value if v not in target[key])
+            else:
+                target[key] = value
+        else:
+            target[key] = value
+
+
+def make_chunk_structures(files, chunk, seed=0):
+    rng = random.Random(seed)
+    topics = {f"Topic_{t}": [f"Sub_{s}" for s in range(4)] for t in range(8)}
+    structures = []
+    for start in range(0, files, chunk):
+        structure = {}
+        for i in range(start, min(start + chunk, files)):
+            topic = rng.choice(list(topics))
+            structure.setdefault(topic, {}).setdefault(rng.choice(topics[topic]), []).append(f"file_{i}.dat")
+        structures.append(structure)
+    return structures
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structure merge benchmark")
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=50, help="Files per LLM chunk structure")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time StructureTree (legacy is slow)")
+    args = parser.parse_args()
+
+    structures = make_chunk_structures(args.files, args.chunk)
+
+    def run_tree():
+        tree = StructureTree()
+        for structure in structures:
+            tree.merge(structure)
+        tree.to_structure()
+
+    def run_legacy():
+        merged = {}
+        for structure in structures:
+            legacy_merge(merged, structure)
+
+    print(f"assignments: {args.files:,} in {len(structures):,} chunk structures")
+    tree_time = time_call(run_tree)
+    print(f"StructureTree.merge  : {tree_time:8.3f} s  ({tree_time / args.files * 1e9:7.0f} ns/assignment)")
+    if not args.skip_legacy:
+        legacy_time = time_call(run_legacy)
+        print(f"legacy _merge_structures: {legacy_time:8.3f} s  ({legacy_time / args.files * 1e9:7.0f} ns/assignment)")
+        print(f"speedup: {legacy_time / tree_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
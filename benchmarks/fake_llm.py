@@ -0,0 +1,115 @@
+"""
+Deterministic stand-in LLM for benchmarks.
+
+``FakeLLM`` has the surface the analysis code uses: ``invoke``,
+``context_window``/``max_tokens`` for budget_for, ``max_concurrency`` for
+llm_concurrency, and ``prime_prefix``. It reads the JSON file list at the end
+of a rendered organize prompt and answers with a JSON structure. Each name
+goes to its extension category, then to a subfolder named after the name's
+leading word, so the merge and validation stages see a realistic tree. The
+answer depends only on the names.
+
+Each call sleeps ``latency + prompt tokens / prompt_rate + output tokens /
+token_rate``. That models a server's queueing, prefill and decode time, so
+the chunking and dispatch settings can be measured without a model. Tokens
+in the primed prefix are not counted as prefill, like a llama.cpp prompt
+cache.
+"""
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from scripts.file_categories import classify
+from scripts.token_budget import estimate_tokens
+
+FILES_MARKER = "Here is the list of files to organize:"
+_LABEL_RE = re.compile(r" \[x\d+\]$") # NameClusters' "IMG_0001.jpg [x9412]"
+_WORD_RE = re.compile(r"[A-Za-z]{2,}")
+
+
+def subfolder_for(name: str) -> Optional[str]:
+    """Leading word of a name ("IMG_0042.jpg" -> "Img"), or None for hash/UUID-like names."""
+    match = _WORD_RE.search(os.path.splitext(_LABEL_RE.sub("", name))[0])
+    if match is None or match.start() > 0:
+        return None
+    return match.group(0).capitalize()
+
+
+def files_in_prompt(prompt: str) -> List[str]:
+    """The JSON list of names after FILES_MARKER (the ``{files_chunk}`` of the organize prompts)."""
+    start = prompt.find("[", prompt.rfind(FILES_MARKER) + 1)
+    if start < 0:
+        return []
+    names, _ = json.JSONDecoder().raw_decode(prompt, start)
+    return [name for name in names if isinstance(name, str)]
+
+
+class FakeLLM:
+    """LLM stub with configurable latency, prefill and decode rates (thread-safe)."""
+
+    model = "fake-llm"
+    supports_cancel = False
+
+    def __init__(self, latency: float = 0.0, token_rate: float = 0.0, prompt_rate: float = 0.0,
+                 context_window: int = 8192, max_tokens: int = 2048, max_concurrency: int = 4,
+                 drop_rate: float = 0.0):
+        self.latency = latency # Seconds per call before any token (queueing, network)
+        self.token_rate = token_rate # Output tokens/s; 0 = instant
+        self.prompt_rate = prompt_rate # Prefill tokens/s; 0 = instant
+        self.context_window = context_window
+        self.max_tokens = max_tokens
+        self.max_concurrency = max_concurrency
+        self.drop_rate = drop_rate # Share of names left out of answers, as small models do
+        self._prefix = ""
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.sleep_s = 0.0
+
+    def prime_prefix(self, prefix: str):
+        self._prefix = prefix
+
+    def _dropped(self, name: str) -> bool:
+        return self.drop_rate > 0 and zlib.crc32(name.encode("utf-8")) % 10_000 < self.drop_rate * 10_000
+
+    def organize(self, names: List[str]) -> Dict[str, dict]:
+        structure: Dict[str, dict] = {}
+        for name in names:
+            if self._dropped(name):
+                continue
+            folder = structure.setdefault(classify(_LABEL_RE.sub("", name)), {})
+            folder.setdefault(subfolder_for(name) or "_files_", []).append(name)
+        return structure
+
+    def invoke(self, prompt: str) -> str:
+        text = json.dumps(self.organize(files_in_prompt(prompt)), indent=2, ensure_ascii=False)
+        prompt_tokens = estimate_tokens(prompt)
+        prefill = estimate_tokens(prompt[len(self._prefix):]) if self._prefix and prompt.startswith(self._prefix) \
+            else prompt_tokens
+        output_tokens = estimate_tokens(text)
+        delay = self.latency
+        if self.prompt_rate > 0:
+            delay += prefill / self.prompt_rate
+        if self.token_rate > 0:
+            delay += output_tokens / self.token_rate
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += prompt_tokens
+            self.tokens_out += output_tokens
+            self.sleep_s += delay
+        return text
+
+    def describe(self) -> Dict[str, float]:
+        """Settings, for the results file."""
+        return {
+            "latency_s": self.latency, "token_rate": self.token_rate, "prompt_rate": self.prompt_rate,
+            "context_window": self.context_window, "max_tokens": self.max_tokens,
+            "max_concurrency": self.max_concurrency, "drop_rate": self.drop_rate,
+        }
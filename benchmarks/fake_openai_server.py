@@ -0,0 +1,188 @@
+"""
+Fake OpenAI-compatible completion server for offline provider benchmarks.
+
+Serves /v1/chat/completions and /v1/completions, streaming (server-sent
+events) or not. It answers organize prompts with benchmarks.fake_llm.FakeLLM,
+so the answers are deterministic. The timing mimics a real server:
+
+- the first token arrives after ``latency + prompt tokens / prompt_rate``;
+- each later token arrives ``1 / token_rate`` seconds after the previous one.
+
+Point other_programs/parallel_model_benchmark.py at it (or pass it --fake)
+to check the TTFT, decode-rate and coverage measurements without a model.
+
+    python -m benchmarks.fake_openai_server --port 8080 --latency 0.2 --prompt-rate 2000 --token-rate 40
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeLLM, files_in_prompt
+from scripts.token_budget import estimate_tokens
+
+# Roughly one token per piece: a digit, a run of up to 4 letters, or one other character
+_TOKEN_RE = re.compile(r"\d|[A-Za-z]{1,4}|\s+|[^\dA-Za-z\s]")
+
+
+def split_tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+
+class FakeOpenAIServer:
+    """Threaded HTTP server; ``start()`` runs it in the background and returns its base URL."""
+
+    def __init__(self, llm: Optional[FakeLLM] = None, host: str = "127.0.0.1", port: int = 0,
+                 model: str = "fake-organizer"):
+        self.llm = llm or FakeLLM()
+        self.model = model
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def answer(self, prompt: str) -> str:
+        return json.dumps(self.llm.organize(files_in_prompt(prompt)), indent=2, ensure_ascii=False)
+
+    def first_token_delay(self, prompt: str) -> float:
+        delay = self.llm.latency
+        if self.llm.prompt_rate > 0:
+            delay += estimate_tokens(prompt) / self.llm.prompt_rate
+        return delay
+
+    def token_delay(self) -> float:
+        return 1.0 / self.llm.token_rate if self.llm.token_rate > 0 else 0.0
+
+    def pieces(self, prompt: str, text: str) -> Iterator[str]:
+        """The answer token by token, paced like a real server."""
+        time.sleep(self.first_token_delay(prompt))
+        for i, piece in enumerate(split_tokens(text)):
+            if i:
+                time.sleep(self.token_delay())
+            yield piece
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        chunk = f"data: {data}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n") # One HTTP chunk per event
+        self.wfile.flush()
+
+    def do_GET(self):
+        fake = self.server.fake
+        if self.path.rstrip("/") == "/v1/models":
+            self._send(200, {"object": "list", "data": [{"id": fake.model, "object": "model"}]})
+        else:
+            self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        fake = self.server.fake
+        chat = self.path.rstrip("/") == "/v1/chat/completions"
+        if not chat and self.path.rstrip("/") != "/v1/completions":
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if chat:
+                prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+            else:
+                prompt = str(request.get("prompt", ""))
+        except (ValueError, AttributeError) as e:
+            self._send(400, {"error": {"message": f"bad request: {e}"}})
+            return
+
+        text = fake.answer(prompt)
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": len(split_tokens(text))}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        kind = "chat.completion" if chat else "text_completion"
+
+        if not request.get("stream"):
+            time.sleep(fake.first_token_delay(prompt) + fake.token_delay() * max(0, usage["completion_tokens"] - 1))
+            choice = {"index": 0, "finish_reason": "stop"}
+            choice.update({"message": {"role": "assistant", "content": text}} if chat else {"text": text})
+            self._send(200, {"object": kind, "model": fake.model, "choices": [choice], "usage": usage})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for piece in fake.pieces(prompt, text):
+                choice = {"index": 0, "finish_reason": None}
+                choice.update({"delta": {"content": piece}} if chat else {"text": piece})
+                self._event({"object": f"{kind}.chunk", "model": fake.model, "choices": [choice]})
+            choice = {"index": 0, "finish_reason": "stop"}
+            choice.update({"delta": {}} if chat else {"text": ""})
+            final = {"object": f"{kind}.chunk", "model": fake.model, "choices": [choice]}
+            if (request.get("stream_options") or {}).get("include_usage"):
+                final["usage"] = usage
+            self._event(final)
+            self._event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client went away mid-stream
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output clean
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before prefill starts")
+    parser.add_argument("--prompt-rate", type=float, default=2000.0, help="Prefill tokens/s (0 = instant)")
+    parser.add_argument("--token-rate", type=float, default=40.0, help="Decode tokens/s (0 = instant)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of files left out of answers")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(FakeLLM(latency=args.latency, prompt_rate=args.prompt_rate,
+                                      token_rate=args.token_rate, drop_rate=args.drop_rate),
+                              host=args.host, port=args.port)
+    print(f"Fake OpenAI-compatible server on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Synthetic folders with real-world filename distributions, for benchmarks.
+
+``generate_names(count, seed)`` draws names from weighted families seen in
+real Downloads/Desktop folders: camera and phone photos, screenshots, dated
+invoices and reports, installers, music, videos, source files, hash- and
+UUID-named exports, and "(1)" copies. That gives the template collapse, the
+chunker and the validator realistic work. The same seed always gives the
+same names. ``create_tree`` writes them as empty files, by default on tmpfs
+(/dev/shm) so disk speed does not drown the measurement.
+"""
+import os
+import random
+import shutil
+import tempfile
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+WORDS = [
+    "budget", "project", "plan", "meeting", "notes", "report", "summary", "draft", "final", "invoice",
+    "receipt", "contract", "resume", "cover", "letter", "thesis", "lecture", "slides", "homework", "lab",
+    "trip", "family", "wedding", "birthday", "holiday", "beach", "mountain", "team", "client", "design",
+    "logo", "mockup", "wireframe", "schedule", "timesheet", "payroll", "tax", "insurance", "lease", "manual",
+    "guide", "tutorial", "dataset", "results", "analysis", "model", "training", "backup", "export", "archive",
+]
+ARTISTS = ["Daft Punk", "Adele", "Radiohead", "Nujabes", "A. R. Rahman", "Miles Davis", "Coldplay", "Björk"]
+
+
+def _date(rng: random.Random) -> Tuple[int, int, int]:
+    return rng.randint(2012, 2025), rng.randint(1, 12), rng.randint(1, 28)
+
+
+def _time(rng: random.Random) -> Tuple[int, int, int]:
+    return rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59)
+
+
+def _words(rng: random.Random, n: int, sep: str = "_", title: bool = False) -> str:
+    words = rng.sample(WORDS, n)
+    return sep.join(w.capitalize() for w in words) if title else sep.join(words)
+
+
+def _camera(rng):
+    y, m, d = _date(rng)
+    h, mi, s = _time(rng)
+    return rng.choice([
+        f"IMG_{y}{m:02d}{d:02d}_{h:02d}{mi:02d}{s:02d}.jpg",
+        f"DSC{rng.randint(1, 99999):05d}.JPG",
+        f"PXL_{y}{m:02d}{d:02d}_{h:02d}{mi:02d}{s:02d}{rng.randint(0, 999):03d}.jpg",
+        f"IMG_{rng.randint(1, 9999):04d}.HEIC",
+    ])
+
+
+def _screenshot(rng):
+    y, m, d = _date(rng)
+    h, mi, s = _time(rng)
+    return rng.choice([
+        f"Screenshot {y}-{m:02d}-{d:02d} at {h:02d}.{mi:02d}.{s:02d}.png",
+        f"Screenshot_{y}{m:02d}{d:02d}-{h:02d}{mi:02d}{s:02d}.png",
+    ])
+
+
+def _document(rng):
+    y, m, d = _date(rng)
+    return rng.choice([
+        f"Invoice_{y}_{rng.randint(1, 9999):04d}.pdf",
+        f"{_words(rng, 2)}.pdf",
+        f"{_words(rng, 2, ' ', title=True)} v{rng.randint(1, 9)}.docx",
+        f"report-{y}-{m:02d}-{d:02d}.xlsx",
+        f"{_words(rng, 3, '-')}.pptx",
+        f"{rng.choice(WORDS).capitalize()} {y}.pdf",
+    ])
+
+
+def _installer(rng):
+    return rng.choice([
+        f"{rng.choice(WORDS)}-setup-{rng.randint(1, 12)}.{rng.randint(0, 9)}.{rng.randint(0, 30)}.exe",
+        f"{rng.choice(WORDS)}_{rng.randint(1, 5)}.{rng.randint(0, 20)}.zip",
+        f"{rng.choice(WORDS).capitalize()}-{rng.randint(1, 20)}.{rng.randint(0, 9)}.dmg",
+    ])
+
+
+def _audio(rng):
+    return rng.choice([
+        f"{rng.choice(ARTISTS)} - {_words(rng, 2, ' ', title=True)}.mp3",
+        f"Track {rng.randint(1, 30):02d}.flac",
+        f"Recording {rng.randint(1, 500)}.m4a",
+    ])
+
+
+def _video(rng):
+    y, m, d = _date(rng)
+    h, mi, s = _time(rng)
+    return rng.choice([
+        f"VID_{y}{m:02d}{d:02d}_{h:02d}{mi:02d}{s:02d}.mp4",
+        f"{_words(rng, 2, ' ', title=True)} ({y}).mkv",
+        f"zoom_{y}{m:02d}{d:02d}_{rng.randint(1, 9)}.mp4",
+    ])
+
+
+def _code(rng):
+    return rng.choice([
+        f"{_words(rng, 2)}.py",
+        f"{rng.choice(WORDS)}.{rng.choice(['js', 'ts', 'java', 'cpp', 'go'])}",
+        f"{rng.choice(WORDS)}_config.json",
+        f"{rng.choice(WORDS)}.ipynb",
+    ])
+
+
+def _export(rng):
+    y, m, d = _date(rng)
+    return rng.choice([
+        f"{uuid.UUID(int=rng.getrandbits(128))}.tmp",
+        f"{rng.getrandbits(128):032x}.bin",
+        f"backup-{y}{m:02d}{d:02d}.tar.gz",
+        f"export_{rng.getrandbits(64):016x}.csv",
+    ])
+
+
+def _note(rng):
+    y, m, d = _date(rng)
+    return rng.choice([
+        f"notes {y}-{m:02d}-{d:02d}.txt",
+        f"{rng.choice(WORDS)}.md",
+        f"{_words(rng, 2)}.csv",
+        f"todo ({rng.randint(1, 9)}).txt",
+    ])
+
+
+# (generator, weight): roughly the mix of a long-lived Downloads folder
+FAMILIES = [
+    (_camera, 25), (_screenshot, 8), (_document, 20), (_installer, 5), (_audio, 8),
+    (_video, 6), (_code, 8), (_export, 10), (_note, 10),
+]
+COPY_SUFFIX_RATE = 0.03 # "report (1).pdf"
+
+
+def generate_names(count: int, seed: int = 0) -> List[str]:
+    """``count`` unique, deterministic filenames."""
+    rng = random.Random(seed)
+    generators = [family for family, _ in FAMILIES]
+    weights = [weight for _, weight in FAMILIES]
+    names: List[str] = []
+    seen = set()
+    while len(names) < count:
+        name = rng.choices(generators, weights)[0](rng)
+        if rng.random() < COPY_SUFFIX_RATE:
+            stem, ext = os.path.splitext(name)
+            name = f"{stem} ({rng.randint(1, 3)}){ext}"
+        if name in seen:
+            stem, ext = os.path.splitext(name)
+            k = 2
+            while f"{stem}_{k}{ext}" in seen:
+                k += 1
+            name = f"{stem}_{k}{ext}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def nest_names(names: List[str], subdirs: int, seed: int = 0) -> List[str]:
+    """Spread names over ``subdirs`` nested folders ("d03/d03_1/name"), for recursive scans."""
+    if subdirs <= 0:
+        return list(names)
+    rng = random.Random(seed + 1)
+    folders = [f"d{i:02d}" if i % 2 == 0 else f"d{i - 1:02d}/d{i:02d}_{i % 3}" for i in range(subdirs)]
+    return [f"{rng.choice(folders)}/{name}" if rng.random() < 0.5 else name for name in names]
+
+
+def tmpfs_dir(prefix: str = "organizahh-bench-") -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    return tempfile.mkdtemp(prefix=prefix, dir=base)
+
+
+def create_tree(names: List[str], root: Optional[str] = None) -> str:
+    """Write ``names`` (possibly "/"-separated) as empty files under ``root`` (a new tmpfs dir by default)."""
+    root = root or tmpfs_dir()
+    made = set()
+    for name in names:
+        parent, _ = os.path.split(name)
+        if parent and parent not in made:
+            os.makedirs(os.path.join(root, parent), exist_ok=True)
+            made.add(parent)
+        os.close(os.open(os.path.join(root, name), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+    return root
+
+
+def remove_tree(root: str):
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def family_counts(names: List[str]) -> Dict[str, int]:
+    """Extension histogram, for the results file (shows what the run was made of)."""
+    counts: Dict[str, int] = {}
+    for name in names:
+        ext = os.path.splitext(name)[1].lower() or "(none)"
+        counts[ext] = counts.get(ext, 0) + 1
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
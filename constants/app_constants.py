@@ -1 +1,6 @@
+import os
+
 APP_NAME = "OrganizAh"
+
+# Per-user data directory for config files, caches and indexes
+APP_DATA_DIR = os.getenv("ORGANIZAHH_HOME", os.path.join(os.path.expanduser("~"), ".organizahh"))
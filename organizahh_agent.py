@@ -1,11 +1,10 @@
 import os
 import sys
 import json
-import regex as re
 import subprocess
 import argparse
 import shutil
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
 from langchain.agents import initialize_agent, Tool, AgentType
@@ -13,22 +12,35 @@ from langchain.schema import SystemMessage
 from langchain_google_genai.llms import GoogleGenerativeAI
 from langchain.callbacks import StdOutCallbackHandler
 
+from scripts.walker import DEFAULT_EXCLUDES, iter_files
+from scripts.llm_cache import cached_invoke, parse_json_response
+from scripts.structure_tree import merge_structures
+from scripts.structure_validation import validate_structure
+from scripts.move_plan import compile_move_plan, execute_move_plan
+from scripts.move_journal import MoveJournal, read_run, undo_run
+from scripts.inference_client import get_local_llm
+
 load_dotenv()
 api_key = os.getenv('GOOGLE_API_KEY')
 
 class FileOrganizerAgent:
-    def __init__(self, folder_path: str, user_instructions: str):
+    def __init__(self, folder_path: str, user_instructions: str, recursive: bool = False,
+                 max_depth: Optional[int] = None, exclude: Optional[List[str]] = None, llm=None):
         self.folder_path = folder_path
         self.user_instructions = user_instructions
-        self.llm = GoogleGenerativeAI(model="gemini-2.0-flash-exp", google_api_key=api_key)
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.exclude = exclude if exclude is not None else (list(DEFAULT_EXCLUDES) if recursive else [])
+        self.llm = llm if llm is not None else GoogleGenerativeAI(model="gemini-2.0-flash-exp", google_api_key=api_key)
         self.current_structure = {}
         self.moves_history = []
+        self.last_journal = None  # Journal path of the last move (persistent undo)
         
     def get_files_in_folder(self, dummy_input: str = "") -> str:
         """Tool to list all files in the target folder."""
         try:
-            files = [f for f in os.listdir(self.folder_path) 
-                    if os.path.isfile(os.path.join(self.folder_path, f))]
+            files = [entry.name for entry in iter_files(self.folder_path, recursive=self.recursive,
+                                                         max_depth=self.max_depth, exclude=self.exclude)]
             result = {
                 "status": "success",
                 "files": files,
@@ -75,17 +87,15 @@ Example format:
 }
 """
             
-            response = self.llm.invoke(prompt_text)
-            match = re.search(r"\{.*\}", response, re.DOTALL)
-            
-            if not match:
+            try:
+                # Only answers that parse are cached, so a retry asks the model again
+                structure = cached_invoke(self.llm, prompt_text, parse=parse_json_response)
+            except ValueError as e:
                 return json.dumps({
-                    "status": "error", 
+                    "status": "error",
                     "message": "Failed to extract JSON structure",
-                    "raw_response": response
+                    "raw_response": str(e)
                 })
-            
-            structure = json.loads(match.group(0))
             self.current_structure = structure
             
             return json.dumps({
@@ -133,18 +143,16 @@ Rules:
 Return the complete updated structure.
 """
             
-            response = self.llm.invoke(prompt_text)
-            match = re.search(r"\{.*\}", response, re.DOTALL)
-            
-            if not match:
+            try:
+                # Only answers that parse are cached, so a retry asks the model again
+                updated_structure = cached_invoke(self.llm, prompt_text, parse=parse_json_response)
+            except ValueError as e:
                 return json.dumps({
                     "status": "error",
                     "message": "Failed to assign files",
-                    "raw_response": response
+                    "raw_response": str(e)
                 })
-            
-            updated_structure = json.loads(match.group(0))
-            self.current_structure = self._merge_structures(self.current_structure, updated_structure)
+            self.current_structure = merge_structures(self.current_structure, updated_structure)
             
             return json.dumps({
                 "status": "success",
@@ -211,11 +219,17 @@ Return the complete updated structure.
                     "message": "No structure available for moving files"
                 })
             
-            moves = self._move_files_recursive(self.current_structure)
+            # Check against the files on disk: no moves for invented names, one folder per file,
+            # files the batches dropped go to their extension category
+            files = [entry.name for entry in iter_files(self.folder_path, recursive=self.recursive,
+                                                         max_depth=self.max_depth, exclude=self.exclude)]
+            self.current_structure, validation = validate_structure(self.current_structure, files)
+            moves = self._move_files(self.current_structure, files)
             self.moves_history = moves
             
             return json.dumps({
                 "status": "success",
+                "validation": validation.describe(),
                 "moves_count": len(moves),
                 "moves": [f"{src} -> {dst}" for dst, src in moves],
                 "message": f"Successfully moved {len(moves)} files"
@@ -233,74 +247,46 @@ Return the complete updated structure.
                     "message": "No moves to undo"
                 })
             
-            undone = 0
-            for dst, src in self.moves_history:
-                if os.path.exists(dst):
-                    os.rename(dst, src)
-                    undone += 1
+            errors = []
+            if self.last_journal:
+                # Restores in bulk and removes the folders the move created
+                result = undo_run(read_run(self.last_journal))
+                undone, errors = len(result.moved), result.errors
+            else:
+                undone = 0
+                for dst, src in self.moves_history:
+                    if os.path.exists(dst):
+                        os.rename(dst, src)
+                        undone += 1
             
             self.moves_history = []
+            self.last_journal = None
             
             return json.dumps({
                 "status": "success",
                 "undone_moves": undone,
+                "errors": errors[:10],
                 "message": f"Undid {undone} file moves"
             }, indent=2)
             
         except Exception as e:
             return json.dumps({"status": "error", "message": str(e)})
 
-    def _merge_structures(self, base: Dict, new: Dict) -> Dict:
-        """Merge updated structure with base structure."""
-        for cat, content in new.items():
-            if cat not in base:
-                base[cat] = content
-                continue
-
-            if isinstance(base[cat], dict) and isinstance(content, dict):
-                for subcat, subfiles in content.items():
-                    if subcat not in base[cat]:
-                        base[cat][subcat] = subfiles
-                    else:
-                        if isinstance(base[cat][subcat], list):
-                            # Merge lists, avoiding duplicates
-                            existing_files = set(base[cat][subcat])
-                            for file in subfiles:
-                                if file not in existing_files:
-                                    base[cat][subcat].append(file)
-            elif isinstance(base[cat], list) and isinstance(content, list):
-                # Merge lists, avoiding duplicates
-                existing_files = set(base[cat])
-                for file in content:
-                    if file not in existing_files:
-                        base[cat].append(file)
-        return base
-
-    def _move_files_recursive(self, structure: Dict, current_path: str = "") -> List:
-        """Recursively move files according to structure."""
-        moves = []
-        base_path = os.path.join(self.folder_path, current_path) if current_path else self.folder_path
-        
-        for category, contents in structure.items():
-            target_path = os.path.join(base_path, category)
-            
-            if isinstance(contents, list):
-                os.makedirs(target_path, exist_ok=True)
-                for file in contents:
-                    if isinstance(file, str):
-                        src = os.path.join(self.folder_path, file)
-                        dst = os.path.join(target_path, file)
-                        if os.path.exists(src) and src != dst:
-                            shutil.move(src, dst)
-                            moves.append((dst, src))
-            elif isinstance(contents, dict):
-                os.makedirs(target_path, exist_ok=True)
-                submoves = self._move_files_recursive(
-                    contents, 
-                    os.path.join(current_path, category)
-                )
-                moves.extend(submoves)
-        return moves
+    def _move_files(self, structure: Dict, files: Optional[List[str]] = None) -> List:
+        """Move files according to structure; returns (dst, src) pairs."""
+        plan = compile_move_plan(self.folder_path, structure, set(files) if files is not None else None)
+        try:
+            journal = MoveJournal.create(self.folder_path)
+        except OSError as e:
+            print(f"⚠️ Could not create move journal: {e}")
+            journal = None
+        result = execute_move_plan(plan, journal=journal)
+        if journal is not None:
+            journal.commit()
+        self.last_journal = journal.path if journal is not None else None
+        for error in result.errors:
+            print(f"⚠️ {error}")
+        return result.moved
 
     def get_tools(self) -> List[Tool]:
         """Get all tools for the agent."""
@@ -342,17 +328,24 @@ Return the complete updated structure.
             )
         ]
 
-def run_file_organization_agent(folder_path: str, user_instructions: str):
-    """Run the file organization agent."""
+def run_file_organization_agent(folder_path: str, user_instructions: str, recursive: bool = False,
+                                max_depth: Optional[int] = None, exclude: Optional[List[str]] = None,
+                                offline: bool = False):
+    """Run the file organization agent (on the local model when ``offline``)."""
     print(f"🚀 Starting ReACT File Organization Agent")
     print(f"📂 Target folder: {folder_path}")
     print(f"📋 Instructions: {user_instructions}")
     
-    # Create agent instance
-    organizer = FileOrganizerAgent(folder_path, user_instructions)
+    # Tools get the JSON-constrained local model; the ReAct loop needs free text
+    tool_llm = get_local_llm() if offline else None
+    organizer = FileOrganizerAgent(folder_path, user_instructions, recursive=recursive,
+                                   max_depth=max_depth, exclude=exclude, llm=tool_llm)
     
     # Initialize LLM and agent
-    llm = GoogleGenerativeAI(model="gemini-2.0-flash-exp", google_api_key=api_key)
+    if offline:
+        llm = get_local_llm(structured=False)
+    else:
+        llm = GoogleGenerativeAI(model="gemini-2.0-flash-exp", google_api_key=api_key)
     
     system_prompt = SystemMessage(content=f"""
 You are a **File Organization ReACT Agent**. Your goal is to organize files in a folder according to user instructions.
@@ -465,6 +458,13 @@ def main():
     parser.add_argument("--instruction", type=str, 
                         default="Organize files intelligently by file type, topic, and purpose. Create logical folder structures.",
                         help="Custom instruction for organizing files")
+    parser.add_argument("--recursive", action="store_true", help="Include files in sub-folders")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Sub-folder levels to descend with --recursive (default: unlimited)")
+    parser.add_argument("--exclude", action="append", default=None, metavar="GLOB",
+                        help="Glob of names/paths to skip (repeatable)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use the local Qwen model (via the inference server if it is running)")
     
     args = parser.parse_args()
     
@@ -472,11 +472,12 @@ def main():
         print("❌ Invalid folder path.")
         sys.exit(1)
     
-    if not api_key:
+    if not args.offline and not api_key:
         print("❌ GOOGLE_API_KEY not found in environment variables.")
         sys.exit(1)
     
-    run_file_organization_agent(args.folder_path, args.instruction)
+    run_file_organization_agent(args.folder_path, args.instruction, recursive=args.recursive,
+                                max_depth=args.max_depth, exclude=args.exclude, offline=args.offline)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,241 +1,349 @@
 """
-Benchmark script to compare Groq, Gemini, Llamafile, and Ollama performance in parallel.
+Benchmark LLM providers on the organize prompt: time to first token, decode
+speed, JSON validity and file coverage.
+
+Each provider's answer is streamed, so a slow result can be told apart as slow
+prefill (high TTFT) or slow decode (low tokens/s). The answer is parsed, and
+coverage is the share of the input files that appear in it, which catches
+models that silently drop files. Token counts come from the server's usage
+report or the model's tokenizer when available, and are estimated otherwise.
+
+Providers:
+  fake       built-in fake OpenAI-compatible server (benchmarks/fake_openai_server.py), fully offline
+  openai     any OpenAI-compatible server (--base-url): llama.cpp's llama-server, vLLM, LM Studio, ...
+  gguf       a local GGUF file through llama-cpp-python (--gguf)
+  groq, gemini, ollama, llamafile   LangChain integrations (API keys from .env)
+
+    python other_programs/parallel_model_benchmark.py ~/Downloads --providers fake
+    python other_programs/parallel_model_benchmark.py --synthetic 300 --providers gguf --gguf models/qwen2.5-3b-q4_0.gguf
+    python other_programs/parallel_model_benchmark.py ~/Downloads --providers openai --base-url http://127.0.0.1:8080/v1
+
+Results are written to benchmark-results/benchmark_results_<time>.json.
 """
+import argparse
+import concurrent.futures
+import json
 import os
+import sys
 import time
-import json
-import asyncio
-import concurrent.futures
-from dotenv import load_dotenv
+import urllib.request
 from datetime import datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.prompt_templates import prompt_template_local
+from scripts.token_budget import estimate_tokens
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmark-results")
+PROVIDERS = ("fake", "openai", "gguf", "groq", "gemini", "ollama", "llamafile")
+FORMAT_INSTRUCTIONS = "Return only the JSON object: folder names mapping to subfolders or lists of file names."
+
+# stream(prompt, usage) yields text pieces as they arrive; it may fill ``usage``
+# with the server's {"prompt_tokens", "completion_tokens"} report
+StreamFn = Callable[[str, Dict[str, int]], Iterator[str]]
+
+
+class Provider(NamedTuple):
+    name: str
+    stream: StreamFn
+    count_tokens: Callable[[str], int] = estimate_tokens
+    exact_tokens: bool = False # True when count_tokens is the model's own tokenizer
+
+
+def build_prompt(files: List[str]) -> str:
+    return prompt_template_local.format(format_instructions=FORMAT_INSTRUCTIONS,
+                                        files_chunk=json.dumps(files, indent=2))
+
 
-# Import model-specific libraries
-from langchain_groq import ChatGroq
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_community.llms.llamafile import Llamafile
-from langchain_community.llms.ollama import Ollama
-from langchain.prompts import PromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
-def list_files_and_folders(directory):
-    return os.listdir(directory)
-# Load environment variables
-load_dotenv()
-
-# Directory to analyze
-directory = r"D:\Users\prabh\Downloads"
-
-# Get files and folders
-files_and_folders = list_files_and_folders(directory)
-
-# Create the prompt template - Note the double curly braces to escape them
-prompt_template = PromptTemplate.from_template("""
-You are given a list of files and folders from a directory:
-{files_and_folders}
-
-Your task is to generate a JSON structure that organizes the files into topics and subtopics. 
-Give the output json only, not any other text.
-Group similar files together under the appropriate categories. The structure should look like this:
-
-{{
-  "Topic_1": {{
-    "Subtopic_1": {{
-      "file1.txt": "document",
-      "file2.pdf": "document"
-    }},
-    "Subtopic_2": {{
-      "file3.zip": "archive"
-    }}
-  }},
-  "Topic_2": {{
-    "Subtopic_1": {{
-      "file4.exe": "installer"
-    }}
-  }}
-}}
-""")
-
-# Function to run a model and measure execution time
-def run_model(model_name, model_instance):
-    print(f"Starting {model_name}...")
-    start_time = time.time()
-    
+def extract_json(text: str):
+    """The JSON object in a response (code fences and surrounding text are ignored), or None."""
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+    start, end = text.find("{"), text.rfind("}") + 1
+    if start < 0 or end <= start:
+        return None
     try:
-        # Create runnable chain using the new LangChain syntax
-        chain = prompt_template | model_instance
-        
-        # Run the chain
-        response = chain.invoke({"files_and_folders": files_and_folders})
-        
-        # Get the text from the response (handling different response types)
-        if hasattr(response, 'content'):
-            # For ChatGroq which returns a message
-            response_text = response.content
-        elif isinstance(response, str):
-            # For models that return a string directly
-            response_text = response
-        else:
-            # Try to get a string representation
-            response_text = str(response)
-        
-        # Clean up response if needed
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        # Try to parse JSON
-        try:
-            if response_text.startswith("{") and response_text.endswith("}"):
-                json_data = json.loads(response_text)
-                json_valid = True
-            else:
-                # Try to extract JSON
-                start_idx = response_text.find("{")
-                end_idx = response_text.rfind("}") + 1
-                if start_idx >= 0 and end_idx > start_idx:
-                    json_str = response_text[start_idx:end_idx]
-                    json_data = json.loads(json_str)
-                    json_valid = True
+        data = json.loads(text[start:end])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def names_in_structure(structure) -> List[str]:
+    """File names placed in a structure: list items and single-file values.
+
+    Keys that map to a string are included too, for the older
+    {"file.txt": "document"} answers.
+    """
+    names = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if isinstance(value, str):
+                    names.extend((key, value))
                 else:
-                    json_valid = False
-                    json_data = None
-        except json.JSONDecodeError:
-            json_valid = False
-            json_data = None
-        
-        end_time = time.time()
-        execution_time = end_time - start_time
-        
-        return {
-            "model": model_name,
-            "execution_time": execution_time,
-            "success": True,
-            "json_valid": json_valid,
-            "categories": len(json_data) if json_valid else 0,
-            "error": None,
-            "raw_response": response_text[:500]  # Store first 500 chars for debugging
-        }
-    
-    except Exception as e:
-        end_time = time.time()
-        execution_time = end_time - start_time
-        
-        return {
-            "model": model_name,
-            "execution_time": execution_time,
-            "success": False,
-            "json_valid": False,
-            "categories": 0,
-            "error": str(e),
-            "raw_response": None
-        } 
-
-# Main function to run all models in parallel
-def run_benchmark():
-    # Initialize models
-    try:
-        groq_api_key = os.getenv("GROQ_API_KEY")
-        groq_model = ChatGroq(
-            api_key=groq_api_key,
-            model_name="llama-3.3-70b-versatile"
-        )
-    except Exception as e:
-        print(f"Error initializing Groq: {e}")
-        groq_model = None
-    
-    try:
-        gemini_api_key = os.getenv("GOOGLE_API_KEY")
-        gemini_model = GoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            api_key=gemini_api_key
-        )
-    except Exception as e:
-        print(f"Error initializing Gemini: {e}")
-        gemini_model = None
-    
-    try:
-        llamafile_model = Llamafile()
-    except Exception as e:
-        print(f"Error initializing Llamafile: {e}")
-        llamafile_model = None
-    
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                if isinstance(item, str):
+                    names.append(item)
+                else:
+                    walk(item)
+
+    walk(structure)
+    return names
+
+
+def run_model(provider: Provider, prompt: str, files: List[str]) -> dict:
+    """Stream one answer from ``provider`` and measure it."""
+    print(f"Starting {provider.name}...")
+    usage: Dict[str, int] = {}
+    pieces: List[str] = []
+    first_token = None
+    start = time.perf_counter()
     try:
-        ollama_model = Ollama(model="gemma3:1b-it-q8_0")
+        for piece in provider.stream(prompt, usage):
+            if piece and first_token is None:
+                first_token = time.perf_counter()
+            pieces.append(piece)
+        error = None
     except Exception as e:
-        print(f"Error initializing Ollama: {e}")
-        ollama_model = None
-    
-    # Create list of models to run
-    models_to_run = []
-    if groq_model:
-        models_to_run.append(("Groq (llama)", groq_model))
-    if gemini_model:
-        models_to_run.append(("Gemini 2.0 Flash", gemini_model))
-    if llamafile_model:
-        models_to_run.append(("Llamafile", llamafile_model))
-    if ollama_model:
-        models_to_run.append(("Ollama (gemma3:1b-it-q8_0)", ollama_model))
-    
-    if not models_to_run:
+        error = str(e)
+    end = time.perf_counter()
+
+    text = "".join(pieces)
+    output_tokens = usage.get("completion_tokens") or (provider.count_tokens(text) if text else 0)
+    decode_time = end - first_token if first_token is not None else 0.0
+    data = extract_json(text)
+    placed = set(names_in_structure(data)) if data is not None else set()
+    found = placed.intersection(files)
+    return {
+        "model": provider.name,
+        "execution_time": end - start,
+        "success": error is None,
+        "json_valid": data is not None,
+        "categories": len(data) if data is not None else 0,
+        "error": error,
+        "ttft": first_token - start if first_token is not None else None,
+        "decode_tokens_per_s": (output_tokens - 1) / decode_time if output_tokens > 1 and decode_time > 0 else None,
+        "prompt_tokens": usage.get("prompt_tokens") or provider.count_tokens(prompt),
+        "output_tokens": output_tokens,
+        "tokens_exact": bool(usage.get("completion_tokens")) or provider.exact_tokens,
+        "files_found": len(found),
+        "coverage": len(found) / len(files) if files and data is not None else None,
+        # Names with an extension that were never sent (folder names and type labels have none)
+        "unknown_names": sum("." in name for name in placed - set(files)),
+        "raw_response": text[:500] if text else None, # First 500 chars for debugging
+    }
+
+
+# --- Providers ---
+
+def openai_stream(base_url: str, model: str, api_key: Optional[str] = None, max_tokens: int = 4096,
+                  timeout: float = 600.0) -> StreamFn:
+    """Streaming chat completions from an OpenAI-compatible server (server-sent events, stdlib only)."""
+    url = base_url.rstrip("/") + "/chat/completions"
+
+    def stream(prompt: str, usage: Dict[str, int]) -> Iterator[str]:
+        body = json.dumps({
+            "model": model, "messages": [{"role": "user", "content": prompt}], "max_tokens": max_tokens,
+            "temperature": 0, "stream": True, "stream_options": {"include_usage": True},
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        request = urllib.request.Request(url, data=body, headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("usage"):
+                    usage.update({key: value for key, value in event["usage"].items() if isinstance(value, int)})
+                for choice in event.get("choices") or []:
+                    piece = (choice.get("delta") or {}).get("content") or choice.get("text")
+                    if piece:
+                        yield piece
+
+    return stream
+
+
+def gguf_provider(path: str, n_ctx: int = 32768, max_tokens: int = 4096) -> Provider:
+    from llama_cpp import Llama
+
+    llm = Llama(model_path=path, n_ctx=n_ctx, verbose=False)
+
+    def stream(prompt: str, usage: Dict[str, int]) -> Iterator[str]:
+        usage["prompt_tokens"] = len(llm.tokenize(prompt.encode("utf-8")))
+        generated = 0
+        for part in llm(prompt, max_tokens=max_tokens, temperature=0, stream=True):
+            generated += 1 # One streamed part per sampled token
+            yield part["choices"][0]["text"]
+        usage["completion_tokens"] = generated
+
+    return Provider(f"GGUF ({os.path.basename(path)})", stream,
+                    lambda text: len(llm.tokenize(text.encode("utf-8"), add_bos=False)), exact_tokens=True)
+
+
+def langchain_stream(model) -> StreamFn:
+    def stream(prompt: str, usage: Dict[str, int]) -> Iterator[str]:
+        for chunk in model.stream(prompt):
+            piece = getattr(chunk, "content", chunk) # Chat models stream message chunks, LLMs strings
+            yield piece if isinstance(piece, str) else str(piece)
+
+    return stream
+
+
+def make_provider(name: str, args) -> Provider:
+    if name == "fake":
+        from benchmarks.fake_llm import FakeLLM
+        from benchmarks.fake_openai_server import FakeOpenAIServer
+
+        server = FakeOpenAIServer(FakeLLM(latency=args.fake_latency, prompt_rate=args.fake_prompt_rate,
+                                          token_rate=args.fake_token_rate, drop_rate=args.fake_drop_rate))
+        return Provider("Fake OpenAI server", openai_stream(server.start(), server.model, max_tokens=args.max_tokens))
+    if name == "openai":
+        return Provider(f"OpenAI-compatible ({args.model})",
+                        openai_stream(args.base_url, args.model, os.getenv("OPENAI_API_KEY"), args.max_tokens))
+    if name == "gguf":
+        if not args.gguf:
+            raise ValueError("--gguf PATH is required for the gguf provider")
+        return gguf_provider(args.gguf, args.n_ctx, args.max_tokens)
+    if name == "groq":
+        from langchain_groq import ChatGroq
+        return Provider("Groq (llama-3.3-70b)", langchain_stream(
+            ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model_name="llama-3.3-70b-versatile")))
+    if name == "gemini":
+        from langchain_google_genai import GoogleGenerativeAI
+        return Provider("Gemini 2.0 Flash", langchain_stream(
+            GoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=os.getenv("GOOGLE_API_KEY"))))
+    if name == "ollama":
+        from langchain_ollama import OllamaLLM
+        return Provider(f"Ollama ({args.ollama_model})", langchain_stream(OllamaLLM(model=args.ollama_model)))
+    if name == "llamafile":
+        from langchain_community.llms.llamafile import Llamafile
+        return Provider("Llamafile", langchain_stream(Llamafile()))
+    raise ValueError(f"Unknown provider: {name}")
+
+
+def list_files(directory: str) -> List[str]:
+    return sorted(entry.name for entry in os.scandir(directory) if entry.is_file())
+
+
+def print_result(i: int, result: dict):
+    print(f"{i}. {result['model']}:")
+    print(f"   Time: {result['execution_time']:.2f} s")
+    if result["ttft"] is not None:
+        print(f"   Time to first token: {result['ttft']:.2f} s")
+    if result["decode_tokens_per_s"] is not None:
+        estimated = "" if result["tokens_exact"] else " (estimated tokens)"
+        print(f"   Decode: {result['decode_tokens_per_s']:.1f} tokens/s, "
+              f"{result['output_tokens']:,} output tokens{estimated}")
+    print(f"   Valid JSON: {result['json_valid']}")
+    if result["json_valid"]:
+        print(f"   Categories: {result['categories']}")
+        print(f"   Coverage: {result['files_found']:,} files ({result['coverage']:.1%}), "
+              f"{result['unknown_names']} unknown names")
+    if result["error"]:
+        print(f"   Error: {result['error']}")
+    print()
+
+
+def run_benchmark(args):
+    if args.synthetic:
+        from benchmarks.synthetic_tree import generate_names
+        files, source = generate_names(args.synthetic, args.seed), f"synthetic:{args.synthetic}:{args.seed}"
+    else:
+        files, source = list_files(args.directory), os.path.abspath(args.directory)
+    if args.limit:
+        files = files[:args.limit]
+    if not files:
+        print("No files to organize.")
+        return None
+    prompt = build_prompt(files)
+
+    providers = []
+    for name in args.providers:
+        try:
+            providers.append(make_provider(name, args))
+        except Exception as e: # Missing package, key or model file: skip that provider
+            print(f"Error initializing {name}: {e}")
+    if not providers:
         print("No models available to run. Please check your API keys and model configurations.")
-        return
-    
-    # Run models in parallel using ThreadPoolExecutor
+        return None
+
     results = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_model = {
-            executor.submit(run_model, name, model): name
-            for name, model in models_to_run
-        }
-        
-        for future in concurrent.futures.as_completed(future_to_model):
-            model_name = future_to_model[future]
-            try:
-                result = future.result()
-                results.append(result)
-                print(f"✅ {model_name} completed in {result['execution_time']:.2f} seconds")
-            except Exception as e:
-                print(f"❌ {model_name} failed: {e}")
-    
-    # Sort results by execution time
-    results.sort(key=lambda x: x["execution_time"])
-    
-    # Print results
-    print("\n" + "="*50)
+    # Local models share the CPU/GPU, so their timings are only comparable when run one at a time
+    workers = 1 if args.sequential else len(providers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_model, provider, prompt, files): provider.name for provider in providers}
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "✅" if result["success"] else "❌"
+            print(f"{status} {result['model']} completed in {result['execution_time']:.2f} seconds")
+
+    results.sort(key=lambda result: result["execution_time"])
+    print("\n" + "=" * 50)
     print("BENCHMARK RESULTS")
-    print("="*50)
-    
-    for i, result in enumerate(results):
-        print(f"{i+1}. {result['model']}:")
-        print(f"   Time: {result['execution_time']:.2f} seconds")
-        print(f"   Success: {result['success']}")
-        print(f"   Valid JSON: {result['json_valid']}")
-        if result['json_valid']:
-            print(f"   Categories: {result['categories']}")
-        if result['error']:
-            print(f"   Error: {result['error']}")
-        print()
-    
-    # Save results to file
+    print("=" * 50)
+    for i, result in enumerate(results, 1):
+        print_result(i, result)
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_file = f"benchmark_results_{timestamp}.json"
-    
-    # Get file count - handle both list and string return types from list_files_and_folders
-    if isinstance(files_and_folders, list):
-        file_count = len(files_and_folders)
-    else:
-        file_count = len(files_and_folders.split("\n"))
-    
-    with open(results_file, "w") as f:
+    os.makedirs(args.output_dir, exist_ok=True)
+    results_file = os.path.join(args.output_dir, f"benchmark_results_{timestamp}.json")
+    with open(results_file, "w", encoding="utf-8") as f:
         json.dump({
             "timestamp": timestamp,
-            "directory": directory,
-            "file_count": file_count,
-            "results": results
-        }, f, indent=2)
-    
+            "directory": source,
+            "file_count": len(files),
+            "prompt_tokens_estimated": estimate_tokens(prompt),
+            "sequential": args.sequential,
+            "results": results,
+        }, f, indent=2, ensure_ascii=False)
     print(f"Results saved to {results_file}")
+    return results
 
-if __name__ == "__main__":
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare LLM providers on the organize prompt")
+    parser.add_argument("directory", nargs="?", default=".", help="Folder whose files are sent (default: .)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N generated file names instead of a folder")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=0, help="Send at most this many files")
+    parser.add_argument("--providers", nargs="+", choices=PROVIDERS, default=["fake"])
+    parser.add_argument("--sequential", action="store_true", help="Run providers one at a time")
+    parser.add_argument("--max-tokens", type=int, default=4096)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8080/v1", help="OpenAI-compatible server")
+    parser.add_argument("--model", default="local", help="Model name sent to the OpenAI-compatible server")
+    parser.add_argument("--gguf", help="GGUF model file for the gguf provider")
+    parser.add_argument("--n-ctx", type=int, default=32768)
+    parser.add_argument("--ollama-model", default="gemma3:1b-it-q8_0")
+    parser.add_argument("--fake-latency", type=float, default=0.2)
+    parser.add_argument("--fake-prompt-rate", type=float, default=2000.0)
+    parser.add_argument("--fake-token-rate", type=float, default=200.0)
+    parser.add_argument("--fake-drop-rate", type=float, default=0.0)
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    args = parser.parse_args(argv)
     print("Starting parallel model benchmark...")
-    run_benchmark()
\ No newline at end of file
+    return run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
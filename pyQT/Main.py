@@ -41,9 +41,16 @@ from pyQT.Helpers import show_error_message,show_info_message,ask_yes_no,show_wa
 load_dotenv()
 
 from constants.app_constants import APP_NAME
+from scripts.folder_snapshot import FolderSnapshot
+from scripts.file_categories import category_for_extension, classify_many
+from scripts.walker import DEFAULT_EXCLUDES
+from scripts.offline_clustering import NUMPY_AVAILABLE
+from scripts.structure_tree import merge_structures
+from scripts.log_setup import get_logger
+from scripts.move_journal import incomplete_runs, last_undoable_run, read_run, undo_run
 # --- PyQt5 Imports ---
  
-from PyQt5.QtCore import  pyqtSignal, QObject
+from PyQt5.QtCore import  pyqtSignal, QObject, QThread, QTimer
 
 # --- Langchain Imports ---
 try:
@@ -62,7 +69,8 @@ except ImportError:
 from constants.app_constants import APP_NAME
 
 load_dotenv()
- 
+
+log = get_logger("app")
 
 
 class FileOrganizerApp(QMainWindow):
@@ -91,6 +99,16 @@ class FileOrganizerApp(QMainWindow):
         self.organization_summary = ""
         self.use_llm_analysis = LANGCHAIN_AVAILABLE # Enable LLM by default if available
         self.last_organization_moves = [] # Store moves for undo functionality
+        self.last_journal_path = None # Journal of the last organization (persistent undo)
+        self.folder_snapshot = None # FolderSnapshot shared by analysis and organize stages
+        self.recursive_scan = False # Walk sub-folders as well as the top level
+        self.scan_max_depth = None # Sub-folder levels to descend when recursive (None = unlimited)
+        self.scan_exclude = DEFAULT_EXCLUDES # Glob patterns never scanned or moved
+        self.use_folder_index = True # Reuse cached LLM placements for unchanged files
+        self.use_offline_grouping = False # Cluster filenames locally when AI analysis is off
+        self.model_ready = False # Local llama.cpp model loaded (see start_model_loading)
+        self.model_thread = None
+        self.model_worker = None
 
         # --- Backbone loading removed ---
 
@@ -121,6 +139,13 @@ class FileOrganizerApp(QMainWindow):
         # --- Show Initial Page ---
         self.show_page("StartPage")
 
+        # --- Offer to finish or roll back organizations that were interrupted by a crash ---
+        QTimer.singleShot(0, self.check_interrupted_runs)
+
+        # --- Load the local model once the event loop is running (window already visible) ---
+        if self.use_llm_analysis:
+            QTimer.singleShot(0, self.start_model_loading)
+
     def create_settings_bar(self):
         """Adds controls for appearance and LLM toggle."""
         settings_widget = QWidget()
@@ -136,12 +161,32 @@ class FileOrganizerApp(QMainWindow):
 
         # LLM toggle if available
         if LANGCHAIN_AVAILABLE:
+            self.model_status_label = QLabel("AI model: not loaded")
+            self.model_status_label.setFont(QFont("Segoe UI", 9))
+            settings_layout.addWidget(self.model_status_label)
+            settings_layout.addSpacing(10)
+
             llm_check = QCheckBox("Use AI Analysis")
             llm_check.setChecked(self.use_llm_analysis)
             llm_check.stateChanged.connect(self.toggle_llm)
             settings_layout.addWidget(llm_check)
             settings_layout.addSpacing(20)
 
+        # Offline (numpy) filename clustering toggle if available
+        if NUMPY_AVAILABLE:
+            grouping_check = QCheckBox("Offline Smart Grouping")
+            grouping_check.setChecked(self.use_offline_grouping)
+            grouping_check.stateChanged.connect(self.toggle_offline_grouping)
+            settings_layout.addWidget(grouping_check)
+            settings_layout.addSpacing(20)
+
+        # Recursive scan toggle
+        recursive_check = QCheckBox("Include Subfolders")
+        recursive_check.setChecked(self.recursive_scan)
+        recursive_check.stateChanged.connect(self.toggle_recursive_scan)
+        settings_layout.addWidget(recursive_check)
+        settings_layout.addSpacing(20)
+
         # Theme selector
         theme_label = QLabel("Theme:")
         theme_label.setFont(QFont("Segoe UI", 9))
@@ -165,7 +210,75 @@ class FileOrganizerApp(QMainWindow):
     def toggle_llm(self, checked):
         """Toggle LLM analysis on/off"""
         self.use_llm_analysis = checked
-        print(f"LLM Analysis {'Enabled' if checked else 'Disabled'}")
+        log.info(f"LLM Analysis {'Enabled' if checked else 'Disabled'}")
+        if checked:
+            self.start_model_loading()
+
+    def set_model_status(self, text):
+        """Update the AI model status badge in the settings bar."""
+        if hasattr(self, "model_status_label"):
+            self.model_status_label.setText(text)
+
+    def start_model_loading(self):
+        """Load the local model on a background thread (no-op if loaded or already loading)."""
+        if self.model_ready or self.model_thread is not None:
+            return
+        self.set_model_status("AI model: loading...")
+        self.model_thread = QThread()
+        from pyQT.Workers import ModelLoadWorker
+        self.model_worker = ModelLoadWorker()
+        self.model_worker.moveToThread(self.model_thread)
+        self.model_worker.progress.connect(log.info)
+        self.model_worker.error.connect(log.error)
+        self.model_worker.finished.connect(self.model_loading_complete)
+        self.model_thread.started.connect(self.model_worker.run)
+        self.model_thread.finished.connect(self.model_thread.deleteLater)
+        self.model_thread.start()
+
+    def model_loading_complete(self, success, message):
+        self.model_thread.quit()
+        self.model_thread.wait()
+        self.model_thread = None
+        self.model_worker = None
+        self.model_ready = success
+        if success:
+            self.set_model_status("AI model: ready (server)" if "server" in message else "AI model: ready")
+        else:
+            self.set_model_status("AI model: unavailable")
+        if hasattr(self, "model_status_label"):
+            self.model_status_label.setToolTip(message)
+        log.info(message)
+
+    def get_local_llm(self):
+        """The local LLM: the shared inference server if running, else the in-process
+        llama.cpp model (blocks until a background load, if any, has finished)."""
+        from scripts.inference_client import get_local_llm
+        return get_local_llm()
+
+    def closeEvent(self, event):
+        # A QThread must not be destroyed while running. A model load can't be
+        # interrupted cleanly, so give it a moment and then stop it, since the app is exiting anyway.
+        if self.model_thread is not None and self.model_thread.isRunning():
+            if not self.model_thread.wait(2000):
+                self.model_thread.terminate()
+                self.model_thread.wait()
+        # Recovery moves files; let it finish rather than destroy the thread mid-move
+        recovery_thread = getattr(self.pages.get("StartPage"), "recovery_thread", None)
+        if recovery_thread is not None and recovery_thread.isRunning():
+            recovery_thread.quit() # Takes effect once the worker returns
+            recovery_thread.wait()
+        super().closeEvent(event)
+
+    def toggle_offline_grouping(self, checked):
+        """Toggle offline filename clustering on/off"""
+        self.use_offline_grouping = bool(checked)
+        log.info(f"Offline Smart Grouping {'Enabled' if checked else 'Disabled'}")
+
+    def toggle_recursive_scan(self, checked):
+        """Toggle scanning of sub-folders"""
+        self.recursive_scan = bool(checked)
+        self.folder_snapshot = None # Previous snapshot was taken with the other mode
+        log.info(f"Recursive scan {'Enabled' if checked else 'Disabled'}")
 
     def on_theme_changed(self, theme_name):
         """Handle theme change from combo box"""
@@ -199,7 +312,7 @@ class FileOrganizerApp(QMainWindow):
             }
             self.setWindowTitle(page_titles.get(page_name, APP_NAME))
         else:
-            print(f"Error: Page '{page_name}' not found.")
+            log.error(f"Page '{page_name}' not found.")
 
     def reset_state(self):
         """Resets application state for a new folder."""
@@ -209,6 +322,8 @@ class FileOrganizerApp(QMainWindow):
         self.current_analysis_summary = ""
         self.organization_summary = ""
         self.last_organization_moves = [] # Clear moves on reset
+        self.last_journal_path = None
+        self.folder_snapshot = None
 
         # Reset StartPage widgets
         start_page = self.pages.get("StartPage")
@@ -220,12 +335,12 @@ class FileOrganizerApp(QMainWindow):
         # Optional: Clear other pages like AnalyzePage results?
         analyze_page = self.pages.get("AnalyzePage")
         if analyze_page:
-             analyze_page.clear_layout(analyze_page.results_layout)
+             analyze_page.clear_results()
              analyze_page.summary_label.setText("")
              analyze_page.subtitle_label.setText("Folder: ")
         edit_page = self.pages.get("EditStructurePage")
         if edit_page:
-             edit_page.structure_tree.clear()
+             edit_page.clear_structure()
 
         gc.collect() # Suggest garbage collection
 
@@ -234,40 +349,33 @@ class FileOrganizerApp(QMainWindow):
 
     # Backbone analysis removed
 
-    def _analyze_by_extension(self):
-        """Analyze files by extension."""
+    def _analyze_by_extension(self, snapshot=None):
+        """Analyze files by extension.
+
+        Reads file names from ``snapshot`` (or the controller's current
+        FolderSnapshot) instead of listing the folder again.
+        """
         result = {}
         try:
-            all_files = [item for item in os.listdir(self.folder_path)
-                         if os.path.isfile(os.path.join(self.folder_path, item))]
+            if snapshot is None:
+                snapshot = self.folder_snapshot
+            if snapshot is None or snapshot.folder_path != self.folder_path:
+                snapshot = self.scan_folder()
 
-            for item in all_files:
-                ext = os.path.splitext(item)[1].lower()
-                category = self._get_category(ext) if ext else 'No Extension'
-                result.setdefault(category, []).append(item)
+            result = classify_many(snapshot.files)
         except Exception as e:
              raise RuntimeError(f"Could not read folder contents for extension analysis:\n{e}") from e
         return result
 
+    def scan_folder(self, on_progress=None, with_stat=False):
+        """Take a FolderSnapshot of the selected folder using the current scan settings."""
+        return FolderSnapshot.scan(self.folder_path, with_stat=with_stat, recursive=self.recursive_scan,
+                                   max_depth=self.scan_max_depth, exclude=self.scan_exclude,
+                                   on_progress=on_progress)
+
     def _get_category(self, ext):
-        # (Keep the category definitions - same as original)
-        categories = {
-            'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg', '.heic', '.heif', '.ico'],
-            'Documents': ['.pdf', '.docx', '.doc', '.txt', '.rtf', '.odt', '.wpd', '.md'],
-            'Spreadsheets': ['.xlsx', '.xls', '.csv', '.ods'],
-            'Presentations': ['.pptx', '.ppt', '.odp'],
-            'Videos': ['.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm', '.mpeg', '.mpg'],
-            'Audio': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma'],
-            'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.iso'],
-            'Code': ['.py', '.js', '.html', '.css', '.java', '.cpp', '.c', '.h', '.cs', '.php', '.rb', '.json', '.xml', '.yaml', '.sh', '.bat'],
-            'Executables': ['.exe', '.msi', '.app', '.dmg', '.deb', '.rpm', '.jar'],
-            'Fonts': ['.ttf', '.otf', '.woff', '.woff2'],
-            'Databases': ['.sqlite', '.db', '.sql', '.mdb', '.accdb'],
-        }
-        for category, extensions in categories.items():
-            if ext in extensions:
-                return category
-        return 'Others'
+        """Category for a single extension, using the shared build-once index."""
+        return category_for_extension(ext)
 
     def _parse_json_safely(self, json_str):
         """Safely parse JSON, potentially fixing common issues."""
@@ -275,50 +383,87 @@ class FileOrganizerApp(QMainWindow):
             # First try direct parsing
             return json.loads(json_str)
         except json.JSONDecodeError as json_err:
-            print(f"Initial JSON parsing failed: {json_err}. Raw string (start): {json_str[:200]}")
+            log.warning(f"Initial JSON parsing failed: {json_err}. Raw string (start): {json_str[:200]}")
             # Attempting basic fixes
             try:
                 # Remove potential leading/trailing non-JSON chars more aggressively
                 json_match = re.search(r'\{.*\}', json_str, re.DOTALL)
                 if json_match:
                     fixed_json = json_match.group(0)
-                    print("Attempting parse after extracting {...}")
+                    log.debug("Attempting parse after extracting {...}")
                     return json.loads(fixed_json)
                 else:
-                    print("Could not extract a top-level JSON object.")
+                    log.warning("Could not extract a top-level JSON object.")
                     return {} # Give up if no object found
             except json.JSONDecodeError as e2:
-                 print(f"JSON parsing failed even after basic extraction: {e2}")
+                 log.warning(f"JSON parsing failed even after basic extraction: {e2}")
                  return {} # Give up if basic fixes fail
             except Exception as e:
-                print(f"Unexpected error during JSON fixing: {e}")
+                log.exception(f"Unexpected error during JSON fixing: {e}")
                 return {}
 
     def _merge_structures(self, target, source):
-        """Merge source structure into target structure (recursive)."""
-        for key, value in source.items():
-            if key in target:
-                if isinstance(target[key], dict) and isinstance(value, dict):
-                    self._merge_structures(target[key], value)
-                elif isinstance(target[key], list) and isinstance(value, list):
-                    # Combine lists, avoid duplicates if desired (simple extend here)
-                    target[key].extend(v for v in value if v not in target[key])
-                else:
-                    # Conflict: Overwrite or handle differently? Overwriting for simplicity.
-                    print(f"Warning: Merging conflict for key '{key}'. Overwriting target.")
-                    target[key] = value
-            else:
-                target[key] = value
+        """Merge source structure into target structure in place (see scripts/structure_tree.py).
+
+        Each file ends up in one folder (the first one it was assigned to); a
+        folder given as a list in one structure and a dict in the other keeps
+        both its files and its subfolders.
+        """
+        merged = merge_structures(target, source)
+        target.clear()
+        target.update(merged)
+
+    def check_interrupted_runs(self):
+        """Resume or roll back organizations whose process died before finishing (see move_journal)."""
+        try:
+            runs = incomplete_runs()
+        except OSError as e:
+            log.warning(f"Could not read move journals: {e}")
+            return
+        jobs = []
+        for run in runs:
+            done = len(run.moved)
+            resume = ask_yes_no("Interrupted Organization",
+                                f"Organizing '{run.root}' was interrupted after {done} of {len(run.moves)} move(s).\n\n"
+                                "Yes: finish the remaining moves.\nNo: move everything back.")
+            jobs.append((run, resume))
+        if jobs:
+            # Large runs (or cross-device copies) take a while: recover on a worker thread with progress
+            self.pages["StartPage"].run_recovery(jobs)
+
+    def _undoable_run(self):
+        """The journaled run to undo: this session's last one, else the newest for the folder."""
+        if self.last_journal_path and os.path.exists(self.last_journal_path):
+            run = read_run(self.last_journal_path)
+            return run if run.committed and not run.undone and run.moved else None
+        if self.folder_path:
+            return last_undoable_run(self.folder_path)
+        return None
 
     def undo_organization(self):
         """Reverts the last organization operation."""
-        if not self.last_organization_moves:
+        run = self._undoable_run()
+        if run is None and not self.last_organization_moves:
             show_info_message("Undo Not Available", "No recent organization to undo.")
             return False
 
         if not ask_yes_no("Confirm Undo", "Are you sure you want to undo the last organization?\nThis will move files back to their original locations."):
             return False
 
+        if run is not None:
+            # Journaled run: restore in bulk and remove the folders it created
+            result = undo_run(run)
+            self.last_organization_moves = []
+            self.last_journal_path = None
+            if not result.errors:
+                show_info_message("Undo Complete", f"{len(result.moved)} file(s) have been restored to their original locations.")
+                return True
+            error_msg = "Undo completed with some issues:\n" + "\n".join(result.errors[:10])
+            if len(result.errors) > 10:
+                error_msg += f"\n...and {len(result.errors) - 10} more errors."
+            show_warning_message("Undo with Issues", error_msg)
+            return False
+
         undo_success = True
         undo_errors = []
         for dst, src in reversed(self.last_organization_moves): # Undo in reverse order
@@ -329,13 +474,13 @@ class FileOrganizerApp(QMainWindow):
                     if not os.path.exists(src_dir):
                         os.makedirs(src_dir)
                     shutil.move(dst, src)
-                    print(f"Undo: Moved '{dst}' back to '{src}'")
+                    log.debug(f"Undo: Moved '{dst}' back to '{src}'")
                 except Exception as e:
                     undo_success = False
                     undo_errors.append(f"Failed to undo '{os.path.basename(dst)}': {e}")
-                    print(f"Error during undo: {e}")
+                    log.error(f"Error during undo: {e}")
             else:
-                print(f"Warning: Destination file not found for undo: {dst}")
+                log.warning(f"Destination file not found for undo: {dst}")
 
         # After moving files back, attempt to remove any now-empty directories
         # This is a best-effort cleanup and might not remove all empty dirs if they were nested
@@ -348,9 +493,9 @@ class FileOrganizerApp(QMainWindow):
             try:
                 if os.path.exists(d) and not os.listdir(d): # Check if directory is empty
                     os.rmdir(d)
-                    print(f"Removed empty directory: {d}")
+                    log.debug(f"Removed empty directory: {d}")
             except OSError as e:
-                print(f"Could not remove directory '{d}': {e}")
+                log.debug(f"Could not remove directory '{d}': {e}")
                 # Don't add to undo_errors as it's a cleanup step, not a critical undo failure
 
         self.last_organization_moves = [] # Clear moves after undo
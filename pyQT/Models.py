@@ -0,0 +1,411 @@
+import json
+import os
+
+from PyQt5.QtCore import QAbstractItemModel, QFileInfo, QMimeData, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QApplication, QFileIconProvider, QStyle
+
+from scripts.analysis_view import ViewFolder
+from scripts.editable_structure import EditableStructure
+
+# Rows added per fetchMore call; a view only asks for more as it scrolls
+FETCH_BATCH = 1000
+
+
+class _FolderNode:
+    """Model-side state of one ViewFolder: how many of its rows are loaded, and its subfolder nodes."""
+    __slots__ = ("folder", "parent", "row", "fetched", "children")
+
+    def __init__(self, folder: ViewFolder, parent=None, row: int = 0):
+        self.folder = folder
+        self.parent = parent
+        self.row = row
+        self.fetched = 0
+        self.children = {} # Row -> _FolderNode, created when first needed
+
+    def child(self, row: int):
+        """Node of the subfolder at ``row`` (None for a file row)."""
+        if row >= len(self.folder.folders):
+            return None
+        node = self.children.get(row)
+        if node is None:
+            node = self.children[row] = _FolderNode(self.folder.folders[row], self, row)
+        return node
+
+
+class AnalysisTreeModel(QAbstractItemModel):
+    """Read-only, lazily populated tree over a sorted analysis view (scripts.analysis_view).
+
+    Every index points at its *parent* folder node; the row says which child
+    it is (subfolders first, then files). File rows have no objects of their
+    own, and a folder's rows are only added in FETCH_BATCH steps as the view
+    scrolls, so opening a 500k-file analysis creates a handful of rows.
+    """
+    HEADERS = ("Name", "Files")
+
+    def __init__(self, view: ViewFolder, parent=None):
+        super().__init__(parent)
+        self._root = _FolderNode(view)
+        self._root.fetched = len(view) # Top-level sections are few; show them all
+        self._section_font = QFont()
+        self._section_font.setBold(True)
+
+    def _folder_node(self, index: QModelIndex):
+        if not index.isValid():
+            return self._root
+        return index.internalPointer().child(index.row())
+
+    # --- Structure ---
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        node = self._folder_node(parent)
+        return self.createIndex(row, column, node) if node is not None else QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self._folder_node(parent)
+        return node.fetched if node is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._folder_node(parent)
+        return node is not None and len(node.folder) > 0
+
+    # --- Lazy population ---
+    def canFetchMore(self, parent):
+        node = self._folder_node(parent)
+        return node is not None and node.fetched < len(node.folder)
+
+    def fetchMore(self, parent):
+        node = self._folder_node(parent)
+        if node is None:
+            return
+        count = min(FETCH_BATCH, len(node.folder) - node.fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+        node.fetched += count
+        self.endInsertRows()
+
+    # --- Data ---
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        parent_node = index.internalPointer()
+        row = index.row()
+        folders = parent_node.folder.folders
+        is_folder = row < len(folders)
+        if is_folder:
+            folder = folders[row]
+            name = folder.name
+        else:
+            name = parent_node.folder.files[row - len(folders)]
+
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                if parent_node is self._root:
+                    return name # Section heading
+                return f"📁 {name}" if is_folder else f"📄 {name}"
+            return str(folder.file_count) if is_folder else None
+        if role == Qt.ToolTipRole and index.column() == 0:
+            return name
+        if role == Qt.FontRole and parent_node is self._root:
+            return self._section_font
+        if role == Qt.TextAlignmentRole and index.column() == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class _IconCache:
+    """One QIcon per folder/file type instead of a style lookup per row."""
+
+    def __init__(self):
+        self._icons = {}
+        self._provider = None
+
+    def folder(self):
+        icon = self._icons.get(None)
+        if icon is None:
+            icon = self._icons[None] = QApplication.style().standardIcon(QStyle.SP_DirIcon)
+        return icon
+
+    def file(self, name: str):
+        extension = os.path.splitext(name)[1].lower()
+        icon = self._icons.get(extension)
+        if icon is None:
+            if self._provider is None:
+                self._provider = QFileIconProvider()
+            icon = self._provider.icon(QFileInfo(f"file{extension}")) # Type icon; the file need not exist
+            if icon.isNull():
+                icon = QApplication.style().standardIcon(getattr(QStyle, "SP_FileIcon", QStyle.SP_CustomBase))
+            self._icons[extension] = icon
+        return icon
+
+
+class StructureItemModel(QAbstractItemModel):
+    """Editable, lazily populated tree over an EditableStructure (scripts.editable_structure).
+
+    Indexes point at their parent EditFolder, as in AnalysisTreeModel. Every
+    edit changes the data and announces only the rows it touched; rows that
+    were never fetched are changed silently and show up when fetched.
+    """
+    MIME_TYPE = "application/x-organizahh-structure-items"
+    message = pyqtSignal(str) # Status text for the page (moves, rejected renames)
+
+    def __init__(self, tree: EditableStructure, parent=None):
+        super().__init__(parent)
+        self.tree = tree
+        self.dirty = False # Edited since loading (see EditStructurePage.update_structure_from_tree)
+        self._fetched = {tree.root: min(len(tree.root), FETCH_BATCH)} # Folder -> rows shown so far
+        self._icons = _IconCache()
+
+    # --- Index helpers ---
+    def _folder(self, index: QModelIndex):
+        """Folder at ``index`` (root for an invalid index), None for a file row."""
+        if not index.isValid():
+            return self.tree.root
+        parent = index.internalPointer()
+        row = index.row()
+        return parent.folders[row] if row < len(parent.folders) else None
+
+    def _item(self, index: QModelIndex):
+        """(parent folder, folder or None, file name or None) for a valid index."""
+        parent = index.internalPointer()
+        row = index.row()
+        if row < len(parent.folders):
+            return parent, parent.folders[row], None
+        return parent, None, parent.files[row - len(parent.folders)]
+
+    def index_of(self, folder) -> QModelIndex:
+        if folder is self.tree.root or folder.parent is None:
+            return QModelIndex()
+        return self.createIndex(folder.row(), 0, folder.parent)
+
+    def drop_folder(self, index: QModelIndex):
+        """Folder that receives a drop on ``index`` (a file row drops into its folder)."""
+        folder = self._folder(index)
+        return folder if folder is not None else index.internalPointer()
+
+    # --- Structure ---
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        folder = self._folder(parent)
+        return self.createIndex(row, column, folder) if folder is not None else QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_of(index.internalPointer())
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        folder = self._folder(parent)
+        return self._fetched.get(folder, 0) if folder is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        folder = self._folder(parent)
+        return folder is not None and len(folder) > 0
+
+    def canFetchMore(self, parent):
+        folder = self._folder(parent)
+        return folder is not None and self._fetched.get(folder, 0) < len(folder)
+
+    def fetchMore(self, parent):
+        folder = self._folder(parent)
+        if folder is None:
+            return
+        fetched = self._fetched.get(folder, 0)
+        count = min(FETCH_BATCH, len(folder) - fetched)
+        if count > 0:
+            self.beginInsertRows(parent, fetched, fetched + count - 1)
+            self._fetched[folder] = fetched + count
+            self.endInsertRows()
+
+    # --- Data ---
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _, folder, name = self._item(index)
+        if role in (Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole):
+            return folder.name if folder is not None else name
+        if role == Qt.DecorationRole:
+            return self._icons.folder() if folder is not None else self._icons.file(name)
+        if role == Qt.UserRole:
+            return "folder" if folder is not None else "file"
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return "Category / File"
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled # Drops on empty space go to the top level
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled
+        if index.row() < len(index.internalPointer().folders):
+            flags |= Qt.ItemIsEditable # Folders can be renamed; files keep their real names
+        return flags
+
+    # --- Row announcements (data is changed by ``apply`` between begin and end) ---
+    def _insert(self, folder, row: int, count: int, apply):
+        """Insert ``count`` rows at ``row``; announced only if they land in the fetched range."""
+        fetched = self._fetched.get(folder, 0)
+        visible = row < fetched or (row == fetched and fetched == len(folder))
+        if visible:
+            self.beginInsertRows(self.index_of(folder), row, row + count - 1)
+        apply()
+        if visible:
+            self._fetched[folder] = fetched + count
+            self.endInsertRows()
+
+    def _remove(self, folder, first: int, last: int, apply):
+        """Remove rows ``first``..``last``; only the fetched part is announced."""
+        fetched = self._fetched.get(folder, 0)
+        shown_last = min(last, fetched - 1)
+        visible = first <= shown_last
+        if visible:
+            self.beginRemoveRows(self.index_of(folder), first, shown_last)
+        apply()
+        if visible:
+            self._fetched[folder] = fetched - (shown_last - first + 1)
+            self.endRemoveRows()
+
+    # --- Edits ---
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        _, folder, _ = self._item(index)
+        if folder is None:
+            return False
+        new_name = str(value).strip()
+        old_name = folder.name
+        if not self.tree.rename_folder(folder, new_name):
+            self.message.emit(f"Cannot rename '{old_name}' to '{new_name}': name is empty or already used here")
+            return False
+        if new_name != old_name:
+            self.dirty = True
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            self.message.emit(f"Renamed '{old_name}' to '{new_name}'")
+        return True
+
+    def add_folder(self, parent_index: QModelIndex, name: str) -> QModelIndex:
+        """Add a subfolder (top level for an invalid index); returns its index, invalid if the name is taken."""
+        parent = self._folder(parent_index)
+        if parent is None or not name or parent.folder(name) is not None:
+            return QModelIndex()
+        row = len(parent.folders)
+        self._insert(parent, row, 1, lambda: self.tree.add_folder(parent, name))
+        self.dirty = True
+        return self.index(row, 0, parent_index) if row < self._fetched.get(parent, 0) else QModelIndex()
+
+    def remove_folder(self, index: QModelIndex) -> bool:
+        folder = self._folder(index)
+        if folder is None or folder is self.tree.root:
+            return False
+        parent, row = folder.parent, folder.row()
+        self._remove(parent, row, row, lambda: self.tree.remove_folder(folder))
+        stack = [folder]
+        while stack: # Forget fetch state of the removed subtree
+            node = stack.pop()
+            self._fetched.pop(node, None)
+            stack.extend(node.folders)
+        self.dirty = True
+        return True
+
+    def move_folder(self, folder, target) -> bool:
+        if not self.tree.can_move_folder(folder, target):
+            return False
+        source, old_row = folder.parent, folder.row()
+        self._remove(source, old_row, old_row, lambda: self.tree.detach_folder(folder))
+        new_row = len(target.folders)
+        self._insert(target, new_row, 1, lambda: self.tree.attach_folder(folder, target))
+        self.dirty = True
+        return True
+
+    def move_files(self, names, target) -> int:
+        """Move files into ``target``, one announcement per contiguous block of rows; returns how many moved."""
+        names = [name for name in names if self.tree.folder_of(name) not in (None, target)]
+        if not names:
+            return 0
+        for folder, first, last in self.tree.removal_runs(names):
+            self._remove(folder, first, last, lambda f=folder, a=first, b=last: self.tree.remove_rows(f, a, b))
+        for row, block in self.tree.insertion_blocks(target, names):
+            self._insert(target, row, len(block), lambda r=row, b=block: self.tree.insert_block(target, r, b))
+        self.dirty = True
+        return len(names)
+
+    # --- Drag and drop (internal moves) ---
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def supportedDragActions(self):
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes):
+        folders, files = [], []
+        for index in indexes:
+            if index.isValid() and index.column() == 0:
+                _, folder, name = self._item(index)
+                if folder is not None:
+                    folders.append(list(folder.path))
+                else:
+                    files.append(name)
+        mime = QMimeData()
+        mime.setData(self.MIME_TYPE, json.dumps({"folders": folders, "files": files}).encode("utf-8"))
+        return mime
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action != Qt.MoveAction or not data.hasFormat(self.MIME_TYPE):
+            return False
+        payload = json.loads(bytes(data.data(self.MIME_TYPE)).decode("utf-8"))
+        target = self.drop_folder(parent)
+        folders = [self.tree.folder_at(path) for path in payload.get("folders", [])]
+        folders = [folder for folder in folders if folder is not None]
+        selected = set(folders)
+        moved_folders = 0
+        for folder in folders:
+            # A folder moves with a selected ancestor; it is not moved on its own
+            ancestor = folder.parent
+            while ancestor is not None and ancestor not in selected:
+                ancestor = ancestor.parent
+            if ancestor is None and self.move_folder(folder, target):
+                moved_folders += 1
+        moved_files = self.move_files(payload.get("files", []), target)
+        where = "/".join(target.path) or "top level"
+        if moved_folders or moved_files:
+            self.message.emit(f"Moved {moved_files} file(s) and {moved_folders} folder(s) to '{where}'")
+        elif folders:
+            self.message.emit(f"Cannot move into '{where}': same place, a folder into itself, or a name clash")
+        # The move is done here; returning False keeps the view from also removing the dragged rows
+        return False
@@ -2,19 +2,27 @@ import os
 import platform
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton,  QScrollArea,
-    QFileDialog, QInputDialog, QProgressDialog, QTreeWidget, QTreeWidgetItem,
+    QLabel, QPushButton,
+    QFileDialog, QInputDialog, QProgressDialog, QTreeView, QHeaderView,
     QSizePolicy, QFrame, QSpacerItem, QStyle,QMenu
 )
-from PyQt5.QtCore import Qt, QThread, QUrl, QTimer
+from PyQt5.QtCore import Qt, QThread, QUrl, QTimer, QModelIndex
 from PyQt5.QtGui import QFont, QDesktopServices
 
 from pyQT.Helpers import show_error_message,show_info_message,show_warning_message,ask_yes_no
+from pyQT.Models import AnalysisTreeModel, StructureItemModel
+from scripts.editable_structure import EditableStructure
+from scripts.log_setup import get_logger
 
 
 
 from constants.app_constants import APP_NAME
 
+# Resolution of the determinate progress bars
+PROGRESS_STEPS = 1000
+
+log = get_logger("pages")
+
 class BasePage(QWidget):
     """Base class for pages."""
     def __init__(self, controller):
@@ -39,6 +47,38 @@ class BasePage(QWidget):
         """Placeholder for UI setup in subclasses."""
         pass
 
+    def update_progress_status(self, event):
+        """Show a worker's ProgressEvent in this page's progress dialog.
+
+        Events arrive already coalesced (scripts/progress.py), so there is no
+        processEvents() here; the bar is determinate whenever the stage has a total.
+        """
+        dialog = getattr(self, "progress_dialog", None)
+        if dialog is None or not dialog.isVisible() or dialog.wasCanceled():
+            return
+        dialog.setLabelText(event.describe())
+        fraction = event.fraction
+        if fraction is None:
+            dialog.setRange(0, 0) # Busy indicator while the total is unknown
+        else:
+            dialog.setRange(0, PROGRESS_STEPS) # Fixed scale: byte totals overflow a C int
+            dialog.setValue(int(fraction * PROGRESS_STEPS))
+
+    def close_progress_dialog(self):
+        """Close the progress dialog without cancelling the worker.
+
+        QProgressDialog.close() emits ``canceled``, which is wired to the
+        worker's cancel; only a click on Cancel should stop the run.
+        """
+        dialog = getattr(self, "progress_dialog", None)
+        if dialog is None:
+            return
+        try:
+            dialog.canceled.disconnect()
+        except TypeError:
+            pass # Nothing connected
+        dialog.close()
+
     def on_show(self):
         """Called when the page is shown. Subclasses can override."""
         pass
@@ -152,13 +192,8 @@ class StartPage(BasePage):
         # Start the thread
         self.analysis_thread.start()
 
-    def update_progress_status(self, message):
-        if self.progress_dialog:
-            self.progress_dialog.setLabelText(message)
-            QApplication.processEvents() # Keep dialog responsive
-
     def analysis_complete(self, success, analysis_result, generated_structure, summary):
-        self.progress_dialog.close()
+        self.close_progress_dialog()
         self.analysis_thread.quit()
         self.analysis_thread.wait()
 
@@ -180,33 +215,61 @@ class StartPage(BasePage):
         # Error messages handled by analysis_error or specific checks in worker
 
     def analysis_error(self, error_message):
-         # This catches errors emitted by the worker specifically
-        if self.progress_dialog and self.progress_dialog.isVisible():
-            self.progress_dialog.close()
-        if self.analysis_thread and self.analysis_thread.isRunning():
-            # Note: Forcefully terminating threads is generally discouraged.
-            # A better approach would involve the worker checking a flag.
-            # For simplicity here, we just quit the thread. The worker might finish.
-            self.analysis_thread.quit()
-            self.analysis_thread.wait()
-
-        self.analyze_btn.setText("Analyze Folder")
-        self.analyze_btn.setEnabled(bool(self.controller.folder_path))
+        # Fatal errors are followed by finished (analysis_complete closes the dialog and the thread);
+        # after a recoverable one (e.g. the LLM failed) the worker carries on with the by-type results
         show_error_message("Analysis Error", error_message)
 
 
+    def run_recovery(self, jobs):
+        """Resume or roll back interrupted organizations, one (run, resume) job after another."""
+        self.recovery_jobs = list(jobs)
+        self.analyze_btn.setEnabled(False)
+        self.start_next_recovery()
+
+    def start_next_recovery(self):
+        if not self.recovery_jobs:
+            self.recovery_thread = None
+            self.analyze_btn.setEnabled(bool(self.controller.folder_path))
+            return
+        journal_run, resume = self.recovery_jobs.pop(0)
+        self.progress_dialog = QProgressDialog(f"Recovering '{journal_run.root}'...", "", 0, 0, self)
+        self.progress_dialog.setCancelButton(None) # Journaled moves must run to the end
+        self.progress_dialog.setWindowTitle("Recovering Interrupted Organization")
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.show()
+
+        self.recovery_thread = QThread()
+        from pyQT.Workers import RecoveryWorker
+        self.recovery_worker = RecoveryWorker(journal_run, resume)
+        self.recovery_worker.moveToThread(self.recovery_thread)
+        self.recovery_worker.progress.connect(self.update_progress_status)
+        self.recovery_worker.finished.connect(self.recovery_complete)
+        self.recovery_thread.started.connect(self.recovery_worker.run)
+        self.recovery_thread.finished.connect(self.recovery_thread.deleteLater)
+        self.recovery_thread.start()
+
+    def recovery_complete(self, action, errors):
+        self.close_progress_dialog()
+        self.recovery_thread.quit()
+        self.recovery_thread.wait()
+        self.recovery_worker = None
+        if errors:
+            show_warning_message("Recovery with Issues", action + "\n\n" + "\n".join(errors[:10]))
+        else:
+            show_info_message("Recovery Complete", action)
+        self.start_next_recovery()
+
     def cancel_analysis(self):
-        print("Analysis cancelled by user.")
-        if self.analysis_thread and self.analysis_thread.isRunning():
-            # Note: Forcefully terminating threads is generally discouraged.
-            # A better approach would involve the worker checking a flag.
-            # For simplicity here, we just quit the thread. The worker might finish.
-            self.analysis_thread.quit()
-            self.analysis_thread.wait()
-        if self.progress_dialog:
-             self.progress_dialog.close()
-        self.analyze_btn.setText("Analyze Folder")
-        self.analyze_btn.setEnabled(bool(self.controller.folder_path))
+        log.info("Cancelling analysis...")
+        # The worker stops at its next check (in-flight local generations abort too) and then
+        # emits finished, which closes the dialog and the thread in analysis_complete. Chunks merged
+        # before the cancel come back as a successful, partial result and are shown on AnalyzePage.
+        worker = getattr(self, "analysis_worker", None)
+        if worker is not None:
+            worker.cancel()
+        self.analyze_btn.setText("Cancelling...")
 
 
 class AnalyzePage(BasePage):
@@ -226,14 +289,15 @@ class AnalyzePage(BasePage):
         main_layout.addLayout(header_layout)
 
         # --- Results Area ---
-        self.results_scroll_area = QScrollArea()
-        self.results_scroll_area.setWidgetResizable(True)
-        self.results_scroll_area.setFrameShape(QFrame.StyledPanel)
-        self.results_widget = QWidget() # Content widget for scroll area
-        self.results_layout = QVBoxLayout(self.results_widget) # Layout for content
-        self.results_layout.setAlignment(Qt.AlignTop) # Add items to the top
-        self.results_scroll_area.setWidget(self.results_widget)
-        main_layout.addWidget(self.results_scroll_area, 1) # Give scroll area stretch factor
+        # Model/view tree: rows are created lazily as they scroll into view (see pyQT/Models.py)
+        self.results_view = QTreeView()
+        self.results_view.setFont(self.FONT_BODY)
+        self.results_view.setUniformRowHeights(True) # Lets the view skip measuring every row
+        self.results_view.setFrameShape(QFrame.StyledPanel)
+        self.results_view.setEditTriggers(QTreeView.NoEditTriggers)
+        main_layout.addWidget(self.results_view, 1) # Give the tree stretch factor
+        self.view_request = 0 # Latest AnalysisViewWorker request; older results are ignored
+        self.view_jobs = {} # request id -> (thread, worker), kept alive until the thread stops
 
         # --- Summary Label ---
         self.summary_label = QLabel("Analyzing...")
@@ -275,23 +339,17 @@ class AnalyzePage(BasePage):
 
         self.setLayout(main_layout)
 
-    def clear_layout(self, layout):
-        """Removes all widgets from a layout."""
-        if layout is not None:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.deleteLater()
-                else:
-                    sub_layout = item.layout()
-                    if sub_layout is not None:
-                        self.clear_layout(sub_layout)
+    def clear_results(self):
+        """Drop the current tree model (and ignore a view still being prepared)."""
+        self.view_request += 1
+        old_model = self.results_view.model()
+        self.results_view.setModel(None)
+        if old_model is not None:
+            old_model.deleteLater()
 
     def populate_analysis(self):
-        """Populate the scrollable area with analysis results."""
-        # Clear previous results
-        self.clear_layout(self.results_layout)
+        """Show the analysis results; they are sorted on a worker thread, then shown lazily."""
+        self.clear_results()
 
         # Update path subtitle
         path = self.controller.folder_path
@@ -303,11 +361,7 @@ class AnalyzePage(BasePage):
         has_results = bool(self.controller.analysis_result or self.controller.generated_structure)
 
         if not has_results:
-            no_files_label = QLabel("No files found or analysis failed.")
-            no_files_label.setFont(self.FONT_BODY)
-            # no_files_label.setStyleSheet("color: gray;")
-            self.results_layout.addWidget(no_files_label, alignment=Qt.AlignCenter)
-            self.summary_label.setText("No files to organize.")
+            self.summary_label.setText("No files found or analysis failed.")
             self.edit_btn.setEnabled(False)
             self.continue_btn.setEnabled(False)
             self.organize_btn.setEnabled(False)
@@ -318,74 +372,40 @@ class AnalyzePage(BasePage):
         self.continue_btn.setEnabled(True)
         self.organize_btn.setEnabled(True)
 
-        # --- Display Generated Structure (if available) ---
-        if self.controller.generated_structure:
-            structure_label = QLabel("AI-Generated Organization Structure")
-            structure_label.setFont(self.FONT_SUBTITLE)
-            self.results_layout.addWidget(structure_label)
-
-            def display_structure_recursive(layout, structure, level=0):
-                indent = "    " * level
-                for item, content in sorted(structure.items()):
-                    is_folder = isinstance(content, dict)
-                    prefix = "📁 " if is_folder else "📄 "
-
-                    item_label_text = f"{indent}{prefix}{item}"
-                    item_label = QLabel(item_label_text)
-                    item_label.setFont(self.FONT_BODY)
-                    layout.addWidget(item_label)
-
-                    if isinstance(content, dict):
-                        display_structure_recursive(layout, content, level + 1)
-                    elif isinstance(content, list): # List of files
-                         for file_item in sorted(content):
-                              file_label = QLabel(f"{indent}    📄 {file_item}")
-                              file_label.setFont(self.FONT_BODY)
-                              layout.addWidget(file_label)
-                    elif isinstance(content, str): # Single file
-                         file_label = QLabel(f"{indent}    📄 {content}")
-                         file_label.setFont(self.FONT_BODY)
-                         layout.addWidget(file_label)
-
-
-            display_structure_recursive(self.results_layout, self.controller.generated_structure)
-
-            # Add a separator
-            separator = QFrame()
-            separator.setFrameShape(QFrame.HLine)
-            separator.setFrameShadow(QFrame.Sunken)
-            self.results_layout.addWidget(separator)
-
-            current_label = QLabel("Current Files by Type (For Reference)")
-            current_label.setFont(self.FONT_SUBTITLE)
-            self.results_layout.addWidget(current_label)
-
-        # --- Display Analysis by Extension (Always show for reference or if no LLM) ---
-        if self.controller.analysis_result:
-            sorted_categories = sorted(self.controller.analysis_result.keys())
-            for category in sorted_categories:
-                files = self.controller.analysis_result[category]
-                if not files: continue
-
-                cat_label = QLabel(f"{category} ({len(files)})")
-                cat_label.setFont(self.FONT_BODY_BOLD)
-                self.results_layout.addWidget(cat_label)
-
-                for file in sorted(files):
-                    file_label = QLabel(f"    {file}") # Indent files
-                    file_label.setFont(self.FONT_BODY)
-                    self.results_layout.addWidget(file_label)
-                self.results_layout.addSpacing(5) # Add space between categories
-        elif not self.controller.generated_structure:
-             # Only show this if there's no generated structure AND no analysis result (should be caught earlier)
-             no_files_label = QLabel("No analysis results available.")
-             no_files_label.setFont(self.FONT_BODY)
-             self.results_layout.addWidget(no_files_label)
-
-
-        # Update summary text
+        # --- Sort off the UI thread; the model is built when the view is ready ---
+        self.summary_label.setText("Preparing view...")
+        request_id = self.view_request
+        thread = QThread()
+        from pyQT.Workers import AnalysisViewWorker
+        worker = AnalysisViewWorker(request_id, self.controller.generated_structure,
+                                    self.controller.analysis_result)
+        worker.moveToThread(thread)
+        worker.finished.connect(self.view_ready)
+        worker.finished.connect(thread.quit)
+        thread.started.connect(worker.run)
+        thread.finished.connect(lambda: self.view_job_done(request_id))
+        self.view_jobs[request_id] = (thread, worker)
+        thread.start()
+
+    def view_job_done(self, request_id):
+        job = self.view_jobs.pop(request_id, None)
+        if job is not None:
+            # finished is emitted just before the thread exits; let it exit before the last reference goes
+            job[0].wait()
+
+    def view_ready(self, request_id, view):
+        """Install the sorted view (unless a newer analysis replaced it meanwhile)."""
+        if request_id != self.view_request:
+            return
+        model = AnalysisTreeModel(view, self)
+        self.results_view.setModel(model)
+        header = self.results_view.header()
+        header.setStretchLastSection(False)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        if model.rowCount():
+            self.results_view.expand(model.index(0, 0)) # Open the first section (AI structure if present)
         self.summary_label.setText(self.controller.current_analysis_summary)
-        self.results_widget.adjustSize() # Adjust content widget size
 
     def edit_structure(self):
         if not (self.controller.analysis_result or self.controller.generated_structure):
@@ -421,7 +441,6 @@ class EditStructurePage(BasePage):
         main_layout.addLayout(header_layout)
 
         # --- Main Content Area (Tree View Only) ---
-        # Using QTreeWidget simplifies editing significantly
         content_layout = QVBoxLayout()
 
         # Header for Tree
@@ -447,23 +466,24 @@ class EditStructurePage(BasePage):
         self.status_label = QLabel("")
         self.status_label.setFont(self.FONT_SMALL)
         content_layout.addWidget(self.status_label)
-
-        # Tree Widget
-        self.structure_tree = QTreeWidget()
-        self.structure_tree.setHeaderLabels(["Category / File"])
+        self.status_timer = QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.timeout.connect(lambda: self.status_label.setText(""))
+
+        # Tree view over a StructureItemModel (set in load_structure); edits update only the rows they touch
+        self.structure_tree = QTreeView()
+        self.structure_tree.setUniformRowHeights(True)
+        self.structure_tree.setEditTriggers(QTreeView.EditKeyPressed | QTreeView.SelectedClicked)
         self.structure_tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.structure_tree.customContextMenuRequested.connect(self.show_context_menu)
-        self.structure_tree.itemChanged.connect(self.handle_item_rename) # Handle renaming via editing
 
-        # Enable drag and drop
+        # Enable drag and drop; the model performs the move itself
         self.structure_tree.setDragEnabled(True)
         self.structure_tree.setAcceptDrops(True)
         self.structure_tree.setDropIndicatorShown(True)
-        self.structure_tree.setDragDropMode(QTreeWidget.InternalMove)  # Allow moving items within the tree
-        self.structure_tree.setSelectionMode(QTreeWidget.ExtendedSelection)  # Allow selecting multiple items
-
-        # Connect drag and drop signal
-        self.structure_tree.model().rowsInserted.connect(self.handle_item_moved)
+        self.structure_tree.setDragDropMode(QTreeView.InternalMove)
+        self.structure_tree.setDefaultDropAction(Qt.MoveAction)
+        self.structure_tree.setSelectionMode(QTreeView.ExtendedSelection)  # Allow selecting multiple items
 
         content_layout.addWidget(self.structure_tree)
 
@@ -474,7 +494,7 @@ class EditStructurePage(BasePage):
         back_btn = QPushButton("← Back")
         back_btn.setFont(self.FONT_BUTTON)
         back_btn.setFixedWidth(120)
-        back_btn.clicked.connect(lambda: self.controller.show_page("AnalyzePage"))
+        back_btn.clicked.connect(self.go_back)
 
         self.confirm_btn = QPushButton("Continue to Organize →")
         self.confirm_btn.setFont(self.FONT_BUTTON)
@@ -488,295 +508,117 @@ class EditStructurePage(BasePage):
 
         self.setLayout(main_layout)
 
-        # Flag to prevent recursive renaming signal
-        self._is_renaming = False
-
+        self.model = None
+        self._loaded_from = (None, None) # (generated_structure, analysis_result) the model was built from
 
     def load_structure(self):
-        """Load the structure into the QTreeWidget."""
-        self.structure_tree.clear()
-        source_structure = self.controller.generated_structure if self.controller.generated_structure else self.controller.analysis_result
-        use_llm_structure = bool(self.controller.generated_structure)
-
+        """Build the model from the controller's structure, unless it is already showing that structure."""
+        generated = self.controller.generated_structure
+        analysis = self.controller.analysis_result
+        if self.model is not None and self._loaded_from[0] is generated and self._loaded_from[1] is analysis:
+            return # Unchanged since the last load or commit; keep the view (and its expanded folders)
+
+        source_structure = generated if generated else analysis
+        self.set_model(StructureItemModel(EditableStructure.from_structure(source_structure or {}), self))
+        self._loaded_from = (generated, analysis)
         if not source_structure:
-             # Should not happen if called correctly, but handle defensively
-             self.structure_tree.addTopLevelItem(QTreeWidgetItem(["No structure to display"]))
-             return
-
-        def add_items_recursive(parent_item, structure):
-            if isinstance(structure, dict):
-                for key, value in sorted(structure.items()):
-                    # Special handling for _files_ key - don't show it in the UI
-                    if key == "_files_":
-                        # Add files directly to parent_item without showing "_files_" folder
-                        if isinstance(value, list):
-                            for filename in sorted(value):
-                                file_item = QTreeWidgetItem([filename])
-                                file_item.setData(0, Qt.UserRole, {"type": "file", "name": filename})
-                                # Enable dragging but disable editing for files
-                                file_item.setFlags(file_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                                file_item.setIcon(0, self.style().standardIcon(getattr(QStyle, "SP_FileIcon", QStyle.SP_CustomBase)))
-                                parent_item.addChild(file_item)
-                        continue  # Skip creating a folder for _files_
-
-                    # Create folder item for regular folders
-                    folder_item = QTreeWidgetItem([key])
-                    folder_item.setData(0, Qt.UserRole, {"type": "folder", "path": key}) # Store type and name
-                    # Allow renaming, dragging, and dropping
-                    folder_item.setFlags(folder_item.flags() | Qt.ItemIsEditable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                    folder_item.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon)) # Use folder icon
-                    parent_item.addChild(folder_item)
-                    # Recursively add children
-                    add_items_recursive(folder_item, value)
-            elif isinstance(structure, list):
-                 # Add files under the current parent folder
-                 for filename in sorted(structure):
-                      file_item = QTreeWidgetItem([filename])
-                      file_item.setData(0, Qt.UserRole, {"type": "file", "name": filename}) # Store type and name
-                      # Enable dragging but disable editing for files
-                      file_item.setFlags(file_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                      file_item.setIcon(0, self.style().standardIcon(getattr(QStyle, "SP_FileIcon", QStyle.SP_CustomBase)))
-                      parent_item.addChild(file_item)
-            elif isinstance(structure, str): # Handle single file string as value
-                 file_item = QTreeWidgetItem([structure])
-                 file_item.setData(0, Qt.UserRole, {"type": "file", "name": structure})
-                 # Enable dragging but disable editing for files
-                 file_item.setFlags(file_item.flags() | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                 file_item.setIcon(0, self.style().standardIcon(getattr(QStyle, "SP_FileIcon", QStyle.SP_CustomBase)))
-                 parent_item.addChild(file_item)
-
-
-        # If using analysis_result (flat structure), create top-level items for categories
-        if not use_llm_structure:
-             for category, files in sorted(source_structure.items()):
-                  category_item = QTreeWidgetItem([category])
-                  category_item.setData(0, Qt.UserRole, {"type": "folder", "path": category})
-                  # Allow renaming, dragging, and dropping
-                  category_item.setFlags(category_item.flags() | Qt.ItemIsEditable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-                  category_item.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
-                  self.structure_tree.addTopLevelItem(category_item)
-                  add_items_recursive(category_item, files) # Add files under category
-        else:
-             # If using LLM structure, add items starting from the root
-             add_items_recursive(self.structure_tree.invisibleRootItem(), source_structure)
-
-        self.structure_tree.expandAll() # Expand tree initially
+            self.show_status("No structure to display")
+            return
+        # Expand the top level only; deeper folders load their rows when opened
+        for row in range(self.model.rowCount()):
+            self.structure_tree.expand(self.model.index(row, 0))
+
+    def set_model(self, model):
+        old_model = self.model
+        self.model = model
+        self.structure_tree.setModel(model)
+        if model is not None:
+            model.message.connect(self.show_status)
+        if old_model is not None:
+            old_model.deleteLater()
+
+    def clear_structure(self):
+        """Drop the model (used when the app resets)."""
+        self.set_model(None)
+        self._loaded_from = (None, None)
+        self.status_label.setText("")
+
+    def show_status(self, text):
+        self.status_label.setText(text)
+        self.status_timer.start(3000)
 
     def show_context_menu(self, position):
         """Show context menu for tree items."""
-        item = self.structure_tree.itemAt(position)
-        if not item:
+        if self.model is None:
+            return
+        index = self.structure_tree.indexAt(position)
+        if not index.isValid() or index.data(Qt.UserRole) != "folder":
             return
 
         menu = QMenu()
-        item_data = item.data(0, Qt.UserRole)
-        item_type = item_data.get("type") if item_data else None
-
-        if item_type == "folder":
-            rename_action = menu.addAction("Rename Category")
-            rename_action.triggered.connect(lambda: self.rename_item(item))
-            delete_action = menu.addAction("Delete Category")
-            delete_action.triggered.connect(lambda: self.delete_item(item))
-            add_subfolder_action = menu.addAction("Add Subfolder")
-            add_subfolder_action.triggered.connect(lambda: self.add_subfolder(item))
-        # Add actions for files if needed (e.g., move to different category)
+        rename_action = menu.addAction("Rename Category")
+        rename_action.triggered.connect(lambda: self.structure_tree.edit(index))
+        delete_action = menu.addAction("Delete Category")
+        delete_action.triggered.connect(lambda: self.delete_item(index))
+        add_subfolder_action = menu.addAction("Add Subfolder")
+        add_subfolder_action.triggered.connect(lambda: self.add_subfolder(index))
 
         menu.exec_(self.structure_tree.viewport().mapToGlobal(position))
 
-    def rename_item(self, item):
-        """Initiate renaming of the selected item."""
-        self.structure_tree.editItem(item, 0) # Start editing the item text
-
-    def handle_item_rename(self, item, column):
-        """Handle the actual renaming after editing is finished."""
-        if self._is_renaming: # Prevent recursion from setData
+    def delete_item(self, index):
+        """Delete the selected category (its files drop out of the structure, not off the disk)."""
+        category_name = index.data(Qt.DisplayRole)
+        if not ask_yes_no("Confirm Delete", f"Delete category '{category_name}'?\nFiles within will be lost in this view (but not deleted from disk yet)."):
              return
-        if column != 0:
+        if self.model.remove_folder(index):
+            self.show_status(f"Category '{category_name}' removed from structure.")
+
+    def add_subfolder(self, parent_index):
+         """Adds a new subfolder under the selected folder."""
+         parent_name = parent_index.data(Qt.DisplayRole)
+         new_name, ok = QInputDialog.getText(self, "Add Subfolder", f"Enter name for new subfolder under '{parent_name}':")
+         if not (ok and new_name.strip()):
+             log.debug("Subfolder addition cancelled or empty name.")
              return
-
-        item_data = item.data(0, Qt.UserRole)
-        if not item_data or item_data.get("type") != "folder":
-             return # Only handle folder renames here
-
-        old_name = item_data.get("path") # Get the original name/path stored
-        new_name = item.text(0).strip()
-
-        if not new_name or new_name == old_name:
-            # If name is empty or unchanged, revert
-            self._is_renaming = True
-            item.setText(0, old_name)
-            self._is_renaming = False
-            return
-
-        print(f"Attempting rename: '{old_name}' -> '{new_name}'")
-
-        # --- Update the underlying data structure ---
-        # This is complex because we need to find the item in the nested dict/list
-        # and update the key or value. This is a limitation of directly mapping
-        # a mutable dict to a tree view without a proper model.
-        # For simplicity, we'll rebuild the structure from the tree after rename.
-        # A more robust solution uses QAbstractItemModel.
-
-        # Rebuild the internal structure from the tree (Simplified approach)
-        self.update_structure_from_tree()
-
-        # Refresh the tree to ensure consistency (might be redundant but safer)
-        self.load_structure()
-
-        show_info_message("Renamed", f"Category '{old_name}' renamed to '{new_name}'.")
-
-
-    def delete_item(self, item):
-        """Delete the selected category item."""
-        item_data = item.data(0, Qt.UserRole)
-        if not item_data or item_data.get("type") != "folder":
-            return
-
-        category_name = item.text(0) # Get current display name
-
-        if not ask_yes_no("Confirm Delete", f"Delete category '{category_name}'?\nFiles within will be lost in this view (but not deleted from disk yet)."):
+         new_name = new_name.strip()
+         if self.model.drop_folder(parent_index).folder(new_name) is not None:
+             show_warning_message("Exists", f"A subfolder named '{new_name}' already exists here.")
              return
-
-        # Remove item from tree
-        parent = item.parent() or self.structure_tree.invisibleRootItem()
-        parent.removeChild(item)
-
-        # Update the internal structure based on the modified tree
-        self.update_structure_from_tree()
-
-        show_info_message("Deleted", f"Category '{category_name}' removed from structure.")
-        # Note: Files are not moved to "Others" in this simplified tree approach.
-        # The organization step will handle files based on the *final* structure.
-
-    def add_subfolder(self, parent_item):
-         """Adds a new subfolder under the selected item."""
-         item_data = parent_item.data(0, Qt.UserRole)
-         if not item_data or item_data.get("type") != "folder":
-             return # Can only add subfolders to folders
-
-         new_name, ok = QInputDialog.getText(self, "Add Subfolder", f"Enter name for new subfolder under '{parent_item.text(0)}':")
-         if ok and new_name.strip():
-             new_name = new_name.strip()
-
-             # Check if subfolder with this name already exists
-             for i in range(parent_item.childCount()):
-                 if parent_item.child(i).text(0) == new_name:
-                     show_warning_message("Exists", f"A subfolder named '{new_name}' already exists here.")
-                     return
-
-             # Create new tree item
-             new_folder_item = QTreeWidgetItem([new_name])
-             new_folder_item.setData(0, Qt.UserRole, {"type": "folder", "path": new_name}) # Path relative to parent for now
-             # Allow renaming, dragging, and dropping
-             new_folder_item.setFlags(new_folder_item.flags() | Qt.ItemIsEditable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-             new_folder_item.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
-             parent_item.addChild(new_folder_item)
-             parent_item.setExpanded(True)
-
-             # Update the internal structure
-             self.update_structure_from_tree()
-             print(f"Added subfolder: {new_name}")
-         else:
-             print("Subfolder addition cancelled or empty name.")
-
+         self.structure_tree.expand(parent_index)
+         self.model.add_folder(parent_index, new_name)
+         self.show_status(f"Added subfolder '{new_name}'.")
 
     def _add_new_category(self):
         """Add a new top-level category."""
+        if self.model is None:
+            self.load_structure()
         new_name, ok = QInputDialog.getText(self, "New Category", "Enter name for the new top-level category:")
-        if ok and new_name.strip():
-            new_name = new_name.strip()
-
-            # Check if top-level category exists
-            for i in range(self.structure_tree.topLevelItemCount()):
-                 if self.structure_tree.topLevelItem(i).text(0) == new_name:
-                      show_warning_message("Exists", f"A top-level category named '{new_name}' already exists.")
-                      return
-
-            # Add item to tree
-            new_item = QTreeWidgetItem([new_name])
-            new_item.setData(0, Qt.UserRole, {"type": "folder", "path": new_name})
-            # Allow renaming, dragging, and dropping
-            new_item.setFlags(new_item.flags() | Qt.ItemIsEditable | Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
-            new_item.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
-            new_item.setTextAlignment(0, Qt.AlignVCenter | Qt.AlignLeft)
-            self.structure_tree.addTopLevelItem(new_item)
-            self.structure_tree.setColumnWidth(0, 250)
-            # Update internal structure
-            self.update_structure_from_tree()
-            show_info_message("Added", f"Category '{new_name}' added.")
-        else:
-             print("Category addition cancelled or empty name.")
-
+        if not (ok and new_name.strip()):
+             log.debug("Category addition cancelled or empty name.")
+             return
+        new_name = new_name.strip()
+        if self.model.tree.root.folder(new_name) is not None:
+            show_warning_message("Exists", f"A top-level category named '{new_name}' already exists.")
+            return
+        index = self.model.add_folder(QModelIndex(), new_name)
+        if index.isValid():
+            self.structure_tree.scrollTo(index)
+        self.show_status(f"Category '{new_name}' added.")
 
     def update_structure_from_tree(self):
-        """Rebuilds the controller's generated_structure from the QTreeWidget."""
-        # We'll build the structure directly in the temp_root_dict variable
-
-        def build_dict_recursive(parent_dict, tree_item):
-            has_files = False
-            files_list = []
-
-            # First pass: collect all files and create subfolders
-            for i in range(tree_item.childCount()):
-                child_item = tree_item.child(i)
-                item_data = child_item.data(0, Qt.UserRole)
-                item_name = child_item.text(0)
-
-                # Skip items with no data or invalid names
-                if not item_data or not item_name or not item_name.strip():
-                    continue
-
-                item_type = item_data.get("type")
-
-                # Only process items with a valid type
-                if item_type == "folder":
-                    # Create a new dict for the folder and recurse
-                    sub_dict = {}
-                    parent_dict[item_name] = sub_dict
-                    build_dict_recursive(sub_dict, child_item)
-                elif item_type == "file":
-                    # Only add files with valid names
-                    if item_name and item_name.strip():
-                        has_files = True
-                        files_list.append(item_name)
-
-            # Only add _files_ if there are actual files and this isn't a renamed folder
-            if has_files and files_list and len(files_list) > 0:
-                parent_dict["_files_"] = files_list
-
-
-        # Build the structure starting from the invisible root
-        root = self.structure_tree.invisibleRootItem()
-        temp_root_dict = {}
-        build_dict_recursive(temp_root_dict, root)
-
-        # Clean up the temporary structure by removing empty folders and _files_ entries
-        def clean_structure(structure):
-            if isinstance(structure, dict):
-                # Remove empty _files_ lists
-                if "_files_" in structure and (not structure["_files_"] or len(structure["_files_"]) == 0):
-                    del structure["_files_"]
-
-                # Recursively clean all sub-dictionaries
-                for key, value in list(structure.items()):
-                    if isinstance(value, dict):
-                        clean_structure(value)
-                        # If the sub-dictionary became empty after cleaning, remove it
-                        if not value:
-                            del structure[key]
-
-        # Apply cleaning to remove empty folders and _files_ entries
-        clean_structure(temp_root_dict)
-
-        # The final structure is the cleaned version
-        final_structure = temp_root_dict
-
-        print("Rebuilt structure from tree:", final_structure)
-        self.controller.generated_structure = final_structure
+        """Write the edited structure back to the controller (only if something was edited)."""
+        if self.model is None or not self.model.dirty:
+            return
+        self.controller.generated_structure = self.model.to_structure()
         # Clear analysis result if structure was edited
         self.controller.analysis_result = {}
-        # If the original was analysis_result, update that instead/as well? Needs clarification.
-        # For now, always update generated_structure, assuming user edits create the desired final form.
+        self.model.dirty = False
+        self._loaded_from = (self.controller.generated_structure, self.controller.analysis_result)
+        log.info(f"Updated structure from editor: {len(self.model.tree)} files")
+
+    def go_back(self):
+        self.update_structure_from_tree() # Keep edits when going back to the analysis page
+        self.controller.show_page("AnalyzePage")
 
     def confirm(self):
         """Update structure from tree and proceed to confirmation."""
@@ -786,26 +628,8 @@ class EditStructurePage(BasePage):
              return
         self.controller.show_page("ConfirmPage")
 
-    def handle_item_moved(self, *_):
-        """Handle when an item is moved via drag and drop
-
-        Parameters are required by the signal but not used in this implementation.
-        We use *_ to indicate unused variable-length arguments.
-        """
-        # Wait a moment for the UI to update before rebuilding the structure
-        QTimer.singleShot(100, self.update_structure_from_tree)
-
-        # Update status label
-        self.status_label.setText("Item moved - structure updated")
-
-        # Clear status after a delay
-        QTimer.singleShot(3000, lambda: self.status_label.setText(""))
-
-        # Log to console
-        print("Item moved via drag and drop - structure will be updated")
-
     def on_show(self):
-        """Reload structure when page is shown."""
+        """Load the structure when the page is shown (no-op if it has not changed)."""
         self.load_structure()
 
 
@@ -874,6 +698,13 @@ class ConfirmPage(BasePage):
         self.confirm_btn.setEnabled(False)
         self.confirm_btn.setText("Organizing...")
 
+        # Progress dialog whose Cancel stops the worker between moves (finished moves stay undoable)
+        self.progress_dialog = QProgressDialog("Organizing files...", "Cancel", 0, 0, self)
+        self.progress_dialog.setWindowTitle("Organizing")
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+
         # Setup Worker Thread
         self.organize_thread = QThread()
         #============Import Main Agent================#
@@ -882,15 +713,19 @@ class ConfirmPage(BasePage):
         self.organize_worker.moveToThread(self.organize_thread)
 
         # Connect signals
+        self.organize_worker.progress.connect(self.update_progress_status)
         self.organize_worker.finished.connect(self.organize_complete)
         self.organize_worker.error.connect(self.organize_error)
         self.organize_thread.started.connect(self.organize_worker.run)
         self.organize_thread.finished.connect(self.organize_thread.deleteLater)
+        self.progress_dialog.canceled.connect(self.organize_worker.cancel)
 
         # Start
+        self.progress_dialog.show()
         self.organize_thread.start()
 
      def organize_complete(self, success, summary_message, recorded_moves):
+        self.close_progress_dialog()
         self.organize_thread.quit()
         self.organize_thread.wait()
         self.confirm_btn.setText("Yes, Organize Now")
@@ -898,6 +733,7 @@ class ConfirmPage(BasePage):
 
         self.controller.organization_summary = summary_message # Store summary
         self.controller.last_organization_moves = recorded_moves # Store moves for undo
+        self.controller.folder_snapshot = None # Folder contents changed; next analysis rescans
 
         if success:
             # Update CompletePage message before showing
@@ -907,11 +743,7 @@ class ConfirmPage(BasePage):
         # Error messages handled by organize_error or specific checks in worker
 
      def organize_error(self, error_message):
-        if self.organize_thread and self.organize_thread.isRunning():
-            self.organize_thread.quit()
-            self.organize_thread.wait()
-        self.confirm_btn.setText("Yes, Organize Now")
-        self.confirm_btn.setEnabled(True)
+        # Always followed by finished; organize_complete closes the dialog and the thread
         show_error_message("Organization Error", error_message)
         # Stay on ConfirmPage after error
 
@@ -139,24 +139,24 @@ class ThemeManager:
         }}
 
         /* Tree and List Views */
-        QTreeWidget, QListWidget {{
+        QTreeView, QListWidget {{
             background-color: {c['bg_secondary']};
             border: none;
             border-radius: 8px;
             padding: 8px;
         }}
 
-        QTreeWidget::item, QListWidget::item {{
+        QTreeView::item, QListWidget::item {{
             padding: 8px;
             margin: 2px 0px;
             border-radius: 4px;
         }}
 
-        QTreeWidget::item:hover, QListWidget::item:hover {{
+        QTreeView::item:hover, QListWidget::item:hover {{
             background-color: {c['highlight']};
         }}
 
-        QTreeWidget::item:selected, QListWidget::item:selected {{
+        QTreeView::item:selected, QListWidget::item:selected {{
             background-color: {c['highlight']};
             color: {c['text_primary']};
         }}
@@ -14,7 +14,6 @@ from PyQt5.QtCore import  pyqtSignal, QObject
 try:
     from langchain_ollama import OllamaLLM
     from langchain_community.llms.llamafile import Llamafile
-    from app import GLOBAL_QWEN_LLM
     from langchain_google_genai import GoogleGenerativeAI
     from langchain.prompts import PromptTemplate
     LANGCHAIN_AVAILABLE = True
@@ -26,17 +25,42 @@ except ImportError:
     class PromptTemplate: pass
     class LLMChain: pass
  
-from scripts.prompt_templates import prompt_template_gemini,prompt_template_local
+from scripts.prompt_templates import prompt_template_gemini,prompt_template_local,static_prefix
+from scripts.folder_index import FolderIndex
+from scripts.structure_tree import StructureTree, count_files, merge_structures
+from scripts.structure_validation import validate_structure
+from scripts.move_plan import compile_move_plan, execute_move_plan
+from scripts.move_journal import MoveJournal, recover_run
+from scripts.llm_cache import cached_invoke, get_llm_cache, parse_json_response
+from scripts.llm_dispatch import dispatch, llm_concurrency
+from scripts.token_budget import budget_for, plan_chunks
+from scripts.name_templates import NameClusters
+from scripts.offline_clustering import NUMPY_AVAILABLE, build_offline_structure
+from scripts.timing import mark
+from scripts.cancellation import CancellationToken, OperationCancelled
+from scripts.analysis_view import ViewFolder, build_analysis_view
+from scripts.progress import BYTES, CLASSIFY, COPY, ORGANIZE, SCAN, STATUS, ProgressReporter
+from scripts.log_setup import QUIET, StageCounters, begin_run, end_run, fields, get_logger
+
+log = get_logger("workers")
+
+# How many times a chunk whose output does not parse is halved and retried
+MAX_CHUNK_SPLITS = 3
 
 class AnalysisWorker(QObject):
     """Worker for running folder analysis in a separate thread."""
-    progress = pyqtSignal(str)
+    progress = pyqtSignal(object) # ProgressEvent (scripts/progress.py), at most ~10 per second
     finished = pyqtSignal(bool, dict, dict, str) # success, analysis_result, generated_structure, summary
     error = pyqtSignal(str)
 
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        """Stop at the next chunk and abort in-flight local generations (call from any thread)."""
+        self.cancel_token.cancel()
 
     def run(self):
         try:
@@ -47,30 +71,59 @@ class AnalysisWorker(QObject):
                 return
 
             norm_path = os.path.normpath(self.controller.folder_path)
+            begin_run("analysis", folder=norm_path, llm=bool(self.controller.use_llm_analysis))
+            counters = StageCounters("analysis")
+
+            reporter = ProgressReporter(self.progress.emit)
 
             def update_status(message):
-                self.progress.emit(message)
-                print(message) # Also print to console
+                reporter.start(STATUS, message)
+                log.info(message) # Also to the console and run log
 
-            update_status("Scanning folder contents...")
+            reporter.start(SCAN, "Scanning folder contents...")
+
+            def scan_progress(count):
+                self.cancel_token.raise_if_cancelled()
+                reporter.update(done=count)
 
             try:
-                files_and_folders = os.listdir(self.controller.folder_path)
-                if not files_and_folders:
+                # Single enumeration shared by every later stage (analysis, LLM, organize)
+                with counters.time("scan"):
+                    snapshot = self.controller.scan_folder(
+                        on_progress=scan_progress,
+                        with_stat=self.controller.use_folder_index) # (dev, inode), size and mtime feed the index
+                counters.add("files", len(snapshot))
+                if snapshot.is_empty:
+                    end_run(outcome="empty")
                     self.error.emit("The selected folder is empty.")
                     self.finished.emit(False, {}, {}, "") # Treat empty as not successful for proceeding
                     return
+            except OperationCancelled:
+                raise
             except Exception as e:
+                log.error(f"Could not list files in folder: {e}")
+                end_run(outcome="error", error=str(e))
                 self.error.emit(f"Could not list files in folder:\n{e}")
                 self.finished.emit(False, {}, {}, "")
                 return
+            self.controller.folder_snapshot = snapshot
 
             analysis_result = {}
             generated_structure = {}
+            offline_grouped = False
 
             # Only use extension-based analysis and LLM if enabled
             update_status("Analyzing files by type...")
-            analysis_result = self.controller._analyze_by_extension()
+            analysis_result = self.controller._analyze_by_extension(snapshot)
+
+            file_categories = {name: category for category, names in analysis_result.items() for name in names}
+            folder_index = None
+            index_recorded = False
+            if self.controller.use_folder_index:
+                try:
+                    folder_index = FolderIndex(self.controller.folder_path)
+                except Exception as e:
+                    log.warning(f"Folder index unavailable, analysing everything from scratch: {e}")
 
             # Generate structure using LLM if available and enabled
             if LANGCHAIN_AVAILABLE and self.controller.use_llm_analysis:
@@ -80,9 +133,8 @@ class AnalysisWorker(QObject):
                     if not api_key:
                         raise ValueError("GOOGLE_API_KEY not found in environment variables.")
 
-                    # Import necessary components for text splitting and JSON parsing
+                    # Import necessary components for JSON parsing
                     try:
-                        from langchain_text_splitters import RecursiveJsonSplitter
                         from langchain_core.output_parsers import JsonOutputParser
                         from pydantic import RootModel
                         from typing import Dict, Any
@@ -91,69 +143,106 @@ class AnalysisWorker(QObject):
                             root: Dict[str, Any]
 
                         parser = JsonOutputParser(pydantic_object=FileOrganization)
-                        TEXT_SPLITTER_AVAILABLE = True
+                        JSON_PARSER_AVAILABLE = True
                     except ImportError:
-                        update_status("Text splitter or JSON parser not available. Falling back to batch processing.")
-                        TEXT_SPLITTER_AVAILABLE = False
+                        update_status("JSON parser not available. Falling back to batch processing.")
+                        JSON_PARSER_AVAILABLE = False
                     
                     # llm = GoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key);local_model = False
                     # llm = OllamaLLM(model="qwen2.5:3b");local_model = True
-                    llm = GLOBAL_QWEN_LLM ;local_model = True; #using custom qwen llama cpp
+                    llm = self.controller.get_local_llm() ;local_model = True; #using custom qwen llama cpp (waits for a background load)
                     # llm = Llamafile();local_model = True # llamafiles just don't aren't working for some reason
-                    all_files = [item for item in os.listdir(self.controller.folder_path)
-                                 if os.path.isfile(os.path.join(self.controller.folder_path, item))]
-
-                    temp_generated_structure = {}
-
-                    if TEXT_SPLITTER_AVAILABLE:
-                        update_status("Using text splitter for efficient processing...")
-                        text_splitter = RecursiveJsonSplitter(max_chunk_size=4000)
-                        files_dict = {"files": all_files}
-                        chunks = text_splitter.split_json(files_dict, convert_lists=True)
-                        update_status(f"Processing {len(all_files)} files in {len(chunks)} chunks...")
+                    token_budget = budget_for(llm)
+
+                    def count_usage(prompt_text, response_text):
+                        tokens_in, tokens_out = token_budget.count(prompt_text), token_budget.count(response_text)
+                        counters.add("llm_calls")
+                        counters.add("tokens_in", tokens_in)
+                        counters.add("tokens_out", tokens_out)
+                        reporter.update(tokens_in=tokens_in, tokens_out=tokens_out)
+                    all_files = list(snapshot.files)
+                    cached_assignments = {}
+                    if folder_index is not None:
+                        # Only new or modified files go to the LLM; the rest keep their last placement
+                        cached_assignments, all_files = folder_index.partition(snapshot)
+                        counters.add("reused_placements", len(cached_assignments))
+                        if cached_assignments:
+                            update_status(f"Reusing cached placement for {len(cached_assignments)} unchanged file(s); "
+                                          f"{len(all_files)} file(s) to classify...")
+
+                    structure_tree = StructureTree() # Every chunk/batch result is merged here
+                    # Send one labelled representative per filename template (IMG_0001.jpg ... IMG_9412.jpg)
+                    name_clusters = NameClusters(all_files)
+                    if name_clusters.collapsed:
+                        update_status(f"Collapsed {len(all_files)} file names into {len(name_clusters.labels)} templates...")
+                    all_files = name_clusters.labels
+
+                    if not all_files:
+                        update_status("No new or changed files since the last analysis.")
+                    elif JSON_PARSER_AVAILABLE:
                         prompt = PromptTemplate(
                             template=prompt_template_gemini if not local_model else prompt_template_local,
                             input_variables=["files_chunk"],
                             partial_variables={"format_instructions": parser.get_format_instructions()}
                         )   
-
-                        for i, chunk in enumerate(chunks):
-                            percentage_done = int((i+1)/len(chunks)*100)
-                            update_status(f"Processing files ({percentage_done}% complete)...")
-                            chain = prompt | llm | parser
+                        if hasattr(llm, "prime_prefix"):
+                            # Instructions + few-shot block are evaluated once; each chunk then only evaluates its files
+                            llm.prime_prefix(static_prefix(prompt))
+                        # Size chunks in tokens so prompt + echoed filenames fit the context and output limit
+                        chunks = plan_chunks(all_files, token_budget,
+                                             prompt_overhead=token_budget.count(prompt.format(files_chunk="")))
+                        log.info(f"Processing {len(all_files)} files in {len(chunks)} chunks...")
+                        counters.add("chunks", len(chunks))
+                        reporter.start(CLASSIFY, f"Classifying {len(all_files)} files", total=len(chunks), unit="chunks")
+
+                        def process_chunk(chunk, depth=0):
                             try:
-                                result = chain.invoke({"files_chunk": json.dumps(chunk, indent=2)})
-                                if not temp_generated_structure:
-                                    temp_generated_structure = result.root if hasattr(result, 'root') else result
-                                else:
-                                    result_struct = result.root if hasattr(result, 'root') else result
-                                    for topic, content in result_struct.items():
-                                        if topic in temp_generated_structure:
-                                            if isinstance(content, dict) and isinstance(temp_generated_structure[topic], dict):
-                                                for subtopic, files in content.items():
-                                                    if subtopic in temp_generated_structure[topic]:
-                                                        if isinstance(files, list) and isinstance(temp_generated_structure[topic][subtopic], list):
-                                                            temp_generated_structure[topic][subtopic].extend(files)
-                                                        elif isinstance(files, dict) and isinstance(temp_generated_structure[topic][subtopic], dict):
-                                                            temp_generated_structure[topic][subtopic].update(files)
-                                                        else:
-                                                            print(f"Warning: Mixed types in subtopic {subtopic}")
-                                                    else:
-                                                        temp_generated_structure[topic][subtopic] = files
-                                            elif isinstance(content, list) and isinstance(temp_generated_structure[topic], list):
-                                                temp_generated_structure[topic].extend(content)
-                                            else:
-                                                print(f"Warning: Mixed types in topic {topic}")
-                                        else:
-                                            temp_generated_structure[topic] = content
-                                print(f"Successfully processed chunk {i+1}")
+                                result = cached_invoke(llm, prompt, {"files_chunk": json.dumps(chunk, indent=2)},
+                                                       parse=parser.parse, cancel=self.cancel_token,
+                                                       on_usage=count_usage)
+                                return result.root if hasattr(result, 'root') else result
+                            except OperationCancelled:
+                                raise
                             except Exception as e:
-                                print(f"Error processing chunk {i+1}: {e}")
+                                # Retry a failed chunk as two halves instead of dropping all of its files
+                                if len(chunk) < 2 or depth >= MAX_CHUNK_SPLITS:
+                                    raise
+                                log.warning(f"Chunk of {len(chunk)} files failed ({e}); retrying as two halves...")
+                                counters.add("chunk_splits")
+                                mid = len(chunk) // 2
+                                halves = []
+                                for half in (chunk[:mid], chunk[mid:]):
+                                    try:
+                                        halves.append(process_chunk(half, depth + 1))
+                                    except OperationCancelled:
+                                        raise
+                                    except Exception as half_error:
+                                        log.warning(f"Dropping {len(half)} files after retries: {half_error}")
+                                        counters.add("files_dropped", len(half))
+                                if not halves:
+                                    raise
+                                return merge_structures(*halves)
+
+                        def chunk_done(res, completed):
+                            reporter.update(done=completed)
+
+                        # Chunks run concurrently (bounded) for remote models; results come back in chunk order.
+                        # On cancel, dispatch returns at once; chunks finished so far are still merged below.
+                        for res in dispatch(chunks, process_chunk, max_workers=llm_concurrency(local_model, llm),
+                                            weight=lambda chunk: sum(len(name) for name in chunk),
+                                            on_result=chunk_done, cancel=self.cancel_token):
+                            i, result = res.index, res.value
+                            if isinstance(res.error, OperationCancelled):
+                                continue
+                            try:
+                                if res.error is not None:
+                                    raise res.error
+                                structure_tree.merge(result.root if hasattr(result, 'root') else result)
+                                log.debug(f"Successfully processed chunk {i+1}")
+                            except Exception as e:
+                                log.error(f"Error processing chunk {i+1}: {e}")
+                                counters.add("chunks_failed")
                     else:
-                        batch_size = int(len(all_files)/2)
-                        batch_size = min(max(batch_size,200),500)
-                        batches = [all_files[i:i + batch_size] for i in range(0, len(all_files), batch_size)]
-                        update_status(f"Processing {len(all_files)} files in {len(batches)} batches...")
                         prompt_template_str = r"""
                         You are an expert file organizer. Given a list of filenames from a directory, generate a JSON structure proposing a logical organization into folders and subfolders, intelligently and intuitively based.
                         The output MUST be ONLY a valid JSON object, starting with {{ and ending with }}. Do not include any explanations, markdown formatting (like ```json), or other text outside the JSON structure.
@@ -171,40 +260,77 @@ class AnalysisWorker(QObject):
                         {files_batch}
                         """
                         prompt = PromptTemplate.from_template(prompt_template_str)
-                        chain = prompt | llm
+                        batches = plan_chunks(all_files, token_budget,
+                                              prompt_overhead=token_budget.count(prompt.format(files_batch="")))
+                        log.info(f"Processing {len(all_files)} files in {len(batches)} batches...")
+                        counters.add("chunks", len(batches))
+                        reporter.start(CLASSIFY, f"Classifying {len(all_files)} files", total=len(batches), unit="batches")
                         for batch_index, files_batch in enumerate(batches):
-                            update_status(f"Processing batch {batch_index+1}/{len(batches)}...")
+                            if self.cancel_token.cancelled:
+                                break
+                            reporter.update(done=batch_index)
                             files_batch_str = "\n".join(files_batch)
-                            response = chain.invoke({"files_batch": files_batch_str})
-                            llm_output = response
-                            if "```json" in llm_output:
-                                llm_output = llm_output.split("```json")[1].split("```")[0].strip()
-                            elif "```" in llm_output:
-                                 llm_output = llm_output.split("```")[1].split("```")[0].strip()
-                            else:
-                                llm_output = llm_output.strip()
-                            if not llm_output.startswith('{') or not llm_output.endswith('}'):
-                                print(f"Warning: LLM output for batch {batch_index+1} doesn't look like JSON: {llm_output[:100]}...")
-                                match = re.search(r'\{.*\}', llm_output, re.DOTALL)
-                                if match:
-                                    llm_output = match.group(0)
-                                else:
-                                    print(f"Failed to extract JSON from batch {batch_index+1}, skipping.")
-                                    continue
-                            batch_structure = self.controller._parse_json_safely(llm_output)
+                            try:
+                                # Only answers that parse are cached, so a rerun retries a bad batch
+                                batch_structure = cached_invoke(llm, prompt, {"files_batch": files_batch_str},
+                                                                parse=parse_json_response, cancel=self.cancel_token,
+                                                                on_usage=count_usage)
+                            except OperationCancelled:
+                                break # Batches merged so far are kept, as for chunks
+                            except ValueError as e:
+                                log.error(f"Failed to parse JSON for batch {batch_index+1}, skipping: {e}")
+                                counters.add("chunks_failed")
+                                continue
                             if batch_structure:
-                                self.controller._merge_structures(temp_generated_structure, batch_structure)
-                                print(f"Successfully processed batch {batch_index+1}")
+                                structure_tree.merge(batch_structure)
+                                log.debug(f"Successfully processed batch {batch_index+1}")
                             else:
-                                print(f"Failed to parse JSON for batch {batch_index+1}, skipping")
+                                log.error(f"Empty structure for batch {batch_index+1}, skipping")
+                                counters.add("chunks_failed")
+                    reporter.flush()
+                    if self.cancel_token.cancelled:
+                        log.info(f"Analysis cancelled; keeping {len(structure_tree)} placement(s) from finished chunks")
+                    if structure_tree.conflicts:
+                        log.info(f"Kept the first folder for {structure_tree.conflicts} file(s) assigned more than once")
+                        counters.add("conflicts", structure_tree.conflicts)
+                    if name_clusters.collapsed:
+                        structure_tree = StructureTree.from_structure(
+                            name_clusters.expand_structure(structure_tree.to_structure()))
+                    llm_cache = get_llm_cache()
+                    if llm_cache is not None:
+                        log.info(f"LLM cache: {llm_cache.hits} hit(s), {llm_cache.misses} miss(es)")
+                    if folder_index is not None:
+                        fresh_assignments = {name: folder for name, folder in structure_tree.iter_assignments()
+                                             if name in snapshot}
+                        for name, folder in cached_assignments.items():
+                            structure_tree.add(name, folder) # Fresh placements win (first kept)
+                        try:
+                            folder_index.record(snapshot, file_categories, fresh_assignments)
+                            index_recorded = True
+                        except Exception as e:
+                            log.warning(f"Could not update folder index: {e}")
+
+                    temp_generated_structure = structure_tree.to_structure() if len(structure_tree) else {}
                     if not temp_generated_structure:
                         update_status("LLM analysis did not produce a valid structure. Using extension-based analysis only.")
                     else:
                         generated_structure = temp_generated_structure
                         update_status(f"Successfully generated organization structure with {len(generated_structure)} categories.")
+                except OperationCancelled:
+                    log.info("LLM analysis cancelled before any chunk finished.")
+                    generated_structure = {}
                 except Exception as e:
                     self.error.emit(f"Error during LLM analysis: {e}")
-                    print(f"LLM Error: {e}")
+                    log.exception(f"LLM Error: {e}")
+                    generated_structure = {}
+            elif self.controller.use_offline_grouping and NUMPY_AVAILABLE:
+                update_status("Grouping files by name (offline)...")
+                try:
+                    generated_structure = build_offline_structure(snapshot.files)
+                    offline_grouped = True
+                except Exception as e:
+                    log.exception(f"Offline grouping error: {e}")
+                    update_status("Offline grouping failed. Using extension-based analysis only.")
                     generated_structure = {}
             else:
                 if not LANGCHAIN_AVAILABLE:
@@ -213,51 +339,79 @@ class AnalysisWorker(QObject):
                      update_status("LLM analysis disabled. Using extension-based analysis only.")
 
 
+            if folder_index is not None:
+                try:
+                    if not index_recorded:
+                        # Keep size/mtime/category current; cached LLM placements survive for unchanged files
+                        folder_index.record(snapshot, file_categories)
+                except Exception as e:
+                    log.warning(f"Could not update folder index: {e}")
+                finally:
+                    folder_index.close()
+            # Completed chunks are now in the LLM cache and folder index, so a rerun resumes from there.
+            # With nothing merged yet there is no partial result to offer.
+            cancelled = self.cancel_token.cancelled
+            if cancelled and not generated_structure:
+                raise OperationCancelled()
+
+            # --- Validate against the snapshot: drop unknown names, dedup, place dropped files ---
+            validation = None
+            if generated_structure:
+                generated_structure, validation = validate_structure(generated_structure, snapshot.files, file_categories)
+                update_status(validation.describe())
+                if validation.unknown_examples:
+                    log.info(f"Unknown names in structure (e.g.): {', '.join(validation.unknown_examples)}")
+
             # --- Final Summary ---
             # Use generated structure if available, otherwise analysis_result for counts
             summary_source = generated_structure if generated_structure else analysis_result
             files_count = 0
             cats_count = 0
             if summary_source:
-                 # Need a way to count files in the potentially nested generated_structure
-                 def count_files_recursive(struct):
-                     count = 0
-                     if isinstance(struct, dict):
-                         for key, value in struct.items():
-                             count += count_files_recursive(value)
-                     elif isinstance(struct, list):
-                          count += len(struct) # Assume list contains filenames
-                     elif isinstance(struct, str): # Handle case where value is a single file string
-                          count += 1
-                     return count
-
-                 files_count = count_files_recursive(summary_source)
+                 # Extension analysis covers every file in the snapshot, so count from it directly
+                 files_count = count_files(summary_source) if generated_structure else len(snapshot)
                  cats_count = len(summary_source) # Top-level categories
 
             summary = f"Found {files_count} file(s) across {cats_count} categories."
             if generated_structure:
-                summary += " (AI Structure Generated)"
+                summary += " (Offline Smart Grouping)" if offline_grouped else " (AI Structure Generated)"
+                summary += f"\n{validation.describe()}"
+                if cancelled and not offline_grouped:
+                    summary += "\nAnalysis cancelled: partial result. Files from unfinished chunks are grouped by type."
             elif analysis_result:
                  summary += " (Analyzed by Extension)"
             else:
                  summary = "No files found or analysis failed."
 
 
+            end_run(outcome="cancelled" if cancelled else "done", **counters.log(log))
             self.finished.emit(True, analysis_result, generated_structure, summary)
 
+        except OperationCancelled:
+            log.info("Analysis cancelled by user.")
+            end_run(outcome="cancelled")
+            self.finished.emit(False, {}, {}, "Analysis cancelled.")
         except Exception as e:
+            log.exception(f"Unexpected error during analysis: {e}")
+            end_run(outcome="error", error=str(e))
             self.error.emit(f"An unexpected error occurred during analysis: {e}")
             self.finished.emit(False, {}, {}, "")
 
 
 class OrganizeWorker(QObject):
     """Worker for running file organization in a separate thread."""
+    progress = pyqtSignal(object) # ProgressEvent: moves, then bytes copied across devices
     finished = pyqtSignal(bool, str, list) # success, summary_message, list of (dst, src) moves
     error = pyqtSignal(str)
 
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        """Stop before the next move (call from any thread); finished moves stay undoable."""
+        self.cancel_token.cancel()
 
     def run(self):
         try:
@@ -267,204 +421,76 @@ class OrganizeWorker(QObject):
                 self.finished.emit(False, "No analysis data found.", [])
                 return
 
-            moved_count = 0
-            error_count = 0
-            error_messages = []
-            recorded_moves = [] # List to store (destination, source) for undo
             target_structure = self.controller.generated_structure if self.controller.generated_structure else self.controller.analysis_result
             use_llm_structure = bool(self.controller.generated_structure)
 
-            print(f"Organizing using {'LLM structure' if use_llm_structure else 'extension analysis'}...")
-
-            # --- Recursive function for LLM structure ---
-            def create_folders_and_move_llm(structure, current_rel_path=""):
-                nonlocal moved_count, error_count, error_messages, recorded_moves
-                base_target_dir = self.controller.folder_path
-
-                for item_name, contents in structure.items():
-                    # Special handling for _files_ key - don't create a _files_ folder
-                    if item_name == "_files_":
-                        # Move files directly to the current folder instead of creating a _files_ subfolder
-                        if isinstance(contents, list):
-                            current_folder_path = os.path.join(base_target_dir, current_rel_path)
-                            try:
-                                # Ensure the current folder exists
-                                if not os.path.exists(current_folder_path):
-                                    os.makedirs(current_folder_path)
-                                    print(f"Created folder: {current_folder_path}")
-
-                                # Move each file to the current folder
-                                for file_name in contents:
-                                    src_path = os.path.join(base_target_dir, file_name)
-                                    dst_path = os.path.join(current_folder_path, file_name)
-
-                                    if os.path.abspath(src_path) == os.path.abspath(dst_path):
-                                        print(f"Skipping {file_name}: Source and destination are the same")
-                                        continue
-
-                                    if os.path.exists(src_path) and os.path.isfile(src_path):
-                                        try:
-                                            print(f"Moving: {src_path} -> {dst_path}")
-                                            shutil.move(src_path, dst_path)
-                                            moved_count += 1
-                                            recorded_moves.append((dst_path, src_path)) # Record for undo
-                                        except Exception as e:
-                                            error_count += 1
-                                            error_messages.append(f"Move Error '{file_name}' to '{current_rel_path}': {e}")
-                                    else:
-                                        print(f"Warning: Source file not found or is not a file: {src_path}")
-                            except OSError as e:
-                                error_count += 1
-                                error_messages.append(f"Dir Error '{current_rel_path}': {e}")
-                        continue  # Skip the rest of the processing for _files_ key
-
-                    new_rel_path = os.path.join(current_rel_path, item_name)
-                    target_path = os.path.join(base_target_dir, new_rel_path)
-
-                    if isinstance(contents, dict):
-                        # It's a subfolder definition
-                        try:
-                            if not os.path.exists(target_path):
-                                os.makedirs(target_path)
-                                print(f"Created folder: {target_path}")
-                            # Recurse into the subfolder structure
-                            create_folders_and_move_llm(contents, new_rel_path)
-                        except OSError as e:
-                            error_count += 1
-                            error_messages.append(f"Dir Create Error '{new_rel_path}': {e}")
-                            # Decide whether to continue into this branch or skip
-                            continue # Skip this branch on directory creation error
-                    elif isinstance(contents, list):
-                         # It's a list of files for the current folder (item_name is the folder)
-                        folder_path = os.path.join(base_target_dir, current_rel_path, item_name)
-                        try:
-                            if not os.path.exists(folder_path):
-                                os.makedirs(folder_path)
-                                print(f"Created folder: {folder_path}")
-
-                            for file_name in contents:
-                                src_path = os.path.join(base_target_dir, file_name) # Files are initially in the root
-                                dst_path = os.path.join(folder_path, file_name)
-
-                                if os.path.abspath(src_path) == os.path.abspath(dst_path):
-                                    print(f"Skipping {file_name}: Source and destination are the same")
-                                    continue
-
-                                if os.path.exists(src_path) and os.path.isfile(src_path):
-                                    try:
-                                        print(f"Moving: {src_path} -> {dst_path}")
-                                        shutil.move(src_path, dst_path)
-                                        moved_count += 1
-                                        recorded_moves.append((dst_path, src_path)) # Record for undo
-                                    except Exception as e:
-                                        error_count += 1
-                                        error_messages.append(f"Move Error '{file_name}' to '{new_rel_path}': {e}")
-                                else:
-                                     print(f"Warning: Source file not found or is not a file: {src_path}")
-                                     # Optionally count as an error or just log
-                                     # error_count += 1
-                                     # error_messages.append(f"Source Not Found '{file_name}'")
-
-                        except OSError as e:
-                            error_count += 1
-                            error_messages.append(f"Dir Error '{item_name}': {e}")
-                            continue # Skip this category if folder creation fails
-                    elif isinstance(contents, str): # Handle case where value is a single file string
-                        # Assume the item_name is the folder, contents is the file
-                        folder_path = os.path.join(base_target_dir, current_rel_path, item_name)
-                        file_name = contents
-                        try:
-                            if not os.path.exists(folder_path):
-                                os.makedirs(folder_path)
-                                print(f"Created folder: {folder_path}")
-
-                            src_path = os.path.join(base_target_dir, file_name) # Files are initially in the root
-                            dst_path = os.path.join(folder_path, file_name)
-
-                            if os.path.abspath(src_path) == os.path.abspath(dst_path):
-                                print(f"Skipping {file_name}: Source and destination are the same")
-                                continue
-
-                            if os.path.exists(src_path) and os.path.isfile(src_path):
-                                try:
-                                    print(f"Moving: {src_path} -> {dst_path}")
-                                    shutil.move(src_path, dst_path)
-                                    moved_count += 1
-                                    recorded_moves.append((dst_path, src_path)) # Record for undo
-                                except Exception as e:
-                                    error_count += 1
-                                    error_messages.append(f"Move Error '{file_name}' to '{new_rel_path}': {e}")
-                            else:
-                                    print(f"Warning: Source file not found or is not a file: {src_path}")
-
-                        except OSError as e:
-                            error_count += 1
-                            error_messages.append(f"Dir Error '{item_name}': {e}")
-                            continue # Skip this category if folder creation fails
-                    else:
-                        print(f"Warning: Unexpected content type in structure for '{item_name}': {type(contents)}")
-
-
-            # --- Process based on structure type ---
-            if use_llm_structure:
-                 create_folders_and_move_llm(target_structure)
-            else:
-                # --- Simple extension-based organization ---
-                for category, files in target_structure.items():
-                    category_path = os.path.join(self.controller.folder_path, category)
-                    try:
-                        os.makedirs(category_path, exist_ok=True)
-                    except OSError as e:
-                        error_count += 1
-                        error_messages.append(f"Dir Create Error '{category}': {e}")
-                        continue # Skip this category
-
-                    for file in files:
-                        src = os.path.join(self.controller.folder_path, file)
-                        dst = os.path.join(category_path, file)
-
-                        if os.path.abspath(src) == os.path.abspath(dst):
-                            continue # Skip if already in place
-
-                        if os.path.exists(src) and os.path.isfile(src):
-                            try:
-                                print(f"Moving: {src} -> {dst}")
-                                shutil.move(src, dst)
-                                moved_count += 1
-                                recorded_moves.append((dst, src)) # Record for undo
-                            except Exception as e:
-                                error_count += 1
-                                error_messages.append(f"Move Error '{file}' to '{category}': {e}")
-                        else:
-                             print(f"Warning: Source file not found or is not a file: {src}")
-                             # Optionally count as an error
-                             # error_count += 1
-                             # error_messages.append(f"Source Not Found '{file}'")
-
+            log.info(f"Organizing using {'LLM structure' if use_llm_structure else 'extension analysis'}...")
+            begin_run("organize", folder=self.controller.folder_path, llm_structure=use_llm_structure)
+            counters = StageCounters("organize")
+
+            # --- Preflight from the analysis snapshot (no per-file stat calls) ---
+            snapshot = self.controller.folder_snapshot
+            if snapshot is None or snapshot.folder_path != self.controller.folder_path:
+                snapshot = self.controller.scan_folder()
+
+            # --- Compile the structure into flat moves + folders, then execute ---
+            # Each file is moved once (first folder wins); names not in the snapshot are skipped
+            with counters.time("plan"):
+                plan = compile_move_plan(self.controller.folder_path, target_structure, set(snapshot.files))
+            log.info("Move plan compiled", extra=fields(moves=len(plan.moves), folders=len(plan.dirs),
+                                                         in_place=plan.in_place, not_found=plan.unknown))
+            # Journal every intent before acting, so undo survives a crash or a restart
+            try:
+                journal = MoveJournal.create(self.controller.folder_path)
+            except OSError as e:
+                log.warning(f"Could not create move journal ({e}); undo will only last this session.")
+                journal = None
+            reporter = ProgressReporter(self.progress.emit)
+            reporter.start(ORGANIZE, "Moving files", total=len(plan.moves), unit="moves")
+
+            def copy_progress(done_bytes, total_bytes, rate):
+                if reporter.stage != COPY:
+                    reporter.start(COPY, "Copying across devices", total=total_bytes, unit=BYTES)
+                reporter.update(done=done_bytes)
+
+            # Reported on every move; the reporter coalesces to the UI refresh rate
+            with counters.time("execute"):
+                result = execute_move_plan(plan, on_progress=lambda done, total: reporter.update(done=done),
+                                           progress_every=1, on_copy_progress=copy_progress,
+                                           journal=journal, cancel=self.cancel_token)
+            reporter.flush()
+            if journal is not None:
+                journal.commit()
+            self.controller.last_journal_path = journal.path if journal is not None else None
+            recorded_moves = result.moved # (destination, source) pairs for undo
+            error_messages = result.errors
+            moved_count = len(recorded_moves)
+            error_count = len(error_messages)
+            for message in error_messages:
+                log.warning(message, extra=QUIET) # Every failure goes to the run log; the summary shows the first 10
+            counters.add("moved", moved_count)
+            counters.add("errors", error_count)
+            counters.add("cross_device", result.cross_device)
+            counters.add("copied_bytes", result.copied_bytes)
 
             # --- Final Summary ---
-            print(f"Organization finished. Moved: {moved_count}, Errors: {error_count}")
+            log.info(f"Organization finished. Moved: {moved_count}, Errors: {error_count}")
+            end_run(outcome="cancelled" if result.cancelled else "done", **counters.log(log))
             summary = f"Moved {moved_count} files."
-            if error_count > 0:
+            if result.cancelled:
+                summary = f"Organization cancelled after moving {moved_count} of {len(plan.moves)} files."
+                if error_count > 0:
+                    summary += f"\n\nEncountered {error_count} error(s):\n" + "\n".join(error_messages[:10])
+                # The moves that did happen can still be undone from the Complete page
+                self.finished.emit(moved_count > 0, summary, recorded_moves)
+            elif error_count > 0:
                 summary += f"\n\nEncountered {error_count} error(s):\n" + "\n".join(error_messages[:10]) # Show first 10 errors
                 if len(error_messages) > 10:
                      summary += f"\n...and {len(error_messages) - 10} more errors."
                 self.finished.emit(True, summary, recorded_moves) # Still emit success=True to show summary page
             elif moved_count == 0 and not error_count:
                  # Check if there were files to move initially
-                 initial_files_exist = False
-                 if use_llm_structure:
-                     def check_files_llm(struct):
-                         if isinstance(struct, dict):
-                             return any(check_files_llm(v) for v in struct.values())
-                         elif isinstance(struct, list):
-                             return bool(struct)
-                         elif isinstance(struct, str):
-                             return True
-                         return False
-                     initial_files_exist = check_files_llm(target_structure)
-                 else:
-                     initial_files_exist = any(target_structure.values())
+                 initial_files_exist = count_files(target_structure) > 0
 
                  if initial_files_exist:
                      summary = "No files were moved. Check permissions or if files already match the target structure."
@@ -478,5 +504,80 @@ class OrganizeWorker(QObject):
                 self.finished.emit(True, summary, recorded_moves)
 
         except Exception as e:
+            log.exception(f"Unexpected error during organization: {e}")
+            end_run(outcome="error", error=str(e))
             self.error.emit(f"An unexpected error occurred during organization: {e}")
             self.finished.emit(False, "An unexpected error occurred.", [])
+
+
+class RecoveryWorker(QObject):
+    """Finishes or rolls back an interrupted organization (move_journal.recover_run) off the UI thread."""
+    progress = pyqtSignal(object) # ProgressEvent: moves, then bytes copied across devices
+    finished = pyqtSignal(str, list) # what was done, error messages
+
+    def __init__(self, journal_run, resume):
+        super().__init__()
+        self.journal_run = journal_run
+        self.resume = resume
+
+    def run(self):
+        reporter = ProgressReporter(self.progress.emit)
+        reporter.start(ORGANIZE, "Finishing interrupted moves" if self.resume else "Moving files back", unit="moves")
+
+        def copy_progress(done_bytes, total_bytes, rate):
+            if reporter.stage != COPY:
+                reporter.start(COPY, "Copying across devices", total=total_bytes, unit=BYTES)
+            reporter.update(done=done_bytes)
+
+        try:
+            result = recover_run(self.journal_run, resume=self.resume, on_copy_progress=copy_progress,
+                                 on_progress=lambda done, total: reporter.update(done=done, total=total))
+        except Exception as e:
+            log.exception(f"Could not recover '{self.journal_run.path}': {e}")
+            self.finished.emit(f"Recovering '{self.journal_run.root}' failed.", [str(e)])
+            return
+        reporter.flush()
+        if self.resume:
+            action = f"Moved the remaining {len(result.moved)} file(s)."
+        else:
+            action = f"Rolled back {len(result.moved)} file(s)."
+        self.finished.emit(action, result.errors)
+
+
+class AnalysisViewWorker(QObject):
+    """Sorts the analysis results for AnalyzePage's tree view off the UI thread."""
+    finished = pyqtSignal(int, object) # request id, ViewFolder
+
+    def __init__(self, request_id, generated_structure, analysis_result):
+        super().__init__()
+        self.request_id = request_id
+        self.generated_structure = generated_structure
+        self.analysis_result = analysis_result
+
+    def run(self):
+        try:
+            view = build_analysis_view(self.generated_structure, self.analysis_result)
+        except Exception as e:
+            log.exception(f"Error preparing analysis view: {e}")
+            view = ViewFolder("")
+        self.finished.emit(self.request_id, view)
+
+
+class ModelLoadWorker(QObject):
+    """Worker that connects to the inference server, or loads the local llama.cpp model, off the UI thread."""
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(bool, str) # success, message
+    error = pyqtSignal(str)
+
+    def run(self):
+        self.progress.emit("Loading local AI model...")
+        try:
+            from scripts.inference_client import get_local_llm
+            llm = get_local_llm()
+        except Exception as e:
+            self.error.emit(f"Local AI model could not be loaded: {e}")
+            self.finished.emit(False, str(e))
+            return
+        elapsed = mark("local model ready")
+        source = f"inference server at {llm.base_url}" if getattr(llm, "base_url", None) else "in-process"
+        self.finished.emit(True, f"Local AI model ready via {source} ({elapsed:.1f}s after start)")
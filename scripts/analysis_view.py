@@ -0,0 +1,77 @@
+# scripts/analysis_view.py
+"""
+Sorted, display-ready tree of analysis results (no Qt dependency).
+
+AnalyzePage used to create one QLabel per file, and a second one when the AI
+structure and the by-type view are both shown. ``build_analysis_view`` does
+the expensive part instead: it sorts every folder's subfolders and files and
+counts files per folder. It runs on a worker thread. The result is read by
+pyQT.Models.AnalysisTreeModel, which creates rows only as the view scrolls
+to them. File names are not copied: each file is one string in a sorted
+list, so a folder of 500k files costs one list.
+"""
+from typing import Dict, List, Optional
+
+from scripts.structure_utils import FILES_KEY
+
+AI_SECTION = "AI-Generated Organization Structure"
+TYPE_SECTION = "Current Files by Type (For Reference)"
+TYPE_ONLY_SECTION = "Files by Type"
+
+
+class ViewFolder:
+    """One folder of the view: sorted subfolders first, then sorted files."""
+    __slots__ = ("name", "folders", "files", "file_count")
+
+    def __init__(self, name: str, folders: Optional[List["ViewFolder"]] = None,
+                 files: Optional[List[str]] = None):
+        self.name = name
+        self.folders = folders if folders is not None else []
+        self.files = files if files is not None else []
+        self.file_count = len(self.files) + sum(folder.file_count for folder in self.folders)
+
+    def __len__(self) -> int:
+        """Rows directly under this folder."""
+        return len(self.folders) + len(self.files)
+
+    def __repr__(self) -> str:
+        return f"ViewFolder({self.name!r}, {len(self.folders)} folder(s), {len(self.files)} file(s))"
+
+
+def _sorted_names(names) -> List[str]:
+    return sorted((name for name in names if isinstance(name, str)), key=str.casefold)
+
+
+def sort_structure(structure: dict, name: str = "") -> ViewFolder:
+    """Sorted view of a nested structure ("_files_" and single-file values become the folder's files)."""
+    folders = []
+    files = []
+    for key, value in structure.items():
+        if key == FILES_KEY:
+            files.extend(value if isinstance(value, list) else [value])
+        elif isinstance(value, dict):
+            folders.append(sort_structure(value, key))
+        elif isinstance(value, list):
+            folders.append(ViewFolder(key, files=_sorted_names(value)))
+        elif isinstance(value, str):
+            folders.append(ViewFolder(key, files=[value]))
+    folders.sort(key=lambda folder: folder.name.casefold())
+    return ViewFolder(name, folders, _sorted_names(files))
+
+
+def sort_categories(analysis_result: Dict[str, List[str]], name: str = "") -> ViewFolder:
+    """Sorted view of the by-extension analysis; empty categories are left out."""
+    folders = [ViewFolder(category, files=_sorted_names(files))
+               for category, files in analysis_result.items() if files]
+    folders.sort(key=lambda folder: folder.name.casefold())
+    return ViewFolder(name, folders)
+
+
+def build_analysis_view(generated_structure: Optional[dict], analysis_result: Optional[dict]) -> ViewFolder:
+    """Root whose sections are the AI structure (if any) and the by-type reference view."""
+    sections = []
+    if generated_structure:
+        sections.append(sort_structure(generated_structure, AI_SECTION))
+    if analysis_result:
+        sections.append(sort_categories(analysis_result, TYPE_SECTION if generated_structure else TYPE_ONLY_SECTION))
+    return ViewFolder("", sections)
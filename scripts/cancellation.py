@@ -0,0 +1,83 @@
+# scripts/cancellation.py
+"""
+Cooperative cancellation shared by the analysis and organize stages.
+
+Stopping the QThread a worker runs on does not stop the worker: it keeps
+making LLM calls and moving files until it returns on its own. Instead, each
+worker owns a ``CancellationToken``. The GUI thread calls ``cancel()``, and
+the worker checks the token at its natural boundaries: between chunks,
+between moves, and between copy blocks.
+
+Work that is already in flight can be aborted too. Code that owns it
+registers a callback with ``on_cancel``: the llama.cpp stopping criteria,
+and the inference client, which asks the server to stop the request.
+Whatever finished before the cancel is kept: merged chunks stay in the LLM
+cache and folder index, and completed moves stay journaled for undo.
+"""
+import threading
+from typing import Callable, List, Optional
+
+from scripts.log_setup import get_logger
+
+log = get_logger("cancellation")
+
+
+class OperationCancelled(Exception):
+    """Raised at a cancellation point once the token was cancelled."""
+
+    def __init__(self, message: str = "Operation cancelled"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """Thread-safe, one-way cancel flag with callbacks."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Set the flag and run the registered callbacks (once; later calls are no-ops)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.warning(f"Cancel callback failed: {e}")
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OperationCancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled (or ``timeout``); returns whether it was cancelled."""
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` on cancel (right away if already cancelled); returns an unregister function."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def raise_if_cancelled(cancel: Optional[CancellationToken]):
+    """Cancellation point for code where the token is optional."""
+    if cancel is not None:
+        cancel.raise_if_cancelled()
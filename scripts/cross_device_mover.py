@@ -0,0 +1,196 @@
+# scripts/cross_device_mover.py
+"""
+Parallel engine for moves that cross filesystems.
+
+``os.rename`` cannot move a file to another device, and ``shutil.move`` falls
+back to copying it in Python, one file at a time. ``move_across_devices``
+groups such moves by (source device, destination device) and gives every
+pair its own thread pool. Copying one volume to another therefore runs
+several streams per disk pair, and independent disk pairs don't wait on
+each other.
+
+Each file is copied in the kernel: ``os.copy_file_range`` where the kernel
+supports it across filesystems, otherwise ``os.sendfile``, and plain buffered
+reads/writes as a last resort. The copy goes to a temporary ``.organizahh-part``
+name and is fsynced, then renamed into place. The source is unlinked only
+after that succeeds, so a failure or crash never loses the only copy.
+
+Progress is reported as (bytes done, bytes total, bytes/s), throttled to a
+few calls per second, from the worker threads. A cancelled token stops
+queued copies from starting and aborts running ones at the next block; their
+partial files are removed and the sources are left in place.
+"""
+import errno
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from scripts.cancellation import CancellationToken
+
+COPY_CHUNK = 64 * 1024 * 1024  # Bytes per kernel copy call (also the progress granularity)
+PART_SUFFIX = ".organizahh-part"
+DEFAULT_WORKERS_PER_PAIR = 4
+PROGRESS_INTERVAL = 0.25  # Seconds between progress callbacks
+
+# copy_file_range/sendfile errors that mean "not supported here", so the next method is tried.
+# ENOTSOCK: macOS sendfile only writes to sockets, never to regular files.
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM, errno.ENOTSOCK,
+                getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+ProgressCallback = Callable[[int, int, float], None]
+
+
+def workers_per_pair() -> int:
+    """Concurrent copies per (source, destination) device pair."""
+    try:
+        return max(1, int(os.getenv("ORGANIZAHH_COPY_WORKERS", DEFAULT_WORKERS_PER_PAIR)))
+    except ValueError:
+        return DEFAULT_WORKERS_PER_PAIR
+
+
+def format_copy_progress(done: int, total: int, rate: float) -> str:
+    """One-line progress text, e.g. "Copying across devices: 1.2/4.0 GB at 310.5 MB/s"."""
+    return f"Copying across devices: {done / 1e9:.1f}/{total / 1e9:.1f} GB at {rate / 1e6:.1f} MB/s"
+
+
+def _copy_fd(fd_in: int, fd_out: int, on_bytes: Callable[[int], None]) -> int:
+    """Copy fd_in to fd_out, preferring in-kernel copies; returns bytes copied."""
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while True:
+                n = os.copy_file_range(fd_in, fd_out, COPY_CHUNK)
+                if n == 0:
+                    return copied
+                copied += n
+                on_bytes(n)
+        except OSError as e:
+            if copied or e.errno not in _UNSUPPORTED:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while True:
+                n = os.sendfile(fd_out, fd_in, copied, COPY_CHUNK)
+                if n == 0:
+                    return copied
+                copied += n
+                on_bytes(n)
+        except OSError as e:
+            if copied or e.errno not in _UNSUPPORTED:
+                raise
+    while True:
+        chunk = os.read(fd_in, 1024 * 1024)
+        if not chunk:
+            return copied
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(fd_out, view):]
+        copied += len(chunk)
+        on_bytes(len(chunk))
+
+
+def copy_then_unlink(src: str, dst: str, on_bytes: Callable[[int], None] = lambda n: None,
+                     fsync: bool = True) -> int:
+    """Move one file by copying it (data + metadata) and unlinking the source after success."""
+    part = dst + PART_SUFFIX
+    try:
+        with open(src, "rb") as fsrc, open(part, "wb") as fdst:
+            copied = _copy_fd(fsrc.fileno(), fdst.fileno(), on_bytes)
+            if fsync:
+                os.fsync(fdst.fileno())
+        shutil.copystat(src, part)
+        os.replace(part, dst)
+    except BaseException:
+        try:
+            os.unlink(part)
+        except OSError:
+            pass
+        raise
+    os.unlink(src)
+    return copied
+
+
+class _Throughput:
+    """Thread-safe byte counter that reports progress at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, total: int, callback: Optional[ProgressCallback]):
+        self.total = total
+        self.done = 0
+        self.callback = callback
+        self.started = time.monotonic()
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, n: int):
+        with self._lock:
+            self.done += n
+            now = time.monotonic()
+            if self.callback is None or now - self._last < PROGRESS_INTERVAL:
+                return
+            self._last = now
+            done = self.done
+        self.callback(done, self.total, self.rate(now))
+
+    def rate(self, now: Optional[float] = None) -> float:
+        elapsed = (now or time.monotonic()) - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def finish(self):
+        if self.callback is not None:
+            self.callback(self.done, self.total, self.rate())
+
+
+def move_across_devices(moves: Sequence[Tuple[str, str]], device_of: Callable[[str], Hashable],
+                        on_progress: Optional[ProgressCallback] = None,
+                        max_workers_per_pair: Optional[int] = None,
+                        fsync: bool = True,
+                        cancel: Optional[CancellationToken] = None) -> Tuple[List[Optional[BaseException]], int]:
+    """Move (src, dst) pairs by copy + unlink, one thread pool per device pair.
+
+    ``device_of(directory)`` returns the device of a directory (cached by the
+    caller). Returns (per-move error or None, in input order; bytes copied).
+    Moves stopped by ``cancel`` carry an OperationCancelled error.
+    """
+    errors: List[Optional[BaseException]] = [None] * len(moves)
+    if not moves:
+        return errors, 0
+    groups: Dict[Tuple[Hashable, Hashable], List[int]] = {}
+    total = 0
+    for index, (src, dst) in enumerate(moves):
+        key = (device_of(os.path.dirname(src)), device_of(os.path.dirname(dst)))
+        groups.setdefault(key, []).append(index)
+        try:
+            total += os.stat(src).st_size
+        except OSError:
+            pass  # Reported when the copy fails
+    throughput = _Throughput(total, on_progress)
+
+    def on_bytes(n: int):
+        throughput.add(n)
+        if cancel is not None:
+            cancel.raise_if_cancelled()  # Between blocks; copy_then_unlink removes the partial file
+
+    def run(index: int):
+        src, dst = moves[index]
+        try:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            copy_then_unlink(src, dst, on_bytes, fsync=fsync)
+        except Exception as e:
+            errors[index] = e
+
+    workers = max_workers_per_pair or workers_per_pair()
+    pools = [ThreadPoolExecutor(max_workers=min(workers, len(indices)), thread_name_prefix=f"copy-{key[0]}-{key[1]}")
+             for key, indices in groups.items()]
+    try:
+        futures = [pool.submit(run, index) for pool, indices in zip(pools, groups.values()) for index in indices]
+        for future in futures:
+            future.result()
+    finally:
+        for pool in pools:
+            pool.shutdown(wait=True)
+    throughput.finish()
+    return errors, throughput.done
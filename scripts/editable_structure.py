@@ -0,0 +1,255 @@
+# scripts/editable_structure.py
+"""
+Editable folder tree behind EditStructurePage (no Qt dependency).
+
+The page used to keep the structure in QTreeWidgetItems and rebuild the whole
+dict from the whole tree after every drag. Here the tree is the data: each
+folder keeps its subfolders and its sorted file names. Every edit (move,
+rename, delete, add folder) touches only the folders involved and returns
+the affected rows, so pyQT.Models.StructureItemModel can report exactly that
+change to the view. The nested dict is only built again by
+``to_structure()``, when the edits are committed.
+
+Rows inside a folder are its subfolders (in insertion order) followed by its
+files (sorted), which is also how the model numbers them.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scripts.structure_utils import FILES_KEY, FolderPath
+
+
+class EditFolder:
+    __slots__ = ("name", "parent", "folders", "files")
+
+    def __init__(self, name: str, parent: Optional["EditFolder"] = None):
+        self.name = name
+        self.parent = parent
+        self.folders: List["EditFolder"] = []
+        self.files: List[str] = [] # Sorted
+
+    def __len__(self) -> int:
+        return len(self.folders) + len(self.files)
+
+    def __repr__(self) -> str:
+        return f"EditFolder({'/'.join(self.path)!r}, {len(self.folders)} folder(s), {len(self.files)} file(s))"
+
+    @property
+    def path(self) -> FolderPath:
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return tuple(reversed(parts))
+
+    def row(self) -> int:
+        """This folder's row in its parent."""
+        return self.parent.folders.index(self)
+
+    def folder(self, name: str) -> Optional["EditFolder"]:
+        for folder in self.folders:
+            if folder.name == name:
+                return folder
+        return None
+
+    def file_row(self, name: str) -> Optional[int]:
+        """Row of file ``name`` in this folder, or None."""
+        i = bisect_left(self.files, name)
+        if i < len(self.files) and self.files[i] == name:
+            return len(self.folders) + i
+        return None
+
+    def is_within(self, other: "EditFolder") -> bool:
+        """True if this folder is ``other`` or one of its descendants."""
+        node = self
+        while node is not None:
+            if node is other:
+                return True
+            node = node.parent
+        return False
+
+
+class EditableStructure:
+    """Folder tree with O(changed rows) edits; each file is listed once."""
+
+    def __init__(self):
+        self.root = EditFolder("")
+        self._file_folder: Dict[str, EditFolder] = {} # File name -> folder holding it
+
+    # --- Loading / saving ---
+    @classmethod
+    def from_structure(cls, structure: dict) -> "EditableStructure":
+        """Load a nested structure ("_files_" and single-file values included); first listing of a file wins."""
+        tree = cls()
+        pending: Dict[int, Tuple[EditFolder, List[str]]] = {}
+
+        def load(folder: EditFolder, value):
+            if isinstance(value, dict):
+                for key, child in value.items():
+                    if key == FILES_KEY:
+                        load(folder, child if isinstance(child, list) else [child])
+                    else:
+                        load(tree._child_folder(folder, key), child)
+            else:
+                names = value if isinstance(value, list) else [value]
+                for name in names:
+                    if isinstance(name, str) and name not in tree._file_folder:
+                        tree._file_folder[name] = folder
+                        pending.setdefault(id(folder), (folder, []))[1].append(name)
+
+        load(tree.root, structure or {})
+        for folder, names in pending.values():
+            folder.files = sorted(names)
+        return tree
+
+    def _child_folder(self, parent: EditFolder, name: str) -> EditFolder:
+        folder = parent.folder(name)
+        if folder is None:
+            folder = EditFolder(name, parent)
+            parent.folders.append(folder)
+        return folder
+
+    def to_structure(self) -> dict:
+        """Nested dict for OrganizeWorker: leaf folders as lists, "_files_" beside subfolders; empty folders dropped."""
+        def build(folder: EditFolder):
+            children = {}
+            for sub in folder.folders:
+                value = build(sub)
+                if value:
+                    children[sub.name] = value
+            if not children:
+                return list(folder.files)
+            if folder.files:
+                children[FILES_KEY] = list(folder.files)
+            return children
+
+        result = build(self.root)
+        return result if isinstance(result, dict) else ({FILES_KEY: result} if result else {})
+
+    def __len__(self) -> int:
+        return len(self._file_folder)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._file_folder
+
+    def folder_of(self, name: str) -> Optional[EditFolder]:
+        return self._file_folder.get(name)
+
+    def folder_at(self, path: Iterable[str]) -> Optional[EditFolder]:
+        folder = self.root
+        for part in path:
+            folder = folder.folder(part)
+            if folder is None:
+                return None
+        return folder
+
+    # --- Edits (each returns the rows it changed) ---
+    def add_folder(self, parent: EditFolder, name: str) -> Optional[int]:
+        """Append subfolder ``name``; returns its row, or None if the name is taken."""
+        if not name or parent.folder(name) is not None:
+            return None
+        parent.folders.append(EditFolder(name, parent))
+        return len(parent.folders) - 1
+
+    def rename_folder(self, folder: EditFolder, new_name: str) -> bool:
+        """Rename in place (same row); False if empty or a sibling already has the name."""
+        if not new_name or folder.parent is None:
+            return False
+        if new_name == folder.name:
+            return True
+        if folder.parent.folder(new_name) is not None:
+            return False
+        folder.name = new_name
+        return True
+
+    def remove_folder(self, folder: EditFolder) -> int:
+        """Remove a folder with everything in it; returns its former row."""
+        row = folder.row()
+        del folder.parent.folders[row]
+        stack = [folder]
+        while stack:
+            node = stack.pop()
+            for name in node.files:
+                self._file_folder.pop(name, None)
+            stack.extend(node.folders)
+        folder.parent = None
+        return row
+
+    def can_move_folder(self, folder: EditFolder, new_parent: EditFolder) -> bool:
+        return (folder.parent is not None and new_parent is not folder.parent
+                and not new_parent.is_within(folder) and new_parent.folder(folder.name) is None)
+
+    def move_folder(self, folder: EditFolder, new_parent: EditFolder) -> Tuple[int, int]:
+        """Re-parent ``folder`` (see can_move_folder); returns (old row, new row)."""
+        old_row = self.detach_folder(folder)
+        return old_row, self.attach_folder(folder, new_parent)
+
+    def detach_folder(self, folder: EditFolder) -> int:
+        """First half of a move: take ``folder`` out of its parent (its files stay indexed); returns its old row."""
+        row = folder.row()
+        del folder.parent.folders[row]
+        return row
+
+    def attach_folder(self, folder: EditFolder, new_parent: EditFolder) -> int:
+        """Second half of a move: append a detached ``folder`` to ``new_parent``; returns its new row."""
+        folder.parent = new_parent
+        new_parent.folders.append(folder)
+        return len(new_parent.folders) - 1
+
+    # Moving many files is planned first, then applied run by run, so a caller
+    # (the Qt model) can announce each contiguous block of rows once.
+    def removal_runs(self, names: Iterable[str]) -> List[Tuple[EditFolder, int, int]]:
+        """(folder, first row, last row) runs covering ``names``, last rows first within each folder."""
+        rows: Dict[int, Tuple[EditFolder, List[int]]] = {}
+        for name in names:
+            folder = self._file_folder.get(name)
+            if folder is not None:
+                rows.setdefault(id(folder), (folder, []))[1].append(folder.file_row(name))
+        runs = []
+        for folder, folder_rows in rows.values():
+            folder_rows = sorted(set(folder_rows), reverse=True)
+            last = first = folder_rows[0]
+            for row in folder_rows[1:]:
+                if row != first - 1:
+                    runs.append((folder, first, last))
+                    last = row
+                first = row
+            runs.append((folder, first, last))
+        return runs
+
+    def remove_rows(self, folder: EditFolder, first: int, last: int):
+        """Remove the file rows ``first``..``last`` of ``folder``."""
+        start, end = first - len(folder.folders), last - len(folder.folders) + 1
+        for name in folder.files[start:end]:
+            self._file_folder.pop(name, None)
+        del folder.files[start:end]
+
+    def insertion_blocks(self, folder: EditFolder, names: Iterable[str]) -> List[Tuple[int, List[str]]]:
+        """(row, sorted names) blocks that insert ``names`` into ``folder`` in order, first rows first.
+
+        Rows are final positions, valid when the blocks are inserted in the
+        returned order. Names listed elsewhere in the tree are skipped.
+        """
+        new_names = sorted(set(name for name in names if name not in self._file_folder))
+        blocks: List[Tuple[int, List[str]]] = []
+        offset = len(folder.folders)
+        for name in new_names:
+            position = bisect_left(folder.files, name)
+            if blocks and blocks[-1][0] == position:
+                blocks[-1][1].append(name)
+            else:
+                blocks.append((position, [name]))
+        result = []
+        inserted = 0
+        for position, block in blocks:
+            result.append((offset + position + inserted, block))
+            inserted += len(block)
+        return result
+
+    def insert_block(self, folder: EditFolder, row: int, names: List[str]):
+        """Insert sorted ``names`` at ``row`` (a block from insertion_blocks)."""
+        start = row - len(folder.folders)
+        folder.files[start:start] = names
+        for name in names:
+            self._file_folder[name] = folder
@@ -0,0 +1,182 @@
+# scripts/file_categories.py
+"""
+Extension -> category lookup used by the extension-based analysis.
+
+The index is built once per process from DEFAULT_CATEGORIES plus an optional
+user config file, so classifying a file is a couple of dict lookups instead of
+a scan over every category list.
+
+User config (``$ORGANIZAHH_CATEGORIES`` or ``<APP_DATA_DIR>/categories.json``)
+maps category names to extension lists and is merged over the defaults, e.g.::
+
+    {
+      "Images": [".avif", ".jxl"],
+      "Userscripts": [".user.js"],
+      "Backups": [".tar.zst", ".bak"]
+    }
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from constants.app_constants import APP_DATA_DIR
+from scripts.log_setup import get_logger
+
+log = get_logger("file_categories")
+
+NO_EXTENSION = 'No Extension'
+OTHERS = 'Others'
+
+# Recursive scans pass "/"-separated relative paths; Windows callers may also use backslashes
+_OS_SEP = os.sep if os.sep != '/' else None
+
+DEFAULT_CATEGORIES: Dict[str, List[str]] = {
+    'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg', '.heic', '.heif', '.ico'],
+    'Documents': ['.pdf', '.docx', '.doc', '.txt', '.rtf', '.odt', '.wpd', '.md'],
+    'Spreadsheets': ['.xlsx', '.xls', '.csv', '.ods'],
+    'Presentations': ['.pptx', '.ppt', '.odp'],
+    'Videos': ['.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm', '.mpeg', '.mpg'],
+    'Audio': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma'],
+    'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.iso',
+                 '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz', '.txz'],
+    'Code': ['.py', '.js', '.html', '.css', '.java', '.cpp', '.c', '.h', '.cs', '.php', '.rb', '.json', '.xml', '.yaml', '.sh', '.bat',
+             '.user.js', '.min.js', '.d.ts'],
+    'Executables': ['.exe', '.msi', '.app', '.dmg', '.deb', '.rpm', '.jar'],
+    'Fonts': ['.ttf', '.otf', '.woff', '.woff2'],
+    'Databases': ['.sqlite', '.db', '.sql', '.mdb', '.accdb'],
+}
+
+
+def user_categories_path() -> str:
+    return os.getenv("ORGANIZAHH_CATEGORIES", os.path.join(APP_DATA_DIR, "categories.json"))
+
+
+def load_user_categories(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Read the user's category overrides; a missing or broken file yields {}."""
+    path = path or user_categories_path()
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        log.warning(f"Could not load category config '{path}': {e}")
+        return {}
+    if not isinstance(data, dict):
+        log.warning(f"Category config '{path}' must be a JSON object. Ignoring it.")
+        return {}
+    return {str(cat): [str(ext) for ext in exts] for cat, exts in data.items() if isinstance(exts, list)}
+
+
+class ExtensionIndex:
+    """Build-once mapping from (possibly compound) suffix to category."""
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self._index: Dict[str, str] = {}
+        self._max_parts = 1
+        for category, extensions in categories.items():
+            for ext in extensions:
+                ext = ext.lower()
+                if not ext.startswith('.'):
+                    ext = '.' + ext
+                # First definition wins, matching the order of the original lookup
+                self._index.setdefault(ext, category)
+                self._max_parts = max(self._max_parts, ext.count('.'))
+
+    def category_for_extension(self, ext: str) -> str:
+        """Category for a single suffix such as '.jpg' (the legacy _get_category contract)."""
+        if not ext:
+            return NO_EXTENSION
+        return self._index.get(ext.lower(), OTHERS)
+
+    def classify(self, name: str) -> str:
+        """Category for a file name or relative path, preferring the longest known compound suffix.
+
+        Only the last path component counts, so dots in folder names are ignored.
+        """
+        lower = name.lower()
+        cut = lower.rfind('/')
+        if _OS_SEP is not None:
+            cut = max(cut, lower.rfind(_OS_SEP))
+        if cut >= 0:
+            lower = lower[cut + 1:]
+        dot = lower.rfind('.')
+        if dot <= 0:
+            return NO_EXTENSION
+        start = 0
+        if lower[0] == '.':
+            # Leading dots belong to the stem (".bashrc" has no extension), as in os.path.splitext
+            start = len(lower) - len(lower.lstrip('.'))
+            if dot <= start:
+                return NO_EXTENSION
+        index = self._index
+        if self._max_parts > 1:
+            pos = lower.rfind('.', start + 1, dot)
+            if pos > start:
+                # Compound candidate: collect earlier dots and try the longest suffix first
+                dots = [pos]
+                while len(dots) < self._max_parts - 1:
+                    pos = lower.rfind('.', start + 1, pos)
+                    if pos <= start:
+                        break
+                    dots.append(pos)
+                for pos in reversed(dots):
+                    category = index.get(lower[pos:])
+                    if category is not None:
+                        return category
+        return index.get(lower[dot:], OTHERS)
+
+    def classify_many(self, names: Iterable[str]) -> Dict[str, List[str]]:
+        """Group names by category in one pass, preserving input order within each group."""
+        groups: Dict[str, List[str]] = {}
+        classify = self.classify
+        lookup = self._index.get
+        compound = self._max_parts > 1
+        for name in names:
+            # Inlined fast path for the common "stem.ext" shape; paths and everything else go through classify()
+            lower = name.lower()
+            dot = lower.rfind('.')
+            if (dot > 0 and lower[0] != '.' and '/' not in lower and (_OS_SEP is None or _OS_SEP not in lower)
+                    and not (compound and lower.rfind('.', 1, dot) > 0)):
+                category = lookup(lower[dot:], OTHERS)
+            else:
+                category = classify(name)
+            try:
+                groups[category].append(name)
+            except KeyError:
+                groups[category] = [name]
+        return groups
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+_default_index: Optional[ExtensionIndex] = None
+
+
+def get_extension_index() -> ExtensionIndex:
+    """Process-wide index (defaults + user config), built on first use."""
+    global _default_index
+    if _default_index is None:
+        _default_index = ExtensionIndex(merge_categories(DEFAULT_CATEGORIES, load_user_categories()))
+    return _default_index
+
+
+def merge_categories(defaults: Dict[str, List[str]], user: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Overlay user categories on the defaults; user entries are indexed first so they win."""
+    merged = {cat: list(exts) for cat, exts in user.items()}
+    for category, extensions in defaults.items():
+        merged.setdefault(category, []).extend(extensions)
+    return merged
+
+
+def category_for_extension(ext: str) -> str:
+    return get_extension_index().category_for_extension(ext)
+
+
+def classify(name: str) -> str:
+    return get_extension_index().classify(name)
+
+
+def classify_many(names: Iterable[str]) -> Dict[str, List[str]]:
+    return get_extension_index().classify_many(names)
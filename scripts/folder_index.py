@@ -0,0 +1,146 @@
+# scripts/folder_index.py
+"""
+Persistent per-folder index used for incremental re-analysis.
+
+One SQLite database per analysed folder (under <APP_DATA_DIR>/index/) stores,
+for every file keyed by (dev, inode): name, size, mtime, extension category
+and the last LLM placement. On a re-run only files that are new or whose
+size/mtime changed are sent to the LLM; everything else keeps its cached
+placement, even if it was renamed in the meantime.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from constants.app_constants import APP_DATA_DIR
+from scripts.folder_snapshot import FileEntry, FolderSnapshot
+from scripts.structure_utils import FolderPath
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    dev        INTEGER NOT NULL,
+    inode      INTEGER NOT NULL,
+    name       TEXT    NOT NULL,
+    size       INTEGER,
+    mtime_ns   INTEGER,
+    category   TEXT,
+    assignment TEXT,
+    PRIMARY KEY (dev, inode)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def index_path_for(folder_path: str) -> str:
+    """Location of the index database for a folder."""
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(folder_path)).encode("utf-8")).hexdigest()
+    return os.path.join(APP_DATA_DIR, "index", f"{key}.sqlite3")
+
+
+def entry_key(entry: FileEntry) -> Tuple[int, int]:
+    """(dev, inode) for an entry.
+
+    Some platforms/filesystems (e.g. Windows scandir results) report inode 0;
+    those entries fall back to a stable 63-bit hash of the name under dev -1.
+    """
+    if entry.inode:
+        return entry.dev or 0, entry.inode
+    digest = hashlib.blake2b(entry.name.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return -1, int.from_bytes(digest, "big") >> 1
+
+
+class FolderIndex:
+    """SQLite-backed cache of per-file metadata and LLM placements for one folder."""
+
+    def __init__(self, folder_path: str, db_path: Optional[str] = None):
+        self.folder_path = folder_path
+        self.db_path = db_path or index_path_for(folder_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._check_schema()
+
+    def _check_schema(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key='schema_version'").fetchone()
+        if row is not None and int(row[0]) != SCHEMA_VERSION:
+            # Incompatible layout: start over rather than misreading old rows
+            self._conn.execute("DELETE FROM entries")
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('folder_path', ?)", (self.folder_path,))
+
+    def _load_rows(self) -> Dict[Tuple[int, int], tuple]:
+        rows = self._conn.execute("SELECT dev, inode, name, size, mtime_ns, category, assignment FROM entries")
+        return {(r[0], r[1]): r[2:] for r in rows}
+
+    @staticmethod
+    def _unchanged(row: Optional[tuple], entry: FileEntry) -> bool:
+        return row is not None and row[1] == entry.size and row[2] == entry.mtime_ns
+
+    def partition(self, snapshot: FolderSnapshot) -> Tuple[Dict[str, FolderPath], List[str]]:
+        """Split a snapshot into (cached placements, names that need classification).
+
+        The snapshot must have been taken with ``with_stat=True``. Cached
+        placements are keyed by the file's *current* name.
+        """
+        rows = self._load_rows()
+        cached: Dict[str, FolderPath] = {}
+        pending: List[str] = []
+        decoded: Dict[str, FolderPath] = {}  # Many files share a folder; decode each placement once
+        for entry in snapshot.entries():
+            row = rows.get(entry_key(entry))
+            if self._unchanged(row, entry) and row[4] is not None:
+                folder = decoded.get(row[4])
+                if folder is None:
+                    folder = decoded[row[4]] = tuple(json.loads(row[4]))
+                cached[entry.name] = folder
+            else:
+                pending.append(entry.name)
+        return cached, pending
+
+    def record(self, snapshot: FolderSnapshot, categories: Dict[str, str],
+               assignments: Optional[Dict[str, FolderPath]] = None):
+        """Replace the index with the snapshot's contents.
+
+        ``assignments`` holds fresh LLM placements by name. Files without a
+        fresh placement keep their previous one if they are unchanged; changed
+        files lose it so they are reclassified next time. Rows for files that
+        no longer exist are dropped.
+        """
+        rows = self._load_rows()
+        new_rows = []
+        for entry in snapshot.entries():
+            key = entry_key(entry)
+            assignment = None
+            if assignments is not None and entry.name in assignments:
+                assignment = json.dumps(list(assignments[entry.name]))
+            else:
+                row = rows.get(key)
+                if self._unchanged(row, entry):
+                    assignment = row[4]
+            new_rows.append((key[0], key[1], entry.name, entry.size, entry.mtime_ns,
+                             categories.get(entry.name), assignment))
+        with self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", new_rows)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
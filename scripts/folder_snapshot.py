@@ -0,0 +1,98 @@
+# scripts/folder_snapshot.py
+"""
+Single-pass, immutable view of a folder's contents.
+
+The snapshot is built once with ``os.scandir`` (which already knows each
+entry's type from the directory listing) and then shared by every stage:
+extension analysis, LLM chunking, summary counts and the organize preflight.
+None of those stages need to touch the filesystem again.
+"""
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class FileEntry(NamedTuple):
+    """A single regular file captured by a snapshot."""
+    name: str                   # Name relative to the snapshot root
+    path: str                   # Full path on disk
+    size: Optional[int] = None  # Only populated when scanned with_stat=True
+    mtime_ns: Optional[int] = None
+    dev: Optional[int] = None
+    inode: Optional[int] = None
+
+
+class FolderSnapshot:
+    """Immutable listing of the files (and sub-folders) of a folder."""
+
+    __slots__ = ("folder_path", "_entries", "_dirs")
+
+    def __init__(self, folder_path: str, entries: Iterable[FileEntry], dirs: Iterable[str] = ()):
+        self.folder_path = folder_path
+        self._entries: Dict[str, FileEntry] = {entry.name: entry for entry in entries}
+        self._dirs: Tuple[str, ...] = tuple(dirs)
+
+    # --- Construction ---
+    @classmethod
+    def scan(cls, folder_path: str, with_stat: bool = False, recursive: bool = False,
+             max_depth: Optional[int] = None, exclude: Optional[Sequence[str]] = None,
+             on_progress: Optional[Callable[[int], None]] = None,
+             progress_every: int = 5000) -> "FolderSnapshot":
+        """Enumerate ``folder_path`` once.
+
+        File/dir detection uses the d_type cached by ``os.scandir``; an extra
+        ``stat`` is only issued per file when ``with_stat`` is requested (and on
+        Windows even that is served from the directory listing).
+
+        With ``recursive=True`` the tree is walked in parallel (see
+        scripts.walker) and file names become "/"-separated relative paths.
+        ``on_progress`` is called with the running file count while scanning.
+        """
+        from scripts.walker import DEFAULT_EXCLUDES, iter_files
+
+        if exclude is None:
+            exclude = DEFAULT_EXCLUDES if recursive else ()
+        dirs: List[str] = []
+        entries = []
+        for entry in iter_files(folder_path, recursive=recursive, max_depth=max_depth, exclude=exclude,
+                                with_stat=with_stat, on_dir=dirs.append):
+            entries.append(entry)
+            if on_progress is not None and len(entries) % progress_every == 0:
+                on_progress(len(entries))
+        return cls(folder_path, entries, dirs)
+
+    # --- Read-only accessors ---
+    @property
+    def files(self) -> Tuple[str, ...]:
+        """File names in directory-listing order."""
+        return tuple(self._entries)
+
+    @property
+    def dirs(self) -> Tuple[str, ...]:
+        return self._dirs
+
+    @property
+    def is_empty(self) -> bool:
+        """True when the folder has no entries at all (files or folders)."""
+        return not self._entries and not self._dirs
+
+    def entry(self, name: str) -> Optional[FileEntry]:
+        return self._entries.get(name)
+
+    def entries(self) -> Iterator[FileEntry]:
+        return iter(self._entries.values())
+
+    def path_of(self, name: str) -> str:
+        entry = self._entries.get(name)
+        return entry.path if entry else os.path.join(self.folder_path, name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __repr__(self) -> str:
+        return f"FolderSnapshot({self.folder_path!r}, files={len(self._entries)}, dirs={len(self._dirs)})"
@@ -4,11 +4,15 @@ from langchain_text_splitters import RecursiveJsonSplitter
 from langchain_core.output_parsers import JsonOutputParser
 from listdir import list_files_and_folders
 import os
+import sys
 import json
 from dotenv import load_dotenv
 from pydantic import RootModel
 from typing import Dict, Any
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.llm_cache import cached_invoke
+
 load_dotenv()
 
 directory = "C:/Users/prabh/Downloads"
@@ -81,12 +85,9 @@ all_results = {}
 for i, chunk in enumerate(chunks):
     print(f"Processing chunk {i+1}/{len(chunks)}...")
 
-    # Create the chain for this chunk
-    chain = prompt | llm | parser
-
-    # Process the chunk
+    # Process the chunk (identical chunks are served from the response cache)
     try:
-        result = chain.invoke({"files_chunk": json.dumps(chunk, indent=2)})
+        result = cached_invoke(llm, prompt, {"files_chunk": json.dumps(chunk, indent=2)}, parse=parser.parse)
 
         # Merge the result into the overall structure
         if not all_results:
@@ -0,0 +1,148 @@
+# scripts/inference_client.py
+"""
+Client for the local inference daemon (scripts/inference_server.py).
+
+``get_local_llm()`` is the single entry point the GUI, terminal.py and the
+agent use for the local model: it returns a ``RemoteQwenLLM`` when the daemon
+is running (model already warm, requests fairly shared) and otherwise falls
+back to loading the model in-process with ``get_qllm()``.
+"""
+import json
+import os
+import socket
+import threading
+import urllib.error
+import urllib.request
+import uuid
+from typing import Any, ClassVar, List, Optional
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+from scripts.inference_server import inference_url
+from scripts.log_setup import get_logger
+
+log = get_logger("inference_client")
+
+try:
+    from langchain.llms.base import LLM
+    LANGCHAIN_AVAILABLE = True
+except ImportError:
+    LANGCHAIN_AVAILABLE = False
+
+HEALTH_TIMEOUT = 0.5
+
+
+def default_client_id() -> str:
+    """Fairness key for the server queue: one per process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def server_health(base_url: Optional[str] = None, timeout: float = HEALTH_TIMEOUT) -> Optional[dict]:
+    """The daemon's /health payload, or None if it is not reachable."""
+    try:
+        with urllib.request.urlopen(f"{base_url or inference_url()}/health", timeout=timeout) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+def cancel_request(request_id: str, base_url: Optional[str] = None, timeout: float = HEALTH_TIMEOUT) -> bool:
+    """Ask the daemon to drop or stop a request; False if it was unknown or unreachable."""
+    request = urllib.request.Request(f"{base_url or inference_url()}/v1/cancel",
+                                     data=json.dumps({"request_id": request_id}).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return bool(json.loads(response.read()).get("cancelled"))
+    except (OSError, ValueError):
+        return False
+
+
+def complete(prompt: str, base_url: Optional[str] = None, max_tokens: Optional[int] = None,
+             stop: Optional[List[str]] = None, structured: bool = True, client: Optional[str] = None,
+             timeout: Optional[float] = None, prefix: Optional[str] = None,
+             cancel: Optional[CancellationToken] = None) -> str:
+    """Run one completion on the daemon and return its text.
+
+    With ``cancel``, cancelling the token stops the request on the server
+    (queued or generating) and raises OperationCancelled here.
+    """
+    base_url = base_url or inference_url()
+    payload = {"prompt": prompt, "stop": stop, "structured": structured, "client": client or default_client_id()}
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    if prefix:
+        payload["prefix"] = prefix
+    unregister = lambda: None
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+        payload["request_id"] = uuid.uuid4().hex
+        # Off the cancelling (GUI) thread: the POST must not block it
+        unregister = cancel.on_cancel(lambda: threading.Thread(
+            target=cancel_request, args=(payload["request_id"], base_url), daemon=True).start())
+    request = urllib.request.Request(f"{base_url}/v1/completions",
+                                     data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())["text"]
+    except urllib.error.HTTPError as e:
+        try:
+            body = json.loads(e.read())
+        except ValueError:
+            body = {}
+        if body.get("cancelled"):
+            raise OperationCancelled() from e
+        raise RuntimeError(f"Inference server error: {body.get('error', str(e))}") from e
+    finally:
+        unregister()
+
+
+if LANGCHAIN_AVAILABLE:
+    class RemoteQwenLLM(LLM):
+        """LangChain LLM backed by the local inference daemon."""
+        base_url: str = ""
+        model_name: str = ""
+        max_tokens: int = 8192
+        context_window: int = 32768
+        structured: bool = True
+        grammar: str = "" # The server's grammar_id (from /health), used when structured
+        max_concurrency: int = 1 # Server slots; used to size concurrent chunk dispatch
+        client_id: str = ""
+        prefix: str = "" # Primed on the server slot before each call
+        supports_cancel: ClassVar[bool] = True # _call accepts cancel=CancellationToken
+
+        @property
+        def grammar_id(self) -> str:
+            return self.grammar if self.structured else "none"
+
+        def prime_prefix(self, prefix: str) -> None:
+            self.prefix = prefix
+
+        def unconstrained(self) -> "RemoteQwenLLM":
+            return RemoteQwenLLM(base_url=self.base_url, model_name=self.model_name, max_tokens=self.max_tokens,
+                                 context_window=self.context_window, structured=False, grammar=self.grammar,
+                                 max_concurrency=self.max_concurrency, client_id=self.client_id)
+
+        def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs) -> str:
+            return complete(prompt, base_url=self.base_url, max_tokens=kwargs.get("max_tokens", self.max_tokens),
+                            stop=stop, structured=kwargs.get("structured", self.structured),
+                            client=self.client_id or None, prefix=self.prefix or None,
+                            cancel=kwargs.get("cancel"))
+
+        @property
+        def _llm_type(self) -> str:
+            return "remote-qwen"
+
+
+def get_local_llm(structured: bool = True) -> Any:
+    """The local model: via the daemon when it is up, otherwise loaded in-process."""
+    base_url = inference_url()
+    health = server_health(base_url)
+    if health is not None and LANGCHAIN_AVAILABLE:
+        log.info(f"Using local inference server at {base_url} ({health.get('slots', 1)} slot(s))")
+        return RemoteQwenLLM(base_url=base_url, model_name=health.get("model", ""), structured=structured,
+                             grammar=str(health.get("grammar", "")),
+                             max_concurrency=int(health.get("slots", 1)), client_id=default_client_id())
+    from scripts.llama_cpp_custom import get_qllm
+    llm = get_qllm()
+    return llm if structured else llm.unconstrained()
@@ -0,0 +1,226 @@
+# scripts/inference_server.py
+"""
+Long-lived local inference daemon that keeps the GGUF model warm.
+
+The GUI, terminal.py and the agent all reach it through
+scripts/inference_client.py instead of loading their own copy of the model
+(several seconds and gigabytes each time). Requests from all clients share
+a fixed number of model slots. Each slot is its own llama.cpp instance;
+their weights are mmap-ed, so they share memory. Waiting requests are served
+round-robin per client, so one large CLI batch cannot starve the GUI.
+
+HTTP API (JSON, bound to 127.0.0.1 by default):
+  GET  /health          -> {"status": "ok", "slots": N, "queued": n, "model": id, "grammar"?: grammar_id}
+  POST /v1/completions  {"prompt", "max_tokens"?, "stop"?, "structured"?, "prefix"?, "client"?, "request_id"?}
+                        -> {"text": ...}   or 409 {"error": "cancelled", "cancelled": true}
+  POST /v1/cancel       {"request_id"} -> {"cancelled": bool}
+"prefix" is a fixed prompt head the slot primes once and then reuses
+(MyQwenLLM.prime_prefix). A cancelled request is dropped from the queue,
+or stops generating within a token if a slot is already running it.
+
+Run with:  python -m scripts.inference_server [--slots 2] [--port 8765]
+"""
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+
+DEFAULT_INFERENCE_URL = "http://127.0.0.1:8765"
+
+
+def inference_url() -> str:
+    return os.getenv("ORGANIZAHH_INFERENCE_URL", DEFAULT_INFERENCE_URL).rstrip("/")
+
+
+class FairQueue:
+    """Blocking queue that serves waiting clients round-robin, FIFO within a client."""
+
+    def __init__(self):
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._size = 0
+
+    def put(self, client: str, item: Any):
+        with self._cond:
+            self._queues.setdefault(client, deque()).append(item)
+            self._size += 1
+            self._cond.notify()
+
+    def get(self) -> Any:
+        with self._cond:
+            while not self._queues:
+                self._cond.wait()
+            client, queue = self._queues.popitem(last=False)
+            item = queue.popleft()
+            if queue:
+                self._queues[client] = queue  # Back of the line until the other clients had a turn
+            self._size -= 1
+            return item
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._size
+
+
+class _Job:
+    __slots__ = ("prompt", "params", "done", "cancel", "text", "error")
+
+    def __init__(self, prompt: str, params: dict):
+        self.prompt = prompt
+        self.params = params
+        self.done = threading.Event()
+        self.cancel = CancellationToken()
+        self.text: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class InferenceServer:
+    """Model slots + fair request queue behind a threading HTTP server."""
+
+    def __init__(self, model_factory: Callable[[], Any], slots: int = 1,
+                 host: str = "127.0.0.1", port: int = 8765, model_id: str = "local"):
+        self.model_id = model_id
+        self.queue = FairQueue()
+        self.models: List[Any] = [model_factory() for _ in range(max(1, slots))]
+        self._jobs: Dict[str, _Job] = {}  # request_id -> queued or running job (for /v1/cancel)
+        self._jobs_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+        for index, model in enumerate(self.models):
+            threading.Thread(target=self._slot_loop, args=(model,), name=f"slot-{index}", daemon=True).start()
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _slot_loop(self, model):
+        while True:
+            job = self.queue.get()
+            try:
+                job.cancel.raise_if_cancelled() # Cancelled while queued: never reaches the model
+                if job.params.get("prefix") and hasattr(model, "prime_prefix"):
+                    model.prime_prefix(job.params["prefix"])
+                kwargs = {key: job.params[key] for key in ("max_tokens", "structured") if key in job.params}
+                if getattr(model, "supports_cancel", False):
+                    kwargs["cancel"] = job.cancel
+                job.text = model._call(job.prompt, stop=job.params.get("stop"), **kwargs)
+            except Exception as e:
+                job.error = e
+            finally:
+                job.done.set()
+
+    def complete(self, client: str, prompt: str, params: dict) -> str:
+        job = _Job(prompt, params)
+        request_id = params.get("request_id")
+        if request_id:
+            with self._jobs_lock:
+                self._jobs[str(request_id)] = job
+        try:
+            self.queue.put(client, job)
+            job.done.wait()
+        finally:
+            if request_id:
+                with self._jobs_lock:
+                    self._jobs.pop(str(request_id), None)
+        if job.error is not None:
+            raise job.error
+        return job.text
+
+    def cancel(self, request_id: str) -> bool:
+        """Cancel a queued or running request; False if it is unknown or already finished."""
+        with self._jobs_lock:
+            job = self._jobs.get(str(request_id))
+        if job is None:
+            return False
+        job.cancel.cancel()
+        return True
+
+    def serve_forever(self):
+        print(f"Inference server listening on {self.address} with {len(self.models)} slot(s)")
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        app: InferenceServer = self.server.app
+        if urlparse(self.path).path == "/health":
+            health = {"status": "ok", "slots": len(app.models), "queued": len(app.queue), "model": app.model_id}
+            grammar = getattr(app.models[0], "grammar_id", None)
+            if grammar is not None:
+                health["grammar"] = grammar # Clients key their LLM cache on it
+            self._send(200, health)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        app: InferenceServer = self.server.app
+        path = urlparse(self.path).path
+        if path not in ("/v1/completions", "/v1/cancel"):
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            key = "prompt" if path == "/v1/completions" else "request_id"
+            value = request[key]
+        except (ValueError, KeyError) as e:
+            self._send(400, {"error": f"bad request: {e}"})
+            return
+        if path == "/v1/cancel":
+            self._send(200, {"cancelled": app.cancel(value)})
+            return
+        client = str(request.get("client") or self.client_address[0])
+        try:
+            text = app.complete(client, value, request)
+        except OperationCancelled:
+            self._send(409, {"error": "cancelled", "cancelled": True})
+            return
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"text": text})
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for model/server messages only
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Organizahh local inference server")
+    url = urlparse(inference_url())
+    parser.add_argument("--host", default=url.hostname or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=url.port or 8765)
+    parser.add_argument("--slots", type=int, default=int(os.getenv("ORGANIZAHH_INFERENCE_SLOTS", "1")),
+                        help="Parallel model instances (weights are shared via mmap)")
+    args = parser.parse_args()
+
+    from scripts.llama_cpp_custom import QWEN_MODEL_ID, load_qwen_llm
+    server = InferenceServer(load_qwen_llm, slots=args.slots, host=args.host, port=args.port,
+                             model_id=QWEN_MODEL_ID)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,176 @@
 # scripts/llama_cpp_custom.py
-from llama_cpp import Llama
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from llama_cpp import Llama, LlamaGrammar, StoppingCriteriaList
 from langchain.llms.base import LLM
-from typing import Optional, List
+from typing import ClassVar, Optional, List
 from pydantic import PrivateAttr
 
+from scripts.cancellation import OperationCancelled
+
+# Grammar for the folder-structure JSON the organisation prompts ask for:
+# an object whose values are either file lists or nested folder objects.
+# Nothing may follow the closing brace, so generation ends right there.
+# Whitespace is bounded (as in llama.cpp's json.gbnf): a small model cannot
+# fill the output budget with newlines and still match.
+FOLDER_STRUCTURE_GBNF = r'''
+root   ::= ws folder
+folder ::= "{" ws ( entry ( "," ws entry )* )? "}"
+entry  ::= string ws ":" ws ( folder | files ) ws
+files  ::= "[" ws ( string ws ( "," ws string ws )* )? "]"
+string ::= "\"" ( [^"\\\x7F\x00-\x1F] | "\\" ( ["\\/bfnrt] | "u" hex hex hex hex ) )* "\""
+hex    ::= [0-9a-fA-F]
+ws     ::= | " " | "\n" [ \t]{0,20}
+'''
+
+# The same shape as a JSON schema, for LlamaGrammar.from_json_schema
+FOLDER_STRUCTURE_SCHEMA = {
+    "$defs": {
+        "folder": {
+            "type": "object",
+            "additionalProperties": {
+                "anyOf": [
+                    {"type": "array", "items": {"type": "string"}},
+                    {"$ref": "#/$defs/folder"},
+                ]
+            },
+        }
+    },
+    "$ref": "#/$defs/folder",
+}
+
+GRAMMAR_MODES = ("gbnf", "json_schema", "none")
+
+QWEN_REPO_ID = "Qwen/Qwen2.5-3B-Instruct-GGUF"
+QWEN_FILENAME = "*q4_0.gguf"
+QWEN_MODEL_ID = f"{QWEN_REPO_ID}:{QWEN_FILENAME}"
+
+# Snapshots of primed prompt prefixes kept per model (each holds the prefix's KV cache)
+MAX_PRIMED_PREFIXES = 4
+
+
+def _shared_length(a, b) -> int:
+    """Number of leading tokens two token sequences have in common."""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def build_grammar(mode: str) -> Optional[LlamaGrammar]:
+    """Compile the folder-structure grammar for ``mode`` ("gbnf", "json_schema" or "none")."""
+    if mode == "gbnf":
+        return LlamaGrammar.from_string(FOLDER_STRUCTURE_GBNF, verbose=False)
+    if mode == "json_schema":
+        return LlamaGrammar.from_json_schema(json.dumps(FOLDER_STRUCTURE_SCHEMA), verbose=False)
+    if mode == "none":
+        return None
+    raise ValueError(f"Unknown grammar mode {mode!r}; expected one of {GRAMMAR_MODES}")
+
+
+def grammar_fingerprint(mode: str) -> str:
+    """Short id of the grammar text for ``mode``; part of the LLM cache key (see scripts/llm_cache.py)."""
+    if mode == "none":
+        return "none"
+    text = FOLDER_STRUCTURE_GBNF if mode == "gbnf" else json.dumps(FOLDER_STRUCTURE_SCHEMA, sort_keys=True)
+    return f"{mode}:{hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]}"
+
+
 class MyQwenLLM(LLM):
     _model: Llama = PrivateAttr()
+    _grammar: Optional[LlamaGrammar] = PrivateAttr(default=None)
+    # Primed prefix tokens -> saved llama state (None until first used), oldest first
+    _prefixes: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    # Output cap per call. The organisation prompts echo every filename back,
+    # so this must be large enough for a full chunk (see scripts/token_budget.py).
+    max_tokens: int = 8192
+    # Constrain output to the folder-structure JSON so every generation parses
+    grammar_mode: str = "gbnf"
+    model_name: str = QWEN_MODEL_ID # Shared with RemoteQwenLLM so both hit the same cache entries
+    # Restore primed prefix snapshots instead of re-evaluating the shared prompt head
+    prefix_reuse: bool = True
+    # _call accepts cancel=CancellationToken and stops generating within one token
+    supports_cancel: ClassVar[bool] = True
 
     def __init__(self, model: Llama, **kwargs):
         super().__init__(**kwargs)
         self._model = model
+        self._grammar = build_grammar(self.grammar_mode)
 
-    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
-        output = self._model(prompt, max_tokens=200)
+    @property
+    def context_window(self) -> int:
+        return self._model.n_ctx()
+
+    @property
+    def grammar_id(self) -> str:
+        return grammar_fingerprint(self.grammar_mode)
+
+    def tokenize(self, text: str) -> List[int]:
+        return self._model.tokenize(text.encode("utf-8"), add_bos=False)
+
+    def unconstrained(self) -> "MyQwenLLM":
+        """A free-text view of the same loaded model (e.g. for ReAct agents)."""
+        return MyQwenLLM(model=self._model, max_tokens=self.max_tokens, grammar_mode="none")
+
+    def prime_prefix(self, prefix: str) -> None:
+        """Register a fixed prompt head (instructions + few-shot examples) shared by many calls.
+
+        The first call whose prompt starts with it evaluates the prefix once and
+        snapshots the model state; later calls restore that snapshot and only
+        evaluate their own suffix, even when other prompts ran in between.
+        """
+        tokens = tuple(self._model.tokenize(prefix.encode("utf-8")))
+        if tokens in self._prefixes:
+            self._prefixes.move_to_end(tokens)
+            return
+        self._prefixes[tokens] = None
+        while len(self._prefixes) > MAX_PRIMED_PREFIXES:
+            self._prefixes.popitem(last=False)
+
+    def _restore_prefix(self, tokens: List[int]):
+        """Load the primed snapshot sharing the most leading tokens with ``tokens``.
+
+        llama.cpp itself keeps whatever prefix the last call left in the KV cache,
+        so a snapshot is only restored when it covers more of this prompt.
+        """
+        if not self.prefix_reuse:
+            self._model.reset() # Evaluate the whole prompt
+            return
+        best, reused = None, _shared_length(self._model._input_ids, tokens)
+        for prefix in self._prefixes:
+            shared = _shared_length(prefix, tokens)
+            if shared > reused:
+                best, reused = prefix, shared
+        if best is None:
+            return
+        state = self._prefixes[best]
+        if state is None:
+            self._model.reset()
+            self._model.eval(list(best))
+            self._prefixes[best] = self._model.save_state()
+        else:
+            self._model.load_state(state)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs) -> str:
+        cancel = kwargs.get("cancel")
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        tokens = self._model.tokenize(prompt.encode("utf-8"))
+        self._restore_prefix(tokens)
+        # Never ask for more than the context has left after the prompt
+        room = self.context_window - len(tokens)
+        max_tokens = max(1, min(kwargs.get("max_tokens", self.max_tokens), room))
+        grammar = self._grammar if kwargs.get("structured", True) else None
+        # Checked after every sampled token, so a cancel frees the model almost immediately
+        stopping = StoppingCriteriaList([lambda input_ids, logits: cancel.cancelled]) if cancel is not None else None
+        output = self._model(prompt, max_tokens=max_tokens, stop=stop, grammar=grammar, stopping_criteria=stopping)
+        if cancel is not None and cancel.cancelled:
+            raise OperationCancelled() # Never return (or cache) a truncated generation
         return output["choices"][0]["text"].strip()
 
     @property
@@ -22,17 +180,33 @@ class MyQwenLLM(LLM):
 
 # ✅ Lazy Singleton (model loads only when first called)
 _qwen_instance: Optional[MyQwenLLM] = None
+# Held while loading, so a caller that needs the model waits for a background load instead of starting another
+_qwen_lock = threading.Lock()
 
 def get_qllm() -> MyQwenLLM:
     global _qwen_instance
-    if _qwen_instance is None:
-        print("🔄 Initializing LLAMA CPP model...")
-        qwen_model = Llama.from_pretrained(
-            repo_id="Qwen/Qwen2.5-3B-Instruct-GGUF",
-            filename="*q4_0.gguf",
-            verbose=False,
-            n_ctx=32768
-        )
-        _qwen_instance = MyQwenLLM(model=qwen_model)
-        print("✅ LLAMA CPP initialized.")
+    if _qwen_instance is not None:
+        return _qwen_instance
+    with _qwen_lock:
+        if _qwen_instance is None:
+            _qwen_instance = load_qwen_llm()
     return _qwen_instance
+
+
+def load_qwen_llm() -> MyQwenLLM:
+    """Load a new model instance (the singleton above and each inference-server slot)."""
+    print("🔄 Initializing LLAMA CPP model...")
+    qwen_model = Llama.from_pretrained(
+        repo_id=QWEN_REPO_ID,
+        filename=QWEN_FILENAME,
+        verbose=False,
+        n_ctx=32768
+    )
+    llm = MyQwenLLM(model=qwen_model, max_tokens=int(os.getenv("ORGANIZAHH_LLM_MAX_TOKENS", "8192")),
+                    grammar_mode=os.getenv("ORGANIZAHH_LLM_GRAMMAR", "gbnf"))
+    print("✅ LLAMA CPP initialized.")
+    return llm
+
+
+def is_qllm_loaded() -> bool:
+    return _qwen_instance is not None
@@ -0,0 +1,257 @@
+# scripts/llm_cache.py
+"""
+Content-addressed, size-bounded disk cache for LLM responses.
+
+Responses are keyed by a SHA-256 of (model id, generation settings, prompt
+template text, rendered inputs), so a retried run or an identical chunk in
+another folder is served from disk instead of calling the model again, while
+a changed output limit, context size or grammar asks the model afresh. Only
+answers that parse are stored (see ``parse_json_response``), so a truncated
+or free-text reply is retried rather than replayed. The cache is a single SQLite
+file shared by the GUI, terminal.py, the agent and the helper scripts.
+
+Eviction is LRU by total stored bytes; entries can optionally expire after a
+TTL. Configuration (environment):
+  ORGANIZAHH_LLM_CACHE=0          disable caching entirely
+  ORGANIZAHH_LLM_CACHE_MB=256     size bound
+  ORGANIZAHH_LLM_CACHE_TTL=0      max age in seconds (0 = no expiry)
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from constants.app_constants import APP_DATA_DIR
+from scripts.cancellation import CancellationToken, raise_if_cancelled
+from scripts.log_setup import get_logger
+
+log = get_logger("llm_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key      TEXT PRIMARY KEY,
+    value    TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+# LLM attributes that change what a prompt generates: output limit, context size
+# (which also sizes the token-budgeted chunks), sampling and output grammar
+_SETTING_ATTRS = ("max_tokens", "max_output_tokens", "context_window", "temperature", "grammar_id")
+
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def make_key(model_id: str, template: str, inputs: Optional[Dict[str, Any]] = None,
+             settings: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps([model_id, settings or {}, template, inputs or {}], sort_keys=True, ensure_ascii=False,
+                         default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def generation_settings(llm: Any) -> Dict[str, Any]:
+    """The generation settings an LLM object exposes (see _SETTING_ATTRS), for the cache key."""
+    settings = {}
+    for attr in _SETTING_ATTRS:
+        value = getattr(llm, attr, None)
+        if isinstance(value, (str, int, float)):
+            settings[attr] = value
+    return settings
+
+
+def parse_json_response(text: str) -> Any:
+    """The JSON object in a free-text answer (code fences and surrounding text are ignored).
+
+    Raises ValueError when there is none or it does not parse; as the ``parse``
+    of cached_invoke this keeps truncated or chatty answers out of the cache.
+    """
+    match = _JSON_OBJECT_RE.search(text)
+    if not match:
+        raise ValueError(f"No JSON object in LLM response: {text[:100]!r}")
+    return json.loads(match.group(0))
+
+
+def model_id_for(llm: Any) -> str:
+    """Best-effort stable identifier for a LangChain LLM.
+
+    The model name alone when the LLM exposes one, so the in-process and
+    daemon-backed wrappers of the same weights share entries; otherwise the class.
+    """
+    for attr in ("model", "model_name", "model_id"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    llm_type = getattr(llm, "_llm_type", None)
+    return f"{type(llm).__name__}:{llm_type}" if isinstance(llm_type, str) else type(llm).__name__
+
+
+class LLMCache:
+    """Thread-safe SQLite cache with byte-bounded LRU eviction, TTL and hit/miss counters."""
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024,
+                 ttl: Optional[float] = None):
+        self.path = path or os.path.join(APP_DATA_DIR, "llm_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.ttl = ttl or None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key=?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._delete(key)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed=? WHERE key=?", (now, key))
+            return row[0]
+
+    def put(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, value, size, now, now))
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, key: str):
+        row = self._conn.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+        if row:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key=?", (key,))
+            self._total_bytes -= row[0]
+
+    def _evict(self):
+        """Drop least-recently-used entries until the cache is back under 90% of its bound."""
+        # Other processes share the file, so start from the real total
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self._total_bytes <= self.max_bytes:
+            return
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if self._total_bytes - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        with self._conn:
+            self._conn.executemany("DELETE FROM responses WHERE key=?", victims)
+        self._total_bytes -= freed
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self._total_bytes}
+
+    def close(self):
+        self._conn.close()
+
+
+_cache_instance: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Process-wide cache configured from the environment (None when disabled)."""
+    global _cache_instance
+    if os.getenv("ORGANIZAHH_LLM_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache_instance is None:
+            try:
+                _cache_instance = LLMCache(
+                    max_bytes=int(float(os.getenv("ORGANIZAHH_LLM_CACHE_MB", "256")) * 1024 * 1024),
+                    ttl=float(os.getenv("ORGANIZAHH_LLM_CACHE_TTL", "0")) or None,
+                )
+            except Exception as e:
+                log.warning(f"LLM cache unavailable, continuing without it: {e}")
+                return None
+        return _cache_instance
+
+
+def _response_text(response: Any) -> str:
+    # Chat models return a message object, plain LLMs return a string
+    content = getattr(response, "content", response)
+    return content if isinstance(content, str) else str(content)
+
+
+def cached_invoke(llm: Any, prompt: Any, inputs: Optional[Dict[str, Any]] = None,
+                  cache: Optional[LLMCache] = None, model_id: Optional[str] = None,
+                  parse: Optional[Callable[[str], Any]] = None,
+                  cancel: Optional[CancellationToken] = None,
+                  on_usage: Optional[Callable[[str, str], None]] = None) -> Any:
+    """Invoke ``llm`` on a prompt, serving repeats from the response cache.
+
+    ``prompt`` is either a LangChain PromptTemplate (rendered with ``inputs``)
+    or an already-rendered prompt string. Returns the raw response text, or
+    ``parse(text)`` when a parser is given; in that case only responses that
+    parse are stored, and a cached response that no longer parses is retried.
+    ``cancel`` is checked before the call and handed to LLMs that declare
+    ``supports_cancel`` so they can abort the generation itself.
+    ``on_usage(prompt text, response text)`` is called after each real model
+    call (not for cache hits), e.g. to count tokens for progress reporting.
+    The key includes the LLM's ``generation_settings``.
+    """
+    cache = cache if cache is not None else get_llm_cache()
+    inputs = inputs or {}
+    if isinstance(prompt, str):
+        template_text, prompt_text = prompt, prompt
+    else:
+        partials = getattr(prompt, "partial_variables", None) or {}
+        template_text = json.dumps([getattr(prompt, "template", repr(prompt)), partials], sort_keys=True, default=str)
+        prompt_text = prompt.format(**inputs)
+
+    key = None
+    if cache is not None:
+        key = make_key(model_id or model_id_for(llm), template_text, inputs, generation_settings(llm))
+        hit = cache.get(key)
+        if hit is not None:
+            if parse is None:
+                return hit
+            try:
+                return parse(hit)
+            except Exception:
+                pass
+
+    raise_if_cancelled(cancel)
+    if cancel is not None and getattr(llm, "supports_cancel", False):
+        text = _response_text(llm.invoke(prompt_text, cancel=cancel))
+    else:
+        text = _response_text(llm.invoke(prompt_text))
+    if on_usage is not None:
+        on_usage(prompt_text, text)
+    result = parse(text) if parse is not None else text
+    if cache is not None and text.strip():
+        cache.put(key, text)
+    return result
@@ -0,0 +1,106 @@
+# scripts/llm_dispatch.py
+"""
+Bounded concurrent dispatch of independent LLM requests (prompt chunks/batches).
+
+Remote providers spend almost all of a request waiting on the network, so
+running a few chunks at once brings wall time close to the slowest requests
+instead of the sum of all of them. The number of in-flight requests is capped
+(ORGANIZAHH_LLM_CONCURRENCY, default 4). In-process llama.cpp models are not
+thread-safe and already saturate the CPU, so they always run one at a time.
+
+Chunks are submitted largest first to shorten the tail, while results are
+returned in the original chunk order so merging stays deterministic.
+
+With a CancellationToken, dispatch returns as soon as it is cancelled.
+Chunks that have not started are skipped, chunks still in flight are left
+to their own cancel hooks, and completed results are kept.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+
+DEFAULT_CONCURRENCY = 4
+CANCEL_POLL_INTERVAL = 0.05  # Seconds between cancel checks while waiting on in-flight chunks
+
+
+class DispatchResult(NamedTuple):
+    index: int
+    value: Any
+    error: Optional[BaseException]
+
+
+def llm_concurrency(local_model: bool = False, llm: Any = None) -> int:
+    """Maximum in-flight LLM requests for the current model type.
+
+    An LLM that declares ``max_concurrency`` (the inference-server client,
+    one per server slot) is trusted; other local models run one at a time.
+    """
+    declared = getattr(llm, "max_concurrency", None)
+    if isinstance(declared, int) and declared > 0:
+        return declared
+    if local_model:
+        return 1
+    try:
+        return max(1, int(os.getenv("ORGANIZAHH_LLM_CONCURRENCY", DEFAULT_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_CONCURRENCY
+
+
+def dispatch(items: Sequence[Any], fn: Callable[[Any], Any], max_workers: int = DEFAULT_CONCURRENCY,
+             weight: Callable[[Any], int] = lambda item: len(str(item)),
+             on_result: Optional[Callable[[DispatchResult, int], None]] = None,
+             cancel: Optional[CancellationToken] = None) -> List[DispatchResult]:
+    """Run ``fn`` over ``items`` with at most ``max_workers`` calls in flight.
+
+    Exceptions are captured per item rather than aborting the rest.
+    ``on_result(result, completed_count)`` is called from the calling thread
+    as each item finishes (in completion order). The returned list is in
+    the original item order; after ``cancel``, unfinished items carry an
+    OperationCancelled error.
+    """
+    results: List[Optional[DispatchResult]] = [None] * len(items)
+    order = sorted(range(len(items)), key=lambda i: weight(items[i]), reverse=True)
+
+    def run(i: int) -> DispatchResult:
+        try:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            return DispatchResult(i, fn(items[i]), None)
+        except Exception as e:
+            return DispatchResult(i, None, e)
+
+    def fill_cancelled() -> List[DispatchResult]:
+        return [result if result is not None else DispatchResult(i, None, OperationCancelled())
+                for i, result in enumerate(results)]
+
+    if max_workers <= 1 or len(items) <= 1:
+        # No pool (and no reordering) for sequential runs; keeps thread affinity simple
+        for done, i in enumerate(range(len(items)), 1):
+            if cancel is not None and cancel.cancelled:
+                return fill_cancelled()
+            results[i] = run(i)
+            if on_result:
+                on_result(results[i], done)
+        return results
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="llm")
+    try:
+        pending = {pool.submit(run, i) for i in order}
+        done_count = 0
+        while pending:
+            finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL if cancel is not None else None,
+                                     return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                results[result.index] = result
+                done_count += 1
+                if on_result:
+                    on_result(result, done_count)
+            if cancel is not None and cancel.cancelled:
+                return fill_cancelled()
+    finally:
+        # After a cancel, don't wait for in-flight calls; they unwind through their own cancel hooks
+        pool.shutdown(wait=not (cancel is not None and cancel.cancelled), cancel_futures=True)
+    return results
@@ -0,0 +1,290 @@
+# scripts/log_setup.py
+"""
+Background, structured logging for the app, the workers and terminal.py.
+
+The workers used to ``print`` as they went. On a Windows console or a
+redirected pipe, each print is a blocking write, and those writes added up
+to a real share of organize and analysis time. Now code logs to "organizahh.*"
+loggers through a ``QueueHandler``. The calling thread only puts the record
+on a queue. A ``QueueListener`` thread does the formatting and the writing:
+
+- to the console, at ORGANIZAHH_LOG_LEVEL (INFO by default);
+- to a JSON-lines run log per analysis or organize run
+  (<APP_DATA_DIR>/logs/<time>-<kind>.jsonl). It is opened with
+  ``begin_run`` and closed with ``end_run``, and the last MAX_KEPT_RUN_LOGS
+  are kept.
+
+Per-file messages are DEBUG, so at INFO they cost one level check.
+Per-stage totals are kept in ``StageCounters`` and logged once, when the
+stage ends.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from constants.app_constants import APP_DATA_DIR
+
+LOGGER_NAME = "organizahh"
+MAX_KEPT_RUN_LOGS = 50
+
+# ``extra=QUIET`` keeps a record out of the console (run log only), e.g. one line per failed move
+QUIET = {"quiet": True}
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_run_handler: Optional["RunLogHandler"] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the app's "organizahh" hierarchy (e.g. get_logger("workers"))."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def fields(**data: Any) -> Dict[str, Dict[str, Any]]:
+    """Structured data for a record: ``log.info("Plan ready", extra=fields(moves=10))``."""
+    return {"data": data}
+
+
+def log_dir() -> str:
+    return os.path.join(APP_DATA_DIR, "logs")
+
+
+def _level_from_env(default: int = logging.INFO) -> int:
+    name = os.getenv("ORGANIZAHH_LOG_LEVEL", "").strip().upper()
+    level = logging.getLevelName(name) if name else default
+    return level if isinstance(level, int) else default
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The message as before, plus any structured data as key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = record.getMessage()
+        if record.levelno >= logging.WARNING and not text.startswith(("Warning", "Error")):
+            text = f"{record.levelname.capitalize()}: {text}"
+        data = getattr(record, "data", None)
+        if data:
+            text += " (" + ", ".join(f"{key}={value}" for key, value in data.items()) + ")"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "t": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        data = getattr(record, "data", None)
+        if data:
+            entry["data"] = data
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time (where the prints went); nothing if there is none."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass # Always the current sys.stdout (redirected, captured, or None in a windowed build)
+
+    def emit(self, record: logging.LogRecord):
+        if sys.stdout is not None:
+            super().emit(record)
+
+
+def _is_control(record: logging.LogRecord) -> bool:
+    return hasattr(record, "run_log")
+
+
+class RunLogHandler(logging.Handler):
+    """Writes records to the current run's JSON-lines file, if a run is open.
+
+    ``begin_run`` and ``end_run`` switch files with control records that go
+    through the queue like any other, so each file gets exactly the records
+    logged between the two calls.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(JsonLinesFormatter())
+        self._file = None
+        self.path: Optional[str] = None
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self.path = None
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if _is_control(record):
+                self._close_file()
+                if record.run_log:
+                    self._file = open(record.run_log, "a", encoding="utf-8")
+                    self.path = record.run_log
+            elif self._file is not None:
+                self._file.write(self.format(record) + "\n")
+                self._file.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            self._close_file()
+        finally:
+            self.release()
+        super().close()
+
+
+def setup_logging(level: Optional[int] = None, console: bool = True) -> logging.Logger:
+    """Route the "organizahh" loggers through a background thread (idempotent; safe to call again)."""
+    global _listener, _run_handler
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level if level is not None else _level_from_env())
+    with _lock:
+        if _listener is not None:
+            return logger
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        handlers = []
+        if console:
+            stream_handler = ConsoleHandler()
+            stream_handler.setFormatter(ConsoleFormatter())
+            stream_handler.addFilter(lambda record: not _is_control(record) and not getattr(record, "quiet", False))
+            handlers.append(stream_handler)
+        _run_handler = RunLogHandler()
+        handlers.append(_run_handler)
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.propagate = False
+        atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    """Write out queued records, close the run log and stop the background thread."""
+    global _listener, _run_handler
+    with _lock:
+        listener, run_handler = _listener, _run_handler
+        _listener = _run_handler = None
+    if listener is None:
+        return
+    listener.stop() # Drains the queue first
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    logger.propagate = True
+    for handler in listener.handlers:
+        handler.close()
+
+
+def prune_run_logs(directory: str, keep: int = MAX_KEPT_RUN_LOGS):
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+    except OSError:
+        return
+    for name in names[:-keep] if keep else names:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def _send_control(run_log: Optional[str]):
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handle(logger.makeRecord(LOGGER_NAME, logging.CRITICAL, __file__, 0, "run log", None, None,
+                                    extra={"run_log": run_log}))
+
+
+def begin_run(kind: str, directory: Optional[str] = None, **data: Any) -> Optional[str]:
+    """Start a JSON-lines run log for an "analysis" or "organize" run; returns its path.
+
+    Returns None (and logs nothing to a file) if logging is not set up or the
+    log cannot be created.
+    """
+    if _run_handler is None:
+        return None
+    directory = directory or log_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        prune_run_logs(directory, MAX_KEPT_RUN_LOGS - 1)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1_000_000:06d}-{kind}.jsonl")
+        open(path, "a", encoding="utf-8").close() # Fail here, not on the logging thread
+    except OSError as e:
+        get_logger("logging").warning(f"Could not create run log: {e}")
+        return None
+    _send_control(path)
+    get_logger("run").info(f"Started {kind} run", extra=fields(kind=kind, **data))
+    return path
+
+
+def end_run(**data: Any):
+    """Log the run's closing record and close its file after it."""
+    if _run_handler is None:
+        return
+    get_logger("run").info("Finished run", extra=fields(**data))
+    _send_control(None)
+
+
+class StageCounters:
+    """Cheap per-stage counters and timers, logged once when the stage ends.
+
+    ``add`` is a dict update under a lock (safe from dispatch threads);
+    nothing is formatted or written until ``log``.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.counts: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, n: float = 1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def time(self, name: str):
+        """Add the time spent in the block to ``<name>_s``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(f"{name}_s", time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            counts = dict(self.counts)
+        counts["elapsed_s"] = time.perf_counter() - self.started
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in counts.items()}
+
+    def log(self, logger: logging.Logger, level: int = logging.INFO) -> Dict[str, float]:
+        """Log the totals as one structured record; returns them."""
+        counts = self.snapshot()
+        logger.log(level, f"{self.stage} stage totals", extra=fields(stage=self.stage, **counts))
+        return counts
@@ -0,0 +1,383 @@
+# scripts/move_journal.py
+"""
+Append-only, crash-safe journal of organize runs (one JSON-lines file per run).
+
+Undo used to live only in memory (``last_organization_moves``,
+``moves_history``), so a crash or simply closing terminal.py lost it. Every
+run now writes <APP_DATA_DIR>/journal/<time>-<pid>.jsonl:
+
+  {"op": "begin", "root": ..., "started": ..., "pid": ...}
+  {"op": "mkdir", "path": ...}           intent      {"op": "created", "path": ...}  done
+  {"op": "move", "i": n, "src", "dst"}   intent      {"op": "moved", "i": n}         done
+                                                     {"op": "failed", "i": n, "error": ...}
+  {"op": "commit"}                       run finished
+  {"op": "restored", "i": n} ... {"op": "undone"}     after an undo or rollback
+
+Intents are written ahead of the filesystem change. Fsync is batched (group
+commit): the intents of up to ``batch_size`` moves are synced with one fsync
+before those moves run, and completions ride along with the next sync.
+After a crash the filesystem settles any move whose completion was not
+synced yet: if the target exists and the source does not, the move happened.
+``recover_run`` then either resumes the run or rolls it back, and
+``undo_run`` reverses any committed run, in this session or a later one.
+"""
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from constants.app_constants import APP_DATA_DIR
+from scripts.cross_device_mover import PART_SUFFIX, ProgressCallback
+from scripts.move_plan import MovePlan, MoveResult, execute_move_plan
+
+DEFAULT_BATCH_SIZE = 256
+MAX_KEPT_RUNS = 100  # Older journals are pruned when a new run starts
+
+PENDING, MOVED, FAILED, RESTORED = "pending", "moved", "failed", "restored"
+
+
+# Windows byte-range locks are mandatory, so the lock sits on a byte far past any journal's data
+_WINDOWS_LOCK_OFFSET = 0x7FFFFFF0
+
+
+def journal_dir() -> str:
+    return os.path.join(APP_DATA_DIR, "journal")
+
+
+def _try_lock(f) -> bool:
+    """Take the run lock on an open journal without blocking; False if another handle holds it."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.flush()
+            os.lseek(f.fileno(), _WINDOWS_LOCK_OFFSET, os.SEEK_SET)
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            finally:
+                os.lseek(f.fileno(), 0, os.SEEK_END)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(f):
+    """Release the run lock (closing the file releases it too; Windows wants it explicit)."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            os.lseek(f.fileno(), _WINDOWS_LOCK_OFFSET, os.SEEK_SET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+class MoveJournal:
+    """Writer for one run's journal file.
+
+    The writer holds an OS lock on the file until it is closed, so other
+    processes can tell a run that is still going from one whose process died.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE, next_index: int = 0):
+        self.path = path
+        self.batch_size = batch_size
+        self._next_index = next_index
+        self._file = open(path, "a", encoding="utf-8")
+        self.locked = _try_lock(self._file)
+
+    @classmethod
+    def create(cls, root: str, directory: Optional[str] = None,
+               batch_size: int = DEFAULT_BATCH_SIZE) -> "MoveJournal":
+        directory = directory or journal_dir()
+        os.makedirs(directory, exist_ok=True)
+        prune_runs(directory)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"{stamp}-{time.time_ns() % 1_000_000_000:09d}-{os.getpid()}.jsonl")
+        journal = cls(path, batch_size)
+        journal._write({"op": "begin", "root": os.path.abspath(root), "started": time.time(), "pid": os.getpid()})
+        journal.sync()
+        return journal
+
+    @classmethod
+    def reopen(cls, path: str) -> "MoveJournal":
+        """Append to an existing run (recovery and undo records)."""
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            torn = size > 0 and f.seek(size - 1) >= 0 and f.read(1) != b"\n"
+        journal = cls(path, next_index=max((move.i for move in read_run(path).moves), default=-1) + 1)
+        if torn:
+            journal._file.write("\n")  # End the torn line so the next record starts on its own
+        return journal
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def sync(self):
+        """Make everything written so far durable (one fsync for the whole batch)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    # --- Intents (call sync() before acting on them) ---
+    def intend_mkdirs(self, paths: Iterable[str]):
+        for path in paths:
+            self._write({"op": "mkdir", "path": path})
+
+    def intend_moves(self, moves: Iterable[Tuple[str, str]]) -> List[int]:
+        """Record (src, dst) move intents; returns their journal ids."""
+        ids = []
+        for src, dst in moves:
+            ids.append(self._next_index)
+            self._write({"op": "move", "i": self._next_index, "src": src, "dst": dst})
+            self._next_index += 1
+        return ids
+
+    # --- Completions (buffered; durable with the next sync) ---
+    def created(self, path: str):
+        self._write({"op": "created", "path": path})
+
+    def moved(self, i: int):
+        self._write({"op": "moved", "i": i})
+
+    def failed(self, i: int, error: str):
+        self._write({"op": "failed", "i": i, "error": error})
+
+    def restored(self, i: int):
+        self._write({"op": "restored", "i": i})
+
+    def commit(self):
+        self._write({"op": "commit"})
+        self.close()
+
+    def mark_undone(self):
+        self._write({"op": "undone"})
+        self.close()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            if self.locked:
+                _unlock(self._file)
+            self._file.close()
+
+
+class JournalMove(NamedTuple):
+    i: int
+    src: str
+    dst: str
+    state: str
+
+
+class JournalRun(NamedTuple):
+    path: str
+    root: str
+    started: float
+    pid: int
+    moves: List[JournalMove]
+    created_dirs: List[str]   # Directories this run created (removed again on undo when empty)
+    pending_dirs: List[str]   # mkdir intents without a completion record
+    committed: bool
+    undone: bool
+
+    @property
+    def moved(self) -> List[JournalMove]:
+        return [move for move in self.moves if move.state == MOVED]
+
+
+def read_run(path: str) -> JournalRun:
+    """Parse a journal file; a torn last line (crash mid-write) is ignored."""
+    root, started, pid = "", 0.0, 0
+    moves: Dict[int, List] = {}
+    created: Dict[str, None] = {}
+    pending_dirs: Dict[str, None] = {}
+    committed = undone = False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get("op")
+            if op == "begin":
+                root, started, pid = record.get("root", ""), record.get("started", 0.0), record.get("pid", 0)
+            elif op == "move":
+                moves[record["i"]] = [record["src"], record["dst"], PENDING]
+            elif op in ("moved", "failed", "restored") and record.get("i") in moves:
+                moves[record["i"]][2] = {"moved": MOVED, "failed": FAILED, "restored": RESTORED}[op]
+            elif op == "mkdir":
+                pending_dirs[record["path"]] = None
+            elif op == "created":
+                pending_dirs.pop(record["path"], None)
+                created[record["path"]] = None
+            elif op == "commit":
+                committed = True
+            elif op == "undone":
+                undone = True
+    return JournalRun(path, root, started, pid,
+                      [JournalMove(i, src, dst, state) for i, (src, dst, state) in sorted(moves.items())],
+                      list(created), list(pending_dirs), committed, undone)
+
+
+def list_runs(directory: Optional[str] = None) -> List[str]:
+    """Journal files, oldest first."""
+    directory = directory or journal_dir()
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in names]
+
+
+def prune_runs(directory: Optional[str] = None, keep: int = MAX_KEPT_RUNS):
+    """Delete the oldest journals beyond ``keep`` (unfinished ones are kept for recovery)."""
+    for path in list_runs(directory)[:-keep or None]:
+        if _last_op(path) in ("commit", "undone"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _last_op(path: str) -> Optional[str]:
+    """The op of a journal's last complete line, reading only the file's tail."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line).get("op")
+        except ValueError:
+            continue
+    return None
+
+
+def _run_active(run: "JournalRun") -> bool:
+    """True while a live process has the run's journal open (it holds the journal lock).
+
+    A PID probe cannot tell this on Windows and is fooled by PID reuse; the
+    lock is released by the OS when its process exits, however that happens.
+    """
+    if run.pid == os.getpid():
+        return True # This process's own runs are never crashed
+    try:
+        with open(run.path, "a", encoding="utf-8") as f:
+            if not _try_lock(f):
+                return True
+            _unlock(f)
+    except OSError:
+        return True # Cannot tell; leave the run alone
+    return False
+
+
+def incomplete_runs(directory: Optional[str] = None) -> List[JournalRun]:
+    """Runs that neither committed nor were rolled back and whose journal is no longer locked (the process died mid-run)."""
+    runs = []
+    for path in list_runs(directory):
+        if _last_op(path) in ("commit", "undone"):
+            continue  # Fast path: no need to parse finished runs
+        run = read_run(path)
+        if not run.committed and not run.undone and not _run_active(run):
+            runs.append(run)
+    return runs
+
+
+def last_undoable_run(root: Optional[str] = None, directory: Optional[str] = None) -> Optional[JournalRun]:
+    """Newest committed, not yet undone run that moved something (optionally for ``root``)."""
+    root = os.path.abspath(root) if root else None
+    for path in reversed(list_runs(directory)):
+        run = read_run(path)
+        if root is not None and run.root != root:
+            continue
+        if run.committed and not run.undone and run.moved:
+            return run
+    return None
+
+
+def _parent_dirs(root: str, paths: Iterable[str]) -> List[str]:
+    """Every directory between ``root`` and the parents of ``paths``, parents first."""
+    parts = set()
+    for path in paths:
+        rel = os.path.relpath(os.path.dirname(path), root)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            continue
+        components = tuple(rel.split(os.sep))
+        for depth in range(1, len(components) + 1):
+            parts.add(components[:depth])
+    return [os.path.join(root, *p) for p in sorted(parts)]
+
+
+def undo_run(run: JournalRun, on_copy_progress: Optional[ProgressCallback] = None,
+             on_progress: Optional[Callable[[int, int], None]] = None) -> MoveResult:
+    """Move every file of ``run`` back in bulk and remove the folders the run created (if empty).
+
+    Safe to repeat after a crash: files already back at their source are only recorded.
+    ``on_progress(done, total)`` follows the moves, as in execute_move_plan.
+    """
+    journal = MoveJournal.reopen(run.path)
+    to_restore: List[JournalMove] = []
+    errors: List[str] = []
+    for move in reversed(run.moved):
+        if os.path.lexists(move.dst):
+            to_restore.append(move)
+        elif os.path.lexists(move.src):
+            journal.restored(move.i)  # Restored by an earlier, interrupted undo
+        else:
+            errors.append(f"Undo Error '{os.path.relpath(move.dst, run.root)}': file not found")
+    plan = MovePlan(run.root, [(move.dst, move.src) for move in to_restore],
+                    _parent_dirs(run.root, (move.src for move in to_restore)), 0, 0)
+    result = execute_move_plan(plan, on_progress=on_progress, progress_every=1, on_copy_progress=on_copy_progress)
+    restored = {original_src for original_src, _ in result.moved}  # (dst, src) pairs of the undo plan
+    for move in to_restore:
+        if move.src in restored:
+            journal.restored(move.i)
+    for path in sorted(run.created_dirs + run.pending_dirs, key=len, reverse=True):  # Deepest first
+        try:
+            os.rmdir(path)
+        except OSError:
+            pass  # Not empty (other files were added) or already gone
+    errors.extend(result.errors)
+    if errors:
+        journal.close()
+    else:
+        journal.mark_undone()
+    return MoveResult(result.moved, errors, result.cross_device, result.copied_bytes)
+
+
+def recover_run(run: JournalRun, resume: bool = True,
+                on_copy_progress: Optional[ProgressCallback] = None,
+                on_progress: Optional[Callable[[int, int], None]] = None) -> MoveResult:
+    """Finish (``resume``) or roll back a run that was interrupted; progress as in undo_run."""
+    journal = MoveJournal.reopen(run.path)
+    pending: List[JournalMove] = []
+    for move in run.moves:
+        if move.state != PENDING:
+            continue
+        try:
+            os.remove(move.dst + PART_SUFFIX)  # Half-copied cross-device file
+        except OSError:
+            pass
+        if os.path.lexists(move.dst) and not os.path.lexists(move.src):
+            journal.moved(move.i)  # Happened; its completion record was not synced yet
+        else:
+            pending.append(move)
+    for move in pending:
+        journal.failed(move.i, "interrupted; " + ("retried" if resume else "rolled back"))
+    journal.sync()
+    if not resume:
+        journal.close()
+        return undo_run(read_run(run.path), on_copy_progress, on_progress)
+    todo = [(move.src, move.dst) for move in pending if os.path.lexists(move.src)]
+    plan = MovePlan(run.root, todo, _parent_dirs(run.root, (dst for _, dst in todo)), 0, 0)
+    result = execute_move_plan(plan, on_progress=on_progress, progress_every=1, on_copy_progress=on_copy_progress,
+                               journal=journal)
+    journal.commit()
+    return result
@@ -0,0 +1,194 @@
+# scripts/move_plan.py
+"""
+Organize a folder in two steps: compile a structure into a MovePlan, then execute it.
+
+Compiling flattens the nested structure into absolute (src, dst) pairs, each
+file at most once (the first folder it is listed under wins, as in
+StructureTree). It also gathers the deduplicated, sorted list of directories
+to create. Sorted order puts every parent before its children, so each
+directory is one ``mkdir``. No filesystem calls are made while compiling.
+
+Executing creates those directories, then moves each file with a plain
+``os.rename`` when source and destination are on the same filesystem. The
+device check is one ``stat`` per distinct directory, not per file.
+Cross-device moves are collected and then handed to the parallel copy engine
+in scripts/cross_device_mover.py. Nothing is printed per file; errors are
+collected and returned. With a MoveJournal (scripts/move_journal.py) every
+folder and move is journaled ahead of time, one fsync per batch. A cancelled
+token stops the run between moves; the moves done so far stay done (and
+undoable).
+"""
+import errno
+import os
+from typing import Callable, Container, Dict, List, NamedTuple, Optional, Tuple
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+from scripts.cross_device_mover import ProgressCallback, move_across_devices
+from scripts.structure_tree import StructureTree
+from scripts.structure_utils import FolderPath, iter_assignments
+
+
+class MovePlan(NamedTuple):
+    root: str
+    moves: List[Tuple[str, str]]  # (src, dst) absolute paths
+    dirs: List[str]               # Directories to create, parents first
+    in_place: int                 # Files the structure leaves where they are
+    unknown: int                  # Names not in ``files`` (skipped)
+
+
+class MoveResult(NamedTuple):
+    moved: List[Tuple[str, str]]  # (dst, src) for undo, in move order
+    errors: List[str]
+    cross_device: int             # Moves that had to copy between filesystems
+    copied_bytes: int = 0         # Bytes copied for those moves
+    cancelled: bool = False       # Stopped early by a CancellationToken
+
+
+def compile_move_plan(root: str, structure: Optional[dict], files: Optional[Container[str]] = None) -> MovePlan:
+    """Flatten ``structure`` into the moves and directories needed under ``root``.
+
+    ``files`` (e.g. a set of snapshot names) restricts the plan to files that
+    exist; names are relative to ``root`` and may contain "/" (recursive scans).
+    """
+    assignments = structure.iter_assignments() if isinstance(structure, StructureTree) \
+        else iter_assignments(structure or {})
+    root_prefix = os.path.join(root, "")
+    moves: List[Tuple[str, str]] = []
+    seen = set()
+    dir_parts = set()
+    target_dirs: Dict[FolderPath, str] = {}  # Target folder -> its path, joined once per folder
+
+    def target_dir(target: FolderPath) -> str:
+        path = target_dirs.get(target)
+        if path is None:
+            for depth in range(1, len(target) + 1):
+                dir_parts.add(target[:depth])
+            path = target_dirs[target] = os.path.join(root, *target)
+        return path
+
+    in_place = unknown = 0
+    for name, folder in assignments:
+        if name in seen:
+            continue
+        seen.add(name)
+        if files is not None and name not in files:
+            unknown += 1
+            continue
+        if not folder:
+            in_place += 1
+            continue
+        if "/" in name or os.sep in name:
+            # Keep a recursive file's sub-path under its new folder
+            parts = tuple(part for part in name.replace(os.sep, "/").split("/") if part)
+            dst = os.path.join(target_dir(folder + parts[:-1]), parts[-1])
+        else:
+            dst = os.path.join(target_dir(folder), name)
+        moves.append((root_prefix + name, dst))
+    dirs = [os.path.join(root, *parts) for parts in sorted(dir_parts)]
+    return MovePlan(root, moves, dirs, in_place, unknown)
+
+
+def execute_move_plan(plan: MovePlan, on_progress: Optional[Callable[[int, int], None]] = None,
+                      progress_every: int = 1000, on_copy_progress: Optional[ProgressCallback] = None,
+                      journal=None, cancel: Optional[CancellationToken] = None) -> MoveResult:
+    """Create the plan's directories and perform its moves; failures don't stop the run.
+
+    ``on_progress(done, total)`` follows the renames; ``on_copy_progress(bytes
+    done, bytes total, bytes/s)`` follows the cross-device copies. ``journal``
+    (a MoveJournal) records intents before acting and completions after; the
+    caller commits it. ``cancel`` is checked before every move.
+    """
+    errors: List[str] = []
+    failed_dirs = set()
+    if journal is not None:
+        journal.intend_mkdirs(plan.dirs)
+        journal.sync()
+    for path in plan.dirs:
+        try:
+            os.mkdir(path)
+            if journal is not None:
+                journal.created(path)
+        except FileExistsError:
+            if not os.path.isdir(path):
+                failed_dirs.add(path)
+                errors.append(f"Dir Error '{os.path.relpath(path, plan.root)}': a file with that name exists")
+        except OSError as e:
+            failed_dirs.add(path)
+            errors.append(f"Dir Error '{os.path.relpath(path, plan.root)}': {e}")
+
+    devices: Dict[str, Optional[int]] = {}
+
+    def device_of(directory: str) -> Optional[int]:
+        if directory not in devices:
+            try:
+                devices[directory] = os.stat(directory).st_dev
+            except OSError:
+                devices[directory] = None
+        return devices[directory]
+
+    def move_error(src: str, dst: str, e: BaseException) -> str:
+        return (f"Move Error '{os.path.relpath(src, plan.root)}' to "
+                f"'{os.path.relpath(os.path.dirname(dst), plan.root)}': {e}")
+
+    def record(k: int, error: Optional[str] = None):
+        if journal is not None:
+            journal.moved(ids[k]) if error is None else journal.failed(ids[k], error)
+
+    moved: List[Tuple[str, str]] = []
+    deferred: List[int] = []  # Indexes of cross-device moves, copied in parallel afterwards
+    total = len(plan.moves)
+    ids: List[int] = []  # Journal ids, aligned with plan.moves
+    cancelled = False
+    for k, (src, dst) in enumerate(plan.moves):
+        if cancel is not None and cancel.cancelled:
+            cancelled = True
+            for pending in range(k, len(ids)):  # Journaled intents that will not run
+                record(pending, "cancelled")
+            break
+        if journal is not None and k % journal.batch_size == 0:
+            # Group commit: the next batch's intents (and earlier completions) in one fsync
+            ids.extend(journal.intend_moves(plan.moves[k:k + journal.batch_size]))
+            journal.sync()
+        try:
+            dst_dir = os.path.dirname(dst)
+            if dst_dir in failed_dirs:
+                errors.append(f"Move Error '{os.path.relpath(src, plan.root)}': target folder could not be created")
+                record(k, errors[-1])
+                continue
+            if device_of(os.path.dirname(src)) != device_of(dst_dir):
+                deferred.append(k)
+                continue
+            try:
+                os.rename(src, dst)
+                moved.append((dst, src))
+                record(k)
+            except OSError as e:
+                if e.errno == errno.EXDEV:  # e.g. a bind mount the st_dev check could not see
+                    deferred.append(k)
+                else:
+                    errors.append(move_error(src, dst, e))
+                    record(k, errors[-1])
+        finally:
+            # Every move counts once handled: renamed, failed, or deferred to the copy phase
+            done = k + 1
+            if on_progress is not None and (done % progress_every == 0 or done == total):
+                on_progress(done, total)
+
+    copied_bytes = 0
+    if deferred:
+        copy_errors, copied_bytes = move_across_devices([plan.moves[k] for k in deferred], device_of,
+                                                        on_progress=on_copy_progress, cancel=cancel)
+        for k, error in zip(deferred, copy_errors):
+            src, dst = plan.moves[k]
+            if error is None:
+                moved.append((dst, src))
+                record(k)
+            elif isinstance(error, OperationCancelled):
+                cancelled = True
+                record(k, "cancelled")  # Source untouched; not an error
+            else:
+                errors.append(move_error(src, dst, error))
+                record(k, errors[-1])
+    if journal is not None:
+        journal.sync()
+    return MoveResult(moved, errors, len(deferred), copied_bytes, cancelled)
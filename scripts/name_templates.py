@@ -0,0 +1,100 @@
+# scripts/name_templates.py
+"""
+Collapse families of similar filenames before sending them to the LLM.
+
+Camera dumps, dated invoices and hash-named exports produce thousands of names
+that differ only in their numbers (IMG_0001.jpg ... IMG_9412.jpg). Each name
+is normalised into a template with UUIDs, hashes, dates and digit runs replaced
+by placeholders; every template with several members is sent to the LLM once,
+as a representative labelled with its count ("IMG_0001.jpg [x9412]"), and the
+placement the LLM returns is expanded back to every member.
+"""
+import re
+from typing import Dict, Iterable, List
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+# Long hex runs that contain at least one digit (pure words like "deadbeefcafe..." are left alone)
+_HASH_RE = re.compile(r"(?<![0-9A-Za-z])(?=[a-fA-F]*\d)[0-9a-fA-F]{16,}(?![0-9A-Za-z])")
+_DATE_RE = re.compile(
+    r"(?<!\d)(?:"
+    r"(?:19|20)\d{2}[-_.]?(?:0[1-9]|1[0-2])[-_.]?(?:0[1-9]|[12]\d|3[01])"  # 2024-03-17 / 20240317
+    r"|(?:0[1-9]|[12]\d|3[01])[-_.](?:0[1-9]|1[0-2])[-_.](?:19|20)\d{2}"   # 17-03-2024
+    r")(?!\d)"
+)
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def name_template(name: str) -> str:
+    """Normalise a filename into its template, e.g. IMG_20240317_0042.jpg -> IMG_{date}_{n}.jpg."""
+    template = _UUID_RE.sub("{uuid}", name)
+    template = _HASH_RE.sub("{hash}", template)
+    template = _DATE_RE.sub("{date}", template)
+    return _DIGITS_RE.sub("{n}", template)
+
+
+def cluster_label(representative: str, count: int) -> str:
+    return f"{representative} [x{count}]"
+
+
+class NameClusters:
+    """Groups names by template and maps LLM placements back to members.
+
+    ``labels`` is what should be sent to the LLM: singletons as-is and one
+    "representative [xN]" label per template with at least ``min_size`` members.
+    """
+
+    def __init__(self, names: Iterable[str], min_size: int = 2):
+        groups: Dict[str, List[str]] = {}
+        for name in names:
+            groups.setdefault(name_template(name), []).append(name)
+
+        self.labels: List[str] = []
+        self._members: Dict[str, List[str]] = {}
+        self.total = 0
+        all_names = {n for members in groups.values() for n in members}
+        for members in groups.values():
+            self.total += len(members)
+            label = cluster_label(members[0], len(members))
+            if len(members) < min_size or label in all_names:
+                self.labels.extend(members)
+                continue
+            self.labels.append(label)
+            # The LLM may echo either the label or just the representative's name
+            self._members[label] = members
+            self._members[members[0]] = members
+
+    @property
+    def collapsed(self) -> int:
+        """How many names the labels stand for beyond themselves."""
+        return self.total - len(self.labels)
+
+    def members(self, label: str) -> List[str]:
+        return self._members.get(label, [label])
+
+    def expand_structure(self, structure: dict) -> dict:
+        """Return a copy of an LLM structure with every label replaced by its members."""
+        seen = set()  # A cluster placed twice (label and bare name) is only expanded once
+
+        def expand_files(files: List[str]) -> List[str]:
+            result = []
+            for name in files:
+                members = self._members.get(name)
+                if members is None:
+                    result.append(name)
+                elif id(members) not in seen:
+                    seen.add(id(members))
+                    result.extend(members)
+            return result
+
+        def expand(node):
+            if isinstance(node, dict):
+                return {key: expand(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return expand_files([n for n in node if isinstance(n, str)])
+            if isinstance(node, str) and node in self._members:
+                files = expand_files([node])
+                return files if len(files) != 1 else files[0]
+            return node
+
+        return expand(structure) if self._members else structure
+
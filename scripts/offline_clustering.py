@@ -0,0 +1,228 @@
+# scripts/offline_clustering.py
+"""
+Offline, LLM-free "smart grouping" of filenames.
+
+Files are first split by extension category (as in the extension analysis),
+then every category is clustered on the filenames themselves:
+
+  * each stem (lower-cased, digits folded to 0, first 32 bytes) is hashed
+    into a fixed-size vector from its character trigrams and word tokens;
+  * identical normalised stems are deduplicated and weighted by their count;
+  * spherical k-means runs on a seeded sample and then assigns every stem
+    in blocks, so memory stays bounded for very large folders;
+  * each cluster is named after the tokens most of its members share.
+
+Everything is vectorised with NumPy, runs on the CPU without any network
+access and handles a million names in seconds. The result uses the nested
+structure shape the LLM produces and OrganizeWorker consumes.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from scripts.file_categories import classify_many
+from scripts.log_setup import get_logger
+from scripts.structure_utils import FILES_KEY
+
+log = get_logger("offline_clustering")
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    log.warning("numpy not installed. Offline smart grouping will be disabled.")
+
+N_DIMS = 256               # Hashed feature dimensions (power of two)
+MAX_STEM_BYTES = 32        # Stems are compared on their first 32 bytes
+SAMPLE_SIZE = 20000        # Distinct stems k-means is fitted on
+KMEANS_ITERS = 25
+KMEANS_RESTARTS = 4        # Seeded k-means++ restarts; the tightest fit wins
+ASSIGN_BLOCK = 16384       # Rows featurised per block when assigning
+TOKEN_WEIGHT = 2.0         # Whole words count more than trigrams
+MIN_SHARED_TOKEN = 0.3     # Share of a cluster a token needs to name it
+
+_WORD_RE = re.compile(r"[^\W\d_]{3,}")
+_STOP_WORDS = {"the", "and", "for", "with", "from", "copy", "file", "new", "final"}
+
+
+def _stem(name: str) -> str:
+    base = name.rsplit("/", 1)[-1]
+    stem, dot, _ = base.rpartition(".")
+    return (stem if dot and stem else base).lower()
+
+
+def _stem_matrix(stems: List[str]) -> "np.ndarray":
+    """uint8 (n, MAX_STEM_BYTES) matrix, zero-padded, with digits folded to '0'."""
+    raw = np.array([s.encode("utf-8", "replace")[:MAX_STEM_BYTES] for s in stems], dtype=f"S{MAX_STEM_BYTES}")
+    matrix = raw.view(np.uint8).reshape(len(stems), MAX_STEM_BYTES).copy()
+    matrix[(matrix >= 48) & (matrix <= 57)] = 48
+    return matrix
+
+
+def _features(rows: "np.ndarray") -> "np.ndarray":
+    """L2-normalised hashed trigram + token vectors (float32, shape (n, N_DIMS))."""
+    n, width = rows.shape
+    if n == 0:
+        return np.zeros((0, N_DIMS), dtype=np.float32)
+    codes = rows.astype(np.int64)
+    letters = ((rows >= 97) & (rows <= 122)) | (rows >= 128)
+
+    # Character trigrams inside words (digit/separator runs would make every numbered name look alike)
+    trigrams = codes[:, :-2] * 961 + codes[:, 1:-1] * 31 + codes[:, 2:]
+    tri_idx = ((trigrams * 0x9E3779B1) >> 11) & (N_DIMS - 1)
+    tri_mask = letters[:, :-2] & letters[:, 1:-1] & letters[:, 2:]
+
+    # Word tokens: rolling hash over runs of letters, emitted at the end of each run
+    token_idx = np.zeros((n, width), dtype=np.int64)
+    token_mask = np.zeros((n, width), dtype=bool)
+    run_hash = np.zeros(n, dtype=np.int64)
+    run_len = np.zeros(n, dtype=np.int64)
+    for j in range(width):
+        in_run = letters[:, j]
+        run_hash = np.where(in_run, (run_hash * 31 + codes[:, j]) & 0x7FFFFFFF, 0)
+        run_len = np.where(in_run, run_len + 1, 0)
+        ends = in_run & ~letters[:, j + 1] if j + 1 < width else in_run
+        token_mask[:, j] = ends & (run_len >= 2)
+        token_idx[:, j] = ((run_hash * 0x85EBCA6B) >> 13) & (N_DIMS - 1)
+
+    row_ids = np.arange(n, dtype=np.int64)[:, None]
+    flat = np.concatenate([(row_ids * N_DIMS + tri_idx)[tri_mask], (row_ids * N_DIMS + token_idx)[token_mask]])
+    weights = np.concatenate([np.ones(int(tri_mask.sum())), np.full(int(token_mask.sum()), TOKEN_WEIGHT)])
+    vectors = np.bincount(flat, weights=weights, minlength=n * N_DIMS).reshape(n, N_DIMS).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _kmeans_pp(vectors: "np.ndarray", weights: "np.ndarray", k: int, rng) -> "np.ndarray":
+    centers = [vectors[rng.choice(len(vectors), p=weights / weights.sum())]]
+    best = 1.0 - vectors @ centers[0]
+    for _ in range(1, k):
+        dist = np.clip(best, 0, None) * weights
+        total = dist.sum()
+        idx = rng.choice(len(vectors), p=dist / total) if total > 0 else rng.integers(len(vectors))
+        centers.append(vectors[idx])
+        best = np.minimum(best, 1.0 - vectors @ vectors[idx])
+    return np.array(centers, dtype=np.float32)
+
+
+def _spherical_kmeans(vectors: "np.ndarray", weights: "np.ndarray", k: int, seed: int) -> "np.ndarray":
+    """Weighted spherical k-means with restarts; returns unit-length centroids (k, N_DIMS)."""
+    rng = np.random.default_rng(seed)
+    best_centers, best_fit = None, -1.0
+    for _ in range(KMEANS_RESTARTS):
+        centers = _lloyd(vectors, weights, _kmeans_pp(vectors, weights, k, rng))
+        fit = float((np.max(vectors @ centers.T, axis=1) * weights).sum())
+        if fit > best_fit:
+            best_centers, best_fit = centers, fit
+    return best_centers
+
+
+def _lloyd(vectors: "np.ndarray", weights: "np.ndarray", centers: "np.ndarray") -> "np.ndarray":
+    """Lloyd iterations from the given centroids until assignments stop changing."""
+    labels = None
+    for _ in range(KMEANS_ITERS):
+        new_labels = np.argmax(vectors @ centers.T, axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, vectors * weights[:, None])
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        if empty.any():
+            # Reseed empty clusters with the points farthest from their centroid
+            fit = np.einsum("ij,ij->i", vectors, centers[labels])
+            for c, idx in zip(np.flatnonzero(empty), np.argsort(fit)[:int(empty.sum())]):
+                sums[c] = vectors[idx]
+                norms[c] = 1.0
+        centers = sums / norms
+    return centers
+
+
+def _assign(rows: "np.ndarray", centers: "np.ndarray") -> "np.ndarray":
+    """Nearest centroid per row; -1 for rows without any letters to compare."""
+    labels = np.empty(len(rows), dtype=np.int64)
+    for start in range(0, len(rows), ASSIGN_BLOCK):
+        block = _features(rows[start:start + ASSIGN_BLOCK])
+        labels[start:start + ASSIGN_BLOCK] = np.where(block.any(axis=1), np.argmax(block @ centers.T, axis=1), -1)
+    return labels
+
+
+def _cluster_name(stems: Iterable[str]) -> Optional[str]:
+    """Name a cluster after the words most of its members share (None if nothing is shared)."""
+    freq: Counter = Counter()
+    total = 0
+    for stem in stems:
+        total += 1
+        for word in set(_WORD_RE.findall(stem)):
+            if word not in _STOP_WORDS:
+                freq[word] += 1
+    shared = [word for word, n in freq.most_common(2) if n >= MIN_SHARED_TOKEN * total]
+    return " ".join(word.title() for word in shared) or None
+
+
+def cluster_names(names: List[str], max_groups: int = 8, min_group_size: int = 3, seed: int = 0) -> dict:
+    """Group one category's names into {cluster name: [names]} (+ FILES_KEY for leftovers)."""
+    stems = [_stem(n) for n in names]
+    matrix = _stem_matrix(stems)
+    unique, inverse, counts = np.unique(matrix.view(f"V{MAX_STEM_BYTES}").ravel(),
+                                        return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    unique_rows = unique.view(np.uint8).reshape(-1, MAX_STEM_BYTES)
+    k = min(max_groups, len(unique_rows), max(1, len(names) // min_group_size))
+    if k <= 1:
+        return {FILES_KEY: list(names)}
+
+    rng = np.random.default_rng(seed)
+    sample = np.arange(len(unique_rows))
+    if len(sample) > SAMPLE_SIZE:
+        sample = np.sort(rng.choice(sample, SAMPLE_SIZE, replace=False))
+    vectors = _features(unique_rows[sample])
+    has_words = vectors.any(axis=1)
+    k = min(k, int(has_words.sum()))
+    if k <= 1:
+        return {FILES_KEY: list(names)}
+    centers = _spherical_kmeans(vectors[has_words], counts[sample][has_words].astype(np.float32), k, seed)
+    labels = _assign(unique_rows, centers)[inverse]
+
+    members: Dict[int, List[int]] = {}
+    for i, label in enumerate(labels.tolist()):
+        members.setdefault(label, []).append(i)
+
+    result: Dict[str, List[str]] = {}
+    leftovers: List[str] = []
+    for label, idxs in sorted(members.items(), key=lambda item: len(item[1]), reverse=True):
+        files = [names[i] for i in idxs]
+        if label < 0 or len(idxs) < min_group_size:
+            leftovers.extend(files)
+            continue
+        sample_idx = idxs if len(idxs) <= 300 else [idxs[int(j * len(idxs) / 300)] for j in range(300)]
+        folder = _cluster_name(stems[i] for i in sample_idx)
+        if folder is None:
+            leftovers.extend(files)
+        else:
+            result.setdefault(folder, []).extend(files)
+    if leftovers:
+        result[FILES_KEY] = leftovers
+    return result
+
+
+def build_offline_structure(names: Iterable[str], max_groups: int = 8, min_group_size: int = 3,
+                            seed: int = 0) -> dict:
+    """Nested organisation structure for ``names`` without an LLM.
+
+    Top level is the extension category; inside it, filename clusters become
+    sub-folders and files that fit no cluster stay directly in the category.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required for offline smart grouping")
+    structure = {}
+    for category, files in classify_many(names).items():
+        if len(files) < 2 * min_group_size:
+            structure[category] = list(files)
+            continue
+        groups = cluster_names(files, max_groups=max_groups, min_group_size=min_group_size, seed=seed)
+        structure[category] = groups[FILES_KEY] if list(groups) == [FILES_KEY] else groups
+    return structure
@@ -0,0 +1,229 @@
+# scripts/progress.py
+"""
+Typed, rate-coalesced progress events for the GUI workers and terminal.py.
+
+Workers used to emit free-form status strings, and the analysis dialog ran
+``QApplication.processEvents()`` for each one. Now a worker feeds counters
+into a ``ProgressReporter``: files scanned, chunks done, tokens in and out,
+moves done, bytes copied. The reporter turns them into ``ProgressEvent``s
+with a rate and an ETA. It delivers at most one event per REFRESH_INTERVAL,
+so a 100k-move run costs a few dozen UI updates, not 100k. Stage changes,
+status messages and the final count of a stage are always delivered.
+
+The same events drive the Qt progress dialogs (through a worker signal) and
+the rewritten status line in terminal.py (``TerminalProgressLine``).
+"""
+import os
+import sys
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+DEFAULT_REFRESH_INTERVAL = 0.1
+
+
+def _interval_from_env(default: float = DEFAULT_REFRESH_INTERVAL) -> float:
+    try:
+        return max(0.0, float(os.getenv("ORGANIZAHH_PROGRESS_INTERVAL", default)))
+    except ValueError:
+        return default
+
+
+# Seconds between delivered events (at most ~10 UI updates per second by default)
+REFRESH_INTERVAL = _interval_from_env()
+
+# Stages
+SCAN = "scan"
+CLASSIFY = "classify"
+ORGANIZE = "organize"
+COPY = "copy"
+STATUS = "status" # Plain status message between counted stages
+
+BYTES = "bytes"
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1000:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1000
+    return f"{n:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+class ProgressEvent(NamedTuple):
+    stage: str
+    message: str
+    done: int = 0
+    total: Optional[int] = None # None while unknown (e.g. scanning)
+    unit: str = "files"
+    rate: float = 0.0 # Units per second since the stage started
+    eta: Optional[float] = None # Seconds left, when total and rate are known
+    elapsed: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of the stage done (0..1), or None when the total is unknown."""
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+    def _amount(self, n: float) -> str:
+        return format_bytes(n) if self.unit == BYTES else f"{n:,.0f}"
+
+    def describe(self) -> str:
+        """One-line text, e.g. "Moving files: 5,000/100,000 moves | 2,100 moves/s | ETA 45s"."""
+        parts = [self.message]
+        if self.done or self.total:
+            unit = "" if self.unit == BYTES else f" {self.unit}"
+            if self.total:
+                parts.append(f"{self._amount(self.done)}/{self._amount(self.total)}{unit} ({self.fraction:.0%})")
+            else:
+                parts.append(f"{self._amount(self.done)}{unit}")
+        if self.rate > 0 and self.elapsed >= 1.0: # Rates over the first instants are noise
+            parts.append(f"{format_bytes(self.rate)}/s" if self.unit == BYTES else f"{self.rate:,.0f} {self.unit}/s")
+        if self.tokens_in or self.tokens_out:
+            parts.append(f"{self.tokens_in:,} tokens in / {self.tokens_out:,} out")
+        if self.eta is not None and self.elapsed >= 1.0:
+            parts.append(f"ETA {format_duration(self.eta)}")
+        return " | ".join(parts)
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """Thread-safe progress counters that deliver coalesced ProgressEvents to ``emit``.
+
+    ``start`` begins a stage, ``update`` moves its counters, ``status``
+    changes its message. ``emit`` is called from whichever thread made the
+    update (one call at a time, outside the counter lock), so a Qt signal is
+    a natural target.
+    """
+
+    def __init__(self, emit: Optional[ProgressCallback], interval: float = REFRESH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self._emit = emit
+        self._interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._emit_lock = threading.Lock() # Keeps a terminal line from being written by two threads at once
+        self._last_emit = float("-inf")
+        self._pending = False
+        self.stage = STATUS
+        self._message = ""
+        self._done = 0
+        self._total: Optional[int] = None
+        self._unit = "files"
+        self._started = clock()
+        self._tokens_in = 0
+        self._tokens_out = 0
+        self.last: Optional[ProgressEvent] = None # Last delivered event
+
+    def _event(self, now: float) -> ProgressEvent:
+        elapsed = now - self._started
+        rate = self._done / elapsed if elapsed > 0 else 0.0
+        eta = (self._total - self._done) / rate if self._total and rate > 0 else None
+        return ProgressEvent(self.stage, self._message, self._done, self._total, self._unit,
+                             rate, eta, elapsed, self._tokens_in, self._tokens_out)
+
+    def _deliver(self, force: bool) -> Optional[ProgressEvent]:
+        """Event to emit now (call with the lock held), or None if coalesced."""
+        now = self._clock()
+        finished = self._total is not None and self._done >= self._total
+        if not force and not finished and now - self._last_emit < self._interval:
+            self._pending = True
+            return None
+        self._last_emit = now
+        self._pending = False
+        self.last = self._event(now)
+        return self.last
+
+    def _send(self, event: Optional[ProgressEvent]):
+        if event is not None and self._emit is not None:
+            with self._emit_lock:
+                self._emit(event)
+
+    def start(self, stage: str, message: str, total: Optional[int] = None, unit: str = "files"):
+        """Begin a stage; its counters, rate and ETA start from zero (token totals carry on)."""
+        with self._lock:
+            self.stage = stage
+            self._message = message
+            self._done = 0
+            self._total = total
+            self._unit = unit
+            self._started = self._clock()
+            event = self._deliver(force=True)
+        self._send(event)
+
+    def update(self, done: Optional[int] = None, advance: int = 0, total: Optional[int] = None,
+               tokens_in: int = 0, tokens_out: int = 0, message: Optional[str] = None, force: bool = False):
+        """Set (``done``) or add to (``advance``) the stage count; deliver if the interval has passed."""
+        with self._lock:
+            if done is not None:
+                self._done = done
+            self._done += advance
+            if total is not None:
+                self._total = total
+            self._tokens_in += tokens_in
+            self._tokens_out += tokens_out
+            if message is not None:
+                self._message = message
+            event = self._deliver(force)
+        self._send(event)
+
+    def status(self, message: str):
+        """Change the message without counting anything (always delivered)."""
+        self.update(message=message, force=True)
+
+    def flush(self):
+        """Deliver the latest state if an update was held back."""
+        with self._lock:
+            event = self._deliver(force=True) if self._pending else None
+        self._send(event)
+
+
+class TerminalProgressLine:
+    """ProgressCallback that keeps one rewritten status line on a terminal.
+
+    When the stream is not a terminal (a log file, a pipe), it writes whole
+    lines instead, one per stage or message change and one when a stage ends.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.interactive = bool(getattr(self.stream, "isatty", lambda: False)())
+        self._width = 0
+        self._last_key = None
+
+    def __call__(self, event: ProgressEvent):
+        text = event.describe()
+        if self.interactive:
+            self.stream.write(f"\r{text:<{self._width}}")
+            self.stream.flush()
+            self._width = len(text)
+            return
+        key = (event.stage, event.message, event.total is not None and event.done >= event.total)
+        if key != self._last_key:
+            self.stream.write(text + "\n")
+            self.stream.flush()
+            self._last_key = key
+
+    def end(self):
+        """Finish the line, so the next print starts on a fresh one."""
+        if self.interactive and self._width:
+            self.stream.write("\n")
+            self.stream.flush()
+        self._width = 0
@@ -1,3 +1,15 @@
+def static_prefix(prompt, variable="files_chunk", **inputs):
+    """The part of a rendered prompt that comes before ``variable``, cut at the last line break.
+
+    ``prompt`` is a template string or PromptTemplate; ``inputs`` fill its other
+    variables. Cutting at a line boundary keeps the prefix's tokens identical to
+    the start of every full prompt.
+    """
+    sentinel = "\x00"
+    head = prompt.format(**inputs, **{variable: sentinel}).split(sentinel, 1)[0]
+    return head[:head.rfind("\n") + 1]
+
+
 prompt_template_gemini = r"""
                         You are an expert file organizer. Given a list of filenames from a directory, generate a JSON structure proposing a logical organization into folders and subfolders, intelligently and intuitively based.
                         {format_instructions}
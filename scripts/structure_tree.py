@@ -0,0 +1,187 @@
+# scripts/structure_tree.py
+"""
+Set-indexed folder tree for merging, counting and walking organisation structures.
+
+Every LLM chunk, offline grouping and cached placement is merged into one
+StructureTree instead of nested dicts and lists:
+
+- folder leaves are insertion-ordered sets (dict keys), so membership and
+  dedup are O(1) instead of ``name not in list`` scans;
+- a file -> folder reverse index makes "where is this file" O(1) and keeps a
+  file in at most one folder;
+- each folder caches the number of files below it, updated along the path on
+  every add/remove, so counts never re-walk the tree;
+- when a file is assigned to two folders the conflict policy decides:
+  ``keep_first`` (default) keeps the earlier placement, ``keep_last`` moves it.
+
+Merging n assignments costs O(n * depth). ``from_structure``/``to_structure``
+convert to and from the nested shape described in scripts/structure_utils.py.
+"""
+from typing import Dict, Iterator, Optional, Tuple
+
+from scripts.structure_utils import FILES_KEY, FolderPath
+
+KEEP_FIRST = "keep_first"
+KEEP_LAST = "keep_last"
+CONFLICT_POLICIES = (KEEP_FIRST, KEEP_LAST)
+
+
+class _Folder:
+    __slots__ = ("children", "files", "count")
+
+    def __init__(self):
+        self.children: Dict[str, "_Folder"] = {}
+        self.files: Dict[str, None] = {}  # Insertion-ordered set
+        self.count = 0  # Files in this folder and all subfolders
+
+
+class StructureTree:
+    """Folder tree with set-backed leaves, a reverse index and cached counts."""
+
+    def __init__(self, policy: str = KEEP_FIRST):
+        if policy not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy {policy!r}; expected one of {CONFLICT_POLICIES}")
+        self.policy = policy
+        self.root = _Folder()
+        self._index: Dict[str, FolderPath] = {}
+        self.conflicts = 0  # Files assigned to more than one folder so far
+
+    @classmethod
+    def from_structure(cls, structure: Optional[dict], policy: str = KEEP_FIRST) -> "StructureTree":
+        tree = cls(policy)
+        if structure:
+            tree.merge(structure)
+        return tree
+
+    # --- Queries ---
+
+    def __len__(self) -> int:
+        return self.root.count
+
+    def __contains__(self, file_name: str) -> bool:
+        return file_name in self._index
+
+    def folder_of(self, file_name: str) -> Optional[FolderPath]:
+        return self._index.get(file_name)
+
+    def count(self, folder: FolderPath = ()) -> int:
+        """Files in ``folder`` and its subfolders (0 if it does not exist)."""
+        node = self._find(folder)
+        return node.count if node is not None else 0
+
+    def top_level(self) -> Tuple[str, ...]:
+        return tuple(self.root.children)
+
+    def iter_assignments(self) -> Iterator[Tuple[str, FolderPath]]:
+        """Yield (file_name, folder_path) in tree order (a folder's files before its subfolders)."""
+        stack = [((), self.root)]
+        while stack:
+            path, node = stack.pop()
+            for file_name in node.files:
+                yield file_name, path
+            for name, child in reversed(node.children.items()):
+                stack.append((path + (name,), child))
+
+    # --- Updates ---
+
+    def ensure_folder(self, folder: FolderPath) -> _Folder:
+        node = self.root
+        for part in folder:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _Folder()
+            node = child
+        return node
+
+    def add(self, file_name: str, folder: FolderPath) -> bool:
+        """Place a file; returns False if it was already there or the policy kept an earlier folder."""
+        folder = tuple(folder)
+        current = self._index.get(file_name)
+        if current is not None:
+            if current == folder:
+                return False
+            self.conflicts += 1
+            if self.policy == KEEP_FIRST:
+                return False
+            self.remove(file_name)
+        node = self.ensure_folder(folder)
+        node.files[file_name] = None
+        self._index[file_name] = folder
+        self._adjust_counts(folder, 1)
+        return True
+
+    def remove(self, file_name: str) -> Optional[FolderPath]:
+        """Drop a file from the tree, returning the folder it was in."""
+        folder = self._index.pop(file_name, None)
+        if folder is not None:
+            del self._find(folder).files[file_name]
+            self._adjust_counts(folder, -1)
+        return folder
+
+    def merge(self, structure) -> "StructureTree":
+        """Merge a nested structure (or another StructureTree), keeping empty folders."""
+        if isinstance(structure, StructureTree):
+            for file_name, folder in structure.iter_assignments():
+                self.add(file_name, folder)
+            return self
+        self._merge_dict(structure, ())
+        return self
+
+    def _merge_dict(self, structure: dict, path: FolderPath):
+        self.ensure_folder(path)
+        for key, value in structure.items():
+            folder = path if key == FILES_KEY else path + (key,)
+            if isinstance(value, dict):
+                self._merge_dict(value, folder)
+            elif isinstance(value, list):
+                self.ensure_folder(folder)
+                for file_name in value:
+                    if isinstance(file_name, str):
+                        self.add(file_name, folder)
+            elif isinstance(value, str):
+                self.add(value, folder)
+
+    # --- Conversion ---
+
+    def to_structure(self) -> dict:
+        """Nested dict form: a folder without subfolders is a list, otherwise a dict with "_files_"."""
+        def convert(node: _Folder) -> dict:
+            result = {}
+            for name, child in node.children.items():
+                result[name] = convert(child) if child.children else list(child.files)
+            if node.files:
+                result[FILES_KEY] = list(node.files)
+            return result
+
+        return convert(self.root)
+
+    # --- Internals ---
+
+    def _find(self, folder: FolderPath) -> Optional[_Folder]:
+        node = self.root
+        for part in folder:
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def _adjust_counts(self, folder: FolderPath, delta: int):
+        node = self.root
+        node.count += delta
+        for part in folder:
+            node = node.children[part]
+            node.count += delta
+
+
+def merge_structures(*structures: Optional[dict], policy: str = KEEP_FIRST) -> dict:
+    """Merge nested structures left to right into a new one, each file kept in one folder."""
+    tree = StructureTree(policy)
+    for structure in structures:
+        if structure:
+            tree.merge(structure)
+    return tree.to_structure()
+
+
+def count_files(structure: Optional[dict]) -> int:
+    """Distinct files in a nested structure."""
+    return len(StructureTree.from_structure(structure))
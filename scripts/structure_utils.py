@@ -0,0 +1,58 @@
+# scripts/structure_utils.py
+"""
+Helpers to convert between nested organization structures and flat
+file -> folder assignments.
+
+Structures follow the shape OrganizeWorker consumes:
+  {"Topic": {"Sub": ["a.txt"], "_files_": ["b.txt"]}, "Other": ["c.zip"]}
+A list holds the files of the folder named by its key, "_files_" holds files
+placed directly in the enclosing folder, and a bare string value is a single file.
+"""
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+FILES_KEY = "_files_"
+
+FolderPath = Tuple[str, ...]
+
+
+def iter_assignments(structure: dict, path: FolderPath = ()) -> Iterator[Tuple[str, FolderPath]]:
+    """Yield (file_name, folder_path) for every file in a nested structure."""
+    for key, value in structure.items():
+        if key == FILES_KEY:
+            folder = path
+        else:
+            folder = path + (key,)
+        if isinstance(value, dict):
+            yield from iter_assignments(value, folder)
+        elif isinstance(value, list):
+            for file_name in value:
+                if isinstance(file_name, str):
+                    yield file_name, folder
+        elif isinstance(value, str):
+            yield value, folder
+
+
+def structure_from_assignments(assignments: Iterable[Tuple[str, FolderPath]]) -> dict:
+    """Build a nested structure from (file_name, folder_path) pairs."""
+    # Intermediate tree: folder -> (subfolders, files)
+    root: Tuple[Dict, List] = ({}, [])
+    for file_name, folder in assignments:
+        node = root
+        for part in folder:
+            node = node[0].setdefault(part, ({}, []))
+        node[1].append(file_name)
+
+    def to_structure(node) -> dict:
+        subfolders, files = node
+        result = {}
+        for name, child in subfolders.items():
+            child_sub, child_files = child
+            if child_sub:
+                result[name] = to_structure(child)
+            else:
+                result[name] = list(child_files)
+        if files:
+            result[FILES_KEY] = list(files)
+        return result
+
+    return to_structure(root)
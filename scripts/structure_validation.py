@@ -0,0 +1,103 @@
+# scripts/structure_validation.py
+"""
+Check an LLM-generated structure against the files that actually exist.
+
+LLM output routinely names files that are not in the folder (typos, invented
+examples, changed case), lists a file under two categories, or silently drops
+files. ``validate_structure`` fixes all three in one O(n) pass over the
+structure plus one over the known files:
+
+- unknown names are dropped (an unambiguous case-insensitive match is
+  repaired to the real name instead);
+- duplicates are resolved by the StructureTree conflict policy (by default
+  the first folder a file was assigned to wins);
+- files the structure missed are placed in their extension category, so
+  every file is organized.
+
+The returned ValidationReport carries the coverage statistics.
+"""
+from typing import Callable, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from scripts.file_categories import classify
+from scripts.structure_tree import KEEP_FIRST, StructureTree
+from scripts.structure_utils import iter_assignments
+
+MAX_REPORTED_NAMES = 10  # Examples of unknown names kept in the report
+
+
+class ValidationReport(NamedTuple):
+    total: int               # Files that exist
+    placed: int              # Existing files the structure placed (after dedup)
+    unknown: int             # Names dropped because no such file exists
+    repaired: int            # Names fixed by a case-insensitive match
+    duplicates: int          # Extra placements of an already placed file
+    missing: int             # Files the structure dropped, placed by extension
+    unknown_examples: Tuple[str, ...] = ()
+
+    @property
+    def coverage(self) -> float:
+        """Share of the existing files the structure itself placed."""
+        return self.placed / self.total if self.total else 1.0
+
+    def describe(self) -> str:
+        parts = [f"structure covered {self.coverage:.1%} of {self.total} file(s)"]
+        if self.unknown:
+            parts.append(f"dropped {self.unknown} unknown name(s)")
+        if self.repaired:
+            parts.append(f"repaired {self.repaired} misspelled name(s)")
+        if self.duplicates:
+            parts.append(f"resolved {self.duplicates} duplicate placement(s)")
+        if self.missing:
+            parts.append(f"placed {self.missing} missing file(s) by extension")
+        return "Validation: " + ", ".join(parts) + "."
+
+
+def validate_structure(structure: Optional[dict], files: Iterable[str],
+                       categories: Optional[Mapping[str, str]] = None,
+                       classify_missing: Callable[[str], str] = classify,
+                       policy: str = KEEP_FIRST,
+                       fill_missing: bool = True) -> Tuple[dict, ValidationReport]:
+    """Return (clean structure, report) for ``structure`` checked against ``files``.
+
+    ``files`` is any iterable of existing names (a FolderSnapshot's ``files``).
+    Missing files go to ``categories[name]`` when given (the extension analysis
+    already computed), otherwise to ``classify_missing(name)``.
+    """
+    known = list(files)
+    known_set = set(known)
+    folded = None  # casefold -> real name, or None when ambiguous; built on the first miss
+    tree = StructureTree(policy)
+    placements = unknown = repaired = 0
+    unknown_examples: List[str] = []
+
+    for name, folder in iter_assignments(structure or {}):
+        if name not in known_set:
+            if folded is None:
+                folded = {}
+                for real in known:
+                    key = real.casefold()
+                    folded[key] = None if key in folded else real
+            real = folded.get(name.casefold())
+            if real is None:
+                unknown += 1
+                if len(unknown_examples) < MAX_REPORTED_NAMES:
+                    unknown_examples.append(name)
+                continue
+            name = real
+            repaired += 1
+        placements += 1
+        tree.add(name, folder)
+
+    placed = len(tree)
+    missing = 0
+    if fill_missing:
+        for name in known:
+            if name not in tree:
+                category = categories.get(name) if categories is not None else None
+                tree.add(name, (category or classify_missing(name),))
+                missing += 1
+
+    report = ValidationReport(total=len(known_set), placed=placed, unknown=unknown, repaired=repaired,
+                              duplicates=placements - placed, missing=missing,
+                              unknown_examples=tuple(unknown_examples))
+    return tree.to_structure(), report
@@ -0,0 +1,36 @@
+# scripts/timing.py
+"""
+Lightweight startup timing marks.
+
+``mark("window shown")`` records the time since this module was first
+imported (app.py imports it before anything heavy). Marks are printed as they
+happen when ORGANIZAHH_TIMING=1 and can be summarised with ``report()``.
+"""
+import os
+import threading
+import time
+from typing import List, Tuple
+
+_T0 = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+_lock = threading.Lock()
+
+
+def mark(label: str) -> float:
+    """Record ``label`` at the current time; returns seconds since startup."""
+    elapsed = time.perf_counter() - _T0
+    with _lock:
+        _marks.append((label, elapsed))
+    if os.getenv("ORGANIZAHH_TIMING") == "1":
+        print(f"[timing] {label}: {elapsed:.3f}s")
+    return elapsed
+
+
+def marks() -> List[Tuple[str, float]]:
+    with _lock:
+        return list(_marks)
+
+
+def report() -> str:
+    """One-line summary of all marks, e.g. "imports 0.41s | window shown 0.62s"."""
+    return " | ".join(f"{label} {elapsed:.2f}s" for label, elapsed in marks())
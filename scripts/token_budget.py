@@ -0,0 +1,104 @@
+# scripts/token_budget.py
+"""
+Token-budget-aware chunking of file lists for LLM prompts.
+
+The organisation prompt echoes every filename back in its JSON answer, so a
+chunk has to fit twice: once in the prompt (next to the template) and once in
+the model's output limit. Chunks are therefore sized in tokens, measured with
+the model's own tokenizer when it has one (llama.cpp) and with a calibrated
+estimate otherwise (Gemini), instead of by characters or a fixed file count.
+"""
+import json
+import math
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+# Gemini 2.0 Flash limits; used when the LLM object does not expose its own
+GEMINI_CONTEXT_TOKENS = 1_048_576
+GEMINI_MAX_OUTPUT_TOKENS = 8192
+DEFAULT_CONTEXT_TOKENS = 8192
+DEFAULT_MAX_OUTPUT_TOKENS = 2048
+
+# Per-file overheads, in tokens, on top of the quoted filename itself.
+# Input: indentation, comma and newline of the pretty-printed JSON list.
+# Output: the same plus a share of the folder keys/brackets the model emits.
+INPUT_TOKENS_PER_FILE = 2
+OUTPUT_TOKENS_PER_FILE = 4
+OUTPUT_BASE_TOKENS = 64
+
+# Estimator calibration for SentencePiece-style tokenizers on filenames:
+# digits are split one per token, everything else averages ~3.5 bytes/token.
+ESTIMATE_BYTES_PER_TOKEN = 3.5
+
+TokenCounter = Callable[[str], int]
+
+
+class TokenBudget(NamedTuple):
+    count: TokenCounter
+    context_tokens: int
+    max_output_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Calibrated token estimate for models without a local tokenizer."""
+    digits = sum(c.isdigit() for c in text)
+    other_bytes = len(text.encode("utf-8")) - digits
+    return digits + math.ceil(other_bytes / ESTIMATE_BYTES_PER_TOKEN)
+
+
+def budget_for(llm: Any) -> TokenBudget:
+    """Token counter and limits for an LLM object.
+
+    Local llama.cpp wrappers expose ``tokenize``, ``context_window`` and
+    ``max_tokens`` (the inference-server client only the limits); LangChain's
+    Gemini wrapper may set ``max_output_tokens``.
+    """
+    tokenize = getattr(llm, "tokenize", None)
+    if callable(tokenize):
+        return TokenBudget(
+            count=lambda text: len(tokenize(text)),
+            context_tokens=getattr(llm, "context_window", None) or DEFAULT_CONTEXT_TOKENS,
+            max_output_tokens=getattr(llm, "max_tokens", None) or DEFAULT_MAX_OUTPUT_TOKENS,
+        )
+    if getattr(llm, "context_window", None):
+        # Daemon-backed local model: real limits, estimated counts (no per-name round trips)
+        return TokenBudget(estimate_tokens, llm.context_window,
+                           getattr(llm, "max_tokens", None) or DEFAULT_MAX_OUTPUT_TOKENS)
+    model_name = str(getattr(llm, "model", "") or "")
+    if "gemini" in model_name.lower():
+        return TokenBudget(estimate_tokens, GEMINI_CONTEXT_TOKENS,
+                           getattr(llm, "max_output_tokens", None) or GEMINI_MAX_OUTPUT_TOKENS)
+    return TokenBudget(estimate_tokens, DEFAULT_CONTEXT_TOKENS,
+                       getattr(llm, "max_output_tokens", None) or DEFAULT_MAX_OUTPUT_TOKENS)
+
+
+def plan_chunks(names: Sequence[str], budget: TokenBudget, prompt_overhead: int = 0,
+                safety: float = 0.9, max_files: Optional[int] = None) -> List[List[str]]:
+    """Greedily pack names into as few chunks as fit the budget.
+
+    ``prompt_overhead`` is the token count of the rendered template with an
+    empty file list. Each chunk satisfies, with a ``safety`` margin:
+      expected output <= max_output_tokens
+      prompt_overhead + chunk input + expected output <= context_tokens
+    A single name that alone exceeds the budget still gets its own chunk.
+    """
+    output_limit = int(budget.max_output_tokens * safety) - OUTPUT_BASE_TOKENS
+    total_limit = int(budget.context_tokens * safety) - prompt_overhead - OUTPUT_BASE_TOKENS
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used_in = used_out = 0
+    for name in names:
+        name_tokens = budget.count(json.dumps(name, ensure_ascii=False))
+        cost_in = name_tokens + INPUT_TOKENS_PER_FILE
+        cost_out = name_tokens + OUTPUT_TOKENS_PER_FILE
+        if current and (used_out + cost_out > output_limit
+                        or used_in + used_out + cost_in + cost_out > total_limit
+                        or (max_files is not None and len(current) >= max_files)):
+            chunks.append(current)
+            current = []
+            used_in = used_out = 0
+        current.append(name)
+        used_in += cost_in
+        used_out += cost_out
+    if current:
+        chunks.append(current)
+    return chunks
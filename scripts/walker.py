@@ -0,0 +1,240 @@
+# scripts/walker.py
+"""
+Parallel, streaming directory walker.
+
+Directories are distributed over a small thread pool. Each worker owns a deque
+of directories: it pops new work from its own tail (depth-first, cache
+friendly) and, when idle, steals from the head of another worker's deque.
+Files are yielded as soon as a directory has been listed, so callers can start
+classifying or chunking long before a multi-million entry tree has been walked.
+"""
+import fnmatch
+import os
+import queue
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from scripts.folder_snapshot import FileEntry
+
+# Never descend into (or move files out of) version-control and tool caches by default
+DEFAULT_EXCLUDES: Tuple[str, ...] = (".git", ".svn", ".hg", "node_modules", "__pycache__", ".venv", "venv")
+
+_DONE = object()
+
+
+def _rel_join(parent: str, name: str) -> str:
+    # Relative names always use "/" so they look the same on every platform
+    return f"{parent}/{name}" if parent else name
+
+
+def _compile_excludes(patterns: Iterable[str]) -> Callable[[str, str], bool]:
+    patterns = tuple(patterns)
+    if not patterns:
+        return lambda name, rel: False
+
+    def is_excluded(name: str, rel: str) -> bool:
+        for pattern in patterns:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel, pattern):
+                return True
+        return False
+    return is_excluded
+
+
+def iter_files(root: str,
+               recursive: bool = True,
+               max_depth: Optional[int] = None,
+               exclude: Sequence[str] = DEFAULT_EXCLUDES,
+               follow_symlinks: bool = False,
+               with_stat: bool = False,
+               workers: Optional[int] = None,
+               on_dir: Optional[Callable[[str], None]] = None,
+               on_error: Optional[Callable[[str, OSError], None]] = None) -> Iterator[FileEntry]:
+    """Yield every regular file under ``root`` as a FileEntry.
+
+    ``FileEntry.name`` is the path relative to ``root`` ("sub/dir/file.txt").
+    ``max_depth`` counts directory levels below root: 0 lists only root itself.
+    ``exclude`` globs are matched against both the entry name and its relative path.
+    ``on_dir`` receives the relative path of every directory that is discovered.
+    Symlinked files are listed like regular files (as os.path.isfile sees them);
+    ``follow_symlinks`` only decides whether symlinked directories are descended.
+    Directories are tracked by (st_dev, st_ino), so symlink/junction loops and
+    bind mounts are never walked twice. Errors listing ``root`` are raised;
+    errors below it go to ``on_error`` (or are skipped).
+    """
+    if not recursive:
+        max_depth = 0
+    if max_depth == 0:
+        # Top level only: a plain scandir is cheaper than spinning up threads
+        yield from _list_dir(root, "", _compile_excludes(exclude), with_stat, follow_symlinks, on_dir, on_error)[0]
+        return
+
+    # Surface errors on the root itself (missing folder, no permission) to the caller
+    os.scandir(root).close()
+    walker = _ParallelWalker(root, max_depth, _compile_excludes(exclude), follow_symlinks, with_stat,
+                             workers or min(8, (os.cpu_count() or 2) * 2), on_dir, on_error or _ignore_error)
+    yield from walker.run()
+
+
+def _list_dir(path: str, rel: str, is_excluded, with_stat: bool, follow_symlinks: bool,
+              on_dir, on_error) -> Tuple[List[FileEntry], List[Tuple[str, str]]]:
+    """List one directory; returns (files, [(subdir_path, subdir_rel)])."""
+    files: List[FileEntry] = []
+    subdirs: List[Tuple[str, str]] = []
+    try:
+        with os.scandir(path) as it:
+            for dir_entry in it:
+                name = dir_entry.name
+                entry_rel = _rel_join(rel, name)
+                if is_excluded(name, entry_rel):
+                    continue
+                try:
+                    if dir_entry.is_file():
+                        if with_stat:
+                            st = dir_entry.stat()
+                            files.append(FileEntry(entry_rel, dir_entry.path, st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino))
+                        else:
+                            files.append(FileEntry(entry_rel, dir_entry.path))
+                    elif dir_entry.is_dir(follow_symlinks=follow_symlinks):
+                        subdirs.append((dir_entry.path, entry_rel))
+                        if on_dir is not None:
+                            on_dir(entry_rel)
+                except OSError as e:
+                    if on_error is not None:
+                        on_error(dir_entry.path, e)
+    except OSError as e:
+        if on_error is None:
+            raise
+        on_error(path, e)
+    return files, subdirs
+
+
+def _ignore_error(path: str, error: OSError):
+    pass
+
+
+class _ParallelWalker:
+    """Thread pool with per-worker deques and work stealing."""
+
+    def __init__(self, root, max_depth, is_excluded, follow_symlinks, with_stat, workers, on_dir, on_error):
+        self.root = root
+        self.max_depth = max_depth
+        self.is_excluded = is_excluded
+        self.follow_symlinks = follow_symlinks
+        self.with_stat = with_stat
+        self.on_dir = on_dir
+        self.on_error = on_error
+        self.num_workers = max(1, workers)
+
+        self._deques: List[deque] = [deque() for _ in range(self.num_workers)]
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._outstanding = 0  # Directories queued or being listed
+        self._visited: Set[Tuple[int, int]] = set()
+        self._stop = threading.Event()
+        # Bounded so a slow consumer applies back-pressure instead of buffering the whole tree
+        self._results: "queue.Queue" = queue.Queue(maxsize=256)
+
+    # --- Scheduling ---
+    def _mark_visited(self, path: str) -> bool:
+        """Record a directory's identity; False if it was already walked (loop or bind mount)."""
+        try:
+            st = os.stat(path) if self.follow_symlinks else os.lstat(path)
+        except OSError as e:
+            if self.on_error is not None:
+                self.on_error(path, e)
+            return False
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            if key in self._visited:
+                return False
+            self._visited.add(key)
+        return True
+
+    def _push(self, worker_id: int, items: List[Tuple[str, str, int]]):
+        with self._lock:
+            self._deques[worker_id].extend(items)
+            self._outstanding += len(items)
+            self._work_available.notify_all()
+
+    def _take(self, worker_id: int) -> Optional[Tuple[str, str, int]]:
+        with self._lock:
+            while True:
+                if self._stop.is_set():
+                    return None
+                own = self._deques[worker_id]
+                if own:
+                    return own.pop()
+                for offset in range(1, self.num_workers):
+                    victim = self._deques[(worker_id + offset) % self.num_workers]
+                    if victim:
+                        return victim.popleft()
+                if self._outstanding == 0:
+                    return None
+                self._work_available.wait(0.05)
+
+    def _finish_one(self):
+        with self._lock:
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._work_available.notify_all()
+
+    # --- Workers ---
+    def _worker(self, worker_id: int):
+        try:
+            while True:
+                item = self._take(worker_id)
+                if item is None:
+                    break
+                path, rel, depth = item
+                try:
+                    files, subdirs = _list_dir(path, rel, self.is_excluded, self.with_stat,
+                                               self.follow_symlinks, self.on_dir, self.on_error)
+                    if files:
+                        self._put(files)
+                    if self.max_depth is None or depth < self.max_depth:
+                        children = [(p, r, depth + 1) for p, r in subdirs if self._mark_visited(p)]
+                        if children:
+                            self._push(worker_id, children)
+                finally:
+                    self._finish_one()
+        finally:
+            self._put(_DONE, force=True)
+
+    def _put(self, item, force: bool = False):
+        while not self._stop.is_set() or force:
+            try:
+                self._results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if force and self._stop.is_set():
+                    return
+
+    def run(self) -> Iterator[FileEntry]:
+        if not self._mark_visited(self.root):
+            return
+        self._push(0, [(self.root, "", 0)])
+        threads = [threading.Thread(target=self._worker, args=(i,), daemon=True, name=f"walker-{i}")
+                   for i in range(self.num_workers)]
+        for t in threads:
+            t.start()
+        remaining = len(threads)
+        try:
+            while remaining:
+                batch = self._results.get()
+                if batch is _DONE:
+                    remaining -= 1
+                    continue
+                yield from batch
+        finally:
+            # Consumer stopped early (break/close) or finished: release the workers
+            self._stop.set()
+            with self._lock:
+                self._work_available.notify_all()
+            while remaining:
+                try:
+                    if self._results.get(timeout=0.1) is _DONE:
+                        remaining -= 1
+                except queue.Empty:
+                    if not any(t.is_alive() for t in threads):
+                        break
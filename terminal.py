@@ -1,9 +1,9 @@
 import os
 import sys
 import json
-import regex as re
 import subprocess
 import argparse
+import signal
 from dotenv import load_dotenv
 
 # --- LangChain Imports ---
@@ -19,10 +19,30 @@ except ImportError:
 load_dotenv()
 
 # --- Utils ---
-def get_files_in_folder(folder_path):
-    return [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-
-from scripts.llama_cpp_custom import get_qllm  # ✅ Same as you used
+from scripts.walker import DEFAULT_EXCLUDES, iter_files
+
+def get_files_in_folder(folder_path, recursive=False, max_depth=None, exclude=None):
+    """List files (as "/"-separated relative paths when recursive) via the parallel walker."""
+    if exclude is None:
+        exclude = DEFAULT_EXCLUDES if recursive else ()
+    return [entry.name for entry in iter_files(folder_path, recursive=recursive, max_depth=max_depth, exclude=exclude)]
+
+from scripts.inference_client import get_local_llm  # Shared inference server if running, else in-process Qwen
+from scripts.llm_cache import cached_invoke, parse_json_response
+from scripts.llm_dispatch import dispatch, llm_concurrency
+from scripts.name_templates import NameClusters
+from scripts.token_budget import budget_for
+from scripts.offline_clustering import NUMPY_AVAILABLE, build_offline_structure
+from scripts.structure_tree import merge_structures
+from scripts.structure_validation import validate_structure
+from scripts.move_plan import compile_move_plan, execute_move_plan
+from scripts.cross_device_mover import format_copy_progress
+from scripts.cancellation import CancellationToken
+from scripts.move_journal import MoveJournal, incomplete_runs, last_undoable_run, recover_run, undo_run
+from scripts.progress import BYTES, CLASSIFY, COPY, ORGANIZE, ProgressReporter, TerminalProgressLine
+from scripts.log_setup import QUIET, StageCounters, begin_run, end_run, get_logger, setup_logging
+
+log = get_logger("terminal")
 
 # --- Step 1: Folder structure generation ---
 def generate_folder_structure(files, user_instructions, llm):
@@ -39,16 +59,15 @@ Files: {json.dumps(files, indent=2)}
 
 STRICTLY return valid JSON, no extra text.
 """
-    response = llm.invoke(prompt_text)
-    match = re.search(r"\{.*\}", response, re.DOTALL)
-    if not match:
+    try:
+        return cached_invoke(llm, prompt_text, parse=parse_json_response)  # Only parseable answers are cached
+    except ValueError as e:
         print("⚠️ Failed to extract JSON for folder structure.")
-        print(response)
+        print(e)
         return None
-    return json.loads(match.group(0))
 
 # --- Step 2: File assignment ---
-def assign_files_to_structure(files, existing_structure, user_instructions, llm):
+def assign_files_to_structure(files, existing_structure, user_instructions, llm, on_usage=None):
     prompt_text = r"""
                         You are an expert file organizer. Given a list of filenames from a directory, generate a JSON structure proposing a logical organization into folders and subfolders, intelligently and intuitively based.
                         Group similar files together. Use descriptive names for topics and subtopics. The structure should resemble this example:
@@ -75,80 +94,132 @@ FILES:
 
 Return ONLY updated JSON.
 """
-    response = llm.invoke(prompt_text)
-    match = re.search(r"\{.*\}", response, re.DOTALL)
-    if not match:
+    try:
+        return cached_invoke(llm, prompt_text, on_usage=on_usage, parse=parse_json_response)
+    except ValueError:
         print("⚠️ Failed to extract JSON for file assignment.")
         return None
-    return json.loads(match.group(0))
-
-# --- Merge updated batches into main structure ---
-def merge_structures(base, new):
-    for cat, content in new.items():
-        if cat not in base:
-            base[cat] = content
-            continue
-
-        if isinstance(base[cat], dict) and isinstance(content, dict):
-            for subcat, subfiles in content.items():
-                if subcat not in base[cat]:
-                    base[cat][subcat] = subfiles
-                else:
-                    if isinstance(base[cat][subcat], list):
-                        base[cat][subcat].extend(subfiles)
-        elif isinstance(base[cat], list) and isinstance(content, list):
-            base[cat].extend(content)
-    return base
 
 # --- File Moving ---
-def move_files_according_to_structure(folder_path, structure, current_path=""):
-    moves = []
-    base_path = os.path.join(folder_path, current_path) if current_path else folder_path
-    os.makedirs(base_path, exist_ok=True)
-
-    for category, contents in structure.items():
-        target_path = os.path.join(base_path, category)
-
-        if isinstance(contents, list):
-            os.makedirs(target_path, exist_ok=True)
-            for file in contents:
-                if isinstance(file, str):
-                    src = os.path.join(folder_path, file)
-                    dst = os.path.join(target_path, file)
-                    if os.path.exists(src):
-                        os.rename(src, dst)
-                        moves.append((dst, src))
-        elif isinstance(contents, dict):
-            os.makedirs(target_path, exist_ok=True)
-            moves.extend(move_files_according_to_structure(folder_path, contents, os.path.join(current_path, category)))
-    return moves
+def print_copy_progress(done, total, rate):
+    print(f"\r{format_copy_progress(done, total, rate)}", end="", flush=True)
+
+def move_files_according_to_structure(folder_path, structure, files=None):
+    begin_run("organize", folder=folder_path)
+    counters = StageCounters("organize")
+    plan = compile_move_plan(folder_path, structure, files)
+    try:
+        journal = MoveJournal.create(folder_path)  # Persistent undo (see --undo-last)
+    except OSError as e:
+        print(f"⚠️ Could not create move journal ({e}); undo will only work in this session.")
+        journal = None
+    # Ctrl+C stops between moves instead of mid-file; what was moved stays journaled for --undo-last
+    cancel = CancellationToken()
+    previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: cancel.cancel())
+    line = TerminalProgressLine()
+    progress = ProgressReporter(line)
+    progress.start(ORGANIZE, "Moving files", total=len(plan.moves), unit="moves")
+
+    def copy_progress(done_bytes, total_bytes, rate):
+        if progress.stage != COPY:
+            progress.start(COPY, "Copying across devices", total=total_bytes, unit=BYTES)
+        progress.update(done=done_bytes)
+
+    try:
+        with counters.time("execute"):
+            result = execute_move_plan(plan, on_progress=lambda done, total: progress.update(done=done),
+                                       progress_every=1, on_copy_progress=copy_progress, journal=journal, cancel=cancel)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        progress.flush()
+        line.end()
+    if journal is not None:
+        journal.commit()
+    if result.cancelled:
+        print(f"⏹️ Cancelled after moving {len(result.moved)} of {len(plan.moves)} files.")
+    for error in result.errors[:10]:
+        print(f"⚠️ {error}")
+    if len(result.errors) > 10:
+        print(f"⚠️ ...and {len(result.errors) - 10} more errors (see the run log).")
+    for error in result.errors:
+        log.warning(error, extra=QUIET)
+    counters.add("moved", len(result.moved))
+    counters.add("errors", len(result.errors))
+    counters.add("copied_bytes", result.copied_bytes)
+    end_run(outcome="cancelled" if result.cancelled else "done", **counters.snapshot())
+    return result.moved
 
 # --- Main ---
+def undo_last(folder_path):
+    """Undo the newest journaled organization of ``folder_path``; False if there is none."""
+    run = last_undoable_run(folder_path)
+    if run is None:
+        return False
+    result = undo_run(run, on_copy_progress=print_copy_progress)
+    if result.cross_device:
+        print()
+    for error in result.errors:
+        print(f"⚠️ {error}")
+    print(f"↩️ Undo complete. Restored {len(result.moved)} files.")
+    return True
+
+def recover_interrupted_runs():
+    """Offer to finish or roll back organizations whose process died mid-run."""
+    for run in incomplete_runs():
+        print(f"⚠️ Organizing '{run.root}' was interrupted after {len(run.moved)} of {len(run.moves)} moves.")
+        resume = input("Finish the remaining moves (f) or move everything back (b)? [f/b]: ").strip().lower() != "b"
+        result = recover_run(run, resume=resume, on_copy_progress=print_copy_progress)
+        for error in result.errors:
+            print(f"⚠️ {error}")
+        print(f"{'Finished' if resume else 'Rolled back'}: {len(result.moved)} files.")
+
 def main():
     parser = argparse.ArgumentParser(description="Reactive File Organizer")
     parser.add_argument("folder_path", help="Folder to organize")
     parser.add_argument("--instruction", type=str, default="Organize files intelligently.",
                         help="Custom instruction for organizing files")
     parser.add_argument("--offline", nargs='?', const='qwen', default=None,
-                        help='Use an offline model. Specify "ollama" for Ollama, otherwise Qwen is used.')
+                        help='Use an offline model. Specify "ollama" for Ollama, "cluster" for LLM-free '
+                             'filename clustering (numpy), otherwise Qwen is used.')
+    parser.add_argument("--recursive", action="store_true",
+                        help="Include files in sub-folders")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Sub-folder levels to descend with --recursive (default: unlimited)")
+    parser.add_argument("--exclude", action="append", default=None, metavar="GLOB",
+                        help="Glob of names/paths to skip (repeatable)")
+    parser.add_argument("--undo-last", action="store_true",
+                        help="Undo the last organization of the folder (from its journal) and exit")
     args = parser.parse_args()
+    setup_logging()
 
     folder_path = args.folder_path
     if not os.path.isdir(folder_path):
         print("Invalid folder path.")
         sys.exit(1)
 
+    recover_interrupted_runs()
+    if args.undo_last:
+        if not undo_last(folder_path):
+            print("Nothing to undo for this folder.")
+        return
+
     # --- LLM Initialization ---
     llm = None
     model_name = ""
-    if args.offline == 'ollama':
+    if args.offline == 'cluster':
+        if not NUMPY_AVAILABLE:
+            print("numpy is required for --offline cluster. Install it with: pip install numpy")
+            sys.exit(1)
+        model_name = "offline clustering"
+        print("Using offline filename clustering (no LLM).")
+    elif args.offline == 'ollama':
         model_name = "Ollama"
         print(f"Using {model_name} model.")
         llm = OllamaLLM(model="gemma3:270m")  # Assuming a default model for ollama
     elif args.offline == 'qwen':
         model_name = "Qwen"
         print(f"Using {model_name} model.")
-        llm = get_qllm()
+        llm = get_local_llm()
     else:
         model_name = "Gemini"
         print(f"Using {model_name} model.")
@@ -166,25 +237,56 @@ def main():
         llm = GoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key)
 
 
-    files = get_files_in_folder(folder_path)
+    files = get_files_in_folder(folder_path, recursive=args.recursive, max_depth=args.max_depth, exclude=args.exclude)
     if not files:
         print("No files found.")
         sys.exit(0)
 
     print(f"📂 Found {len(files)} files. Generating structure with {model_name}...")
-    structure = generate_folder_structure(files, args.instruction, llm)
-    if not structure:
-        print("❌ Failed to generate folder structure.")
-        sys.exit(1)
-
-    print("✅ Folder structure generated. Assigning files...")
-    batch_size = 15
-    for i in range(0, len(files), batch_size):
-        batch = files[i:i + batch_size]
-        print(f"Assigning batch {i//batch_size + 1}/{(len(files)+batch_size-1)//batch_size}...")
-        updated = assign_files_to_structure(batch, structure, args.instruction, llm)
-        if updated:
-            structure = merge_structures(structure, updated)
+    folder_files = files
+    if llm is None:
+        structure = build_offline_structure(files)
+    else:
+        name_clusters = NameClusters(files)
+        files = name_clusters.labels  # One labelled representative per filename template
+        if name_clusters.collapsed:
+            print(f"Collapsed {name_clusters.total} file names into {len(files)} templates.")
+        structure = generate_folder_structure(files, args.instruction, llm)
+        if not structure:
+            print("❌ Failed to generate folder structure.")
+            sys.exit(1)
+
+        print("✅ Folder structure generated. Assigning files...")
+        batch_size = 15
+        batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+        skeleton = json.loads(json.dumps(structure))  # Every batch is assigned against the same empty structure
+
+        line = TerminalProgressLine()
+        progress = ProgressReporter(line)
+        progress.start(CLASSIFY, "Assigning files", total=len(batches), unit="batches")
+        failures = []
+        count_tokens = budget_for(llm).count
+
+        def count_usage(prompt_text, response_text):
+            progress.update(tokens_in=count_tokens(prompt_text), tokens_out=count_tokens(response_text))
+
+        def batch_done(res, completed):
+            progress.update(done=completed)
+            if res.error is not None:
+                failures.append(f"⚠️ Batch {res.index + 1} failed: {res.error}")
+
+        results = dispatch(batches, lambda batch: assign_files_to_structure(batch, skeleton, args.instruction, llm, count_usage),
+                           max_workers=llm_concurrency(local_model=args.offline is not None, llm=llm), on_result=batch_done)
+        line.end()
+        for failure in failures:  # Printed after the progress line so they don't get overwritten
+            print(failure)
+        # Merge in batch order so the result is deterministic; a file assigned twice keeps its first folder
+        structure = merge_structures(structure, *(res.value for res in results if res.value))
+        structure = name_clusters.expand_structure(structure)
+
+    # Drop names that don't exist, keep each file in one folder, place dropped files by extension
+    structure, validation = validate_structure(structure, folder_files)
+    print(validation.describe())
 
     print("\n✅ Final Proposed Organization Structure:")
     print(json.dumps(structure, indent=2))
@@ -197,17 +299,20 @@ def main():
     subprocess.call([editor, temp_json])
 
     with open(temp_json, "r", encoding="utf-8") as f:
-        edited_structure = json.load(f)
+        edited_structure = merge_structures(json.load(f))  # One folder per file after manual edits
 
     print("\n🚀 Organizing files...")
-    moves = move_files_according_to_structure(folder_path, edited_structure)
+    moves = move_files_according_to_structure(folder_path, edited_structure, set(folder_files))
     print(f"✅ Done. Moved {len(moves)} files.")
 
     if input("Undo organization? (y/N): ").strip().lower() == "y":
-        for src, dst in moves:
-            if os.path.exists(src):
-                os.rename(src, dst)
-        print("↩️ Undo complete.")
+        if not undo_last(folder_path):  # No journal: fall back to this session's moves
+            for src, dst in moves:
+                if os.path.exists(src):
+                    os.rename(src, dst)
+            print("↩️ Undo complete.")
+    else:
+        print(f"You can undo later with: python terminal.py \"{folder_path}\" --undo-last")
 
 if __name__ == "__main__":
     main()
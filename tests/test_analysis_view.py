@@ -0,0 +1,33 @@
+from scripts.analysis_view import AI_SECTION, TYPE_ONLY_SECTION, TYPE_SECTION, build_analysis_view, sort_structure
+
+
+def names(folder):
+    return [sub.name for sub in folder.folders], folder.files
+
+
+class TestSortStructure:
+    def test_folders_then_files_sorted_with_counts(self):
+        """Subfolders and files are sorted case-insensitively; counts include nested files."""
+        view = sort_structure({
+            "docs": {"Work": ["b.pdf", "A.pdf"], "_files_": ["z.txt"]},
+            "Audio": "song.mp3",
+            "_files_": ["readme.md"],
+        })
+        assert names(view) == (["Audio", "docs"], ["readme.md"])
+        docs = view.folders[1]
+        assert names(docs) == (["Work"], ["z.txt"])
+        assert docs.folders[0].files == ["A.pdf", "b.pdf"]
+        assert (view.file_count, docs.file_count, len(docs)) == (5, 3, 2)
+
+
+class TestBuildAnalysisView:
+    def test_sections(self):
+        """AI structure first, by-type reference second; empty categories are skipped."""
+        view = build_analysis_view({"Docs": ["a.pdf"]}, {"Images": ["b.jpg"], "Videos": []})
+        assert [section.name for section in view.folders] == [AI_SECTION, TYPE_SECTION]
+        assert [category.name for category in view.folders[1].folders] == ["Images"]
+
+    def test_extension_only(self):
+        view = build_analysis_view({}, {"Images": ["b.jpg", "a.jpg"]})
+        assert [section.name for section in view.folders] == [TYPE_ONLY_SECTION]
+        assert view.folders[0].folders[0].files == ["a.jpg", "b.jpg"]
@@ -0,0 +1,45 @@
+import json
+
+from benchmarks.bench_pipeline import STAGES, compare, make_results, run_pipeline
+from benchmarks.fake_llm import FakeLLM, files_in_prompt
+from benchmarks.synthetic_tree import generate_names
+from scripts.prompt_templates import prompt_template_local
+
+
+class TestSyntheticNames:
+    def test_deterministic_and_unique(self):
+        names = generate_names(2000, seed=7)
+        assert names == generate_names(2000, seed=7)
+        assert names != generate_names(2000, seed=8)
+        assert len(set(names)) == 2000
+
+
+class TestFakeLLM:
+    def test_answers_from_the_prompt_file_list(self):
+        """Names (including cluster labels) come back placed by category and leading word."""
+        files = ["IMG_0001.jpg [x40]", "Invoice_2024_0001.pdf", "0a1b2c3d4e5f60718293a4b5c6d7e8f9.bin"]
+        prompt = prompt_template_local.format(format_instructions="", files_chunk=json.dumps(files, indent=2))
+        assert files_in_prompt(prompt) == files
+        llm = FakeLLM()
+        structure = json.loads(llm.invoke(prompt))
+        assert structure["Images"] == {"Img": ["IMG_0001.jpg [x40]"]}
+        assert structure["Documents"] == {"Invoice": ["Invoice_2024_0001.pdf"]}
+        assert llm.calls == 1 and llm.tokens_out > 0
+
+
+class TestPipeline:
+    def test_small_run_covers_every_stage(self):
+        run = run_pipeline(300, FakeLLM(drop_rate=0.1), seed=1, subdirs=3)
+        assert tuple(run["stages"]) == STAGES
+        totals = run["totals"]
+        assert totals["moved"] == 300 and totals["move_errors"] == totals["undo_errors"] == 0
+        assert totals["coverage"] < 1.0 # Dropped names were filled in by validation
+
+    def test_compare_flags_slower_stages(self):
+        def results(seconds):
+            run = {"params": {"files": 10, "seed": 0, "subdirs": 0, "llm": {}},
+                   "stages": {"scan": {"seconds": seconds}, "move": {"seconds": 1.0}}}
+            return make_results([run])
+
+        rows = compare(results(2.0), results(1.0))
+        assert [(stage, regressed) for _, stage, _, _, _, regressed in rows] == [("scan", True), ("move", False)]
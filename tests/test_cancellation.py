@@ -0,0 +1,31 @@
+import pytest
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+
+
+class TestCancellationToken:
+    def test_cancel_runs_callbacks_once(self):
+        """Callbacks fire on the first cancel only; unregistered ones never fire."""
+        token = CancellationToken()
+        calls = []
+        token.on_cancel(lambda: calls.append("a"))
+        unregister = token.on_cancel(lambda: calls.append("b"))
+        unregister()
+        token.cancel()
+        token.cancel()
+        assert calls == ["a"]
+        assert token.cancelled and token.wait(0)
+
+    def test_callback_after_cancel_runs_immediately(self):
+        token = CancellationToken()
+        token.cancel()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        assert calls == [1]
+
+    def test_raise_if_cancelled(self):
+        token = CancellationToken()
+        token.raise_if_cancelled()
+        token.cancel()
+        with pytest.raises(OperationCancelled):
+            token.raise_if_cancelled()
@@ -0,0 +1,107 @@
+import errno
+import os
+import threading
+
+import pytest
+
+from scripts import cross_device_mover
+from scripts.cross_device_mover import PART_SUFFIX, copy_then_unlink, move_across_devices
+from scripts.move_plan import compile_move_plan, execute_move_plan
+
+
+class TestCopyThenUnlink:
+    def test_copies_data_and_mtime_then_unlinks(self, tmp_path):
+        """The destination gets the data and mtime; the source is gone afterwards."""
+        src, dst = tmp_path / "a.bin", tmp_path / "b.bin"
+        src.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+        os.utime(src, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+        data = src.read_bytes()
+        copied = copy_then_unlink(str(src), str(dst))
+        assert copied == len(data)
+        assert dst.read_bytes() == data
+        assert dst.stat().st_mtime_ns == 1_600_000_000_000_000_000
+        assert not src.exists()
+
+    def test_falls_back_when_kernel_copy_is_unsupported(self, tmp_path, monkeypatch):
+        """ENOSYS/EXDEV from the kernel copy calls falls through to the next method."""
+        def unsupported(*args):
+            raise OSError(errno.EXDEV, "cross-device")
+
+        monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+        monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+        src, dst = tmp_path / "a.txt", tmp_path / "b.txt"
+        src.write_text("hello")
+        assert copy_then_unlink(str(src), str(dst)) == 5
+        assert dst.read_text() == "hello"
+
+    def test_falls_back_when_sendfile_needs_a_socket(self, tmp_path, monkeypatch):
+        """macOS has no copy_file_range and its sendfile fails with ENOTSOCK on files."""
+        def socket_only(*args):
+            raise OSError(errno.ENOTSOCK, "Socket operation on non-socket")
+
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+        monkeypatch.setattr(os, "sendfile", socket_only, raising=False)
+        src, dst = tmp_path / "a.txt", tmp_path / "b.txt"
+        src.write_text("hello")
+        assert copy_then_unlink(str(src), str(dst)) == 5
+        assert dst.read_text() == "hello"
+        assert not src.exists()
+
+    def test_failed_copy_keeps_source(self, tmp_path):
+        """If the copy cannot be written, the source stays and no partial file is left."""
+        src = tmp_path / "a.txt"
+        src.write_text("keep me")
+        dst = tmp_path / "missing-dir" / "a.txt"
+        with pytest.raises(OSError):
+            copy_then_unlink(str(src), str(dst))
+        assert src.read_text() == "keep me"
+        assert not os.path.exists(str(dst) + PART_SUFFIX)
+
+
+class TestMoveAcrossDevices:
+    def test_groups_by_device_pair_and_reports_progress(self, tmp_path, monkeypatch):
+        """Each device pair gets its own pool; errors line up with the inputs."""
+        (tmp_path / "disk1").mkdir()
+        (tmp_path / "disk2").mkdir()
+        (tmp_path / "out").mkdir()
+        moves = []
+        for disk in ("disk1", "disk2"):
+            for i in range(3):
+                src = tmp_path / disk / f"{i}.dat"
+                src.write_bytes(b"x" * 1000)
+                moves.append((str(src), str(tmp_path / "out" / f"{disk}-{i}.dat")))
+        moves.append((str(tmp_path / "disk1" / "gone.dat"), str(tmp_path / "out" / "gone.dat")))
+        thread_names = set()
+        real_copy = cross_device_mover.copy_then_unlink
+
+        def recording_copy(*args, **kwargs):
+            thread_names.add(threading.current_thread().name.rsplit("_", 1)[0])
+            return real_copy(*args, **kwargs)
+
+        monkeypatch.setattr(cross_device_mover, "copy_then_unlink", recording_copy)
+        progress = []
+        errors, copied = move_across_devices(moves, device_of=lambda d: os.path.basename(d),
+                                             on_progress=lambda *p: progress.append(p), fsync=False)
+        assert [e is None for e in errors] == [True] * 6 + [False]
+        assert copied == 6000
+        assert progress[-1][:2] == (6000, 6000)
+        assert thread_names == {"copy-disk1-out", "copy-disk2-out"}
+        assert len(os.listdir(tmp_path / "out")) == 6
+
+    def test_execute_move_plan_routes_cross_device_moves(self, tmp_path, monkeypatch):
+        """Moves whose folders report different devices go through the copy engine."""
+        (tmp_path / "a.txt").write_text("a")
+        plan = compile_move_plan(str(tmp_path), {"Docs": ["a.txt"]})
+        real_stat = os.stat
+
+        def fake_stat(path, *args, **kwargs):
+            result = real_stat(path, *args, **kwargs)
+            if os.path.basename(path) == "Docs":
+                return os.stat_result((result.st_mode, result.st_ino, result.st_dev + 1) + tuple(result)[3:])
+            return result
+
+        monkeypatch.setattr(os, "stat", fake_stat)
+        result = execute_move_plan(plan)
+        assert result.errors == []
+        assert (result.cross_device, result.copied_bytes) == (1, 1)
+        assert (tmp_path / "Docs" / "a.txt").read_text() == "a"
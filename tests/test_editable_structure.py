@@ -0,0 +1,79 @@
+from scripts.editable_structure import EditableStructure
+
+
+def move_files(tree, names, target):
+    """Apply a move the way StructureItemModel does: removal runs, then insertion blocks."""
+    names = [name for name in names if tree.folder_of(name) is not target]
+    for folder, first, last in tree.removal_runs(names):
+        tree.remove_rows(folder, first, last)
+    for row, block in tree.insertion_blocks(target, names):
+        tree.insert_block(target, row, block)
+
+
+class TestLoadAndSave:
+    def test_round_trip(self):
+        """"_files_" and single-file values load as files; leaf folders save as lists."""
+        tree = EditableStructure.from_structure({
+            "Docs": {"Work": ["b.pdf", "a.pdf"], "_files_": ["z.txt"]},
+            "Audio": "song.mp3",
+            "_files_": ["readme.md"],
+        })
+        assert len(tree) == 5 and "song.mp3" in tree
+        assert tree.folder_at(("Docs", "Work")).files == ["a.pdf", "b.pdf"]
+        assert tree.to_structure() == {
+            "Docs": {"Work": ["a.pdf", "b.pdf"], "_files_": ["z.txt"]},
+            "Audio": ["song.mp3"],
+            "_files_": ["readme.md"],
+        }
+
+    def test_first_listing_wins_and_empty_folders_dropped(self):
+        tree = EditableStructure.from_structure({"A": ["x.txt"], "B": ["x.txt", "y.txt"], "C": []})
+        assert tree.folder_of("x.txt").name == "A"
+        assert tree.to_structure() == {"A": ["x.txt"], "B": ["y.txt"]}
+
+
+class TestEdits:
+    def test_move_files_keeps_rows_sorted(self):
+        """Files from several folders land in sorted order; rows are folders first, then files."""
+        tree = EditableStructure.from_structure({"A": ["a", "c", "e"], "B": {"X": ["b"], "_files_": ["d", "f"]}})
+        target = tree.folder_at(("B", "X"))
+        move_files(tree, ["e", "a", "d", "f"], target)
+        assert tree.to_structure() == {"A": ["c"], "B": {"X": ["a", "b", "d", "e", "f"]}}
+        assert tree.folder_of("d") is target
+        assert tree.folder_at(("B",)).file_row("d") is None
+
+    def test_removal_runs_are_contiguous_and_descending(self):
+        tree = EditableStructure.from_structure({"A": ["a", "b", "c", "d", "e"]})
+        folder = tree.folder_at(("A",))
+        assert tree.removal_runs(["a", "b", "d", "e"]) == [(folder, 3, 4), (folder, 0, 1)]
+
+    def test_insertion_blocks_use_final_rows(self):
+        tree = EditableStructure.from_structure({"A": ["b", "d"], "B": ["a", "c", "e"]})
+        target = tree.folder_at(("A",))
+        move_files(tree, ["a", "c", "e"], target)
+        assert target.files == ["a", "b", "c", "d", "e"]
+
+    def test_rename_conflict_is_rejected(self):
+        tree = EditableStructure.from_structure({"A": ["a"], "B": ["b"]})
+        folder = tree.folder_at(("A",))
+        assert not tree.rename_folder(folder, "B")
+        assert not tree.rename_folder(folder, "")
+        assert tree.rename_folder(folder, "C") and folder.row() == 0
+        assert tree.to_structure() == {"C": ["a"], "B": ["b"]}
+
+    def test_remove_folder_drops_its_files(self):
+        tree = EditableStructure.from_structure({"A": {"X": ["a"], "_files_": ["b"]}, "B": ["c"]})
+        assert tree.remove_folder(tree.folder_at(("A",))) == 0
+        assert len(tree) == 1 and "a" not in tree
+        assert tree.to_structure() == {"B": ["c"]}
+
+    def test_folder_moves(self):
+        """A folder cannot move into itself, a descendant, or next to a same-named sibling."""
+        tree = EditableStructure.from_structure({"A": {"X": ["a"]}, "B": {"X": ["b"]}, "C": ["c"]})
+        a, b, c = (tree.folder_at((name,)) for name in "ABC")
+        assert not tree.can_move_folder(a, a.folder("X"))
+        assert not tree.can_move_folder(a.folder("X"), b)
+        assert tree.can_move_folder(c, a)
+        assert tree.move_folder(c, a) == (2, 1)
+        assert tree.to_structure() == {"A": {"X": ["a"], "C": ["c"]}, "B": {"X": ["b"]}}
+        assert tree.folder_of("c").path == ("A", "C")
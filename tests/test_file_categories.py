@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from scripts import file_categories
+from scripts.file_categories import (
+    DEFAULT_CATEGORIES, ExtensionIndex, load_user_categories, merge_categories,
+)
+
+
+@pytest.fixture
+def index():
+    return ExtensionIndex(DEFAULT_CATEGORIES)
+
+
+class TestExtensionIndex:
+    def test_simple_extensions(self, index):
+        """Single suffixes map to their category, case-insensitively."""
+        assert index.classify("photo.JPG") == "Images"
+        assert index.classify("report.pdf") == "Documents"
+        assert index.classify("unknown.xyz") == "Others"
+
+    def test_no_extension(self, index):
+        """Names without a suffix (including dotfiles) have no extension."""
+        assert index.classify("Makefile") == "No Extension"
+        assert index.classify(".bashrc") == "No Extension"
+        assert index.classify("..hidden") == "No Extension"
+
+    def test_compound_suffixes(self, index):
+        """Compound suffixes win over their last component."""
+        custom = ExtensionIndex({"Userscripts": [".user.js"], "Code": [".js"], "Backups": [".tar.gz"], "Archives": [".gz"]})
+        assert custom.classify("adblock.user.js") == "Userscripts"
+        assert custom.classify("app.js") == "Code"
+        assert custom.classify("site.tar.gz") == "Backups"
+        assert custom.classify("my.data.gz") == "Archives"
+        assert index.classify("release.tar.gz") == "Archives"
+
+    def test_category_for_extension_matches_legacy_contract(self, index):
+        """The single-extension lookup keeps the old _get_category behaviour."""
+        assert index.category_for_extension(".png") == "Images"
+        assert index.category_for_extension(".nope") == "Others"
+        assert index.category_for_extension("") == "No Extension"
+
+    def test_classify_many_groups_in_order(self, index):
+        """classify_many groups names in one pass and preserves their order."""
+        names = ["b.png", "a.txt", "c.png", "README", "x.tar.gz"]
+        assert index.classify_many(names) == {
+            "Images": ["b.png", "c.png"],
+            "Documents": ["a.txt"],
+            "No Extension": ["README"],
+            "Archives": ["x.tar.gz"],
+        }
+
+    def test_classify_many_agrees_with_classify(self, index):
+        """The inlined fast path gives the same answers as classify()."""
+        names = ["a.jpg", ".env", "b.user.js", "c.", "d..png", "e.tar.bz2", "F.PDF", "g"]
+        grouped = index.classify_many(names)
+        for category, members in grouped.items():
+            for name in members:
+                assert index.classify(name) == category
+
+    def test_relative_paths_use_the_file_name(self, index):
+        """Recursive scans pass "dir/name"; dots in folder names and nested dotfiles don't count."""
+        assert index.classify_many(["photos.2020/Makefile", "x/.bashrc", "v1.2/site.tar.gz", "a.b/c.JPG"]) == {
+            "No Extension": ["photos.2020/Makefile", "x/.bashrc"],
+            "Archives": ["v1.2/site.tar.gz"],
+            "Images": ["a.b/c.JPG"],
+        }
+        assert index.classify("photos.2020/Makefile") == index.classify("Makefile")
+
+
+class TestUserCategories:
+    def test_user_config_extends_and_overrides(self, tmp_path):
+        """User categories are merged over the defaults and take priority."""
+        config = tmp_path / "categories.json"
+        config.write_text(json.dumps({"Raw Photos": [".cr2", ".png"], "Images": [".avif"]}))
+        merged = ExtensionIndex(merge_categories(DEFAULT_CATEGORIES, load_user_categories(str(config))))
+        assert merged.classify("shot.cr2") == "Raw Photos"
+        assert merged.classify("shot.png") == "Raw Photos"
+        assert merged.classify("shot.avif") == "Images"
+        assert merged.classify("shot.jpg") == "Images"
+
+    def test_broken_config_is_ignored(self, tmp_path):
+        """An unreadable config falls back to the defaults."""
+        config = tmp_path / "categories.json"
+        config.write_text("{not json")
+        assert load_user_categories(str(config)) == {}
+        assert load_user_categories(str(tmp_path / "missing.json")) == {}
+
+    def test_default_index_is_built_once(self, monkeypatch, tmp_path):
+        """The module-level index is cached after the first lookup."""
+        monkeypatch.setenv("ORGANIZAHH_CATEGORIES", str(tmp_path / "none.json"))
+        monkeypatch.setattr(file_categories, "_default_index", None)
+        first = file_categories.get_extension_index()
+        assert file_categories.get_extension_index() is first
+        assert file_categories.classify("a.mp3") == "Audio"
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from scripts.folder_index import FolderIndex
+from scripts.folder_snapshot import FolderSnapshot
+from scripts.structure_utils import iter_assignments, structure_from_assignments
+
+
+@pytest.fixture
+def folder(tmp_path):
+    root = tmp_path / "files"
+    root.mkdir()
+    for name in ("a.txt", "b.jpg", "c.pdf"):
+        (root / name).write_text(name)
+    return root
+
+
+@pytest.fixture
+def index(folder, tmp_path):
+    idx = FolderIndex(str(folder), db_path=str(tmp_path / "index.sqlite3"))
+    yield idx
+    idx.close()
+
+
+def snap(folder):
+    return FolderSnapshot.scan(str(folder), with_stat=True)
+
+
+class TestFolderIndex:
+    def test_first_run_classifies_everything(self, folder, index):
+        """With an empty index every file is pending."""
+        cached, pending = index.partition(snap(folder))
+        assert cached == {}
+        assert sorted(pending) == ["a.txt", "b.jpg", "c.pdf"]
+
+    def test_unchanged_files_keep_placement(self, folder, index):
+        """Only new or modified files are reported as pending on a re-run."""
+        first = snap(folder)
+        index.record(first, {"a.txt": "Documents"}, {"a.txt": ("Docs",), "b.jpg": ("Media", "Photos"), "c.pdf": ("Docs",)})
+
+        (folder / "c.pdf").write_text("changed content")
+        os.utime(folder / "c.pdf", ns=(1, 1))
+        (folder / "d.md").write_text("new")
+
+        cached, pending = index.partition(snap(folder))
+        assert cached == {"a.txt": ("Docs",), "b.jpg": ("Media", "Photos")}
+        assert sorted(pending) == ["c.pdf", "d.md"]
+
+    def test_renamed_file_keeps_placement(self, folder, index):
+        """Entries are keyed by (dev, inode), so a rename keeps the cached placement."""
+        index.record(snap(folder), {}, {"a.txt": ("Docs",)})
+        os.rename(folder / "a.txt", folder / "renamed.txt")
+        cached, _ = index.partition(snap(folder))
+        assert cached["renamed.txt"] == ("Docs",)
+
+    def test_record_without_assignments_preserves_cache(self, folder, index):
+        """A non-LLM run refreshes metadata without discarding placements."""
+        index.record(snap(folder), {}, {"a.txt": ("Docs",)})
+        index.record(snap(folder), {"a.txt": "Documents"})
+        cached, _ = index.partition(snap(folder))
+        assert cached == {"a.txt": ("Docs",)}
+
+    def test_deleted_files_are_dropped(self, folder, index):
+        """Rows for files that disappeared are removed."""
+        index.record(snap(folder), {})
+        os.remove(folder / "b.jpg")
+        index.record(snap(folder), {})
+        assert len(index) == 2
+
+
+class TestStructureUtils:
+    def test_round_trip(self):
+        """Nested structures survive flattening and rebuilding."""
+        structure = {"Docs": {"Finance": ["a.xlsx"], "_files_": ["b.txt"]}, "Media": ["c.jpg"], "Single": "d.zip"}
+        assignments = list(iter_assignments(structure))
+        assert assignments == [("a.xlsx", ("Docs", "Finance")), ("b.txt", ("Docs",)),
+                               ("c.jpg", ("Media",)), ("d.zip", ("Single",))]
+        assert structure_from_assignments(assignments) == {
+            "Docs": {"Finance": ["a.xlsx"], "_files_": ["b.txt"]}, "Media": ["c.jpg"], "Single": ["d.zip"]}
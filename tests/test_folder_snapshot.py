@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from scripts.folder_snapshot import FolderSnapshot
+
+
+@pytest.fixture
+def sample_folder(tmp_path):
+    """Create a folder with a few files and one sub-folder."""
+    for name in ("a.txt", "b.jpg", "noext"):
+        (tmp_path / name).write_text("x" * 3)
+    (tmp_path / "subdir").mkdir()
+    (tmp_path / "subdir" / "nested.txt").write_text("nested")
+    return tmp_path
+
+
+class TestFolderSnapshot:
+    def test_scan_lists_top_level_files_only(self, sample_folder):
+        """Files are captured, sub-folders are tracked separately and not descended into."""
+        snapshot = FolderSnapshot.scan(str(sample_folder))
+        assert sorted(snapshot.files) == ["a.txt", "b.jpg", "noext"]
+        assert snapshot.dirs == ("subdir",)
+        assert len(snapshot) == 3
+        assert "a.txt" in snapshot
+        assert "nested.txt" not in snapshot
+        assert not snapshot.is_empty
+
+    def test_scan_without_stat_leaves_metadata_empty(self, sample_folder):
+        """Default scans rely on d_type only and never stat individual files."""
+        entry = FolderSnapshot.scan(str(sample_folder)).entry("a.txt")
+        assert entry.path == os.path.join(str(sample_folder), "a.txt")
+        assert entry.size is None and entry.inode is None
+
+    def test_scan_with_stat(self, sample_folder):
+        """with_stat=True records size, mtime and (dev, inode)."""
+        entry = FolderSnapshot.scan(str(sample_folder), with_stat=True).entry("a.txt")
+        st = os.stat(entry.path)
+        assert entry.size == 3
+        assert entry.mtime_ns == st.st_mtime_ns
+        assert (entry.dev, entry.inode) == (st.st_dev, st.st_ino)
+
+    def test_empty_folder(self, tmp_path):
+        """An empty folder produces an empty snapshot."""
+        snapshot = FolderSnapshot.scan(str(tmp_path))
+        assert snapshot.is_empty
+        assert snapshot.files == ()
+
+    def test_snapshot_does_not_track_later_changes(self, sample_folder):
+        """The snapshot is a frozen view of the folder at scan time."""
+        snapshot = FolderSnapshot.scan(str(sample_folder))
+        (sample_folder / "late.txt").write_text("late")
+        assert "late.txt" not in snapshot
+        assert snapshot.path_of("late.txt") == os.path.join(str(sample_folder), "late.txt")
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+from scripts.inference_client import complete, server_health
+from scripts.inference_server import FairQueue, InferenceServer
+
+
+class EchoModel:
+    """Stands in for MyQwenLLM: records calls and echoes the prompt."""
+
+    def __init__(self):
+        self.calls = []
+        self.prefixes = []
+
+    def prime_prefix(self, prefix):
+        self.prefixes.append(prefix)
+
+    def _call(self, prompt, stop=None, **kwargs):
+        self.calls.append((prompt, kwargs))
+        if prompt == "fail":
+            raise ValueError("model exploded")
+        return f"echo:{prompt}"
+
+
+class BlockingModel:
+    """A slot model whose generation runs until the request is cancelled."""
+    supports_cancel = True
+
+    def _call(self, prompt, stop=None, cancel=None, **kwargs):
+        if not cancel.wait(5):
+            return "finished"
+        raise OperationCancelled()
+
+
+@pytest.fixture
+def server():
+    srv = InferenceServer(EchoModel, slots=2, port=0, model_id="echo-model")
+    thread = threading.Thread(target=srv.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+
+
+class TestFairQueue:
+    def test_round_robin_between_clients(self):
+        """A client with a backlog does not starve one that arrives later."""
+        queue = FairQueue()
+        for i in range(3):
+            queue.put("cli", f"cli{i}")
+        queue.put("gui", "gui0")
+        queue.put("gui", "gui1")
+        order = [queue.get() for _ in range(5)]
+        assert order == ["cli0", "gui0", "cli1", "gui1", "cli2"]
+        assert len(queue) == 0
+
+
+class TestInferenceServer:
+    def test_health_reports_slots_and_model(self, server):
+        """/health answers with the slot count and model id."""
+        health = server_health(server.address)
+        assert health == {"status": "ok", "slots": 2, "queued": 0, "model": "echo-model"}
+
+    def test_completion_round_trip(self, server):
+        """Prompts and generation options reach a slot model; its text comes back."""
+        text = complete("hello", base_url=server.address, max_tokens=16, structured=False, client="test")
+        assert text == "echo:hello"
+        calls = [call for model in server.models for call in model.calls]
+        assert calls == [("hello", {"max_tokens": 16, "structured": False})]
+
+    def test_prefix_is_primed_on_the_slot(self, server):
+        """A request's fixed prompt head is handed to the slot model before generation."""
+        complete("head\nfiles", base_url=server.address, prefix="head\n")
+        assert [p for model in server.models for p in model.prefixes] == ["head\n"]
+
+    def test_model_errors_are_reported(self, server):
+        """A failing generation surfaces as a client-side RuntimeError."""
+        with pytest.raises(RuntimeError, match="model exploded"):
+            complete("fail", base_url=server.address)
+
+    def test_unreachable_server(self):
+        """Health checks against a closed port return None instead of raising."""
+        assert server_health("http://127.0.0.1:9", timeout=0.2) is None
+
+    def test_cancel_stops_running_request(self):
+        """Cancelling the client's token stops the generation on the server slot."""
+        srv = InferenceServer(BlockingModel, slots=1, port=0)
+        threading.Thread(target=srv.httpd.serve_forever, daemon=True).start()
+        try:
+            cancel = CancellationToken()
+            threading.Timer(0.2, cancel.cancel).start()
+            started = time.monotonic()
+            with pytest.raises(OperationCancelled):
+                complete("long job", base_url=srv.address, client="test", cancel=cancel)
+            assert time.monotonic() - started < 3
+        finally:
+            srv.shutdown()
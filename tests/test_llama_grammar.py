@@ -0,0 +1,157 @@
+import json
+import re
+
+import pytest
+
+pytest.importorskip("llama_cpp")
+pytest.importorskip("langchain")
+
+from scripts.llama_cpp_custom import FOLDER_STRUCTURE_GBNF, build_grammar
+
+
+# --- A small GBNF recognizer (the subset the folder grammar uses) ---
+
+_TOKEN_RE = re.compile(r'\s*(?:(?P<str>"(?:\\.|[^"\\])*")|(?P<cls>\[(?:\\.|[^\]\\])*\])|(?P<name>[a-zA-Z_][\w-]*)'
+                       r'|(?P<rep>\{\d+(?:,\d*)?\})|(?P<op>[()|?*+]))')
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+
+def _unescape(text):
+    out, i = [], 0
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            nxt = text[i + 1]
+            if nxt == "x":
+                out.append(chr(int(text[i + 2:i + 4], 16)))
+                i += 4
+                continue
+            out.append(_ESCAPES.get(nxt, nxt))
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _char_class(body):
+    negate = body.startswith("^")
+    chars = _unescape(body[1:] if negate else body)
+    ranges, i = [], 0
+    while i < len(chars):
+        if i + 2 < len(chars) and chars[i + 1] == "-":
+            ranges.append((chars[i], chars[i + 2]))
+            i += 3
+        else:
+            ranges.append((chars[i], chars[i]))
+            i += 1
+    return ("cls", negate, ranges)
+
+
+def parse_gbnf(text):
+    rules = {}
+    for line in text.strip().splitlines():
+        name, body = line.split("::=", 1)
+        tokens = [(m.lastgroup, m.group(m.lastgroup)) for m in _TOKEN_RE.finditer(body)]
+        node, rest = _parse_alt(tokens)
+        assert not rest, f"unparsed: {rest}"
+        rules[name.strip()] = node
+    return rules
+
+
+def _parse_alt(tokens):
+    alts = []
+    seq, tokens = _parse_seq(tokens)
+    alts.append(seq)
+    while tokens and tokens[0] == ("op", "|"):
+        seq, tokens = _parse_seq(tokens[1:])
+        alts.append(seq)
+    return ("alt", alts), tokens
+
+
+def _parse_seq(tokens):
+    items = []
+    while tokens and tokens[0] not in (("op", "|"), ("op", ")")):
+        kind, value = tokens[0]
+        tokens = tokens[1:]
+        if kind == "str":
+            item = ("lit", _unescape(value[1:-1]))
+        elif kind == "cls":
+            item = _char_class(value[1:-1])
+        elif kind == "name":
+            item = ("ref", value)
+        else:
+            assert value == "(", value
+            item, tokens = _parse_alt(tokens)
+            assert tokens[0] == ("op", ")")
+            tokens = tokens[1:]
+        while tokens and (tokens[0][0] == "rep" or tokens[0][1] in ("?", "*", "+")):
+            kind, value = tokens[0]
+            tokens = tokens[1:]
+            if kind == "rep":
+                low, comma, high = value[1:-1].partition(",")
+                bounds = (int(low), int(high) if high else None) if comma else (int(low), int(low))
+            else:
+                bounds = {"?": (0, 1), "*": (0, None), "+": (1, None)}[value]
+            item = ("rep", item, *bounds)
+        items.append(item)
+    return ("seq", items), tokens
+
+
+def _ends(rules, node, text, pos):
+    """Every position where ``node`` can finish matching ``text`` from ``pos``."""
+    kind = node[0]
+    if kind == "lit":
+        return {pos + len(node[1])} if text.startswith(node[1], pos) else set()
+    if kind == "cls":
+        if pos >= len(text):
+            return set()
+        inside = any(low <= text[pos] <= high for low, high in node[2])
+        return {pos + 1} if inside != node[1] else set()
+    if kind == "ref":
+        return _ends(rules, rules[node[1]], text, pos)
+    if kind == "alt":
+        return set().union(*(_ends(rules, alt, text, pos) for alt in node[1]))
+    if kind == "seq":
+        positions = {pos}
+        for item in node[1]:
+            positions = set().union(*(_ends(rules, item, text, p) for p in positions)) if positions else set()
+        return positions
+    _, item, low, high = node
+    result, frontier, count = set(), {pos}, 0
+    while frontier and (high is None or count <= high):
+        if count >= low:
+            result |= frontier
+        if high is not None and count == high:
+            break
+        frontier = set().union(*(_ends(rules, item, text, p) for p in frontier)) - frontier
+        count += 1
+    return result
+
+
+def matches(text):
+    rules = parse_gbnf(FOLDER_STRUCTURE_GBNF)
+    return len(text) in _ends(rules, rules["root"], text, 0)
+
+
+class TestFolderGrammar:
+    def test_compiles(self):
+        assert build_grammar("gbnf") is not None
+        assert build_grammar("json_schema") is not None
+
+    @pytest.mark.parametrize("sample", [
+        {"Docs": ["a.pdf", "b \"quoted\".txt"], "Media": {"Images": ["x.jpg"], "_files_": []}},
+        {},
+    ])
+    def test_accepts_compact_and_pretty_json(self, sample):
+        assert matches(json.dumps(sample))
+        assert matches(json.dumps(sample, indent=2))
+
+    @pytest.mark.parametrize("text", [
+        '{"Docs": "a.pdf"}', # Folder values are lists or objects
+        '{"Docs": ["a.pdf"]} trailing',
+        '{' + "\n" * 100 + '}', # Unbounded whitespace would eat the output budget
+        '{"Docs":' + " " * 30 + '[]}',
+    ])
+    def test_rejects(self, text):
+        assert not matches(text)
@@ -0,0 +1,154 @@
+import json
+
+import pytest
+
+from scripts.llm_cache import LLMCache, cached_invoke, make_key, model_id_for, parse_json_response
+
+
+class FakeLLM:
+    model = "fake-1"
+
+    def __init__(self, reply="{}"):
+        self.reply = reply
+        self.calls = []
+
+    def invoke(self, prompt):
+        self.calls.append(prompt)
+        return self.reply
+
+
+class FakeTemplate:
+    def __init__(self, template):
+        self.template = template
+        self.partial_variables = {}
+
+    def format(self, **kwargs):
+        return self.template.format(**kwargs)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = LLMCache(path=str(tmp_path / "cache.sqlite3"))
+    yield c
+    c.close()
+
+
+class TestLLMCache:
+    def test_key_depends_on_model_template_and_inputs(self):
+        """Changing any part of the request changes the key."""
+        base = make_key("m", "t {x}", {"x": 1})
+        assert base == make_key("m", "t {x}", {"x": 1})
+        assert base != make_key("m2", "t {x}", {"x": 1})
+        assert base != make_key("m", "u {x}", {"x": 1})
+        assert base != make_key("m", "t {x}", {"x": 2})
+        assert base != make_key("m", "t {x}", {"x": 1}, {"max_tokens": 512})
+
+    def test_generation_settings_are_part_of_the_key(self, cache):
+        """Answers made under another output limit or grammar are not replayed."""
+        llm = FakeLLM("a")
+        llm.max_tokens, llm.grammar_id = 1024, "gbnf:old"
+        cached_invoke(llm, "p", cache=cache)
+        llm.grammar_id = "gbnf:new"
+        cached_invoke(llm, "p", cache=cache)
+        llm.max_tokens = 2048
+        cached_invoke(llm, "p", cache=cache)
+        cached_invoke(llm, "p", cache=cache)
+        assert len(llm.calls) == 3
+
+    def test_repeat_prompt_is_served_from_cache(self, cache):
+        """The second identical call does not reach the model."""
+        llm = FakeLLM('{"Docs": ["a.txt"]}')
+        prompt = FakeTemplate("Files: {files_chunk}")
+        first = cached_invoke(llm, prompt, {"files_chunk": "a.txt"}, cache=cache)
+        second = cached_invoke(llm, prompt, {"files_chunk": "a.txt"}, cache=cache)
+        assert first == second == '{"Docs": ["a.txt"]}'
+        assert llm.calls == ["Files: a.txt"]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_usage_is_reported_for_model_calls_only(self, cache):
+        """on_usage sees prompt and reply of real calls; cache hits cost no tokens."""
+        llm = FakeLLM("reply")
+        usage = []
+        for _ in range(2):
+            cached_invoke(llm, "prompt", cache=cache, on_usage=lambda *texts: usage.append(texts))
+        assert usage == [("prompt", "reply")]
+
+    def test_different_model_misses(self, cache):
+        """Responses are not shared between models."""
+        a, b = FakeLLM("a"), FakeLLM("b")
+        b.model = "fake-2"
+        assert cached_invoke(a, "same prompt", cache=cache) == "a"
+        assert cached_invoke(b, "same prompt", cache=cache) == "b"
+        assert model_id_for(a) != model_id_for(b)
+
+    def test_empty_responses_are_not_cached(self, cache):
+        """A blank reply is retried on the next call."""
+        llm = FakeLLM("  ")
+        cached_invoke(llm, "p", cache=cache)
+        cached_invoke(llm, "p", cache=cache)
+        assert len(llm.calls) == 2
+
+    def test_unparseable_responses_are_not_cached(self, cache):
+        """With a parser, only responses that parse are stored."""
+        llm = FakeLLM("not json")
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                cached_invoke(llm, "p", cache=cache, parse=json.loads)
+        assert len(llm.calls) == 2
+        llm.reply = '{"Docs": []}'
+        assert cached_invoke(llm, "p", cache=cache, parse=json.loads) == {"Docs": []}
+        assert cached_invoke(llm, "p", cache=cache, parse=json.loads) == {"Docs": []}
+        assert len(llm.calls) == 3
+
+    def test_json_response_parser(self, cache):
+        """Answers with text or code fences around the object parse; truncated ones are retried."""
+        assert parse_json_response('Sure!\n```json\n{"Docs": ["a.pdf"]}\n```') == {"Docs": ["a.pdf"]}
+        llm = FakeLLM('{"Docs": ["a.pdf"')
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                cached_invoke(llm, "p", cache=cache, parse=parse_json_response)
+        assert len(llm.calls) == 2 and cache.stats()["entries"] == 0
+
+    def test_stale_unparseable_hit_is_retried(self, cache):
+        """A cached response that no longer parses is regenerated."""
+        llm = FakeLLM('{"A": ["x"]}')
+        cache.put(make_key(model_id_for(llm), "p", {}, {}), "free text")
+        assert cached_invoke(llm, "p", cache=cache, parse=json.loads) == {"A": ["x"]}
+        assert len(llm.calls) == 1
+
+    def test_lru_eviction_by_bytes(self, tmp_path):
+        """Least recently used entries are dropped once the byte bound is exceeded."""
+        cache = LLMCache(path=str(tmp_path / "small.sqlite3"), max_bytes=300)
+        cache.put("a", "x" * 100)
+        cache.put("b", "x" * 100)
+        assert cache.get("a") is not None  # "b" is now least recently used
+        cache.put("c", "x" * 100)
+        cache.put("d", "x" * 100)
+        assert cache.get("b") is None
+        assert cache.get("d") is not None
+        assert cache.stats()["bytes"] <= 300
+        cache.close()
+
+    def test_ttl_expiry(self, tmp_path, monkeypatch):
+        """Entries older than the TTL are treated as misses."""
+        import scripts.llm_cache as llm_cache
+        now = [1000.0]
+        monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+        cache = LLMCache(path=str(tmp_path / "ttl.sqlite3"), ttl=60)
+        cache.put("k", "v")
+        now[0] += 30
+        assert cache.get("k") == "v"
+        now[0] += 60
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        """A new process sees responses stored by a previous one."""
+        path = str(tmp_path / "shared.sqlite3")
+        first = LLMCache(path=path)
+        first.put("k", "v")
+        first.close()
+        second = LLMCache(path=path)
+        assert second.get("k") == "v"
+        second.close()
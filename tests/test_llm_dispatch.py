@@ -0,0 +1,96 @@
+import threading
+import time
+
+from scripts.cancellation import CancellationToken, OperationCancelled
+from scripts.llm_dispatch import dispatch, llm_concurrency
+
+
+class TestDispatch:
+    def test_results_in_original_order(self):
+        """Results line up with the inputs regardless of completion order."""
+        items = ["a" * n for n in (1, 5, 3, 2)]
+        results = dispatch(items, lambda s: len(s), max_workers=4)
+        assert [r.index for r in results] == [0, 1, 2, 3]
+        assert [r.value for r in results] == [1, 5, 3, 2]
+
+    def test_largest_items_start_first(self):
+        """With one slot free at a time the biggest chunk is scheduled first."""
+        started = []
+        lock = threading.Lock()
+
+        def work(item):
+            with lock:
+                started.append(item)
+            time.sleep(0.01)
+            return item
+
+        items = ["xx", "xxxxxx", "x", "xxxx"]
+        dispatch(items, work, max_workers=2, weight=len)
+        assert started[0] == "xxxxxx"
+
+    def test_in_flight_is_bounded(self):
+        """Never more than max_workers calls run at once."""
+        active = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def work(item):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+        dispatch(list(range(12)), work, max_workers=3)
+        assert peak[0] <= 3
+
+    def test_errors_are_captured_per_item(self):
+        """A failing chunk does not stop the others."""
+        def work(item):
+            if item == 2:
+                raise ValueError("bad chunk")
+            return item
+
+        seen = []
+        results = dispatch([1, 2, 3], work, max_workers=2, on_result=lambda r, done: seen.append(done))
+        assert isinstance(results[1].error, ValueError)
+        assert [results[0].value, results[2].value] == [1, 3]
+        assert sorted(seen) == [1, 2, 3]
+
+    def test_cancel_returns_without_waiting(self):
+        """After a cancel, finished chunks are kept and dispatch does not wait for the slow ones."""
+        cancel = CancellationToken()
+        release = threading.Event()
+
+        def work(item):
+            if item == "slow":
+                release.wait(5)
+            return item
+
+        def on_result(result, done):
+            if result.value == "fast":
+                cancel.cancel()
+
+        started = time.monotonic()
+        results = dispatch(["slow", "fast", "x", "y"], work, max_workers=2, weight=lambda item: 0,
+                           on_result=on_result, cancel=cancel)
+        release.set()
+        assert time.monotonic() - started < 2
+        assert results[1].value == "fast"
+        assert isinstance(results[0].error, OperationCancelled)
+
+    def test_cancel_sequential(self):
+        """Sequential dispatch stops at the next item."""
+        cancel = CancellationToken()
+        results = dispatch([1, 2, 3], lambda item: cancel.cancel() or item, max_workers=1, cancel=cancel)
+        assert results[0].value == 1
+        assert all(isinstance(r.error, OperationCancelled) for r in results[1:])
+
+    def test_concurrency_setting(self, monkeypatch):
+        """Local models are serialized; remote concurrency comes from the environment."""
+        monkeypatch.setenv("ORGANIZAHH_LLM_CONCURRENCY", "8")
+        assert llm_concurrency(local_model=False) == 8
+        assert llm_concurrency(local_model=True) == 1
+        monkeypatch.setenv("ORGANIZAHH_LLM_CONCURRENCY", "junk")
+        assert llm_concurrency() == 4
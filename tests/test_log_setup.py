@@ -0,0 +1,61 @@
+import json
+import logging
+
+import pytest
+
+from scripts.log_setup import (
+    QUIET, StageCounters, begin_run, end_run, fields, get_logger, setup_logging, shutdown_logging,
+)
+
+
+@pytest.fixture
+def logging_on():
+    setup_logging(level=logging.INFO)
+    yield
+    shutdown_logging()
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestRunLog:
+    def test_run_log_gets_records_between_begin_and_end(self, tmp_path, logging_on, capsys):
+        log = get_logger("test")
+        log.info("before the run")
+        path = begin_run("organize", directory=str(tmp_path), folder="/data")
+        log.info("Move plan compiled", extra=fields(moves=3))
+        log.debug("per-file detail") # Below INFO: dropped before the queue
+        log.warning("Move Error 'a.txt'", extra=QUIET)
+        end_run(outcome="done", moved=3)
+        log.info("after the run")
+        shutdown_logging() # Drains the queue
+
+        records = read_lines(path)
+        assert [r["msg"] for r in records] == ["Started organize run", "Move plan compiled",
+                                              "Move Error 'a.txt'", "Finished run"]
+        assert records[0]["data"] == {"kind": "organize", "folder": "/data"}
+        assert records[1]["data"] == {"moves": 3}
+        assert records[-1]["data"] == {"outcome": "done", "moved": 3}
+        console = capsys.readouterr().out
+        assert "Move plan compiled (moves=3)" in console
+        assert "Move Error" not in console and "run log" not in console
+
+    def test_without_setup_runs_are_skipped(self, tmp_path):
+        shutdown_logging()
+        assert begin_run("analysis", directory=str(tmp_path)) is None
+        end_run()
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestStageCounters:
+    def test_counts_and_timers(self):
+        counters = StageCounters("organize")
+        counters.add("moved")
+        counters.add("moved", 2)
+        with counters.time("execute"):
+            pass
+        totals = counters.snapshot()
+        assert totals["moved"] == 3
+        assert totals["execute_s"] >= 0 and totals["elapsed_s"] >= totals["execute_s"]
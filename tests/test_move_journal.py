@@ -0,0 +1,114 @@
+import json
+import os
+
+from scripts.move_journal import (
+    FAILED, MOVED, RESTORED, MoveJournal, incomplete_runs, last_undoable_run, read_run, recover_run, undo_run,
+)
+from scripts.move_plan import compile_move_plan, execute_move_plan
+
+
+def make_files(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+
+def write_crashed_run(journal_dir, root, moves, done):
+    """A journal as a killed process leaves it: intents synced, first ``done`` moves performed, no commit."""
+    journal_dir.mkdir(exist_ok=True)
+    path = journal_dir / "20240101-000000-000000000-0.jsonl"
+    records = [{"op": "begin", "root": str(root), "started": 0.0, "pid": 0}]
+    for i, (src, dst) in enumerate(moves):
+        records.append({"op": "mkdir", "path": os.path.dirname(dst)})
+        records.append({"op": "move", "i": i, "src": src, "dst": dst})
+    os.makedirs(os.path.dirname(moves[0][1]), exist_ok=True)
+    records.append({"op": "created", "path": os.path.dirname(moves[0][1])})
+    for src, dst in moves[:done]:
+        os.rename(src, dst)
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + '{"op": "mov')  # Torn last line
+    return str(path)
+
+
+class TestJournaledRun:
+    def test_undo_restores_files_and_removes_folders(self, tmp_path):
+        """A committed run is undone from its journal alone, in a later "session"."""
+        root, journal_dir = tmp_path / "folder", tmp_path / "journal"
+        make_files(root, ["a.pdf", "b.jpg", "sub/c.txt", "Existing/keep.txt"])
+        plan = compile_move_plan(str(root), {"Docs": {"Work": ["a.pdf"]}, "Images": ["b.jpg"],
+                                             "Existing": ["sub/c.txt"]})
+        journal = MoveJournal.create(str(root), directory=str(journal_dir), batch_size=2)
+        result = execute_move_plan(plan, journal=journal)
+        journal.commit()
+        assert len(result.moved) == 3 and not (root / "a.pdf").exists()
+
+        run = last_undoable_run(str(root), directory=str(journal_dir))
+        assert run is not None and run.committed and len(run.moved) == 3
+        undo = undo_run(run)
+        assert undo.errors == []
+        assert sorted(os.listdir(root)) == ["Existing", "a.pdf", "b.jpg", "sub"]
+        assert (root / "sub" / "c.txt").read_text() == "sub/c.txt"
+        assert os.listdir(root / "Existing") == ["keep.txt"]  # Pre-existing folder is kept
+        undone = read_run(run.path)
+        assert undone.undone and {move.state for move in undone.moves} == {RESTORED}
+        assert last_undoable_run(str(root), directory=str(journal_dir)) is None
+
+    def test_failed_moves_are_journaled(self, tmp_path):
+        """A move that fails is recorded as failed, not left pending."""
+        root = tmp_path / "folder"
+        make_files(root, ["a.pdf"])
+        plan = compile_move_plan(str(root), {"Docs": ["a.pdf", "gone.pdf"]})
+        journal = MoveJournal.create(str(root), directory=str(tmp_path / "journal"))
+        execute_move_plan(plan, journal=journal)
+        journal.commit()
+        states = [move.state for move in read_run(journal.path).moves]
+        assert states == [MOVED, FAILED]
+
+
+class TestRecovery:
+    def moves(self, root):
+        make_files(root, ["a.txt", "b.txt", "c.txt"])
+        return [(str(root / name), str(root / "Docs" / name)) for name in ("a.txt", "b.txt", "c.txt")]
+
+    def test_incomplete_run_is_found_despite_torn_line(self, tmp_path):
+        root, journal_dir = tmp_path / "folder", tmp_path / "journal"
+        path = write_crashed_run(journal_dir, root, self.moves(root), done=2)
+        runs = incomplete_runs(str(journal_dir))
+        assert [run.path for run in runs] == [path]
+        assert len(runs[0].moves) == 3 and runs[0].moved == []
+        assert last_undoable_run(directory=str(journal_dir)) is None  # Not committed
+
+    def test_locked_run_is_still_running(self, tmp_path):
+        """An uncommitted journal that another writer holds open is not offered for recovery."""
+        root, journal_dir = tmp_path / "folder", tmp_path / "journal"
+        path = write_crashed_run(journal_dir, root, self.moves(root), done=2)
+        writer = MoveJournal.reopen(path) # Stands in for the organizing process (pid 0 is never ours)
+        assert writer.locked
+        try:
+            assert incomplete_runs(str(journal_dir)) == []
+        finally:
+            writer.close()
+        assert [run.path for run in incomplete_runs(str(journal_dir))] == [path]
+
+    def test_resume_finishes_remaining_moves(self, tmp_path):
+        root, journal_dir = tmp_path / "folder", tmp_path / "journal"
+        write_crashed_run(journal_dir, root, self.moves(root), done=2)
+        (root / "Docs" / "c.txt.organizahh-part").write_text("half")
+        run = incomplete_runs(str(journal_dir))[0]
+        progress = []
+        result = recover_run(run, resume=True, on_progress=lambda done, total: progress.append((done, total)))
+        assert result.errors == [] and len(result.moved) == 1
+        assert progress[-1] == (1, 1)
+        assert sorted(os.listdir(root / "Docs")) == ["a.txt", "b.txt", "c.txt"]
+        assert incomplete_runs(str(journal_dir)) == []
+        assert len(last_undoable_run(str(root), directory=str(journal_dir)).moved) == 3
+
+    def test_rollback_restores_original_layout(self, tmp_path):
+        root, journal_dir = tmp_path / "folder", tmp_path / "journal"
+        write_crashed_run(journal_dir, root, self.moves(root), done=2)
+        progress = []
+        result = recover_run(incomplete_runs(str(journal_dir))[0], resume=False,
+                             on_progress=lambda done, total: progress.append((done, total)))
+        assert result.errors == [] and progress[-1] == (2, 2)
+        assert sorted(os.listdir(root)) == ["a.txt", "b.txt", "c.txt"]
+        assert incomplete_runs(str(journal_dir)) == []
@@ -0,0 +1,76 @@
+import os
+
+from scripts.cancellation import CancellationToken
+from scripts.move_plan import compile_move_plan, execute_move_plan
+
+
+def make_files(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+
+class TestCompileMovePlan:
+    def test_moves_and_sorted_dirs(self, tmp_path):
+        """Moves are flattened once per file; every needed folder is listed once, parents first."""
+        root = str(tmp_path)
+        structure = {"Docs": {"Work": ["a.pdf"], "_files_": ["b.txt"]}, "Misc": ["a.pdf", "c.zip"], "_files_": ["d.md"]}
+        plan = compile_move_plan(root, structure)
+        assert plan.moves == [
+            (os.path.join(root, "a.pdf"), os.path.join(root, "Docs", "Work", "a.pdf")),
+            (os.path.join(root, "b.txt"), os.path.join(root, "Docs", "b.txt")),
+            (os.path.join(root, "c.zip"), os.path.join(root, "Misc", "c.zip")),
+        ]
+        assert plan.dirs == [os.path.join(root, "Docs"), os.path.join(root, "Docs", "Work"),
+                             os.path.join(root, "Misc")]
+        assert plan.in_place == 1
+
+    def test_unknown_files_and_sub_paths(self, tmp_path):
+        """Names outside ``files`` are skipped; a recursive file keeps its sub-path."""
+        root = str(tmp_path)
+        plan = compile_move_plan(root, {"Photos": ["trip/img.jpg", "ghost.jpg"]}, files={"trip/img.jpg"})
+        assert plan.unknown == 1
+        assert plan.moves == [(os.path.join(root, "trip", "img.jpg"),
+                               os.path.join(root, "Photos", "trip", "img.jpg"))]
+        assert plan.dirs == [os.path.join(root, "Photos"), os.path.join(root, "Photos", "trip")]
+
+
+class TestExecuteMovePlan:
+    def test_executes_and_reports_for_undo(self, tmp_path):
+        """Files end up in their folders and moves come back as (dst, src) pairs."""
+        make_files(tmp_path, ["a.pdf", "b.jpg", "sub/c.txt"])
+        plan = compile_move_plan(str(tmp_path), {"Docs": ["a.pdf", "sub/c.txt"], "Images": {"2024": ["b.jpg"]}})
+        progress = []
+        result = execute_move_plan(plan, on_progress=lambda done, total: progress.append((done, total)),
+                                   progress_every=2)
+        assert result.errors == [] and result.cross_device == 0
+        assert (tmp_path / "Docs" / "a.pdf").read_text() == "a.pdf"
+        assert (tmp_path / "Docs" / "sub" / "c.txt").exists()
+        assert (tmp_path / "Images" / "2024" / "b.jpg").exists()
+        assert not (tmp_path / "a.pdf").exists()
+        assert sorted(result.moved) == sorted((dst, src) for src, dst in plan.moves)
+        assert progress == [(2, 3), (3, 3)]
+
+    def test_errors_do_not_stop_the_run(self, tmp_path):
+        """A missing source or a folder blocked by a file is reported; other moves still happen."""
+        make_files(tmp_path, ["a.pdf", "b.jpg", "Blocked"])
+        plan = compile_move_plan(str(tmp_path), {"Docs": ["a.pdf", "gone.pdf"], "Blocked": ["b.jpg"]})
+        progress = []
+        result = execute_move_plan(plan, on_progress=lambda done, total: progress.append(done), progress_every=1)
+        assert (tmp_path / "Docs" / "a.pdf").exists()
+        assert (tmp_path / "b.jpg").exists()
+        assert len(result.moved) == 1
+        assert len(result.errors) == 3  # Blocked folder, b.jpg into it, gone.pdf
+        assert progress == [1, 2, 3]  # Failed moves count too, so the bar reaches the total
+
+    def test_cancel_keeps_a_prefix_of_moves(self, tmp_path):
+        """A cancel stops before the next move; the moves done so far are reported for undo."""
+        make_files(tmp_path, ["a.txt", "b.txt", "c.txt"])
+        plan = compile_move_plan(str(tmp_path), {"Docs": ["a.txt", "b.txt", "c.txt"]})
+        cancel = CancellationToken()
+        result = execute_move_plan(plan, on_progress=lambda done, total: cancel.cancel(), progress_every=1,
+                                   cancel=cancel)
+        assert result.cancelled and result.errors == []
+        assert result.moved == [(plan.moves[0][1], plan.moves[0][0])]
+        assert sorted(os.listdir(tmp_path)) == ["Docs", "b.txt", "c.txt"]
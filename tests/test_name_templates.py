@@ -0,0 +1,50 @@
+from scripts.name_templates import NameClusters, name_template
+
+
+class TestNameTemplate:
+    def test_placeholders(self):
+        """Digit runs, dates, UUIDs and hashes become placeholders."""
+        assert name_template("IMG_0042.jpg") == "IMG_{n}.jpg"
+        assert name_template("IMG_20240317_0042.jpg") == "IMG_{date}_{n}.jpg"
+        assert name_template("invoice_2024_03_17.pdf") == "invoice_{date}.pdf"
+        assert name_template("scan 17-03-2024.png") == "scan {date}.png"
+        assert name_template("550e8400-e29b-41d4-a716-446655440000.json") == "{uuid}.json"
+        assert name_template("export_9f86d081884c7d659a2feaa0c55ad015.csv") == "export_{hash}.csv"
+
+    def test_plain_names_unchanged(self):
+        """Names without numbers are their own template."""
+        assert name_template("report.docx") == "report.docx"
+
+
+class TestNameClusters:
+    def test_camera_dump_collapses_to_one_label(self):
+        """Thousands of numbered photos are sent as a single labelled representative."""
+        names = [f"IMG_{i:04d}.jpg" for i in range(1, 5001)] + ["notes.txt"]
+        clusters = NameClusters(names)
+        assert clusters.labels == ["IMG_0001.jpg [x5000]", "notes.txt"]
+        assert clusters.collapsed == 4999
+
+    def test_singletons_are_sent_verbatim(self):
+        """Templates with a single member are not labelled."""
+        clusters = NameClusters(["a1.txt", "b.txt"])
+        assert clusters.labels == ["a1.txt", "b.txt"]
+        assert clusters.collapsed == 0
+
+    def test_expand_structure_restores_members(self):
+        """Every member lands where the LLM put its representative."""
+        names = ["IMG_1.jpg", "IMG_2.jpg", "invoice_2024_01_01.pdf", "invoice_2024_02_01.pdf", "cv.docx"]
+        clusters = NameClusters(names)
+        structure = {
+            "Photos": ["IMG_1.jpg [x2]"],
+            "Docs": {"Invoices": ["invoice_2024_01_01.pdf"], "_files_": ["cv.docx"]},
+        }
+        expanded = clusters.expand_structure(structure)
+        assert expanded["Photos"] == ["IMG_1.jpg", "IMG_2.jpg"]
+        assert expanded["Docs"]["Invoices"] == ["invoice_2024_01_01.pdf", "invoice_2024_02_01.pdf"]
+        assert expanded["Docs"]["_files_"] == ["cv.docx"]
+
+    def test_cluster_placed_twice_is_expanded_once(self):
+        """If the LLM echoes a label in two folders the members are not duplicated."""
+        clusters = NameClusters(["x1.log", "x2.log"])
+        expanded = clusters.expand_structure({"A": ["x1.log [x2]"], "B": ["x1.log"]})
+        assert expanded == {"A": ["x1.log", "x2.log"], "B": []}
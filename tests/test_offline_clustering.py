@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from scripts.offline_clustering import build_offline_structure, cluster_names
+from scripts.structure_utils import FILES_KEY, iter_assignments
+
+
+PHOTOS = [f"IMG_{i:04d}.jpg" for i in range(1, 7)] + [f"beach_{i}.jpg" for i in range(1, 5)] + ["beach_sunset.jpg"] \
+    + [f"screenshot {2020 + i}.png" for i in range(4)] + ["logo.png", "0001.jpg"]
+
+
+class TestOfflineClustering:
+    def test_groups_by_shared_words(self):
+        """Names sharing a word land in one sub-folder named after it."""
+        groups = cluster_names(PHOTOS)
+        assert sorted(groups["Img"]) == [f"IMG_{i:04d}.jpg" for i in range(1, 7)]
+        assert {f"beach_{i}.jpg" for i in range(1, 5)} <= set(groups["Beach"])
+        assert len(groups["Screenshot"]) == 4
+        assert "0001.jpg" in groups[FILES_KEY]
+
+    def test_structure_covers_every_file_once(self):
+        """The nested structure places each input exactly once."""
+        names = PHOTOS + ["report_q1.pdf", "report_q2.pdf", "notes.txt", "setup.exe"]
+        structure = build_offline_structure(names)
+        placed = [name for name, _ in iter_assignments(structure)]
+        assert sorted(placed) == sorted(names)
+        assert isinstance(structure["Images"], dict)
+
+    def test_small_categories_stay_flat(self):
+        """Categories with only a few files are not split further."""
+        structure = build_offline_structure(["a.pdf", "b.pdf", "song.mp3"])
+        assert structure == {"Documents": ["a.pdf", "b.pdf"], "Audio": ["song.mp3"]}
+
+    def test_deterministic(self):
+        """The same input and seed always give the same structure."""
+        names = [f"{w}_{i}.txt" for w in ("alpha", "beta", "gamma", "delta") for i in range(20)]
+        assert build_offline_structure(names) == build_offline_structure(list(names))
@@ -0,0 +1,32 @@
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.synthetic_tree import generate_names
+from other_programs.parallel_model_benchmark import Provider, build_prompt, names_in_structure, openai_stream, run_model
+
+
+class TestMeasurements:
+    def test_streamed_answer_from_fake_server(self):
+        """TTFT covers latency + prefill; tokens come from the server's usage report; dropped files lower coverage."""
+        server = FakeOpenAIServer(FakeLLM(latency=0.05, token_rate=5000, drop_rate=0.2))
+        try:
+            files = generate_names(50, seed=3)
+            result = run_model(Provider("fake", openai_stream(server.start(), server.model)), build_prompt(files), files)
+        finally:
+            server.shutdown()
+        assert result["success"] and result["json_valid"]
+        assert result["ttft"] >= 0.05
+        assert result["tokens_exact"] and result["output_tokens"] > 1 and result["decode_tokens_per_s"] > 0
+        assert 0.5 < result["coverage"] < 1.0 and result["unknown_names"] == 0
+
+    def test_failed_stream_is_reported(self):
+        def stream(prompt, usage):
+            yield '{"Docs": ["a.pdf"'
+            raise ConnectionError("reset")
+
+        result = run_model(Provider("broken", stream), "prompt", ["a.pdf"])
+        assert not result["success"] and result["error"] == "reset"
+        assert not result["json_valid"] and result["coverage"] is None
+
+    def test_names_in_structure_handles_both_answer_shapes(self):
+        assert sorted(names_in_structure({"Docs": {"Work": ["a.pdf"], "Misc": "b.txt"}})) == ["Misc", "a.pdf", "b.txt"]
+        assert "c.zip" in names_in_structure({"Archives": {"Zips": {"c.zip": "archive"}}})
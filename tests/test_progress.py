@@ -0,0 +1,80 @@
+import io
+
+from scripts.progress import (
+    BYTES, DEFAULT_REFRESH_INTERVAL, ORGANIZE, SCAN, ProgressEvent, ProgressReporter, TerminalProgressLine,
+    _interval_from_env,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def reporter(interval=0.1):
+    events, clock = [], FakeClock()
+    return ProgressReporter(events.append, interval=interval, clock=clock), events, clock
+
+
+class TestProgressReporter:
+    def test_updates_are_coalesced(self):
+        """100k updates inside one interval produce no events beyond the stage start."""
+        progress, events, clock = reporter()
+        progress.start(ORGANIZE, "Moving files", total=200_000, unit="moves")
+        for done in range(1, 100_001):
+            progress.update(done=done)
+        assert len(events) == 1
+        clock.now = 0.2
+        progress.update(advance=1)
+        assert len(events) == 2 and events[-1].done == 100_001
+
+    def test_stage_end_and_flush_are_delivered(self):
+        progress, events, clock = reporter()
+        progress.start(SCAN, "Scanning")
+        progress.update(done=10)
+        assert len(events) == 1
+        progress.flush()
+        assert events[-1].done == 10
+        progress.start(ORGANIZE, "Moving files", total=3, unit="moves")
+        progress.update(done=3)
+        assert events[-1].stage == ORGANIZE and events[-1].fraction == 1.0
+
+    def test_rate_eta_and_tokens(self):
+        progress, events, clock = reporter()
+        progress.start(ORGANIZE, "Moving files", total=1000, unit="moves")
+        clock.now = 2.0
+        progress.update(done=500, tokens_in=40, tokens_out=60)
+        event = events[-1]
+        assert event.rate == 250 and event.eta == 2.0
+        assert (event.tokens_in, event.tokens_out) == (40, 60)
+        assert event.describe() == ("Moving files | 500/1,000 moves (50%) | 250 moves/s | "
+                                    "40 tokens in / 60 out | ETA 2s")
+
+
+    def test_interval_from_env(self, monkeypatch):
+        """A malformed ORGANIZAHH_PROGRESS_INTERVAL falls back to the default instead of failing at import."""
+        monkeypatch.setenv("ORGANIZAHH_PROGRESS_INTERVAL", "0.5")
+        assert _interval_from_env() == 0.5
+        monkeypatch.setenv("ORGANIZAHH_PROGRESS_INTERVAL", "fast")
+        assert _interval_from_env() == DEFAULT_REFRESH_INTERVAL
+
+
+class TestDescribe:
+    def test_bytes_and_unknown_total(self):
+        event = ProgressEvent(ORGANIZE, "Copying", done=1_500_000_000, total=3_000_000_000, unit=BYTES,
+                              rate=300e6, elapsed=5.0)
+        assert event.describe() == "Copying | 1.5 GB/3.0 GB (50%) | 300.0 MB/s"
+        assert ProgressEvent(SCAN, "Scanning", done=42).fraction is None
+
+
+class TestTerminalProgressLine:
+    def test_non_terminal_writes_one_line_per_change(self):
+        stream = io.StringIO()
+        line = TerminalProgressLine(stream)
+        for done in (1, 2, 3):
+            line(ProgressEvent(ORGANIZE, "Moving files", done=done, total=3, unit="moves"))
+        line.end()
+        assert stream.getvalue().splitlines() == ["Moving files | 1/3 moves (33%)", "Moving files | 3/3 moves (100%)"]
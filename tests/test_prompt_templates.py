@@ -0,0 +1,16 @@
+from scripts.prompt_templates import prompt_template_local, static_prefix
+
+
+class TestStaticPrefix:
+    def test_prefix_starts_every_rendered_prompt(self):
+        """The prefix is the rendered template up to the line holding the file list."""
+        prefix = static_prefix(prompt_template_local, format_instructions="Return JSON.")
+        full = prompt_template_local.format(format_instructions="Return JSON.", files_chunk='["a.txt"]')
+        assert full.startswith(prefix)
+        assert prefix.endswith("Here is the list of files to organize:\n")
+        assert "Example 2:" in prefix and "a.txt" not in prefix
+
+    def test_other_variable(self):
+        """Any template variable can mark the end of the shared prefix."""
+        template = "Rules\nUser: {question}\nFiles:\n{files_chunk}"
+        assert static_prefix(template, variable="question", files_chunk="x") == "Rules\n"
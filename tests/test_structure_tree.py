@@ -0,0 +1,61 @@
+import pytest
+
+from scripts.structure_tree import KEEP_LAST, StructureTree, count_files, merge_structures
+
+
+class TestStructureTree:
+    def test_merge_dedups_and_keeps_order(self):
+        """Files merged twice into the same folder appear once, in first-seen order."""
+        tree = StructureTree.from_structure({"Docs": ["a.pdf", "b.pdf"]})
+        tree.merge({"Docs": ["b.pdf", "c.pdf", "a.pdf"]})
+        assert tree.to_structure() == {"Docs": ["a.pdf", "b.pdf", "c.pdf"]}
+        assert len(tree) == 3
+
+    def test_conflict_policies(self):
+        """keep_first ignores a second folder for a file; keep_last moves it there."""
+        first = {"Images": ["x.jpg"]}
+        second = {"Holiday": ["x.jpg"]}
+        tree = StructureTree.from_structure(first)
+        tree.merge(second)
+        assert tree.folder_of("x.jpg") == ("Images",)
+        assert tree.conflicts == 1
+
+        tree = StructureTree.from_structure(first, policy=KEEP_LAST)
+        tree.merge(second)
+        assert tree.folder_of("x.jpg") == ("Holiday",)
+        assert tree.to_structure() == {"Images": [], "Holiday": ["x.jpg"]}
+
+        with pytest.raises(ValueError):
+            StructureTree(policy="newest")
+
+    def test_list_and_dict_for_same_folder(self):
+        """A folder given as a list in one chunk and a dict in another keeps both."""
+        tree = StructureTree.from_structure({"Work": ["notes.txt"]})
+        tree.merge({"Work": {"Reports": ["q1.pdf"]}})
+        assert tree.to_structure() == {"Work": {"Reports": ["q1.pdf"], "_files_": ["notes.txt"]}}
+        assert tree.count(("Work",)) == 2
+        assert tree.count(("Work", "Reports")) == 1
+
+    def test_counts_follow_removals(self):
+        """Cached per-folder counts stay correct as files are added and removed."""
+        tree = StructureTree.from_structure({"A": {"B": ["1", "2"], "C": ["3"]}, "_files_": ["root.txt"]})
+        assert tree.count() == 4 and tree.count(("A",)) == 3
+        assert tree.remove("2") == ("A", "B")
+        assert tree.remove("missing") is None
+        assert tree.count(("A",)) == 2 and tree.count(("A", "B")) == 1
+        assert "2" not in tree and "1" in tree
+        assert tree.count(("Nope",)) == 0
+
+    def test_empty_folders_and_single_file_values(self):
+        """Empty skeleton folders survive a merge; a bare string value is one file."""
+        merged = merge_structures({"Music": [], "Misc": {}}, {"Music": "song.mp3"})
+        assert merged == {"Music": ["song.mp3"], "Misc": []}
+        assert count_files(merged) == 1
+        assert count_files(None) == 0
+
+    def test_iter_assignments_round_trip(self):
+        """to_structure -> from_structure preserves every placement."""
+        structure = {"A": {"B": ["1"], "_files_": ["2"]}, "C": ["3", "4"]}
+        tree = StructureTree.from_structure(structure)
+        assert list(tree.iter_assignments()) == [("2", ("A",)), ("1", ("A", "B")), ("3", ("C",)), ("4", ("C",))]
+        assert StructureTree.from_structure(tree.to_structure()).to_structure() == structure
@@ -0,0 +1,43 @@
+from scripts.structure_validation import validate_structure
+
+
+class TestValidateStructure:
+    def test_unknown_duplicate_and_missing(self):
+        """Invented names are dropped, a file listed twice stays in its first folder, dropped files are filled in."""
+        files = ["a.pdf", "b.jpg", "c.mp3", "d.zip"]
+        structure = {
+            "Docs": ["a.pdf", "ghost.pdf"],
+            "Photos": {"Holiday": ["b.jpg"]},
+            "Misc": ["b.jpg", "a.pdf"],
+        }
+        clean, report = validate_structure(structure, files, categories={"c.mp3": "Audio"})
+        assert clean == {
+            "Docs": ["a.pdf"],
+            "Photos": {"Holiday": ["b.jpg"]},
+            "Audio": ["c.mp3"],
+            "Archives": ["d.zip"],
+        }
+        assert (report.total, report.placed, report.unknown, report.duplicates, report.missing) == (4, 2, 1, 2, 2)
+        assert report.unknown_examples == ("ghost.pdf",)
+        assert report.coverage == 0.5
+        assert "50.0% of 4" in report.describe()
+
+    def test_case_repair(self):
+        """A name that differs only in case from one real file is repaired, not dropped."""
+        clean, report = validate_structure({"Docs": ["REPORT.PDF"]}, ["report.pdf"])
+        assert clean == {"Docs": ["report.pdf"]}
+        assert report.repaired == 1 and report.unknown == 0
+
+    def test_ambiguous_case_is_dropped(self):
+        """When two real files fold to the same name, the guess is not trusted."""
+        clean, report = validate_structure({"Docs": ["README"]}, ["readme", "Readme"], fill_missing=False)
+        assert clean == {}
+        assert report.unknown == 1
+
+    def test_complete_structure_is_unchanged(self):
+        """A structure that already places every file once passes through as is."""
+        structure = {"Work": {"_files_": ["notes.txt"], "Reports": ["q1.pdf"]}}
+        clean, report = validate_structure(structure, ["q1.pdf", "notes.txt"])
+        assert clean == {"Work": {"Reports": ["q1.pdf"], "_files_": ["notes.txt"]}}
+        assert report.coverage == 1.0
+        assert report.describe() == "Validation: structure covered 100.0% of 2 file(s)."
@@ -0,0 +1,20 @@
+from scripts import timing
+
+
+class TestTiming:
+    def test_marks_are_recorded_in_order(self):
+        """Marks keep their labels and increase monotonically."""
+        first = timing.mark("test first")
+        second = timing.mark("test second")
+        labels = [label for label, _ in timing.marks()]
+        assert labels.index("test first") < labels.index("test second")
+        assert 0 <= first <= second
+
+    def test_report_and_printing(self, monkeypatch, capsys):
+        """Marks print only when ORGANIZAHH_TIMING=1 and appear in the report."""
+        timing.mark("quiet mark")
+        assert capsys.readouterr().out == ""
+        monkeypatch.setenv("ORGANIZAHH_TIMING", "1")
+        timing.mark("loud mark")
+        assert "[timing] loud mark:" in capsys.readouterr().out
+        assert "loud mark" in timing.report()
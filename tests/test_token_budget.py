@@ -0,0 +1,71 @@
+from scripts.token_budget import (TokenBudget, budget_for, estimate_tokens, plan_chunks,
+                                  OUTPUT_BASE_TOKENS, OUTPUT_TOKENS_PER_FILE, INPUT_TOKENS_PER_FILE)
+
+
+def count_chars(text):
+    return len(text)
+
+
+class FakeLocalLLM:
+    context_window = 4096
+    max_tokens = 1024
+
+    def tokenize(self, text):
+        return text.split("_")
+
+
+class FakeGemini:
+    model = "gemini-2.0-flash"
+    max_output_tokens = None
+
+
+class TestTokenBudget:
+    def test_estimate_counts_digits_individually(self):
+        """Digit-heavy names are not underestimated."""
+        assert estimate_tokens("20240101") == 8
+        assert estimate_tokens("report.pdf") == 3
+
+    def test_budget_uses_local_tokenizer(self):
+        """llama.cpp wrappers are measured with their own tokenizer and limits."""
+        budget = budget_for(FakeLocalLLM())
+        assert budget.count("a_b_c") == 3
+        assert (budget.context_tokens, budget.max_output_tokens) == (4096, 1024)
+
+    def test_budget_for_gemini(self):
+        """Gemini gets the estimator and its published limits."""
+        budget = budget_for(FakeGemini())
+        assert budget.count is estimate_tokens
+        assert budget.max_output_tokens == 8192
+
+    def test_chunks_respect_output_limit(self):
+        """No chunk's expected echoed output exceeds the output cap."""
+        names = [f"file_{i:05d}.txt" for i in range(2000)]
+        budget = TokenBudget(count_chars, context_tokens=1_000_000, max_output_tokens=2000)
+        chunks = plan_chunks(names, budget, safety=1.0)
+        assert [n for chunk in chunks for n in chunk] == names
+        for chunk in chunks:
+            out = sum(len(f'"{n}"') + OUTPUT_TOKENS_PER_FILE for n in chunk)
+            assert out <= 2000 - OUTPUT_BASE_TOKENS
+        assert len(chunks) > 1
+
+    def test_chunks_respect_context_with_overhead(self):
+        """Template overhead + input + output stays within the context window."""
+        names = [f"n{i}" for i in range(500)]
+        budget = TokenBudget(count_chars, context_tokens=1000, max_output_tokens=10_000)
+        chunks = plan_chunks(names, budget, prompt_overhead=300, safety=1.0)
+        for chunk in chunks:
+            per_file = sum(2 * len(f'"{n}"') + INPUT_TOKENS_PER_FILE + OUTPUT_TOKENS_PER_FILE for n in chunk)
+            assert 300 + per_file + OUTPUT_BASE_TOKENS <= 1000
+
+    def test_oversized_name_gets_own_chunk(self):
+        """A name larger than the budget is still sent, alone."""
+        budget = TokenBudget(count_chars, context_tokens=200, max_output_tokens=100)
+        chunks = plan_chunks(["a", "x" * 500, "b"], budget, safety=1.0)
+        assert ["x" * 500] in chunks
+        assert sum(len(c) for c in chunks) == 3
+
+    def test_max_files_cap(self):
+        """An explicit file cap splits chunks even when tokens would allow more."""
+        budget = TokenBudget(count_chars, context_tokens=1_000_000, max_output_tokens=1_000_000)
+        chunks = plan_chunks([str(i) for i in range(10)], budget, max_files=4)
+        assert [len(c) for c in chunks] == [4, 4, 2]
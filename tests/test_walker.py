@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from scripts.folder_snapshot import FolderSnapshot
+from scripts.walker import iter_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """root/{a.txt, d1/{b.txt, d2/{c.txt, d3/d.txt}}, .git/config, node_modules/x.js}"""
+    (tmp_path / "a.txt").write_text("a")
+    d3 = tmp_path / "d1" / "d2" / "d3"
+    d3.mkdir(parents=True)
+    (tmp_path / "d1" / "b.txt").write_text("b")
+    (tmp_path / "d1" / "d2" / "c.txt").write_text("c")
+    (d3 / "d.txt").write_text("d")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text("")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "x.js").write_text("")
+    return tmp_path
+
+
+def names(entries):
+    return sorted(entry.name for entry in entries)
+
+
+class TestIterFiles:
+    def test_recursive_walk_uses_relative_names(self, tree):
+        """All files are found with '/'-separated paths; default excludes are skipped."""
+        assert names(iter_files(str(tree), workers=4)) == ["a.txt", "d1/b.txt", "d1/d2/c.txt", "d1/d2/d3/d.txt"]
+
+    def test_non_recursive_lists_top_level(self, tree):
+        """recursive=False behaves like the old top-level listing."""
+        assert names(iter_files(str(tree), recursive=False)) == ["a.txt"]
+
+    def test_max_depth(self, tree):
+        """max_depth counts directory levels below root."""
+        assert names(iter_files(str(tree), max_depth=1)) == ["a.txt", "d1/b.txt"]
+        assert names(iter_files(str(tree), max_depth=2)) == ["a.txt", "d1/b.txt", "d1/d2/c.txt"]
+
+    def test_exclude_globs(self, tree):
+        """Exclude globs match names and relative paths."""
+        assert names(iter_files(str(tree), exclude=["d2", ".git", "node_modules"])) == ["a.txt", "d1/b.txt"]
+        assert names(iter_files(str(tree), exclude=["*.txt"])) == [".git/config", "node_modules/x.js"]
+        assert "d1/b.txt" not in names(iter_files(str(tree), exclude=["d1/b.*"]))
+
+    @pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="needs POSIX symlinks")
+    def test_symlink_loops_are_walked_once(self, tree):
+        """A symlink back to an ancestor does not cause infinite recursion."""
+        os.symlink(str(tree / "d1"), str(tree / "d1" / "d2" / "loop"))
+        found = names(iter_files(str(tree), follow_symlinks=True))
+        assert found.count("d1/b.txt") == 1
+        assert len(found) == 4
+
+    @pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt", reason="needs POSIX symlinks")
+    def test_symlinked_files_are_listed(self, tmp_path):
+        """A symlink to a file counts as a file, as os.path.isfile does; a dangling one does not."""
+        d = tmp_path / "d"
+        d.mkdir()
+        (d / "a.txt").write_text("a")
+        (tmp_path / "real.txt").write_text("real")
+        os.symlink(os.path.join("..", "real.txt"), str(d / "link.txt"))
+        os.symlink(os.path.join("..", "missing.txt"), str(d / "dangling.txt"))
+        assert names(iter_files(str(d), recursive=False)) == ["a.txt", "link.txt"]
+        assert names(iter_files(str(d))) == ["a.txt", "link.txt"]
+        assert FolderSnapshot.scan(str(d), with_stat=True).entry("link.txt").size == 4
+
+    def test_early_close_stops_workers(self, tmp_path):
+        """Breaking out of the generator does not hang."""
+        for i in range(20):
+            sub = tmp_path / f"dir{i}"
+            sub.mkdir()
+            for j in range(50):
+                (sub / f"f{j}.txt").write_text("")
+        gen = iter_files(str(tmp_path), workers=4)
+        first = [next(gen) for _ in range(5)]
+        gen.close()
+        assert len(first) == 5
+
+    def test_missing_root_raises(self, tmp_path):
+        """Errors on the root folder itself propagate."""
+        with pytest.raises(OSError):
+            list(iter_files(str(tmp_path / "missing")))
+        with pytest.raises(OSError):
+            list(iter_files(str(tmp_path / "missing"), recursive=False))
+
+    def test_recursive_snapshot(self, tree):
+        """FolderSnapshot.scan(recursive=True) collects nested files and directories."""
+        snapshot = FolderSnapshot.scan(str(tree), recursive=True)
+        assert "d1/d2/d3/d.txt" in snapshot
+        assert sorted(snapshot.dirs) == ["d1", "d1/d2", "d1/d2/d3"]